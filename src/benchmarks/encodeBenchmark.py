@@ -0,0 +1,145 @@
+"""
+Measures the encode time and size of every image the games produce with each encode profile
+
+Run from the 'src' directory:
+
+    python -m benchmarks.encodeBenchmark
+    python -m benchmarks.encodeBenchmark --profiles jpeg webp --repeat 5
+
+The images are:
+
+    avalon_board : every board each player count can show
+    avalon_mission : every mission reveal (passes, fails)
+    coup_hand : every (sorted) hand of 1 to 4 cards
+
+For each kind of image and each profile it prints the average encode time and the average/largest size,
+then what the current encode policies pick for each destination
+"""
+
+import os
+import time
+import argparse
+import itertools
+
+from games.common import utils
+from games.common import Compositor
+from games.common import ImageEncoding
+from games.avalon.board import GameBoard
+from games.coup.game import Coup
+
+AVALON_FOLDER = os.path.join("..", "resources", "avalon")
+
+def avalon_boards():
+    """
+    yields (name, image) for every board the Avalon games can show
+    """
+
+    for player_count, mission_counts in GameBoard._mission_counts.items():
+
+        board_directory = os.path.join(AVALON_FOLDER, "boards", f"{player_count}_players")
+        if not os.path.isdir(board_directory):
+            continue
+
+        mission_total = len(mission_counts)
+        for played in range(mission_total + 1):
+            for results in itertools.product(["pass", "fail"], repeat = played):
+                mission_results = list(results) + ["blank"] * (mission_total - played)
+                files = [os.path.join(board_directory, f"game_board_{player_count}_{i}_{result}.jpg") for i, result in enumerate(mission_results)]
+                yield f"board_{player_count}_{'_'.join(mission_results)}", Compositor.hstack([utils.read_image(f) for f in files])
+
+def avalon_mission_reveals():
+    """
+    yields (name, image) for every mission reveal
+    """
+
+    other_directory = os.path.join(AVALON_FOLDER, "other")
+    team_sizes = sorted(set(size for counts in GameBoard._mission_counts.values() for size in counts))
+
+    for team_size in team_sizes:
+        for fails in range(team_size + 1):
+            files = [os.path.join(other_directory, "pass.jpg")] * (team_size - fails) + [os.path.join(other_directory, "fail.jpg")] * fails
+            yield f"mission_{team_size - fails}_{fails}", Compositor.hstack([utils.read_image(f) for f in files])
+
+def coup_hands(max_hand_size = 4):
+    """
+    yields (name, image) for every sorted hand of Coup cards
+    """
+
+    cards = sorted(Coup._all_cards, key = lambda card: card.name)
+
+    for hand_size in range(1, max_hand_size + 1):
+        for hand in itertools.combinations_with_replacement(cards, hand_size):
+            yield "hand_" + "_".join(card.name for card in hand), Compositor.hstack([utils.read_image(card.card_image) for card in hand])
+
+IMAGE_KINDS = {
+    "avalon_board" : (avalon_boards, "channel"),
+    "avalon_mission" : (avalon_mission_reveals, "channel"),
+    "coup_hand" : (coup_hands, "player"),
+}
+
+def time_encode(encode, image, name, repeat):
+    """
+    returns (seconds per encode, EncodedImage) for the fastest of 'repeat' runs
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = encode(image, name)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best, encoded
+
+def summarize(times, sizes):
+    return f"{1000 * sum(times) / len(times):8.2f} ms | {sum(sizes) / len(sizes) / 1024:8.1f} KB avg | {max(sizes) / 1024:8.1f} KB max"
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "encode time and size of every image the games produce")
+    parser.add_argument("--profiles", nargs = "+", default = list(ImageEncoding.PROFILES.keys()), choices = list(ImageEncoding.PROFILES.keys()))
+    parser.add_argument("--kinds", nargs = "+", default = list(IMAGE_KINDS.keys()), choices = list(IMAGE_KINDS.keys()))
+    parser.add_argument("--repeat", type = int, default = 3, help = "encodes per image (the fastest is kept)")
+    args = parser.parse_args(argv)
+
+    for kind in args.kinds:
+
+        generate_images, destination = IMAGE_KINDS[kind]
+        images = list(generate_images())
+        pixels = sum(image.shape[0] * image.shape[1] for _, image in images) / len(images)
+
+        print(f"\n{kind}: {len(images)} images, {pixels / 1000:.1f} kilopixels avg")
+
+        for profile_name in args.profiles:
+            profile = ImageEncoding.PROFILES[profile_name]
+
+            times = []
+            sizes = []
+            try:
+                for name, image in images:
+                    elapsed, encoded = time_encode(profile.encode, image, name, args.repeat)
+                    times.append(elapsed)
+                    sizes.append(len(encoded))
+            except (KeyError, OSError, ValueError) as e:
+                print(f"    {profile_name:12} | not supported: {e}")
+                continue
+
+            print(f"    {profile_name:12} | {summarize(times, sizes)}")
+
+        policy = ImageEncoding.get_policy("default", destination)
+
+        times = []
+        sizes = []
+        picked = {}
+        for name, image in images:
+            elapsed, encoded = time_encode(policy.encode, image, name, args.repeat)
+            times.append(elapsed)
+            sizes.append(len(encoded))
+            extension = os.path.splitext(encoded.filename)[1]
+            picked[extension] = picked.get(extension, 0) + 1
+
+        print(f"    {'policy':12} | {summarize(times, sizes)} | '{destination}' budget {policy.byte_budget} bytes, picked {picked}")
+
+if __name__ == "__main__":
+    main()
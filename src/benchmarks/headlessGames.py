@@ -0,0 +1,318 @@
+import random
+import asyncio
+import inspect
+
+import games.avalon.game
+import games.coup.game
+import games.rockpaperscissors.game
+import games.common.GameClasses
+import games.common.GameExceptions
+import messageBatcher
+
+class FakeUser:
+    """
+    Stands in for a discord.Member/discord.User when running a game without discord
+
+    The games only ever call str() on the author context (and store it as the destination of messages), so this is all that's needed
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeChannel(FakeUser):
+    """
+    Stands in for the game's discord.TextChannel when running a game without discord
+    """
+    pass
+
+def collect_results(result):
+    """
+    returns everything a generator/async generator command result yields as one list (other results are returned as is)
+    
+    The GameRunner sends each yielded item as it comes, here they just need to be counted
+    """
+
+    if inspect.isgenerator(result):
+        return list(result)
+
+    if inspect.isasyncgen(result):
+        async def collect():
+            return [item async for item in result]
+        return asyncio.get_event_loop().run_until_complete(collect())
+
+    return result
+
+def split_command_result(result):
+    """
+    separates the prompts and interrupts from the messages in a command result (the same way the GameRunner does)
+
+    :return (Tuple[List[CommandResultPrompt], List[CommandResultInterrupt], messages]):
+    """
+
+    if not messageBatcher.is_streamed_result(result):
+        return messageBatcher.split_command_result(result)
+
+    prompts = []
+    interrupts = []
+    messages = []
+    for item in collect_results(result):
+        item_prompts, item_interrupts, item_messages = messageBatcher.split_command_result(item)
+        prompts += item_prompts
+        interrupts += item_interrupts
+        messages.append(item_messages)
+
+    return prompts, interrupts, messages
+
+class HeadlessGame:
+    """
+    Runs a DiscordGame without a bot. Commands are called directly and every prompt/interrupt is answered at random by the fake players
+
+    contructors:
+
+    __init__(self, GameClass : type, player_count : int, rng : random.Random, interrupt_chance : float, retries : int)
+
+        GameClass (type) : The DiscordGame to run
+
+        player_count (int) : How many fake players join the game
+
+        rng (random.Random) : The random number generator used to answer prompts (so runs can be repeated)
+
+        interrupt_chance (float) : The chance a player responds to an interrupt instead of everyone passing
+
+        retries (int) : How many times a prompt is answered again if the answer was an illegal move
+
+    instance methods:
+
+    .command_steps(self, user : FakeUser, command_name : str, *args) -> Generator
+
+        runs a command as 'user' and answers every prompt/interrupt it leads to, yielding after each step
+
+    .command(self, user : FakeUser, command_name : str, *args)
+
+        runs all the steps of .command_steps at once
+
+    instance fields:
+
+    game (DiscordGame) : The game being run
+
+    users (List[FakeUser]) : The fake discord users (one per player)
+
+    channel (FakeChannel) : The fake game channel
+
+    command_count (int) : How many commands and prompt/interrupt follow ups have been run
+
+    message_count (int) : How many messages would have been sent to discord
+
+    illegal_move_count (int) : How many commands or prompt answers were illegal moves
+    """
+
+    def __init__(self, GameClass, player_count, rng = None, interrupt_chance = 0.3, retries = 10):
+
+        if rng is None:
+            rng = random.Random()
+
+        self.rng = rng
+        self.interrupt_chance = interrupt_chance
+        self.retries = retries
+
+        self.game = GameClass(False)
+        self.users = [FakeUser(f"user{i}") for i in range(player_count)]
+        self.channel = FakeChannel("game-channel")
+
+        self.command_count = 0
+        self.message_count = 0
+        self.illegal_move_count = 0
+
+    def answer_prompt(self, prompt):
+        return (prompt.key, set(self.rng.sample(list(prompt.emojis), prompt.count)))
+
+    def answer_interrupt(self, interrupt):
+        responses = {player.name : set() for player in interrupt.players}
+
+        if len(interrupt.players) and len(interrupt.emojis) and self.rng.random() < self.interrupt_chance:
+            player = self.rng.choice(interrupt.players)
+            responses[player.name].add(self.rng.choice(interrupt.emojis))
+
+        return responses
+
+    def answer(self, prompts, interrupts):
+        """
+        returns the name of the follow up function and the answers to pass to it
+        """
+
+        if len(prompts) != 0 and len(interrupts) != 0:
+            raise games.common.GameExceptions.DiscordGameError("Command returned CommandResultPrompts and CommandResultInterrupt. Only one or the other is allowed.")
+
+        if len(prompts) != 0:
+            return prompts[0].func_name, dict(self.answer_prompt(prompt) for prompt in prompts)
+
+        if len(interrupts) == 1:
+            return interrupts[0].func_name, self.answer_interrupt(interrupts[0])
+
+        raise games.common.GameExceptions.DiscordGameError("Command returned multiple CommandResultInterrupts. Only one is allowed.")
+
+    def record_messages(self, messages):
+        for _ in messageBatcher.flatten_command_results(messages, expand_live_boards = True):
+            self.message_count += 1
+
+    def command_steps(self, user, command_name, *args):
+        """
+        runs a command as 'user' and answers every prompt/interrupt it leads to, yielding after the command and after each follow up
+
+        a whole game can be a single command followed by a chain of prompts, so this lets each step be run (and measured) on its own
+        """
+
+        self.command_count += 1
+        result = self.game.__getattribute__(command_name)(*args, DiscordAuthorContext = user, DiscordChannelContext = self.channel)
+        prompts, interrupts, messages = split_command_result(result)
+        self.record_messages(messages)
+        yield
+
+        while len(prompts) != 0 or len(interrupts) != 0:
+
+            #a random answer can be an illegal move (ex. targeting a player who's out), so just answer again like a player would
+            for attempt in range(self.retries + 1):
+                func_name, answers = self.answer(prompts, interrupts)
+
+                try:
+                    self.command_count += 1
+                    result = self.game.__getattribute__(func_name)(answers)
+                    break
+                except games.common.GameExceptions.DiscordGameIllegalMove:
+                    self.illegal_move_count += 1
+                    if attempt == self.retries:
+                        raise
+
+            prompts, interrupts, messages = split_command_result(result)
+            self.record_messages(messages)
+            yield
+
+    def command(self, user, command_name, *args):
+        for _ in self.command_steps(user, command_name, *args):
+            pass
+
+    def try_command_steps(self, user, command_name, *args):
+        """
+        the same as .command_steps, but counts and ignores illegal moves instead of raising them
+        """
+
+        try:
+            yield from self.command_steps(user, command_name, *args)
+        except games.common.GameExceptions.DiscordGameIllegalMove:
+            self.illegal_move_count += 1
+
+    def close(self):
+        self.game.kill_game()
+
+##################
+#Game Simulations#
+##################
+
+#Each simulation is a generator that yields after each command (or prompt/interrupt follow up),
+#so many games can be interleaved in a single process like a bot hosting many concurrent games
+
+def simulate_rock_paper_scissors(headless, rounds = 3, max_commands = 100):
+
+    for i, user in enumerate(headless.users[:2]):
+        yield from headless.command_steps(user, "join", f"player{i}")
+
+    for _ in range(rounds):
+        yield from headless.command_steps(headless.users[0], "play")
+
+        yield from headless.command_steps(headless.users[0], "reset")
+
+def simulate_coup(headless, rounds = 1, max_commands = 500):
+
+    for i, user in enumerate(headless.users):
+        yield from headless.command_steps(user, "join", f"player{i}")
+
+    for _ in range(rounds):
+
+        yield from headless.command_steps(headless.users[0], "start")
+
+        commands = 0
+        while headless.game.state != "game_end" and commands < max_commands:
+            commands += 1
+
+            #everything is normally driven by prompts, this only happens if a prompt chain ended with an illegal move
+            if headless.game.state in ["challenge", "reaction", "reaction_challenge"]:
+                yield from headless.try_command_steps(headless.users[0], "next")
+            elif headless.game.state == "action":
+                current_player = headless.game.find_current_player()
+                yield from headless.try_command_steps(current_player.discord_channel, "action", "income")
+            else:
+                raise games.common.GameExceptions.DiscordGameError(f"Headless Coup got stuck in state: {headless.game.state}")
+
+        yield from headless.command_steps(headless.users[0], "restart")
+
+def simulate_avalon(headless, rounds = 1, max_commands = 500):
+
+    for i, user in enumerate(headless.users):
+        yield from headless.command_steps(user, "join", f"player{i}")
+
+    for _ in range(rounds):
+
+        commands = 0
+        while headless.game.state != "game_end" and commands < max_commands:
+            commands += 1
+            yield from headless.try_command_steps(headless.users[0], "next")
+
+        yield from headless.command_steps(headless.users[0], "restart")
+
+SIMULATIONS = {
+    "RockPaperScissors" : (games.rockpaperscissors.game.RockPaperScissors, simulate_rock_paper_scissors, 2),
+    "Coup" : (games.coup.game.Coup, simulate_coup, 4),
+    "Avalon" : (games.avalon.game.Avalon, simulate_avalon, 7),
+}
+
+def run_concurrent_games(game_name, game_count, player_count = None, seed = 0, rounds = 1, on_step = None, keep_games = False):
+    """
+    runs 'game_count' headless games of 'game_name' interleaved one command at a time
+
+    :param game_name (str): A key in SIMULATIONS
+    :param game_count (int): How many games to run at once
+    :param player_count (int): How many players in each game (defaults to the value in SIMULATIONS)
+    :param seed (int): Seed for the random answers to prompts
+    :param rounds (int): How many games each simulated "table" plays
+    :param on_step (function): called with (headless, step) around each command. step is a generator
+                               that has to be advanced with next() exactly once (lets a benchmark measure each command)
+    :param keep_games (bool): Set to True to return the games without closing them (the caller needs to call .close on each)
+
+    :return (List[HeadlessGame]): the games that were run
+    """
+
+    GameClass, simulation, default_player_count = SIMULATIONS[game_name]
+
+    if player_count is None:
+        player_count = default_player_count
+
+    rng = random.Random(seed)
+
+    headless_games = [HeadlessGame(GameClass, player_count, random.Random(rng.random())) for _ in range(game_count)]
+    running = [(headless, simulation(headless, rounds)) for headless in headless_games]
+
+    try:
+        while len(running):
+            still_running = []
+            for headless, steps in running:
+                try:
+                    if on_step is None:
+                        next(steps)
+                    else:
+                        on_step(headless, steps)
+                    still_running.append((headless, steps))
+                except StopIteration:
+                    pass
+            running = still_running
+    finally:
+        if not keep_games:
+            for headless in headless_games:
+                headless.close()
+
+    return headless_games
@@ -0,0 +1,715 @@
+"""
+Capacity benchmark: runs the real bot against the mock Discord server (mockDiscord) with simulated players
+
+Every table is its own guild with a "games" channel and a few simulated players. One player starts a game with
+'gamebot: game <Game> <prefix>', they all join, and from then on they type game commands (SCRIPTS) and answer the bot's
+prompts and interrupts by clicking reactions, each after a human-like think time. When a game ends they start another one.
+
+The bot runs in its own process (with a game process per table, like in production, or the games spread over "--workers" worker
+processes) and is measured from the outside:
+
+    command latency : from a player's command to the first reply from the bot (in the channel or a DM)
+    reaction latency : from a player's reaction to the bot updating that message
+    API calls : every REST call the bot made to the mock server (and how many got a 429)
+    CPU : the CPU time of the bot and all its game processes, giving the cores used and the games per core
+    memory : the RSS of the bot and of each game process (each worker with "--workers")
+
+Measuring starts after the warm up, once a game has been played to the end. If none finishes ("--first-game-timeout")
+the run fails instead of reporting numbers for games that don't get anywhere.
+
+Run from the 'src' directory (the bot's settings are made for the run, "resources/settings.json" isn't used):
+
+    python -m benchmarks.loadTest Coup --tables 20 --duration 300
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import signal
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import collections
+
+import aiohttp
+
+from games.common import GameClasses
+from mockDiscord.server import MockDiscord
+
+#the prefix of the host bot's commands (discordBot.COMMAND_PREFIX, it can't be imported without starting the bot)
+BOT_PREFIX = "gamebot: "
+
+SRC_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#if nothing happens at a table for this long the game is started over
+STALL_SECONDS = 90
+
+#how long a player waits for the bot to react to their reaction before deciding the prompt wasn't for them
+REACTION_SETTLE_SECONDS = 10
+
+#how long a player waits for a reply to a command that has to go through (joining a game) and how many times they try
+REPLY_TIMEOUT = 15
+REPLY_ATTEMPTS = 5
+
+PAGE_EMOJIS = {GameClasses.PREVIOUS_PAGE_EMOJI, GameClasses.NEXT_PAGE_EMOJI}
+
+class GameScript:
+    """
+    What the simulated players type for a game
+
+    contructors:
+
+    __init__(self, players : int, start : List[str], turn : List[Tuple[int, str]], end_pattern : str, restart : List[str])
+
+        players (int) : How many players sit at each table
+
+        start (List[str]) : The commands that start a game once everyone joined
+
+        turn (List[Tuple[int, str]]) : (weight, command) a random player types when no prompt is open. "{target}" is replaced with another player's name
+
+        end_pattern (str) : A regex that's in one of the bot's messages when a game is over
+
+        restart (List[str]) : The commands that start the next game
+    """
+
+    def __init__(self, players, start, turn, end_pattern, restart):
+        self.players = players
+        self.start = start
+        self.turn = turn
+        self.end_pattern = re.compile(end_pattern)
+        self.restart = restart
+
+    def choose_turn(self, rng):
+        if len(self.turn) == 0:
+            return None
+        weights, commands = zip(*self.turn)
+        return rng.choices(commands, weights)[0]
+
+SCRIPTS = {
+    #the whole round is the two DM prompts 'play' sends
+    "RockPaperScissors" : GameScript(2, ["play"], [], r"go back to player select", ["reset", "play"]),
+    #only the current player's action goes through, everyone else's is an illegal move like a real table
+    "Coup" : GameScript(4, ["start"],
+                        [(6, "action income"), (2, "action foreign_aid"), (2, "action tax"), (1, "action steal {target}"),
+                         (1, "action assassinate {target}"), (2, "action coup {target}"), (1, "challenge"), (1, "next")],
+                        r"Game Over!", ["restart", "start"]),
+    #everything after 'next' is prompts
+    "Avalon" : GameScript(7, ["next"], [(1, "next")], r"Team (Good|Evil) [Ww]ins", ["next", "next"]),
+}
+
+####################
+#Process Accounting#
+####################
+
+def get_process_tree(root_pid):
+    """
+    returns the pids of a process and all its descendants (read from /proc)
+    """
+
+    children = collections.defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as stat_file:
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        children[int(fields[1])].append(int(entry))
+
+    pids = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+
+    return pids
+
+def get_process_stats(pid):
+    """
+    returns (CPU seconds, RSS bytes) of a process (None if it's gone)
+    """
+
+    try:
+        with open(f"/proc/{pid}/stat", "r") as stat_file:
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", "r") as statm_file:
+            rss = int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return None
+
+    #utime and stime are fields 14 and 15 of stat (counted from the state field after the name here)
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu_seconds, rss
+
+def get_tree_stats(root_pid):
+    """
+    returns {pid : (CPU seconds, RSS bytes)} for a process and all its descendants
+    """
+
+    stats = {}
+    for pid in get_process_tree(root_pid):
+        pid_stats = get_process_stats(pid)
+        if pid_stats is not None:
+            stats[pid] = pid_stats
+    return stats
+
+def percentile(values, q):
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+#########
+#Players#
+#########
+
+class Table:
+    """
+    One guild, its game channel and the simulated players at it
+
+    instance fields:
+
+    channel_id (str) : The game channel
+
+    prefix (str) : The prefix of the table's game
+
+    players (List[Tuple[dict, str]]) : (mock user, name in the game) of each player
+
+    open_prompts (Set[str]) : The ids of the prompts/interrupts the players are answering
+
+    pending_commands (deque) : The send times of the commands the bot hasn't replied to yet
+    """
+
+    def __init__(self, index, server, script, rng):
+        self.index = index
+        self.script = script
+        self.rng = rng
+
+        guild = server.state.add_guild(f"load-test-{index}", ["games"])
+        self.guild_id = guild["id"]
+        self.channel_id = guild["channels"][0]["id"]
+        self.prefix = f"g{index}."
+
+        self.players = [(server.state.add_user(f"table{index}_player{i}", [self.guild_id]), f"p{i}") for i in range(script.players)]
+
+        self.started = asyncio.Event()
+        self.replied = asyncio.Event()
+        self.game_over = False
+        self.last_activity = time.monotonic()
+
+        self.open_prompts = set()
+        self.pending_commands = collections.deque()
+
+        self.commands_sent = 0
+        self.games_completed = 0
+        self.stalls = 0
+
+class LoadTest:
+    """
+    Runs the benchmark (see above)
+
+    contructors:
+
+    __init__(self, game : str, args : argparse.Namespace)
+
+    instance methods:
+
+    async .run(self) -> dict
+
+        runs the bot against the simulated tables for 'args.duration' seconds and returns the report
+    """
+
+    def __init__(self, game, args):
+        self.game = game
+        self.args = args
+        self.script = SCRIPTS[game]
+        self.rng = random.Random(args.seed)
+
+        rate_limit_scale = None if args.no_rate_limits else args.rate_limit_scale
+        self.server = MockDiscord(args.rest_latency, args.gateway_latency, args.jitter, rate_limit_scale, shard_count = args.shards)
+        self.server.add_listener(self.on_event)
+
+        self.tables = [Table(i, self.server, self.script, random.Random(self.rng.random())) for i in range(args.tables)]
+        self.tables_by_channel = {table.channel_id : table for table in self.tables}
+        self.tables_by_user = {user["id"] : table for table in self.tables for user, _ in table.players}
+
+        #{message id : [emojis the bot reacted with]} of the messages that might be prompts
+        self.prompts = {}
+        #{message id : asyncio.Event set when the bot edits the message}
+        self.message_updates = {}
+        #{message id : time the last reaction was made}
+        self.reaction_times = {}
+
+        self.command_latencies = []
+        self.reaction_latencies = []
+        self.unanswered_commands = 0
+
+        self.stopping = False
+        self.bot_process = None
+
+    def think(self):
+        """
+        sleeps for a human-like think time (log-normal around args.think seconds)
+        """
+
+        if self.args.think <= 0:
+            return asyncio.sleep(0)
+        return asyncio.sleep(self.rng.lognormvariate(math.log(self.args.think), 0.5))
+
+    ############
+    #Bot Events#
+    ############
+
+    def on_event(self, event, data):
+        #the players see the events as late as the bot does
+        delay = self.server.get_delay(self.server.gateway_latency)
+        asyncio.get_event_loop().call_later(delay, self.handle_event, event, data)
+
+    def get_table(self, channel_id):
+        table = self.tables_by_channel.get(channel_id)
+        if table is None:
+            recipient = self.server.state.get_dm_recipient(self.server.state.channels.get(channel_id, {"type" : None}))
+            if recipient is not None:
+                table = self.tables_by_user.get(recipient["id"])
+        return table
+
+    def handle_event(self, event, data):
+        bot_id = self.server.state.bot_user["id"]
+
+        if event == "MESSAGE_CREATE" and data["author"]["id"] == bot_id:
+            table = self.get_table(data["channel_id"])
+            if table is None:
+                return
+
+            table.last_activity = time.monotonic()
+            table.replied.set()
+
+            now = time.perf_counter()
+            while table.pending_commands and now - table.pending_commands[0] > STALL_SECONDS:
+                table.pending_commands.popleft()
+                self.unanswered_commands += 1
+            if table.pending_commands:
+                self.command_latencies.append(now - table.pending_commands.popleft())
+
+            text = " ".join([data["content"]] + [f"{embed.get('title', '')} {embed.get('description', '')}" for embed in data["embeds"]])
+            if data["channel_id"] == table.channel_id:
+                if f"{self.game} game started" in text:
+                    table.started.set()
+                if table.script.end_pattern.search(text):
+                    table.game_over = True
+
+        elif event == "MESSAGE_UPDATE" and data["author"]["id"] == bot_id:
+            message_id = data["id"]
+
+            sent = self.reaction_times.pop(message_id, None)
+            if sent is not None:
+                self.reaction_latencies.append(time.perf_counter() - sent)
+
+            updated = self.message_updates.get(message_id)
+            if updated is not None:
+                updated.set()
+
+            table = self.get_table(data["channel_id"])
+            if table is not None:
+                table.last_activity = time.monotonic()
+
+        elif event == "MESSAGE_REACTION_ADD" and data["user_id"] == bot_id:
+            table = self.get_table(data["channel_id"])
+            if table is None:
+                return
+
+            message_id = data["message_id"]
+            #answer once the bot has had time to add all the reactions
+            if message_id not in self.prompts:
+                self.prompts[message_id] = []
+                asyncio.ensure_future(self.answer_prompt(table, data["channel_id"], message_id))
+            self.prompts[message_id].append(data["emoji"]["name"])
+
+    ################
+    #Player Actions#
+    ################
+
+    def send_command(self, table, user, command):
+        table.commands_sent += 1
+        table.pending_commands.append(time.perf_counter())
+        self.server.user_send_message(user["id"], table.channel_id, command)
+
+    def get_description(self, channel_id, message_id):
+        message = self.server.state.get_message(channel_id, message_id)
+        if message is None or len(message["embeds"]) == 0:
+            return None
+        return message["embeds"][0].get("description") or ""
+
+    async def react(self, user, channel_id, message_id, emoji):
+        """
+        reacts to a message and returns whether the bot updated the message because of it
+        """
+
+        updated = self.message_updates.setdefault(message_id, asyncio.Event())
+        updated.clear()
+
+        self.reaction_times[message_id] = time.perf_counter()
+        if self.server.user_add_reaction(user["id"], channel_id, message_id, emoji) is None:
+            self.reaction_times.pop(message_id, None)
+            return False
+
+        try:
+            await asyncio.wait_for(updated.wait(), REACTION_SETTLE_SECONDS)
+            return True
+        except asyncio.TimeoutError:
+            self.reaction_times.pop(message_id, None)
+            return False
+
+    async def answer_prompt(self, table, channel_id, message_id):
+        """
+        answers a prompt/interrupt like a player would
+
+        The players can't see who a prompt in the game channel is for, so they take turns reacting until one of them gets an update
+        """
+
+        table.open_prompts.add(message_id)
+
+        try:
+            await self.think()
+
+            emojis = self.prompts.get(message_id, [])
+            if set(emojis) <= PAGE_EMOJIS:
+                return
+
+            is_interrupt = GameClasses.END_EMOJI in emojis
+            choices = [emoji for emoji in emojis if emoji != GameClasses.END_EMOJI]
+
+            recipient = self.server.state.get_dm_recipient(self.server.state.channels[channel_id])
+            if recipient is not None:
+                candidates = [recipient]
+            else:
+                candidates = [user for user, _ in table.players]
+                table.rng.shuffle(candidates)
+
+            for user in candidates:
+                tried = set()
+                interrupted = False
+
+                while not self.stopping:
+                    if is_interrupt:
+                        if interrupted or len(choices) == 0 or table.rng.random() >= self.args.interrupt_chance:
+                            emoji = GameClasses.END_EMOJI
+                        else:
+                            emoji = table.rng.choice(choices)
+                            interrupted = True
+                    else:
+                        options = [emoji for emoji in choices if emoji not in tried]
+                        if len(options) == 0:
+                            break
+                        emoji = table.rng.choice(options)
+
+                    tried.add(emoji)
+
+                    if not await self.react(user, channel_id, message_id, emoji):
+                        #the prompt isn't for this player
+                        break
+
+                    description = self.get_description(channel_id, message_id)
+                    if description is None or description.startswith("Timed out!"):
+                        return
+                    if is_interrupt and emoji == GameClasses.END_EMOJI:
+                        return
+                    if not is_interrupt and not description.startswith("Current selection"):
+                        return
+
+                    await self.think()
+
+        finally:
+            table.open_prompts.discard(message_id)
+            self.prompts.pop(message_id, None)
+            self.message_updates.pop(message_id, None)
+
+    async def command_until_reply(self, table, user, command):
+        """
+        sends a command until the bot replies to it (the game's process might not be connected yet)
+        """
+
+        for _ in range(REPLY_ATTEMPTS):
+            table.replied.clear()
+            self.send_command(table, user, command)
+            try:
+                await asyncio.wait_for(table.replied.wait(), REPLY_TIMEOUT)
+                return True
+            except asyncio.TimeoutError:
+                #it was never going to be answered, so don't count it as a slow reply
+                if table.pending_commands:
+                    table.pending_commands.pop()
+
+        return False
+
+    async def run_commands(self, table, commands):
+        for command in commands:
+            await self.think()
+            user, _ = table.rng.choice(table.players)
+            self.send_command(table, user, table.prefix + command)
+
+    async def run_table(self, table):
+        owner, _ = table.players[0]
+
+        self.send_command(table, owner, f"{BOT_PREFIX}game {self.game} {table.prefix} {not self.args.no_images}")
+        await asyncio.wait_for(table.started.wait(), 60)
+
+        for user, name in table.players:
+            await self.think()
+            await self.command_until_reply(table, user, f"{table.prefix}join {name}")
+
+        await self.run_commands(table, self.script.start)
+
+        while not self.stopping:
+            await self.think()
+
+            if len(table.open_prompts):
+                continue
+
+            if table.game_over:
+                table.game_over = False
+                table.games_completed += 1
+                await self.run_commands(table, self.script.restart)
+                continue
+
+            if time.monotonic() - table.last_activity > STALL_SECONDS:
+                table.stalls += 1
+                table.last_activity = time.monotonic()
+                await self.run_commands(table, self.script.restart)
+                continue
+
+            command = self.script.choose_turn(table.rng)
+            if command is not None:
+                user, name = table.rng.choice(table.players)
+                targets = [other for _, other in table.players if other != name]
+                self.send_command(table, user, table.prefix + command.format(target = table.rng.choice(targets)))
+
+    #########
+    #The Bot#
+    #########
+
+    def start_bot(self):
+        settings = {}
+        if self.args.base_settings is not None:
+            with open(self.args.base_settings, "r") as settings_file:
+                settings = json.load(settings_file)
+
+        settings.update({"TOKEN" : "load-test", "DISCORD_API" : self.server.get_api_url(), "LOGGING" : {}, "METRICS" : {"Host" : "127.0.0.1", "Port" : self.args.metrics_port}})
+        if self.args.shards > 1:
+            settings["SHARDING"] = {"Enabled" : True, "ShardCount" : self.args.shards}
+        if self.args.workers is not None:
+            settings["WORKERS"] = {"Enabled" : True, "MaxWorkers" : self.args.workers, "GamesPerWorker" : math.ceil(len(self.tables) / self.args.workers)}
+
+        self.settings_file = tempfile.NamedTemporaryFile("w", suffix = ".json", delete = False)
+        json.dump(settings, self.settings_file)
+        self.settings_file.close()
+
+        env = dict(os.environ, GAMEBOT_SETTINGS = self.settings_file.name)
+        #its own session so the bot and every game it started can be stopped together
+        self.bot_process = subprocess.Popen([sys.executable, "discordBot.py"], cwd = SRC_FOLDER, env = env, start_new_session = True,
+                                            stdout = None if self.args.bot_output else subprocess.DEVNULL)
+
+    def stop_bot(self):
+        if self.bot_process is None:
+            return
+
+        try:
+            os.killpg(self.bot_process.pid, signal.SIGTERM)
+            self.bot_process.wait(5)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.bot_process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        os.remove(self.settings_file.name)
+
+    async def wait_for_bot(self, timeout = 60):
+        start = time.monotonic()
+        #a sharded bot has a session for each shard (commands in a guild on a shard that isn't connected yet are lost)
+        while sum(session.identified for session in self.server.sessions) < self.args.shards:
+            if self.bot_process.poll() is not None:
+                raise RuntimeError(f"The bot exited with code {self.bot_process.returncode} before connecting")
+            if time.monotonic() - start > timeout:
+                raise RuntimeError(f"The bot didn't connect within {timeout} seconds")
+            await asyncio.sleep(0.2)
+
+    async def wait_for_first_game(self, tasks, timeout):
+        #the capacity numbers of a bot whose games never get to the end (ex. the players' reactions don't reach them) mean nothing
+        start = time.monotonic()
+        while sum(table.games_completed for table in self.tables) == 0:
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    raise task.exception()
+            if time.monotonic() - start > timeout:
+                raise RuntimeError(f"No game finished within {timeout} seconds of the warm up (--first-game-timeout), the players' commands or reactions aren't reaching the games")
+            await asyncio.sleep(1)
+
+    async def scrape_metrics(self):
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{self.args.metrics_port}/metrics") as response:
+                    return await response.text()
+        except aiohttp.ClientError:
+            return None
+
+    async def run(self):
+        args = self.args
+
+        await self.server.start(args.host, args.port)
+        self.start_bot()
+
+        try:
+            await self.wait_for_bot()
+
+            tasks = []
+            for table in self.tables:
+                tasks.append(asyncio.ensure_future(self.run_table(table)))
+                await asyncio.sleep(args.ramp)
+
+            #measure the steady state, not the start up
+            await asyncio.sleep(args.warmup)
+            await self.wait_for_first_game(tasks, args.first_game_timeout)
+            self.command_latencies.clear()
+            self.reaction_latencies.clear()
+            start_requests = self.server.stats["requests"]
+            start_rate_limited = self.server.stats["rate_limited"]
+            start_upload_bytes = self.server.stats["upload_bytes"]
+            start_completed = sum(table.games_completed for table in self.tables)
+            start_cpu = get_tree_stats(self.bot_process.pid)
+            start_time = time.monotonic()
+
+            peak_rss = 0
+            while time.monotonic() - start_time < args.duration:
+                await asyncio.sleep(min(5, args.duration))
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        raise task.exception()
+                peak_rss = max(peak_rss, sum(rss for _, rss in get_tree_stats(self.bot_process.pid).values()))
+
+            end_time = time.monotonic()
+            end_cpu = get_tree_stats(self.bot_process.pid)
+
+            self.stopping = True
+            metrics_text = await self.scrape_metrics()
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions = True)
+
+        finally:
+            self.stop_bot()
+            await self.server.stop()
+
+        if args.metrics_out is not None and metrics_text is not None:
+            with open(args.metrics_out, "w") as metrics_file:
+                metrics_file.write(metrics_text)
+
+        return self.make_report(start_cpu, end_cpu, end_time - start_time, peak_rss, self.server.stats["requests"] - start_requests,
+                                self.server.stats["rate_limited"] - start_rate_limited, self.server.stats["upload_bytes"] - start_upload_bytes,
+                                sum(table.games_completed for table in self.tables) - start_completed)
+
+    def make_report(self, start_cpu, end_cpu, seconds, peak_rss, requests, rate_limited, upload_bytes, completed):
+        tables = len(self.tables)
+        host_pid = self.bot_process.pid
+
+        #processes that died during the run lose their CPU time, the ones that started count from 0
+        cpu_seconds = sum(cpu - start_cpu.get(pid, (0, 0))[0] for pid, (cpu, _) in end_cpu.items())
+        cores = cpu_seconds / seconds if seconds else 0.0
+        game_rss = [rss for pid, (_, rss) in end_cpu.items() if pid != host_pid]
+
+        return {
+            "game" : self.game,
+            "tables" : tables,
+            "players_per_table" : self.script.players,
+            "seconds" : round(seconds, 1),
+            "games_completed" : completed,
+            "commands_sent" : sum(table.commands_sent for table in self.tables),
+            "unanswered_commands" : self.unanswered_commands,
+            "stalls" : sum(table.stalls for table in self.tables),
+            "command_latency_p50" : percentile(self.command_latencies, 0.5),
+            "command_latency_p99" : percentile(self.command_latencies, 0.99),
+            "reaction_latency_p50" : percentile(self.reaction_latencies, 0.5),
+            "reaction_latency_p99" : percentile(self.reaction_latencies, 0.99),
+            "api_calls" : requests,
+            "api_calls_per_game_minute" : requests / tables / (seconds / 60) if seconds else 0.0,
+            "api_calls_per_completed_game" : requests / completed if completed else None,
+            "rate_limited" : rate_limited,
+            "upload_bytes" : upload_bytes,
+            "cpu_seconds" : round(cpu_seconds, 2),
+            "cores_used" : round(cores, 3),
+            "games_per_core" : tables / cores if cores else None,
+            "host_rss" : end_cpu.get(host_pid, (0, 0))[1],
+            "game_rss_mean" : sum(game_rss) / len(game_rss) if game_rss else 0,
+            "game_rss_max" : max(game_rss, default = 0),
+            "peak_total_rss" : peak_rss,
+        }
+
+def format_report(report):
+    mb = 1024 * 1024
+
+    lines = [
+        f"{report['game']}: {report['tables']} tables of {report['players_per_table']} players for {report['seconds']}s",
+        f"    games completed: {report['games_completed']} | commands: {report['commands_sent']} | unanswered: {report['unanswered_commands']} | stalls: {report['stalls']}",
+        "",
+        "Latency (seconds):",
+        f"    command: p50 {report['command_latency_p50']:.3f} | p99 {report['command_latency_p99']:.3f}",
+        f"    reaction: p50 {report['reaction_latency_p50']:.3f} | p99 {report['reaction_latency_p99']:.3f}",
+        "",
+        "Discord API:",
+        f"    calls: {report['api_calls']} | per game per minute: {report['api_calls_per_game_minute']:.1f} | per completed game: {report['api_calls_per_completed_game'] or 0:.0f}",
+        f"    429s: {report['rate_limited']} | uploaded: {report['upload_bytes'] / mb:.1f} MB",
+        "",
+        "Capacity:",
+        f"    CPU: {report['cpu_seconds']}s | cores used: {report['cores_used']} | games per core: {report['games_per_core'] or 0:.1f}",
+        f"    RSS: host {report['host_rss'] / mb:.1f} MB | per game process {report['game_rss_mean'] / mb:.1f} MB (max {report['game_rss_max'] / mb:.1f} MB) | peak total {report['peak_total_rss'] / mb:.1f} MB",
+    ]
+
+    return "\n".join(lines)
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "capacity benchmark of the bot against the mock Discord server with simulated players")
+    parser.add_argument("game", choices = list(SCRIPTS.keys()))
+    parser.add_argument("--tables", type = int, default = 10, help = "number of concurrent games (each in its own guild)")
+    parser.add_argument("--duration", type = float, default = 300, help = "seconds to measure for (after the warm up)")
+    parser.add_argument("--warmup", type = float, default = 30, help = "seconds to let the games get going before measuring")
+    parser.add_argument("--first-game-timeout", type = float, default = 1800, help = "seconds after the warm up to wait for a game to finish before giving up (measuring starts once one has)")
+    parser.add_argument("--ramp", type = float, default = 1.0, help = "seconds between starting each table")
+    parser.add_argument("--think", type = float, default = 3.0, help = "median seconds a player thinks before each command/reaction (0 for none)")
+    parser.add_argument("--interrupt-chance", type = float, default = 0.3, help = "chance a player responds to an interrupt instead of passing")
+    parser.add_argument("--no-images", action = "store_true", help = "start the games with use_images off")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8088, help = "port of the mock server")
+    parser.add_argument("--metrics-port", type = int, default = 9118, help = "port of the bot's metrics endpoint")
+    parser.add_argument("--metrics-out", default = None, help = "save the bot's metrics (Prometheus text) at the end to this file")
+    parser.add_argument("--rest-latency", type = float, default = 0.05)
+    parser.add_argument("--gateway-latency", type = float, default = 0.02)
+    parser.add_argument("--jitter", type = float, default = 0.2)
+    parser.add_argument("--rate-limit-scale", type = float, default = 1.0)
+    parser.add_argument("--no-rate-limits", action = "store_true")
+    parser.add_argument("--shards", type = int, default = 1, help = "run the bot (and the games) sharded with this many shards")
+    parser.add_argument("--workers", type = int, default = None, help = "run the games on this many worker processes instead of a process each")
+    parser.add_argument("--base-settings", default = None, help = "settings file to start from (ex. for IMAGE_ENCODING). TOKEN, DISCORD_API and METRICS are replaced")
+    parser.add_argument("--bot-output", action = "store_true", help = "show the bot's output")
+    parser.add_argument("--json", default = None, help = "also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    load_test = LoadTest(args.game, args)
+    report = asyncio.get_event_loop().run_until_complete(load_test.run())
+
+    print(format_report(report))
+
+    if args.json is not None:
+        with open(args.json, "w") as json_file:
+            json.dump(report, json_file, indent = 4)
+
+if __name__ == "__main__":
+    main()
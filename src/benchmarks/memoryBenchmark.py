@@ -0,0 +1,159 @@
+"""
+Measures the memory used by games running in the headless simulation
+
+Run from the 'src' directory:
+
+    python -m benchmarks.memoryBenchmark Coup --games 50
+
+To compare two versions of the code (ex. before/after a change) run the same command with the same seed on each version.
+A version from before the benchmarks package was added can't run it, so from the repository root check that version out
+in a worktree and put the benchmarks package (as it was when this script was added) into it:
+
+    git worktree add ../memory-baseline <old commit>
+    git -C ../memory-baseline checkout <commit that added this script> -- src/benchmarks
+    cd ../memory-baseline/src && python -m benchmarks.memoryBenchmark Coup --games 1
+
+Before that commit every game of a type shared one player registry, so the old code can only run one game at a time (--games 1)
+"""
+
+import sys
+import argparse
+import tracemalloc
+
+import games.common.GameClasses
+from benchmarks import headlessGames
+
+#the objects every command allocates a fresh batch of
+TRACKED_CLASSES = (games.common.GameClasses.Player,
+                   games.common.GameClasses.CommandResultMessage,
+                   games.common.GameClasses.CommandResultEmbedding,
+                   games.common.GameClasses.CommandResultPrompt,
+                   games.common.GameClasses.CommandResultInterrupt)
+
+def get_object_size(obj):
+    """
+    returns the size in bytes of an object plus its __dict__ (if it has one)
+    """
+
+    size = sys.getsizeof(obj)
+
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+
+    return size
+
+class StepStats:
+    """
+    Collects the memory statistics for each step (command or prompt/interrupt follow up) of the headless games
+    """
+
+    def __init__(self):
+        self.steps = 0
+        self.allocated_blocks = 0
+        self.allocated_bytes = 0
+        self.peak_bytes = 0
+        self.max_peak = 0
+
+    def on_step(self, headless, steps):
+
+        blocks_before = sys.getallocatedblocks()
+        bytes_before, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+        next(steps)
+
+        bytes_after, peak = tracemalloc.get_traced_memory()
+
+        self.steps += 1
+        self.allocated_blocks += sys.getallocatedblocks() - blocks_before
+        self.allocated_bytes += bytes_after - bytes_before
+        self.peak_bytes += peak - bytes_before
+        self.max_peak = max(self.max_peak, peak)
+
+def measure_tracked_objects(headless_games):
+    """
+    returns (count, bytes) of the players and command results reachable from the games
+    """
+
+    count = 0
+    size = 0
+
+    for headless in headless_games:
+        for player in headless.game.get_players_in_registry():
+            count += 1
+            size += get_object_size(player)
+
+            private_info = getattr(player, "private_info", None)
+            if isinstance(private_info, TRACKED_CLASSES):
+                count += 1
+                size += get_object_size(private_info)
+
+    return count, size
+
+def measure_result_sizes():
+    """
+    returns the size in bytes of one of each command result type (and a player)
+    """
+
+    user = headlessGames.FakeUser("user")
+    player = games.common.GameClasses.Player(user, "player")
+
+    examples = [
+        player,
+        games.common.GameClasses.CommandResultMessage(text = "text"),
+        games.common.GameClasses.CommandResultEmbedding(title = "title", description = "description"),
+        games.common.GameClasses.CommandResultPrompt(player = player, title = "title", func_name = "func", emojis = ["a", "b"]),
+        games.common.GameClasses.CommandResultInterrupt(title = "title", players = [player], func_name = "func", emojis = ["a"]),
+    ]
+
+    return {type(obj).__name__ : get_object_size(obj) for obj in examples}
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "memory benchmark for games running in the headless simulation")
+    parser.add_argument("game", choices = list(headlessGames.SIMULATIONS.keys()))
+    parser.add_argument("--games", type = int, default = 20, help = "number of concurrent games")
+    parser.add_argument("--players", type = int, default = None, help = "number of players in each game")
+    parser.add_argument("--rounds", type = int, default = 1, help = "number of games played at each table")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args(argv)
+
+    print("Object sizes (bytes):")
+    for name, size in measure_result_sizes().items():
+        print(f"    {name}: {size}")
+
+    stats = StepStats()
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    headless_games = headlessGames.run_concurrent_games(args.game, args.games, args.players, args.seed, args.rounds, on_step = stats.on_step, keep_games = True)
+
+    try:
+        current, peak = tracemalloc.get_traced_memory()
+        tracked_count, tracked_size = measure_tracked_objects(headless_games)
+    finally:
+        for headless in headless_games:
+            headless.close()
+        tracemalloc.stop()
+
+    commands = sum(headless.command_count for headless in headless_games)
+    messages = sum(headless.message_count for headless in headless_games)
+    illegal_moves = sum(headless.illegal_move_count for headless in headless_games)
+
+    print(f"\n{args.game}: {args.games} concurrent games | {commands} commands | {messages} messages | {illegal_moves} illegal moves")
+
+    print("\nPer step (command or prompt/interrupt follow up):")
+    print(f"    allocated blocks retained: {stats.allocated_blocks / max(stats.steps, 1):.1f}")
+    print(f"    bytes retained: {stats.allocated_bytes / max(stats.steps, 1):.1f}")
+    if hasattr(tracemalloc, "reset_peak"):
+        print(f"    peak bytes: {stats.peak_bytes / max(stats.steps, 1):.1f}")
+
+    print("\nPer game:")
+    print(f"    memory retained: {(current - baseline) / args.games:.1f} bytes")
+    print(f"    peak memory: {(max(peak, stats.max_peak) - baseline) / args.games:.1f} bytes")
+    print(f"    players/results held: {tracked_count / args.games:.1f} objects, {tracked_size / args.games:.1f} bytes")
+
+if __name__ == "__main__":
+    main()
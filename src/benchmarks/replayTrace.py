@@ -0,0 +1,219 @@
+"""
+Replays a game trace (recorded with "TRACING" turned on, see traceRecorder.py) without discord
+
+Every call the game got is made again in the same order, with the same answers to its prompts and the same random seed,
+and each one's outcome (and the prompts/interrupts it returned) is checked against the trace. The first call that comes out
+differently is where a replay stopped matching the real game (ex. a bug that depends on timing, or the code changed since).
+
+Run from the 'src' directory:
+
+    python -m benchmarks.replayTrace ../resources/traces/Coup_c._1234_20261019_120000.jsonl.gz
+
+    --speed original : waits between calls as long as the real game did (ex. to watch a stuck game happen)
+    --repeat 20 : replays it 20 times and times every call (to benchmark a real session before/after a change)
+"""
+
+import time
+import argparse
+import collections
+
+import traceRecorder
+import games.common.GameExceptions
+from benchmarks import headlessGames
+
+GAME_CLASSES = {GameClass.__name__ : GameClass for GameClass, _, _ in headlessGames.SIMULATIONS.values()}
+
+def load_trace(path):
+    """
+    returns (the start event, [(call event, its result event or None)], {kind : count} of the other events, [api events])
+    """
+
+    start = None
+    calls = []
+    counts = collections.Counter()
+    api_calls = []
+
+    for event in traceRecorder.read_trace(path):
+        kind = event["k"]
+
+        if kind == "start":
+            start = event
+        elif kind == "call":
+            calls.append([event, None])
+        elif kind == "result":
+            if len(calls) and calls[-1][1] is None:
+                calls[-1][1] = event
+        elif kind == "api":
+            api_calls.append(event)
+        else:
+            counts[kind] += 1
+
+    if start is None:
+        raise ValueError(f"{path} isn't a game trace (it has no start event)")
+
+    return start, calls, counts, api_calls
+
+def get_outcome(error):
+    if error is None:
+        return "ok"
+    if isinstance(error, games.common.GameExceptions.DiscordGameIllegalMove):
+        return "illegal_move"
+    if isinstance(error, games.common.GameExceptions.DiscordGameError):
+        return "game_error"
+    return "exception"
+
+class TraceReplay:
+    """
+    Replays the calls of a trace on a new game
+
+    contructors:
+
+    __init__(self, start : dict, calls : List[Tuple[dict, dict]])
+
+        start, calls : from load_trace
+
+    instance methods:
+
+    .run(self, speed : str = "fast", stop_on_divergence : bool = False)
+
+        replays every call ("original" speed waits between calls like the real game did)
+
+    instance fields:
+
+    game (DiscordGame) : The replayed game (after .run)
+
+    timings (Dict[str, List[float]]) : {function name : seconds each call took}
+
+    divergences (List[Tuple[int, dict, dict, dict]]) : (call index, call event, recorded result, replayed result) for every call that didn't match
+    """
+
+    def __init__(self, start, calls):
+        self.start = start
+        self.calls = calls
+
+        self.channel = headlessGames.FakeChannel("game-channel")
+        self.users = {}
+        self.dm_channels = {}
+
+        self.game = None
+        self.timings = collections.defaultdict(list)
+        self.divergences = []
+
+    def get_user(self, name):
+        if name not in self.users:
+            self.users[name] = headlessGames.FakeUser(name)
+            self.dm_channels[name] = headlessGames.FakeChannel(f"dm-{name}")
+        return self.users[name]
+
+    def make_call(self, call):
+        kwargs = {}
+        if "user" in call:
+            kwargs["DiscordAuthorContext"] = self.get_user(call["user"])
+            kwargs["DiscordChannelContext"] = self.dm_channels[call["user"]] if call.get("dm") else self.channel
+
+        args = traceRecorder.decode(call["args"])
+
+        start = time.perf_counter()
+        try:
+            result = self.game.__getattribute__(call["func"])(*args, **kwargs)
+            prompts, interrupts, _ = headlessGames.split_command_result(result)
+            replayed = {"outcome" : "ok"}
+            if len(prompts):
+                replayed["prompts"] = [prompt.func_name for prompt in prompts]
+            if len(interrupts):
+                replayed["interrupts"] = [interrupt.func_name for interrupt in interrupts]
+        except Exception as e:
+            replayed = {"outcome" : get_outcome(e), "error" : f"{type(e).__name__}: {e}"}
+        finally:
+            self.timings[call["func"]].append(time.perf_counter() - start)
+
+        return replayed
+
+    def run(self, speed = "fast", stop_on_divergence = False):
+        GameClass = GAME_CLASSES[self.start["game"]]
+
+        self.game = GameClass(self.start.get("options", {}).get("debug", False))
+        #the game's random numbers start from the same seed as they did in the real game
+        self.game.random.seed(self.start["seed"])
+
+        replay_start = time.monotonic()
+
+        try:
+            for i, (call, recorded) in enumerate(self.calls):
+
+                if speed == "original":
+                    delay = call["at"] - (time.monotonic() - replay_start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                replayed = self.make_call(call)
+
+                #the last call might not have finished before the game was killed
+                if recorded is None:
+                    continue
+
+                matches = all(replayed.get(field) == recorded.get(field) for field in ("outcome", "prompts", "interrupts"))
+                if not matches:
+                    self.divergences.append((i, call, recorded, replayed))
+                    if stop_on_divergence:
+                        return
+        finally:
+            self.game.kill_game()
+
+def format_milliseconds(seconds):
+    return f"{seconds * 1000:.2f}"
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "replays a recorded game trace without discord")
+    parser.add_argument("trace", help = "the trace file (.jsonl.gz)")
+    parser.add_argument("--speed", choices = ["fast", "original"], default = "fast", help = "replay as fast as possible or with the recorded gaps between calls")
+    parser.add_argument("--repeat", type = int, default = 1, help = "replay this many times (the timings cover every replay)")
+    parser.add_argument("--stop-on-divergence", action = "store_true", help = "stop at the first call that doesn't match the trace")
+    parser.add_argument("--show", type = int, default = 5, help = "how many divergences to show")
+    args = parser.parse_args(argv)
+
+    start, calls, counts, api_calls = load_trace(args.trace)
+
+    print(f"{start['game']} (prefix {start['prefix']}, seed {start['seed']}): {len(calls)} calls, {counts['cmd']} commands, {counts['react']} reactions, {len(api_calls)} API calls")
+    if len(calls):
+        print(f"    recorded over {calls[-1][0]['at']:.1f}s" + ("" if counts["end"] else " (the trace ends without the game stopping)"))
+
+    timings = collections.defaultdict(list)
+    replays = []
+    total_start = time.perf_counter()
+
+    for _ in range(args.repeat):
+        replay = TraceReplay(start, calls)
+        replay.run(args.speed, args.stop_on_divergence)
+        replays.append(replay)
+        for func_name, seconds in replay.timings.items():
+            timings[func_name] += seconds
+
+    total = time.perf_counter() - total_start
+
+    #the replays are all the same, so only the first one's divergences are shown
+    divergences = replays[0].divergences
+    print(f"\nReplayed {args.repeat} time(s) in {total:.3f}s | divergences: {len(divergences)} | final state: {getattr(replays[0].game, 'state', None)}")
+    for i, call, recorded, replayed in divergences[:args.show]:
+        print(f"    call {i} at {call['at']:.1f}s: {call['func']}{tuple(traceRecorder.decode(call['args']))} by {call.get('user', 'follow up')}")
+        print(f"        recorded: {recorded}")
+        print(f"        replayed: {replayed}")
+
+    print("\nGame time per call (ms):")
+    print(f"    {'function':<30}{'calls':>8}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for func_name, seconds in sorted(timings.items(), key = lambda item: -sum(item[1])):
+        ordered = sorted(seconds)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+        print(f"    {func_name:<30}{len(seconds):>8}{format_milliseconds(sum(seconds) / len(seconds)):>10}{format_milliseconds(p50):>10}{format_milliseconds(p99):>10}")
+
+    if len(api_calls):
+        print("\nRecorded API calls:")
+        routes = collections.Counter(f"{event['method']} {event['route']}" for event in api_calls)
+        for route, count in routes.most_common(10):
+            print(f"    {route}: {count}")
+        print(f"    uploaded: {sum(event['bytes'] for event in api_calls) / (1024 * 1024):.1f} MB | mean {sum(event['ms'] for event in api_calls) / len(api_calls):.1f} ms per call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Builds a resource pack from the images in the resources folder
+
+Run from the 'src' directory (rerun whenever an image in resources/ changes):
+
+    python buildResourcePack.py
+
+The pack is written to resources/packs/<version>/ where <version> is a hash of the source images and the build settings,
+and resources/packs/current is pointed at it. A pack has:
+
+    images/ : each image scaled down to at most MAX_SIZES and re-encoded (what gets sent to discord as is)
+    tiles/ : each scaled image decoded into a .npy file (what gets memory mapped and composed into bigger images)
+    manifest.json : maps each source image (relative to resources/) to its image and tile
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+
+import numpy as np
+import imageio
+from PIL import Image
+
+from games.common import ResourcePack
+
+#folders (relative to resources/) that are put in the pack
+SOURCE_FOLDERS = ["avalon/boards", "avalon/characters", "avalon/other", "coup"]
+SOURCE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+#the largest (width, height) the images in each folder are scaled down to. Discord doesn't show them any bigger than this anyway
+#images in a folder that's not listed keep their size
+MAX_SIZES = {
+    "avalon/characters" : (240, 370),
+    "avalon/other" : (150, 250),
+    "coup" : (155, 215),
+}
+
+JPEG_QUALITY = 85
+
+def find_sources(resources_folder):
+    """
+    returns the paths (relative to 'resources_folder' and using '/') of every image that goes in the pack
+    """
+
+    sources = []
+
+    for folder in SOURCE_FOLDERS:
+        for root, _, files in os.walk(os.path.join(resources_folder, folder)):
+            for file_name in files:
+                if os.path.splitext(file_name)[1].lower() in SOURCE_EXTENSIONS:
+                    sources.append(os.path.relpath(os.path.join(root, file_name), resources_folder).replace(os.sep, "/"))
+
+    return sorted(sources)
+
+def get_max_size(source):
+    """
+    returns the MAX_SIZES entry for the most specific folder 'source' is in (None if it isn't limited)
+    """
+
+    folder = os.path.dirname(source)
+    while folder != "":
+        if folder in MAX_SIZES:
+            return MAX_SIZES[folder]
+        folder = os.path.dirname(folder)
+
+    return None
+
+def get_version(resources_folder, sources):
+    """
+    returns a hash of the source images and build settings (any change to either makes a new pack)
+    """
+
+    version = hashlib.sha1()
+    version.update(json.dumps([ResourcePack.PACK_FORMAT, SOURCE_FOLDERS, MAX_SIZES, JPEG_QUALITY]).encode())
+
+    for source in sources:
+        version.update(source.encode())
+        with open(os.path.join(resources_folder, source), "rb") as source_file:
+            version.update(hashlib.sha1(source_file.read()).digest())
+
+    return version.hexdigest()[:12]
+
+def build_image(source_file, image_file, tile_file, max_size):
+    """
+    scales one image down to 'max_size' and writes its encoded image and decoded tile
+
+    :return (List[int]): the shape of the tile
+    """
+
+    image = Image.fromarray(np.asarray(imageio.imread(source_file))).convert("RGB")
+
+    if max_size is not None:
+        scale = min(1.0, max_size[0] / image.width, max_size[1] / image.height)
+        if scale < 1.0:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+
+    os.makedirs(os.path.dirname(image_file), exist_ok = True)
+    os.makedirs(os.path.dirname(tile_file), exist_ok = True)
+
+    image.save(image_file, quality = JPEG_QUALITY, optimize = True, progressive = True)
+
+    tile = np.ascontiguousarray(np.asarray(image))
+    np.save(tile_file, tile)
+
+    return list(tile.shape)
+
+def build_pack(resources_folder = ResourcePack.RESOURCES_FOLDER, packs_folder = ResourcePack.PACKS_FOLDER, force = False):
+    """
+    builds the resource pack for the current resources (unless it's already built) and makes it the current pack
+
+    :return (str): the folder of the pack
+    """
+
+    sources = find_sources(resources_folder)
+    version = get_version(resources_folder, sources)
+    pack_folder = os.path.join(packs_folder, version)
+
+    if force or not os.path.isfile(os.path.join(pack_folder, ResourcePack.MANIFEST_FILE)):
+
+        #build somewhere else first so a half built pack is never used
+        build_folder = os.path.join(packs_folder, f".building_{version}")
+        if os.path.isdir(build_folder):
+            shutil.rmtree(build_folder)
+
+        resources = {}
+        for source in sources:
+            source_file = os.path.join(resources_folder, source)
+            name = os.path.splitext(source)[0]
+
+            entry = {
+                "image" : f"images/{name}.jpg",
+                "tile" : f"tiles/{name}.npy",
+            }
+
+            entry["shape"] = build_image(source_file, os.path.join(build_folder, entry["image"]), os.path.join(build_folder, entry["tile"]), get_max_size(source))
+
+            source_stat = os.stat(source_file)
+            entry["source_size"] = source_stat.st_size
+            entry["source_mtime_ns"] = source_stat.st_mtime_ns
+
+            resources[source] = entry
+
+        manifest = {"format" : ResourcePack.PACK_FORMAT, "version" : version, "resources" : resources}
+        with open(os.path.join(build_folder, ResourcePack.MANIFEST_FILE), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent = 2, sort_keys = True)
+
+        if os.path.isdir(pack_folder):
+            shutil.rmtree(pack_folder)
+        os.replace(build_folder, pack_folder)
+
+    #switch the current pack over in one step so running games only ever see a complete pack
+    current_file = os.path.join(packs_folder, ResourcePack.CURRENT_PACK_FILE)
+    with open(current_file + ".tmp", "w") as current:
+        current.write(version)
+    os.replace(current_file + ".tmp", current_file)
+
+    return pack_folder
+
+def prune_packs(packs_folder, keep_version):
+    """
+    deletes every pack except 'keep_version'
+    """
+
+    for version in os.listdir(packs_folder):
+        folder = os.path.join(packs_folder, version)
+        if version != keep_version and os.path.isdir(folder):
+            shutil.rmtree(folder)
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "build the resource pack of pre-scaled images and memory mappable tiles")
+    parser.add_argument("--resources", default = ResourcePack.RESOURCES_FOLDER, help = "the resources folder to build from")
+    parser.add_argument("--force", action = "store_true", help = "rebuild the pack even if it's already built")
+    parser.add_argument("--prune", action = "store_true", help = "delete every older pack")
+    args = parser.parse_args(argv)
+
+    packs_folder = os.path.join(args.resources, "packs")
+    os.makedirs(packs_folder, exist_ok = True)
+
+    pack_folder = build_pack(args.resources, packs_folder, args.force)
+
+    if args.prune:
+        prune_packs(packs_folder, os.path.basename(pack_folder))
+
+    print(f"resource pack: {pack_folder}")
+
+if __name__ == "__main__":
+    sys.exit(main())
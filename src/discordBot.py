@@ -1,17 +1,29 @@
+import io
 import os
 import json
 import random
-from multiprocessing import Process
+import asyncio
+import traceback
+from multiprocessing import Process, Queue, Pipe
 
 from discord.ext import commands
 import discord
 
+import metrics
+import gameControl
+import memoryReport
+import traceRecorder
+import sharding
+import gameWorker
 from gameRunner import GameRunner
 from games.avalon.game import Avalon
 from games.rockpaperscissors.game import RockPaperScissors
 from games.coup.game import Coup
+from games.common import ImageEncoding
+from games.common import TempDirs
 
-SETTINGS_FILE = os.path.join("..", "resources", "settings.json")
+#the settings can be swapped out for a run (ex. benchmarks.loadTest points the bot at the mock Discord server)
+SETTINGS_FILE = os.environ.get("GAMEBOT_SETTINGS", os.path.join("..", "resources", "settings.json"))
 ADMIN_FILE = os.path.join("..","resources","admin.json")
 SUBS_FILE = os.path.join("..","resources","subscribers.json")
 COMMAND_PREFIX = "gamebot: "
@@ -27,17 +39,108 @@ with open(SETTINGS_FILE, "r") as token_file:
     TOKEN=settings["TOKEN"]
     
     LOGGING = settings.get("LOGGING", {})
+    
+    #the game processes inherit the encode policies, so this has to happen before any game starts
+    ImageEncoding.configure(settings.get("IMAGE_ENCODING", {}))
+    TempDirs.configure(settings.get("TEMP_DIR"))
+    
+    #the metrics endpoint is on by default (only on localhost). Set "Port" to null to turn it off
+    METRICS = {"Host" : "127.0.0.1", "Port" : 9108}
+    METRICS.update(settings.get("METRICS", {}))
+    
+    #'Admin Profile' is off unless it's turned on in the settings
+    PROFILING = {"Enabled" : False, "MaxSeconds" : 120}
+    PROFILING.update(settings.get("PROFILING", {}))
+    
+    #the games read their memory limits when they start, so this has to happen before any game starts too
+    memoryReport.configure(settings.get("MEMORY", {}))
+    traceRecorder.configure(settings.get("TRACING", {}))
+    sharding.configure(settings.get("SHARDING", {}))
+    gameWorker.configure(settings.get("WORKERS", {}))
+    
+    #point discord.py at another API (ex. the mock server in mockDiscord for load tests). The game processes inherit it
+    if "DISCORD_API" in settings:
+        discord.http.Route.BASE = settings["DISCORD_API"]
 
-bot = commands.Bot(command_prefix=COMMAND_PREFIX)
+#how often (in seconds) the temp directories of games that are gone get cleaned up
+JANITOR_INTERVAL = 10 * 60
+
+#how often (in seconds) to check for games that need to be restarted (ex. by their memory watchdog)
+SUPERVISOR_INTERVAL = 5
+
+#an AutoShardedBot if "SHARDING" is turned on (see sharding.py)
+bot = sharding.make_bot(COMMAND_PREFIX)
 running_games = {}
+#{game id : guild id} of the games being started. They count towards the limits before they're in running_games
+starting_games = {}
+
+#each game sends its metrics here. They're added up with the host's own for the metrics endpoint and 'Admin Stats'
+metrics_queue = Queue()
+metrics_collector = metrics.MetricsCollector(metrics_queue)
+host_metrics = metrics.get_registry()
+metrics.instrument_http(bot.http, host_metrics, "host")
+
+#with "WORKERS" turned on the games run in worker processes that each host several games (see gameWorker.py)
+worker_pool = gameWorker.WorkerPool(GAMES, TOKEN, LOGGING, metrics_queue) if gameWorker.is_enabled() else None
 
 def validate_prefix(main_prefix, new_prefix):
     
     return not (main_prefix.startswith(new_prefix) or new_prefix.startswith(main_prefix))
 
+janitor_task = None
+supervisor_task = None
+metrics_server = None
+
+async def run_janitor():
+    
+    while True:
+        #keep the metrics queue from growing between scrapes
+        metrics_collector.drain()
+        
+        removed = await bot.loop.run_in_executor(None, TempDirs.clean_orphans)
+        if len(removed):
+            print(f"Cleaned up {len(removed)} temp directories left by games that are gone")
+        
+        await asyncio.sleep(JANITOR_INTERVAL)
+
+async def run_supervisor():
+    
+    while True:
+        #one bad check can't be allowed to stop every restart after it
+        try:
+            await prune_game_map(None)
+        except Exception:
+            print("The supervisor couldn't check the running games")
+            traceback.print_exc()
+        
+        await asyncio.sleep(SUPERVISOR_INTERVAL)
+
 @bot.event
 async def on_ready():
+    global janitor_task
+    global supervisor_task
+    global metrics_server
+    
     print(f'{bot.user.name} has connected to Discord!')
+    if bot.shard_count is not None:
+        print(f"Running shards {sorted(bot.shards)} of {bot.shard_count}")
+    
+    #on_ready fires again after a reconnect, only start one janitor
+    if janitor_task is None:
+        janitor_task = bot.loop.create_task(run_janitor())
+        supervisor_task = bot.loop.create_task(run_supervisor())
+        
+    if metrics_server is None and METRICS.get("Port") is not None:
+        metrics_server = metrics.MetricsServer(get_metrics, METRICS.get("Host", "127.0.0.1"), METRICS["Port"])
+        try:
+            await metrics_server.start()
+            print(f"Serving metrics on http://{metrics_server.host}:{metrics_server.port}/metrics")
+        except OSError as e:
+            print(f"Couldn't start the metrics endpoint: {e}")
+
+def get_metrics():
+    host_metrics.set_gauge(metrics.RSS_BYTES, memoryReport.get_rss(), source = "host")
+    return metrics_collector.combine(host_metrics)
 
 @bot.command(name='roll', help="Simulates rolling dice. To roll 4 d20 use: roll 5 20")
 async def roll(ctx, number_of_dice: int, number_of_sides: int):
@@ -69,19 +172,22 @@ async def check_running(ctx):
     
     title = "Running Games:"
     desc_lines = []
-    keys_to_remove = []
+    
+    await prune_game_map(ctx)
+    
+    #{pid : (temp directories, bytes)}
+    disk_usage = await bot.loop.run_in_executor(None, TempDirs.get_usage_by_pid)
+    
     for game_id, info in running_games.items():
         
-        if info["thread"].is_alive():
-        
-            desc_lines.append(f"Game: {info['game_name']} | Command_Prefix: {info['command_prefix']} | Server: {info['server']} | Channel: {info['channel']}")
-            
-        else:
-            
-            keys_to_remove.append(game_id)
-            
-    for game_id in keys_to_remove:
-        running_games.pop(game_id)            
+        _, disk_bytes = disk_usage.get(info["thread"].pid, (0, 0))
+        line = f"Game: {info['game_name']} | Command_Prefix: {info['command_prefix']} | Server: {info['server']} | Channel: {info['channel']} | Disk: {TempDirs.format_bytes(disk_bytes)}"
+        if info["shard"] is not None:
+            line += f" | Shard: {info['shard'][0]}"
+        if info["worker"] is not None:
+            #the disk usage is the whole worker's
+            line += f" | Worker: {info['worker'].worker_id}"
+        desc_lines.append(line)
 
     title = "Running Games:"
     description = "\n\n".join(desc_lines)
@@ -103,8 +209,8 @@ async def check(ctx, option):
     else:
         await ctx.send(f"Check Error: Unknown option {option}")
 
-@bot.command(name="game", pass_context = True, help="Syntax: game [game] [command_prefix]. Starts a game")
-async def start_game(ctx, game, game_command_prefix, use_images : bool = True, debug : bool = False):
+@bot.command(name="game", pass_context = True, help="Syntax: game [game] [command_prefix] [use_images] [debug] [live_board]. Starts a game")
+async def start_game(ctx, game, game_command_prefix, use_images : bool = True, debug : bool = False, live_board : bool = False):
     if game in GAMES:
         
         if validate_prefix(COMMAND_PREFIX, game_command_prefix):
@@ -118,11 +224,23 @@ async def start_game(ctx, game, game_command_prefix, use_images : bool = True, d
                 guild = ctx.guild
                 channel = ctx.channel
             
-                runner = Process(target = GameRunner, args = (GAMES[game], TOKEN, str(guild), str(channel), game_command_prefix, LOGGING, use_images, debug))
-                runner.start()
-            
                 game_id = f"{game}_{game_command_prefix}"
-                running_games[game_id] = {"thread" : runner, "game_name" : game, "command_prefix" : game_command_prefix, "server" : str(guild), "channel" : str(channel)}
+                
+                try:
+                    gameWorker.check_limits(running_games, guild.id, starting_games)
+                    if game_id in running_games or game_id in starting_games:
+                        raise gameWorker.PlacementError(f"A game with the prefix {game_command_prefix} is already running")
+                    
+                    #the game holds its place while it starts so the games started at the same time can't go over the limits
+                    starting_games[game_id] = guild.id
+                    try:
+                        running_games[game_id] = await launch_game(game, str(guild), str(channel), game_command_prefix, use_images, debug, live_board, guild.id, sharding.get_game_shard(bot, guild))
+                    finally:
+                        del starting_games[game_id]
+                    
+                except gameWorker.PlacementError as e:
+                    await ctx.send(f"Cannot start {game}. {e}")
+                    return
             
                 await channel.send(f"{game} game started in '{guild}' : '{channel}' using prefix: {game_command_prefix}")
                 
@@ -138,24 +256,227 @@ async def start_game(ctx, game, game_command_prefix, use_images : bool = True, d
     
         await ctx.send(f"Cannot start {game}. Game Not Found")        
 
+async def launch_game(game, guild, channel, game_command_prefix, use_images, debug, live_board, guild_id = None, shard = None):
+    """
+    starts a GameRunner process for 'game' (or starts it on a worker if there are workers) and returns its entry for running_games
+    
+    'shard' is (shard id, shard count) of the guild when the bot is sharded (the game only connects to that shard)
+    
+    Raises a gameWorker.PlacementError if no worker can take the game
+    """
+    
+    if worker_pool is not None:
+        game_id = f"{game}_{game_command_prefix}"
+        worker = await worker_pool.start_game(game_id, game, guild, channel, game_command_prefix, (use_images, debug, live_board), guild_id, shard)
+        
+        return {
+            "thread" : worker.process, "game_name" : game, "command_prefix" : game_command_prefix, "server" : guild, "channel" : channel,
+            "control" : gameWorker.WorkerGameControl(worker, game_id), "options" : (use_images, debug, live_board),
+            "guild_id" : guild_id, "shard" : shard, "worker" : worker,
+        }
+    
+    control_connection, runner_control_connection = Pipe()
+    
+    runner = Process(target = GameRunner, args = (GAMES[game], TOKEN, guild, channel, game_command_prefix, LOGGING, use_images, debug, live_board, metrics_queue, runner_control_connection, guild_id, shard))
+    runner.start()
+    
+    #the game has its own copy of its end of the pipe now
+    runner_control_connection.close()
+    
+    return {
+        "thread" : runner, "game_name" : game, "command_prefix" : game_command_prefix, "server" : guild, "channel" : channel,
+        "control" : gameControl.ControlClient(control_connection), "options" : (use_images, debug, live_board),
+        "guild_id" : guild_id, "shard" : shard, "worker" : None,
+    }
+
 async def prune_game_map(ctx):
     keys_to_remove = []
+    keys_to_restart = []
+    dead_pids = []
+    
+    #the games on workers are checked against what their workers report
+    ended_on_workers = set()
+    restarts_on_workers = set()
+    if worker_pool is not None:
+        ended_on_workers, restarts_on_workers = await worker_pool.refresh()
+        
+        for pid in worker_pool.retired_pids:
+            metrics_collector.retire(pid)
+            dead_pids.append(pid)
+        worker_pool.retired_pids = []
 
     for game_id, info in running_games.items():
-        if not info["thread"].is_alive():
-            keys_to_remove.append(game_id)
+        if info["worker"] is not None:
+            if game_id in restarts_on_workers:
+                keys_to_restart.append(game_id)
+            elif game_id in ended_on_workers:
+                keys_to_remove.append(game_id)
+        
+        elif not info["thread"].is_alive():
+            #a game that asked to be restarted (ex. by its memory watchdog) gets a new process in the same channel
+            if info["thread"].exitcode == memoryReport.RESTART_EXIT_CODE:
+                keys_to_restart.append(game_id)
+            else:
+                keys_to_remove.append(game_id)
             
     for game_id in keys_to_remove:
-        running_games.pop(game_id)
+        info = running_games.pop(game_id)
+        if info["worker"] is None:
+            metrics_collector.retire(info["thread"].pid)
+        
+    #take out every game before awaiting anything so another prune can't restart the same game again
+    restarting = [(game_id, running_games.pop(game_id)) for game_id in keys_to_restart]
+    for game_id, info in restarting:
+        if info["worker"] is None:
+            metrics_collector.retire(info["thread"].pid)
+            dead_pids.append(info["thread"].pid)
+        
+    for game_id, info in restarting:
+        try:
+            running_games[game_id] = await launch_game(info["game_name"], info["server"], info["channel"], info["command_prefix"], *info["options"], info["guild_id"], info["shard"])
+        except gameWorker.PlacementError as e:
+            print(f"Couldn't restart game {game_id}: {e}")
+            continue
+        print(f"Restarted game {game_id} (pid {info['thread'].pid} -> {running_games[game_id]['thread'].pid})")
+        
+    if len(dead_pids):
+        await bot.loop.run_in_executor(None, lambda: TempDirs.clean_orphans(dead_pids = dead_pids))
         
 async def kill_game(ctx, game_id, prune=True):
     
     await ctx.send(f"killing game: {game_id}")
-    running_games[game_id]["thread"].terminate()
+    
+    #a game on a worker is stopped by its worker (the other games on it keep running)
+    worker = running_games[game_id]["worker"]
+    if worker is not None:
+        try:
+            await worker_pool.stop_game(worker, game_id)
+        except gameControl.ControlError as e:
+            await ctx.send(f"Couldn't stop game {game_id}: {e}")
+        
+        if prune:
+            await prune_game_map(ctx)
+        return
+    
+    runner = running_games[game_id]["thread"]
+    runner.terminate()
+    
+    #a terminated game can't clean up its own temp directory so do it for it
+    await bot.loop.run_in_executor(None, runner.join, 5)
+    if not runner.is_alive():
+        await bot.loop.run_in_executor(None, lambda: TempDirs.clean_orphans(dead_pids = [runner.pid]))
     
     if prune:
         await prune_game_map(ctx)
     
+async def migrate_game(ctx, game_id, target = None):
+    """
+    moves a game to another worker ('target', or the least loaded one with room if None) without ending it (see gameMigration.py)
+    
+    :return (bool): whether it was moved
+    """
+    
+    info = running_games[game_id]
+    source = info["worker"]
+    
+    try:
+        worker = await worker_pool.migrate_game(source, game_id, info["game_name"], info["server"], info["channel"], info["command_prefix"], info["options"], info["guild_id"], info["shard"], target)
+    except gameWorker.PlacementError as e:
+        await ctx.send(f"Admin Error: Couldn't move game {game_id}. {e}")
+        return False
+    
+    #(the game could have been killed while it was moving)
+    if running_games.get(game_id) is info:
+        info["thread"] = worker.process
+        info["control"] = gameWorker.WorkerGameControl(worker, game_id)
+        info["worker"] = worker
+    
+    await ctx.send(f"Admin Command: Moved game {game_id} from worker {source.worker_id} to worker {worker.worker_id}")
+    return True
+    
+async def drain_worker(ctx, worker):
+    """
+    moves every game off of 'worker' and then stops it (it's left running if a game couldn't be moved)
+    """
+    
+    worker.draining = True
+    
+    game_ids = [game_id for game_id, info in running_games.items() if info["worker"] is worker]
+    for game_id in game_ids:
+        if game_id in running_games:
+            await migrate_game(ctx, game_id)
+    
+    left = [game_id for game_id, info in running_games.items() if info["worker"] is worker]
+    if len(left):
+        await ctx.send(f"Admin Error: Worker {worker.worker_id} still has games ({', '.join(left)}). It won't get any new games, 'Admin Drain {worker.worker_id}' again to retry")
+        return
+    
+    try:
+        await worker_pool.stop_worker(worker)
+    except gameControl.ControlError as e:
+        await ctx.send(f"Admin Error: Couldn't stop worker {worker.worker_id}: {e}")
+        return
+    
+    await prune_game_map(ctx)
+    await ctx.send(f"Admin Command: Drained and stopped worker {worker.worker_id}")
+    
+async def profile_game(ctx, game_id, seconds, mode):
+    
+    if not PROFILING.get("Enabled", False):
+        await ctx.send("Admin Error: Profiling is turned off. Set \"PROFILING\" : {\"Enabled\" : true} in the settings to turn it on")
+        return
+        
+    try:
+        seconds = float(seconds)
+    except ValueError:
+        await ctx.send(f"Admin Error: Invalid number of seconds: {seconds}")
+        return
+    
+    max_seconds = PROFILING.get("MaxSeconds", 120)
+    if seconds <= 0 or seconds > max_seconds:
+        await ctx.send(f"Admin Error: Can only profile for between 0 and {max_seconds} seconds")
+        return
+    
+    await ctx.send(f"Admin Command: Profiling game {game_id} for {seconds:g} seconds ({mode})")
+    
+    try:
+        file_name, data, summary = await running_games[game_id]["control"].request("profile", seconds, mode, timeout = seconds + 60)
+    except gameControl.ControlError as e:
+        await ctx.send(f"Admin Error: Couldn't profile game {game_id}: {e}")
+        return
+    
+    #leave room for the code block in discord's 2000 character limit
+    if len(summary) > 1900:
+        summary = summary[:1900] + "\n..."
+    
+    await ctx.send(f"```\n{summary}\n```", file = discord.File(io.BytesIO(data), filename = f"{game_id}_{file_name}"))
+    
+async def report_memory(ctx, game_id, trace_seconds):
+    
+    try:
+        trace_seconds = float(trace_seconds)
+    except ValueError:
+        await ctx.send(f"Admin Error: Invalid number of seconds: {trace_seconds}")
+        return
+    
+    max_seconds = PROFILING.get("MaxSeconds", 120)
+    if trace_seconds < 0 or trace_seconds > max_seconds:
+        await ctx.send(f"Admin Error: Can only trace allocations for between 0 and {max_seconds} seconds")
+        return
+        
+    if trace_seconds > 0:
+        await ctx.send(f"Admin Command: Tracing allocations of game {game_id} for {trace_seconds:g} seconds")
+    
+    try:
+        report = await running_games[game_id]["control"].request("memory", trace_seconds, timeout = trace_seconds + 60)
+    except gameControl.ControlError as e:
+        await ctx.send(f"Admin Error: Couldn't get a memory report from game {game_id}: {e}")
+        return
+    
+    summary = report if len(report) <= 1900 else report[:1900] + "\n..."
+    
+    await ctx.send(f"```\n{summary}\n```", file = discord.File(io.BytesIO(report.encode("utf-8")), filename = f"{game_id}_memory.txt"))
+    
 async def kill_bot(ctx):
     await prune_game_map(ctx)
         
@@ -166,6 +487,7 @@ async def kill_bot(ctx):
 
     else:
         await ctx.send("Killing bot")
+        stop_workers()
         await bot.logout()
 
 async def force_kill_bot(ctx):
@@ -175,8 +497,13 @@ async def force_kill_bot(ctx):
         await kill_game(ctx, game_id, prune=False)
     
     await ctx.send("Killing bot")
+    stop_workers()
     await bot.logout()
 
+def stop_workers():
+    if worker_pool is not None:
+        worker_pool.shutdown()
+
 def has_permission(user, level=None):
 
     with open(ADMIN_FILE, 'r') as admin_file:
@@ -296,9 +623,15 @@ async def admin_commands(ctx, *args):
     if command is None:
         title = "Administrator Commands:"
         description = "Admin Kill Game [Game_ID] : kills game with Game ID = [Game_ID]\n\n"
+        description += "Admin Stats : Show the slowest game commands and the Discord API call counts\n\n"
+        description += "Admin Profile [Game_ID] [seconds] [sample|cprofile] : profile the game with Game ID = [Game_ID] (if profiling is turned on)\n\n"
+        description += "Admin Memory [Game_ID] [trace_seconds] : memory report of the game with Game ID = [Game_ID] (tracing allocations for [trace_seconds] first)\n\n"
+        description += "Admin Workers : Show the load of each worker process (if workers are turned on)\n\n"
+        description += "Admin Migrate [Game_ID] [Worker_ID] : move the game with Game ID = [Game_ID] to worker [Worker_ID] (the least loaded worker if left out) without ending it\n\n"
         if has_permission(user, "master"):
             description += "Admin Kill Bot : kills the Bot (fails if any games are running)\n\n"
             description += "Admin Kill Bot Force : kills the Bot, closing all games first\n\n"
+            description += "Admin Drain [Worker_ID] : move every game off of worker [Worker_ID] and then stop it\n\n"
             description += "Admin Add <user> master : make <user> a Bot Admin for entire Bot\n\n"
             description += "Admin Remove <user> : Remove all of <user>'s Bot Admin Permissions\n\n"
             description += "Admin Remove master : Remove <user>'s Entire Bot Admin Permission\n\n"
@@ -410,9 +743,118 @@ async def admin_commands(ctx, *args):
             
             await ctx.send(f"Admin Perimssion Denied: {user} doesn't have Bot Level Permissions")
     
+    elif command == "Profile":
+        
+        target = kwargs.get("arg_1", None)
+        seconds = kwargs.get("arg_2", "30")
+        mode = kwargs.get("arg_3", "sample")
+        
+        if target is None:
+            await ctx.send("Admin Error: Admin Command 'Admin Profile' requires a target of which game to profile")
+        
+        elif target not in running_games:
+            await ctx.send(f"Admin Error: Cannot profile game {target}. Game not found in running games")
+        
+        elif mode not in ["sample", "cprofile"]:
+            await ctx.send(f"Admin Error: Unknown profile mode: {mode} (use 'sample' or 'cprofile')")
+            
+        else:
+            server = running_games[target]["server"]
+            if has_permission(user, server):
+                await profile_game(ctx, target, seconds, mode)
+            else:
+                await ctx.send(f"Admin Permission Denied: {user} doesn't have Permission to profile games on server: {server}")
+    
+    elif command == "Memory":
+        
+        target = kwargs.get("arg_1", None)
+        trace_seconds = kwargs.get("arg_2", "0")
+        
+        if target is None:
+            await ctx.send("Admin Error: Admin Command 'Admin Memory' requires a target of which game to report on")
+        
+        elif target not in running_games:
+            await ctx.send(f"Admin Error: Cannot report on game {target}. Game not found in running games")
+            
+        else:
+            server = running_games[target]["server"]
+            if has_permission(user, server):
+                await report_memory(ctx, target, trace_seconds)
+            else:
+                await ctx.send(f"Admin Permission Denied: {user} doesn't have Permission to check games on server: {server}")
+    
+    elif command == "Workers":
+        
+        if worker_pool is None:
+            await ctx.send("Admin Error: Workers are turned off. Set \"WORKERS\" : {\"Enabled\" : true} in the settings to turn them on")
+        else:
+            title = "Workers:"
+            embedding = discord.Embed(title=title, description=worker_pool.format_load(), color=discord.Color.gold())
+            await ctx.send(embed=embedding)
+    
+    elif command == "Migrate":
+        
+        target = kwargs.get("arg_1", None)
+        worker_id = kwargs.get("arg_2", None)
+        
+        if worker_pool is None:
+            await ctx.send("Admin Error: Workers are turned off. Set \"WORKERS\" : {\"Enabled\" : true} in the settings to turn them on")
+        
+        elif target is None:
+            await ctx.send("Admin Error: Admin Command 'Admin Migrate' requires a target of which game to move")
+        
+        elif target not in running_games:
+            await ctx.send(f"Admin Error: Cannot move game {target}. Game not found in running games")
+        
+        elif worker_id is not None and find_worker(worker_id) is None:
+            await ctx.send(f"Admin Error: Cannot move game {target}. Worker not found: {worker_id}")
+            
+        else:
+            server = running_games[target]["server"]
+            if has_permission(user, server):
+                await migrate_game(ctx, target, None if worker_id is None else find_worker(worker_id))
+            else:
+                await ctx.send(f"Admin Permission Denied: {user} doesn't have Permission to move games on server: {server}")
+    
+    elif command == "Drain":
+        
+        worker_id = kwargs.get("arg_1", None)
+        
+        if worker_pool is None:
+            await ctx.send("Admin Error: Workers are turned off. Set \"WORKERS\" : {\"Enabled\" : true} in the settings to turn them on")
+        
+        elif worker_id is None:
+            await ctx.send("Admin Error: Admin Command 'Admin Drain' requires a target of which worker to drain")
+        
+        elif find_worker(worker_id) is None:
+            await ctx.send(f"Admin Error: Cannot drain worker {worker_id}. Worker not found")
+        
+        elif not has_permission(user, "master"):
+            await ctx.send(f"Admin Permission Denied: {user} doesn't have Bot Level Permissions")
+            
+        else:
+            await drain_worker(ctx, find_worker(worker_id))
+    
+    elif command == "Stats":
+        
+        title = "Bot Stats:"
+        description = metrics.format_stats(get_metrics())
+        embedding = discord.Embed(title=title, description=description, color=discord.Color.gold())
+        await ctx.send(embed=embedding)
+    
     else:
         await ctx.send(f"Admin Error: Admin command not found: {command}")
 
+def find_worker(worker_id):
+    """
+    returns the worker with the id 'worker_id' (a string from an admin command), None if there isn't one
+    """
+    
+    try:
+        return worker_pool.workers.get(int(worker_id))
+    except ValueError:
+        return None
+
 async def send_alerts(ctx, option, title, description):
 
     with open(SUBS_FILE, 'r') as subs_file:
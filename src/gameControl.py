@@ -0,0 +1,176 @@
+"""
+Lets the host (discordBot) send requests to a running game process (or worker, see gameWorker.py) and get answers back, ex. 'Admin Profile'
+
+Each game gets one end of a multiprocessing.Pipe. The game side (ControlServer) watches its end from the event loop,
+runs the handler for each request and sends back (request id, True, result) or (request id, False, error message).
+The host side (ControlClient) watches its end the same way and hands each answer to the request with its id, so any
+number of requests can be waiting at once. A request the host gives up on (it timed out) is cancelled in the game and
+its answer is dropped if it comes anyway, the pipe carries on working for the next ones
+"""
+
+import asyncio
+import itertools
+import traceback
+
+class ControlError(Exception):
+    """
+    A control request failed (the game couldn't do it, doesn't answer or is gone)
+    """
+    pass
+
+class ControlServer:
+    """
+    The game process' end of the control pipe
+
+    contructors:
+
+    __init__(self, connection : multiprocessing.connection.Connection, handlers : Dict[str, function])
+
+        handlers (Dict[str, function]) : {request name : coroutine function(*args)}
+
+    instance methods:
+
+    .attach(self, loop : asyncio.AbstractEventLoop)
+
+        starts answering requests on 'loop'
+    """
+
+    def __init__(self, connection, handlers):
+        self.connection = connection
+        self.handlers = handlers
+        self.loop = None
+        #{request id : the task answering it}
+        self.tasks = {}
+
+    def attach(self, loop):
+        self.loop = loop
+        loop.add_reader(self.connection.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        try:
+            kind, request_id, request, args = self.connection.recv()
+        except (EOFError, OSError):
+            #the host is gone
+            self.loop.remove_reader(self.connection.fileno())
+            return
+
+        if kind == "cancel":
+            #the host gave up on it
+            task = self.tasks.get(request_id)
+            if task is not None:
+                task.cancel()
+            return
+
+        self.tasks[request_id] = self.loop.create_task(self._answer(request_id, request, args))
+
+    async def _answer(self, request_id, request, args):
+        handler = self.handlers.get(request)
+
+        try:
+            if handler is None:
+                response = (request_id, False, f"Unknown control request: {request}")
+            else:
+                try:
+                    response = (request_id, True, await handler(*args))
+                except Exception as e:
+                    response = (request_id, False, f"{type(e).__name__}: {e}\n{''.join(traceback.format_tb(e.__traceback__)[-3:])}")
+
+        except asyncio.CancelledError:
+            #no one is waiting for the answer
+            return
+
+        finally:
+            self.tasks.pop(request_id, None)
+
+        try:
+            self.connection.send(response)
+        except (BrokenPipeError, OSError):
+            pass
+
+class ControlClient:
+    """
+    The host's end of a game's control pipe
+
+    instance methods:
+
+    async .request(self, request : str, *args, timeout : float = 30) -> object
+
+        sends a request to the game and returns its result. Raises a ControlError if it failed or timed out (the game then
+        stops working on it)
+
+    .is_busy(self) -> bool
+
+        whether a request is waiting for its answer
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.loop = None
+        self.request_ids = itertools.count()
+        #{request id : the future its answer is given to}
+        self.waiting = {}
+        #why the pipe stopped working (None while it works)
+        self.closed = None
+
+    def is_busy(self):
+        return len(self.waiting) != 0
+
+    def _attach(self):
+        #(the client can be made before the host's event loop runs, it starts watching the pipe with the first request)
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+            self.loop.add_reader(self.connection.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        try:
+            request_id, ok, result = self.connection.recv()
+        except (EOFError, OSError) as e:
+            self._close(f"The game isn't running anymore ({e})")
+            return
+
+        #(the answer to a request that was given up on has no one waiting for it)
+        future = self.waiting.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result((ok, result))
+
+    def _close(self, reason):
+        self.loop.remove_reader(self.connection.fileno())
+        self.closed = reason
+
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(ControlError(reason))
+        self.waiting.clear()
+
+    async def request(self, request, *args, timeout = 30):
+        if self.closed is not None:
+            raise ControlError(self.closed)
+        self._attach()
+
+        request_id = next(self.request_ids)
+        future = self.loop.create_future()
+        self.waiting[request_id] = future
+
+        try:
+            try:
+                self.connection.send(("request", request_id, request, args))
+            except (BrokenPipeError, OSError) as e:
+                raise ControlError(f"The game isn't running anymore ({e})")
+
+            try:
+                ok, result = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                #have the game stop working on it
+                try:
+                    self.connection.send(("cancel", request_id, None, ()))
+                except (BrokenPipeError, OSError):
+                    pass
+                raise ControlError(f"The game didn't answer '{request}' within {timeout} seconds")
+
+        finally:
+            self.waiting.pop(request_id, None)
+
+        if not ok:
+            raise ControlError(result)
+
+        return result
@@ -0,0 +1,314 @@
+"""
+Moves a running game from one worker process to another without ending it (see gameWorker.py for the workers)
+
+The host (WorkerPool.migrate_game) moves a game like this:
+
+    start : the game is started on the new worker in standby. It connects to discord but doesn't answer anything yet
+    export : the old worker stops the game between commands (GameRunner.export_game) and sends back its state
+    import : the new worker takes over the game (GameRunner.import_game) and carries on where it left off
+    release : the old worker lets go of its copy (without killing it). If the import failed it's resumed there instead
+
+A game is only stopped once every command it's running is waiting on reactions to its prompts/interrupts (or is done).
+Nothing in the game changes while it's stopped: reactions and timeouts that come in are held until it's released or resumed,
+and so are the commands sent to it, which the new worker answers (any the old worker already answered are skipped).
+The move is given up on if more commands come in than the workers can keep track of (MESSAGE_HISTORY).
+
+The state is the game object itself, pickled, along with a PendingCommand for each command that's waiting. The discord
+objects in it (the users that control its players, channels and guilds) are pickled as their ids and looked up again by
+the new worker's bot. Every prompt/interrupt that's showing is picked up again by its message id: the reactions it
+already counted are kept, any it missed while it was moving are counted and it gets the time it had left to time out.
+"""
+
+import io
+import pickle
+import asyncio
+
+import discord
+
+#how long (in seconds) a game gets to finish the commands it's running before the move is given up on
+QUIESCE_TIMEOUT = 30
+
+#how often (in seconds) a stopping game checks whether its commands are all waiting
+QUIESCE_POLL = 0.05
+
+#how many of the commands sent to it a game remembers answering, and how many it holds while it's moving
+#(a move is given up on when more come in than that, rather than losing any of them)
+MESSAGE_HISTORY = 100
+
+class MigrationError(Exception):
+    """
+    A game can't be moved (it's traced, busy or something in it can't be moved)
+    """
+    pass
+
+class PendingWait:
+    """
+    A prompt or interrupt that's showing and waiting on reactions
+
+    instance fields:
+
+    message_id (int) : The id of the message it's showing in (None until it's sent)
+
+    remaining (float) : The seconds it had left to time out when it was moved here (None if it wasn't moved)
+
+    waiting (bool) : Whether it's waiting on a reaction right now (only then can it be moved)
+
+    deadline (float) : When (on the event loop's clock) the wait it's in times out
+
+    message (discord.Message) : The message it's showing in, once it's been picked up again after being moved here
+
+    missed_reactions (List[Tuple[discord.Reaction, discord.User]]) : Reactions it missed while it was moving, to be counted first
+    """
+
+    #the fields that are moved along with it (the rest only mean anything in the process it's in)
+    _moved_fields = ("message_id",)
+
+    def __init__(self):
+        self.message_id = None
+        self.remaining = None
+        self.waiting = False
+        self.deadline = None
+        self.message = None
+        self.missed_reactions = []
+
+    def get_timeout(self, timeout):
+        """
+        returns how long the next wait should be: what it had left if it was just moved here, 'timeout' otherwise
+        """
+
+        if self.remaining is not None:
+            timeout, self.remaining = self.remaining, None
+        return timeout
+
+    def __getstate__(self):
+        state = {field : getattr(self, field) for field in self._moved_fields}
+
+        #the event loop's clock is different in every process, so only the time it has left is moved
+        if self.deadline is not None:
+            state["remaining"] = max(0.0, self.deadline - asyncio.get_event_loop().time())
+        return state
+
+    def __setstate__(self, state):
+        self.__init__()
+        for field, value in state.items():
+            setattr(self, field, value)
+
+class PendingPrompt(PendingWait):
+    """
+    A CommandResultPrompt that's showing, with the choices made on it so far (and its result once it's done)
+    """
+
+    _moved_fields = ("message_id", "prompt", "choices", "done", "result")
+
+    def __init__(self, prompt = None):
+        super().__init__()
+        self.prompt = prompt
+        self.choices = set()
+        self.done = False
+        self.result = None
+
+class PendingInterrupt(PendingWait):
+    """
+    A CommandResultInterrupt that's showing, with the responses made on it so far
+    """
+
+    _moved_fields = ("message_id", "interrupt", "responses", "count")
+
+    def __init__(self, interrupt = None):
+        super().__init__()
+        self.interrupt = interrupt
+        self.responses = {} if interrupt is None else {player.name : set() for player in interrupt.players}
+        self.count = 0
+
+class PendingCommand:
+    """
+    A command a GameRunner is running. While it's waiting on its prompts (or interrupt) it can be moved to another process
+
+    contructors:
+
+    __init__(self, command_name : str, reply_channel : discord.abc.Messageable)
+
+    instance methods:
+
+    .wait_on_prompts(self, func_name : str, prompts : List[CommandResultPrompt])
+
+    .wait_on_interrupt(self, interrupt : CommandResultInterrupt)
+
+    .stop_waiting(self)
+
+        the command is carrying on with the follow up (it can't be moved until it's waiting again)
+
+    .is_waiting(self) -> bool
+
+    instance fields:
+
+    command_name (str) : The command that's running
+
+    reply_channel (discord.abc.Messageable) : Where the command was sent from (errors are sent back there)
+
+    func_name (str) : The follow up function of its prompts
+
+    prompts (List[PendingPrompt]) : The prompts it's waiting on
+
+    interrupt (PendingInterrupt) : The interrupt it's waiting on
+
+    task (asyncio.Task) : The task running it (in this process)
+    """
+
+    def __init__(self, command_name, reply_channel):
+        self.command_name = command_name
+        self.reply_channel = reply_channel
+        self.func_name = None
+        self.prompts = []
+        self.interrupt = None
+        self.task = None
+
+    def wait_on_prompts(self, func_name, prompts):
+        self.func_name = func_name
+        self.prompts = [PendingPrompt(prompt) for prompt in prompts]
+
+    def wait_on_interrupt(self, interrupt):
+        self.interrupt = PendingInterrupt(interrupt)
+
+    def stop_waiting(self):
+        self.func_name = None
+        self.prompts = []
+        self.interrupt = None
+
+    def is_waiting(self):
+        if self.interrupt is not None:
+            return self.interrupt.waiting
+
+        #(a prompt is only done once it's shown its result)
+        return len(self.prompts) != 0 and all(prompt.waiting or prompt.done for prompt in self.prompts)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["task"] = None
+        return state
+
+class PendingPages:
+    """
+    A CommandResultPages whose pages can still be turned
+
+    instance fields:
+
+    channel (discord.abc.Messageable) : Where it was sent
+
+    message_id (int) : The id of its message
+
+    paged_message (messageBatcher.PagedMessage) : Its pages
+
+    page (int) : The page it's showing
+
+    task (asyncio.Task) : The task turning its pages (in this process)
+    """
+
+    def __init__(self, channel, message_id, paged_message, page):
+        self.channel = channel
+        self.message_id = message_id
+        self.paged_message = paged_message
+        self.page = page
+        self.task = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["task"] = None
+        return state
+
+class GamePickler(pickle.Pickler):
+    """
+    Pickles a game's state with the discord objects in it as their ids (see load_state)
+
+    instance fields:
+
+    user_ids (Set[int]) : The ids of the users in it (they're looked up before it's unpickled)
+    """
+
+    def __init__(self, file):
+        super().__init__(file, protocol = pickle.HIGHEST_PROTOCOL)
+        self.user_ids = set()
+
+    def persistent_id(self, obj):
+        #(users and members alike, a member is looked up again as the user)
+        if isinstance(obj, discord.abc.User):
+            self.user_ids.add(obj.id)
+            return ("user", obj.id)
+
+        if isinstance(obj, discord.DMChannel):
+            self.user_ids.add(obj.recipient.id)
+            return ("dm", obj.recipient.id)
+
+        if isinstance(obj, discord.abc.GuildChannel):
+            return ("channel", obj.id)
+
+        if isinstance(obj, discord.Guild):
+            return ("guild", obj.id)
+
+        return None
+
+class GameUnpickler(pickle.Unpickler):
+    """
+    Unpickles a game's state, putting the discord objects of 'bot' back in place of their ids
+    """
+
+    def __init__(self, file, bot, users):
+        super().__init__(file)
+        self.bot = bot
+        self.users = users
+
+    def persistent_load(self, pid):
+        kind, object_id = pid
+
+        if kind == "user":
+            return self.users[object_id]
+
+        if kind == "dm":
+            #the DM channel is opened again the first time something's sent to it
+            return self.users[object_id]
+
+        if kind == "channel":
+            found = self.bot.get_channel(object_id)
+        elif kind == "guild":
+            found = self.bot.get_guild(object_id)
+        else:
+            raise pickle.UnpicklingError(f"Unknown discord object: {kind}")
+
+        if found is None:
+            raise MigrationError(f"This bot can't see the {kind} with id {object_id}")
+        return found
+
+def dump_state(state):
+    """
+    pickles a game's state (a dict with the game and its pending commands) for load_state
+
+    :return (dict): {"user_ids" : the ids of the users in it, "pickle" : the pickled state}
+    """
+
+    buffer = io.BytesIO()
+    pickler = GamePickler(buffer)
+
+    try:
+        pickler.dump(state)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise MigrationError(f"Part of the game can't be moved: {e}")
+
+    return {"user_ids" : sorted(pickler.user_ids), "pickle" : buffer.getvalue()}
+
+async def load_state(dumped, bot):
+    """
+    unpickles a game's state from dump_state with the discord objects of 'bot' (which has to be ready)
+    """
+
+    #the users are looked up first since fetching the ones that aren't cached is a REST call
+    users = {}
+    for user_id in dumped["user_ids"]:
+        user = bot.get_user(user_id)
+        if user is None:
+            try:
+                user = await bot.fetch_user(user_id)
+            except discord.HTTPException as e:
+                raise MigrationError(f"Couldn't find the user with id {user_id}: {e}")
+        users[user_id] = user
+
+    return GameUnpickler(io.BytesIO(dumped["pickle"]), bot, users).load()
@@ -1,27 +1,88 @@
+import os
+import sys
 import discord
 import asyncio
+import inspect
 import traceback
+import collections
+import tracemalloc
+import concurrent.futures
 from discord.ext import commands
 
 import games.common
+import messageBatcher
+import timerWheel
+import metrics
+import profiler
+import gameControl
+import memoryReport
+import traceRecorder
+import sharding
+import gameMigration
 
 class GameRunner:
-    def __init__(self, GameClass, token, game_guild_name, game_channel_name, command_prefix, logging_info, use_images = True, debug = False):    
+    def __init__(self, GameClass, token, game_guild_name, game_channel_name, command_prefix, logging_info, use_images = True, debug = False, live_board = False, metrics_queue = None, control_connection = None, game_guild_id = None, shard = None, bot = None, run = True, memory_watchdog = True, standby = False):    
         self.token = token
         self.game_guild_name = game_guild_name
         self.game_channel_name = game_channel_name
+        self.game_guild_id = game_guild_id
         self.command_prefix = command_prefix
         self.use_images = use_images
         
+        #when 'live_board' is enabled the board is kept in a single pinned message that gets edited instead of reposted
+        self.live_board = live_board
+        self.live_board_message = None
+        self.live_board_state = None
+        self.live_board_image_state = None
+        
         self.illegal_move_log_channel = logging_info.get("IllegalMoveLog")
         self.error_log_channel = logging_info.get("ErrorLog")
                 
-        self.bot = commands.Bot(command_prefix = self.command_prefix)
+        #'bot' lets a stand-in client be used instead (ex. the test harness), it's then up to the caller to run its loop ('run' = False)
+        #with sharding on, the game only connects to its guild's shard (see sharding.py)
+        #a forked game process inherits the host's (running) event loop, so its bot gets a new one
+        if bot is None:
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        self.bot = sharding.make_game_bot(self.command_prefix, shard) if bot is None else bot
+        self.bot.event(self.on_message)
+        
+        #count the time spent on each command and the discord API calls made by this game (sent to the host through 'metrics_queue')
+        self.game_name = GameClass.__name__
+        self.metrics = metrics.get_registry()
+        self.metrics_queue = metrics_queue
+        metrics.instrument_http(self.bot.http, self.metrics, self.game_name)
+        
+        #record everything that happens to this game so it can be replayed without discord (see traceRecorder.py)
+        self.trace = None
+        if traceRecorder.is_enabled():
+            options = {"debug" : debug, "use_images" : use_images, "live_board" : live_board}
+            self.trace = traceRecorder.TraceRecorder(traceRecorder.make_trace_path(self.game_name, command_prefix), self.game_name, command_prefix, options)
+            traceRecorder.trace_http(self.bot.http, self.trace)
+            self.bot.add_listener(self.trace_reaction_add, "on_raw_reaction_add")
+            self.bot.add_listener(self.trace_reaction_remove, "on_raw_reaction_remove")
     
         self.game = GameClass(debug)
         
+        #a traced game's shuffles and deals come from the trace's seed so a replay makes the same ones
+        if self.trace is not None:
+            self.game.random.seed(self.trace.seed)
+        
         self.game_commands = self.game.get_commands()
         
+        #the commands that are running (so they can be moved to another process along with the game, see gameMigration.py)
+        self.pending_commands = set()
+        self.command_resumers = {}
+        self.page_turns = {}
+        
+        #a game started in 'standby' is being moved here from another process and holds its messages until it's taken over.
+        #A game that's stopped to be moved ('quiesced') holds its messages too, and its prompts wait until it's resumed or released
+        self.standby = standby
+        self.quiesced = False
+        self.not_quiesced = asyncio.Event()
+        self.not_quiesced.set()
+        self.held_messages = []
+        self.handled_messages = collections.deque(maxlen = gameMigration.MESSAGE_HISTORY)
+        
         for command in self.game_commands:
             if debug or (not command.debug):
                 self.make_command(command)
@@ -30,85 +91,182 @@ class GameRunner:
         
         self.is_locked = False
         
+        #all the prompt/interrupt timeouts are kept in the process wide timer wheel instead of each having their own timer
+        self.timers = timerWheel.get_timer_wheel()
+        
+        #commands that yield their results are advanced on the render thread (so the next result renders while the last one is sent)
+        #the game lock makes sure only one piece of game code runs at a time between the event loop and the render thread
+        self.render_executor = concurrent.futures.ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "render")
+        self.game_lock = asyncio.Lock()
+        
+        if self.metrics_queue is not None:
+            self.bot.loop.create_task(self.report_metrics())
+        
+        #requests from the host (ex. 'Admin Profile') come in over the control pipe
+        if control_connection is not None:
+            self.control = gameControl.ControlServer(control_connection, {"profile" : self.profile, "memory" : self.memory_report})
+            self.control.attach(self.bot.loop)
+        
+        #watch this game's memory, restarting it if it gets too big (a worker running several games watches its own memory instead, see gameWorker.py)
+        self.exit_code = None
+        if memory_watchdog:
+            if memoryReport.get_limits().get("Tracemalloc"):
+                tracemalloc.start()
+            self.watchdog = memoryReport.MemoryWatchdog(self.game_name, lambda: memoryReport.make_report(self.game, self.bot), self.restart)
+            self.bot.loop.create_task(self.watchdog.run())
+        
+        if not run:
+            return
+        
         self.bot.run(self.token)
+        
+        self.close()
+        
+        #tell the host to start this game again
+        if self.exit_code is not None:
+            sys.exit(self.exit_code)
             
+    def close(self):
+        """
+        cleans up after the game's bot has stopped
+        """
+        
+        if self.trace is not None:
+            self.trace.close()
+        
+        self.render_executor.shutdown(wait = False)
+    
+    async def on_message(self, message):
+        """
+        runs the commands in a message from the game's guild or a DM (the game's shards have other guilds' messages too)
+        """
+        
+        if not self.is_game_message(message):
+            return
+        
+        #(every one is held, the move is given up on if there are too many, see check_held_messages)
+        if self.standby or self.quiesced:
+            self.held_messages.append(message)
+            return
+        
+        self.handled_messages.append(message.id)
+        await self.bot.process_commands(message)
+    
+    def is_game_message(self, message):
+        """
+        returns whether 'message' can be a command for this game: a DM or a message in the game's guild that starts with its prefix
+        """
+        
+        if message.guild is None:
+            return True
+        
+        if (self.game_guild_id is not None) and (message.guild.id != self.game_guild_id):
+            return False
+        
+        return message.content.startswith(self.command_prefix)
+    
     def make_command(self, command):
                         
-        async def process_command_result(game_channel, command_result):
+        async def process_command_result(game_channel, command_result, timer):
             
-            if command_result is None:
-                pass
-                
-            elif isinstance(command_result, str):
-                await game_channel.send(command_result)
-                
-            elif isinstance(command_result, games.common.GameClasses.CommandResultMessage):
-                
-                destination =  command_result.destination
-                if destination is None:
-                    destination = game_channel                
-                
-                kwargs = {}
-                
-                if (self.use_images) and (command_result.image is not None):
-                    kwargs["file"] = discord.File(command_result.image)
+            #merge consecutive results for the same destination so each one doesn't need its own API call
+            with timer.stage("render"):
+                batches = messageBatcher.batch_command_results(game_channel, command_result, self.use_images, command.name, self.live_board)
+            
+            with timer.stage("send"):
+                for batch in batches:
+                    message = await batch.send()
                     
-                if (not self.use_images) or (command_result.image is None) or (command_result.send_both):
-                    kwargs["content"] = command_result.text
-                    if kwargs["content"] is None:
-                        kwargs["content"] = "."
+                    #page turning happens in the background so it doesn't hold up the command
+                    if isinstance(batch, messageBatcher.PagedMessage) and len(batch.pages.pages) > 1:
+                        self.bot.loop.create_task(self.turn_pages(message, batch))
                     
-                await destination.send(**kwargs)
-             
-            elif isinstance(command_result, games.common.GameClasses.CommandResultEmbedding):
-
-                destination =  command_result.destination
-                if destination is None:
-                    destination = game_channel
-
-                kwargs = {}
-                
-                kwargs["title"] = command_result.title
-                
-                if command_result.description is not None:
-                    kwargs["description"] = command_result.description
-                
-                kwargs["color"] = command_result.color
-                
-                embedding = discord.Embed(**kwargs)
-                
-                await destination.send(embed=embedding)
-             
-            elif isinstance(command_result,(list,tuple)):
-                [await process_command_result(game_channel, cr) for cr in command_result]
+                #only the most recent board matters for the live board
+                if self.live_board:
+                    boards = messageBatcher.find_live_boards(command_result, command.name)
+                    if len(boards):
+                        await self.update_live_board(game_channel, boards[-1])
+        
+        async def send_results(game_channel, command_result, timer):
+            """
+            sends the messages in a command result and returns the prompts and interrupts in it (for the follow up)
+            
+            if the command yielded its results each one is sent as soon as it's yielded
+            """
+            
+            if not messageBatcher.is_streamed_result(command_result):
+                prompts, interrupts, messages = messageBatcher.split_command_result(command_result)
+                await process_command_result(game_channel, messages, timer)
+                return prompts, interrupts
+            
+            prompts = []
+            interrupts = []
+            async for item in self.stream_results(command_result, timer):
+                item_prompts, item_interrupts, messages = messageBatcher.split_command_result(item)
+                prompts += item_prompts
+                interrupts += item_interrupts
+                await process_command_result(game_channel, messages, timer)
+            
+            return prompts, interrupts
+        
+        async def run_game_function(game_channel, timer, func_name, *args, **kwargs):
+            """
+            calls a function of the game (a command or a prompt/interrupt follow up), sends its messages and returns its prompts and interrupts
+            """
+            
+            try:
+                async with self.game_lock:
+                    self.trace_call(func_name, args, kwargs)
+                    with timer.stage("logic"):
+                        result = self.game.__getattribute__(func_name)(*args, **kwargs)
                 
-            else:
-                raise games.common.GameExceptions.DiscordGameError(f"result from commmand '{command.name}' not recognized: {type(command_result)}")
+                prompts, interrupts = await send_results(game_channel, result, timer)
+            
+            except Exception as e:
+                self.trace_result(e)
+                raise
+            
+            self.trace_result(None, prompts, interrupts)
+            return prompts, interrupts
         
-        async def prompt_player(default_channel, prompt : games.common.GameClasses.CommandResultPrompt):
+        async def prompt_player(default_channel, pending : gameMigration.PendingPrompt):
             
-            vote_box = discord.Embed(title = prompt.title, description = prompt.description, color = prompt.color)
+            prompt = pending.prompt
             
             channel = prompt.channel
             if channel is None:
                 channel = default_channel
-            
-            message = await channel.send(embed= vote_box)
-            for emoji in prompt.emojis:
-                await message.add_reaction(emoji)
                 
             def check(reaction, user):
-                return (user == prompt.player.discord_channel) and (reaction.message.id == message.id)
-                
+                return (user == prompt.player.discord_channel) and (reaction.message.id == pending.message_id)
+            
+            #a prompt moved here from another process is already showing (the reactions on a DM prompt stay on it once they're counted)
+            message = None
+            if pending.message_id is not None:
+                message = await self.pick_up_wait(channel, pending, check, lambda reaction: prompt.channel is not None and reaction.emoji in pending.choices)
+            
+            if message is None:
+                vote_box = discord.Embed(title = prompt.title, description = prompt.description, color = prompt.color)
+                message = await channel.send(embed= vote_box)
+                pending.message_id = message.id
+                for emoji in prompt.emojis:
+                    await message.add_reaction(emoji)
                
-            choices = set()
+            choices = pending.choices
+            used_default = False
             while len(choices) < prompt.count:
                 
                 try:
-                    reaction, user = await self.bot.wait_for("reaction_add", timeout = prompt.timeout, check = check)
+                    reaction, user = await self.wait_for_reaction(pending, check, prompt.timeout)
                     if prompt.channel is None:
                         await message.remove_reaction(reaction, user)
                 except asyncio.TimeoutError:
+                    #if the game gave the prompt a default selection use it, so the game keeps going without the player
+                    if prompt.default is not None:
+                        choices = set(prompt.default)
+                        used_default = True
+                        break
+                        
                     timeout_box = discord.Embed(title = prompt.title, description = "Timed out! Please manually make selection with game commands", color=prompt.color)
                     await message.edit(embed = timeout_box)
                     choices = None
@@ -132,32 +290,43 @@ class GameRunner:
                 desc = f"{prompt.result_message} {list(choices)[0]}"
             else:
                 desc = f"{prompt.result_message} {choices}"
+            if used_default:
+                desc = f"Timed out! Defaulted to: {desc}"
             recorded_box = discord.Embed(title = prompt.title, description = desc, color=prompt.color)
             await message.edit(embed = recorded_box)
             
-            return (prompt.key, choices)
+            pending.result = choices
+            pending.done = True
         
-        async def prompt_interrupt(game_channel, interrupt : games.common.GameClasses.CommandResultInterrupt):
-                       
-            responses = {player.name : set() for player in interrupt.players}
+        async def prompt_interrupt(game_channel, pending : gameMigration.PendingInterrupt):
+            
+            interrupt = pending.interrupt
+            responses = pending.responses
             player_map = {player.discord_name : player.name for player in interrupt.players}
-            description = "\n".join(f"{player.name}: {list(responses[player.name])}" for player in interrupt.players)
-            interrupt_box = discord.Embed(title = interrupt.title, description = description, color=interrupt.color)
-                        
-            message = await game_channel.send(embed= interrupt_box)
-            for emoji in interrupt.emojis:
-                await message.add_reaction(emoji)
-            await message.add_reaction(interrupt.end_emoji)
                 
             def check(reaction, user):
-                return (user in [player.discord_channel for player in interrupt.players]) and (reaction.message.id == message.id)
+                return (user in [player.discord_channel for player in interrupt.players]) and (reaction.message.id == pending.message_id)
+            
+            #an interrupt moved here from another process is already showing
+            message = None
+            if pending.message_id is not None:
+                message = await self.pick_up_wait(game_channel, pending, check, lambda reaction: False)
+            
+            if message is None:
+                description = "\n".join(f"{player.name}: {list(responses[player.name])}" for player in interrupt.players)
+                interrupt_box = discord.Embed(title = interrupt.title, description = description, color=interrupt.color)
+                            
+                message = await game_channel.send(embed= interrupt_box)
+                pending.message_id = message.id
+                for emoji in interrupt.emojis:
+                    await message.add_reaction(emoji)
+                await message.add_reaction(interrupt.end_emoji)
                 
-            count = 0
             reaction = None
-            while (reaction is None or reaction.emoji != interrupt.end_emoji) and (interrupt.max_responses is None or count < interrupt.max_responses):
+            while (reaction is None or reaction.emoji != interrupt.end_emoji) and (interrupt.max_responses is None or pending.count < interrupt.max_responses):
                 
                 try:
-                    reaction, user = await self.bot.wait_for("reaction_add", timeout = interrupt.timeout, check = check)
+                    reaction, user = await self.wait_for_reaction(pending, check, interrupt.timeout)
                     await message.remove_reaction(reaction, user)
                 except asyncio.TimeoutError:
                     timeout_box = discord.Embed(title = interrupt.title, description = "Timed out! Please manually make selection with game commands", color=interrupt.color)
@@ -170,10 +339,10 @@ class GameRunner:
                 
                     if reaction.emoji in responses[player_name]:
                         responses[player_name].remove(reaction.emoji)
-                        count-=1
+                        pending.count-=1
                     else:
                         responses[player_name].add(reaction.emoji)
-                        count+=1
+                        pending.count+=1
                     
                     description = "\n".join(f"{player.name}: {'|'.join(list(responses[player.name]))}" for player in interrupt.players)
                     interrupt_box = discord.Embed(title = interrupt.title, description = description, color=interrupt.color)
@@ -188,6 +357,9 @@ class GameRunner:
         
         async def new_function(ctx, *args, **kwargs):
             
+            if self.trace is not None:
+                self.trace.command(str(ctx.author), isinstance(ctx.channel, discord.channel.DMChannel), command.name, args)
+            
             #Check to see if the user is allowed to use this command right now
             try:
                 #find the guild and channel the game is using
@@ -278,37 +450,28 @@ class GameRunner:
                 finally:
                     return
                         
+            #add the author and the channel to the kwargs
+            kwargs["DiscordAuthorContext"] = ctx.author
+            kwargs["DiscordChannelContext"] = ctx.channel
+            
+            #run the command and send the messages returned by it
+            pending = gameMigration.PendingCommand(command.name, ctx.channel)
+            await run_command(pending, game_channel, lambda timer: run_game_function(game_channel, timer, command.name, *args, **kwargs))
+        
+        async def run_command(pending, game_channel, first_step):
+            """
+            runs a command ('first_step' makes its first call into the game and returns the prompts and interrupts) and its follow ups,
+            sending any errors back to where the command came from
+            """
+            
             #Run the command
+            timer = metrics.CommandTimer()
+            outcome = "exception"
+            pending.task = asyncio.current_task()
+            self.pending_commands.add(pending)
             try:                    
-                                                
-                #add the author and the channel to the kwargs
-                kwargs["DiscordAuthorContext"] = ctx.author
-                kwargs["DiscordChannelContext"] = ctx.channel
-            
-                #run the command
-                result = self.game.__getattribute__(command.name)(*args, **kwargs)
-                
-                #seperate out the prompts from the messages
-                if isinstance(result, (list, tuple)):
-                    interrupts = [res for res in result if isinstance(res, games.common.GameClasses.CommandResultInterrupt)]
-                    prompts = [res for res in result if isinstance(res, games.common.GameClasses.CommandResultPrompt)]
-                    messages = [res for res in result if not isinstance(res, (games.common.GameClasses.CommandResultPrompt,
-                                                                              games.common.GameClasses.CommandResultInterrupt))]
-                elif isinstance(result, games.common.GameClasses.CommandResultPrompt):
-                    interrupts = []
-                    prompts = [result]
-                    messages = None
-                elif isinstance(result, games.common.GameClasses.CommandResultInterrupt):
-                    interrupts = [result]
-                    prompts = []
-                    messages = None                    
-                else: 
-                    interrupts = []
-                    prompts = []
-                    messages = result
-                                
-                #send the messages returned by the command
-                await process_command_result(game_channel, messages)
+                
+                prompts, interrupts = await first_step(timer)
                                 
                 #keep looping until there are no more game prompts or interrupts
                 while len(prompts) != 0 or len(interrupts) != 0:
@@ -330,50 +493,27 @@ class GameRunner:
                         if func_name not in dir(self.game):
                             raise games.common.GameExceptions.DiscordGameError(f"The Game has not field by the name '{func_name}'. Cannot use this as a follow up functon")
                 
-                        #prompt the players and get their results
-                        prompt_results = await asyncio.gather(*[prompt_player(game_channel, prompt) for prompt in prompts])
-                        prompt_results_dict = {pr[0] : pr[1] for pr in prompt_results}
-                
-                        #call the return function
-                        result = self.game.__getattribute__(func_name)(prompt_results_dict)
+                        pending.wait_on_prompts(func_name, prompts)
+                        prompts, interrupts = await run_prompts(game_channel, timer, pending)
                     
                     elif len(interrupts) == 1:
-                        interrupt = interrupts[0]
-                    
-                        #prompt the players to see if they want to interrupt
-                        prompt_results = await prompt_interrupt(game_channel, interrupt)
-                        
-                        #call the return function
-                        result = self.game.__getattribute__(interrupt.func_name)(prompt_results)
+                        pending.wait_on_interrupt(interrupts[0])
+                        prompts, interrupts = await run_interrupt(game_channel, timer, pending)
                     
                     else:
                         raise games.common.GameExceptions.DiscordGameError("Command returned multiple CommandResultInterrupts. Only one is allowed.")
-                    
-                    #seperate out the prompts and interrupts from the messages
-                    if isinstance(result, (list, tuple)):
-                        interrupts = [res for res in result if isinstance(res, games.common.GameClasses.CommandResultInterrupt)]
-                        prompts = [res for res in result if isinstance(res, games.common.GameClasses.CommandResultPrompt)]
-                        messages = [res for res in result if not isinstance(res, (games.common.GameClasses.CommandResultPrompt,
-                                                                              games.common.GameClasses.CommandResultInterrupt))]
-                    elif isinstance(result, games.common.GameClasses.CommandResultPrompt):
-                        interrupts = []
-                        prompts = [result]
-                        messages = None
-                    elif isinstance(result, games.common.GameClasses.CommandResultInterrupt):
-                        interrupts = [result]
-                        prompts = []
-                        messages = None                    
-                    else: 
-                        interrupts = []
-                        prompts = []
-                        messages = result
-                                
-                    #send the messages returned by the command
-                    await process_command_result(game_channel, messages)  
+                
+                outcome = "ok"
+            
+            #the game moved to another process, which carries on with the command
+            except asyncio.CancelledError:
+                outcome = "migrated"
+                raise
             
             #catch any Illegal Game Moves thrown
             except games.common.GameExceptions.DiscordGameIllegalMove as e:
-                await ctx.channel.send(f"Illegal Move: {e}")
+                outcome = "illegal_move"
+                await pending.reply_channel.send(f"Illegal Move: {e}")
                 
                 try:
                     if self.illegal_move_log_channel is not None:
@@ -393,7 +533,8 @@ class GameRunner:
                 
             #catch any Game Errors thrown
             except games.common.GameExceptions.DiscordGameError as e:
-                await ctx.channel.send(f"Game Error: {e}")
+                outcome = "game_error"
+                await pending.reply_channel.send(f"Game Error: {e}")
                 
                 try:
                     if self.error_log_channel is not None:
@@ -413,7 +554,7 @@ class GameRunner:
             
             #catch any other Exceptions Thrown
             except Exception as e:
-                await ctx.channel.send(f"Unrecognized Exception: {e}")
+                await pending.reply_channel.send(f"Unrecognized Exception: {e}")
                 
                 try:
                     if self.error_log_channel is not None:
@@ -433,14 +574,561 @@ class GameRunner:
                     
             #release the game lock if it was acquired
             finally:
+                self.pending_commands.discard(pending)
+                
                 if command.requires_lock:
                     self.is_locked = False    
+                
+                timer.record(self.metrics, outcome, game = self.game_name, command = command.name)
+                
+                if self.trace is not None:
+                    self.trace.flush()
+        
+        async def run_prompts(game_channel, timer, pending):
+            """
+            prompts the players with the prompts 'pending' is waiting on, then calls their follow up and returns its prompts and interrupts
+            """
+            
+            #prompt the players and get their results (the prompts answered before the game was moved here already have theirs)
+            with timer.stage("prompt_wait"):
+                await asyncio.gather(*[prompt_player(game_channel, pending_prompt) for pending_prompt in pending.prompts if not pending_prompt.done])
+            prompt_results_dict = {pending_prompt.prompt.key : pending_prompt.result for pending_prompt in pending.prompts}
+            
+            func_name = pending.func_name
+            pending.stop_waiting()
+            
+            #call the return function
+            return await run_game_function(game_channel, timer, func_name, prompt_results_dict)
+        
+        async def run_interrupt(game_channel, timer, pending):
+            """
+            prompts the players with the interrupt 'pending' is waiting on, then calls its follow up and returns its prompts and interrupts
+            """
+            
+            #prompt the players to see if they want to interrupt
+            with timer.stage("prompt_wait"):
+                prompt_results = await prompt_interrupt(game_channel, pending.interrupt)
+            
+            func_name = pending.interrupt.interrupt.func_name
+            pending.stop_waiting()
+            
+            #call the return function
+            return await run_game_function(game_channel, timer, func_name, prompt_results)
+        
+        async def resume_function(pending):
+            """
+            carries on with a command that was waiting on its prompts/interrupt when the game was moved here from another process
+            """
+            
+            if command.requires_lock:
+                self.is_locked = True
+            
+            game_channel = self.find_game_channel()
+            if pending.interrupt is not None:
+                await run_command(pending, game_channel, lambda timer: run_interrupt(game_channel, timer, pending))
+            else:
+                await run_command(pending, game_channel, lambda timer: run_prompts(game_channel, timer, pending))
+        
+        self.command_resumers[command.name] = resume_function
         
         new_function.__name__ = f"{command.name}_command"
         new_command = commands.Command(new_function, name=command.name, help=command.help_message)
         
         self.bot.add_command(new_command)             
     
+    async def stream_results(self, command_result, timer = None):
+        """
+        yields each result a generator/async generator command result yields, always working on the next one in the meantime
+        
+        Generators are advanced on the render thread so rendering the next result overlaps sending the last one.
+        The game lock is held while the game's code runs so other commands never run in the middle of a step
+        
+        The time spent making each result is added to the "render" stage of 'timer' (a metrics.CommandTimer)
+        """
+        
+        loop = asyncio.get_event_loop()
+        end_of_results = object()
+        
+        async def step():
+            if inspect.isasyncgen(command_result):
+                try:
+                    return await command_result.__anext__()
+                except StopAsyncIteration:
+                    return end_of_results
+                
+            return await loop.run_in_executor(self.render_executor, next, command_result, end_of_results)
+        
+        async def advance():
+            async with self.game_lock:
+                if timer is None:
+                    return await step()
+                
+                with timer.stage("render"):
+                    return await step()
+        
+        pending = asyncio.ensure_future(advance())
+        
+        try:
+            while True:
+                item = await pending
+                if item is end_of_results:
+                    return
+                
+                pending = asyncio.ensure_future(advance())
+                yield item
+                
+        finally:
+            #if sending failed let the step that's running finish, the game lock can't be let go while the render thread is in the game
+            if not pending.done():
+                await asyncio.wait([pending])
+                if not pending.cancelled():
+                    pending.exception()
+    
+    def trace_call(self, func_name, args, kwargs):
+        if self.trace is None:
+            return
+        
+        author = kwargs.get("DiscordAuthorContext")
+        if author is None:
+            self.trace.call(func_name, args)
+        else:
+            self.trace.call(func_name, args, str(author), isinstance(kwargs.get("DiscordChannelContext"), discord.channel.DMChannel))
+    
+    def trace_result(self, error, prompts = (), interrupts = ()):
+        if self.trace is None:
+            return
+        
+        if error is None:
+            outcome = "ok"
+        elif isinstance(error, games.common.GameExceptions.DiscordGameIllegalMove):
+            outcome = "illegal_move"
+        elif isinstance(error, games.common.GameExceptions.DiscordGameError):
+            outcome = "game_error"
+        else:
+            outcome = "exception"
+        
+        self.trace.result(outcome, prompts, interrupts, None if error is None else f"{type(error).__name__}: {error}")
+    
+    def trace_reaction(self, payload, removed):
+        """
+        records a reaction on the game's channel or on a DM from one of its players (every game sees every reaction the bot can)
+        """
+        
+        if payload.user_id == self.bot.user.id:
+            return
+        
+        user = self.bot.get_user(payload.user_id)
+        user_name = str(user) if user is not None else str(payload.user_id)
+        
+        if payload.guild_id is not None:
+            channel = self.bot.get_channel(payload.channel_id)
+            if channel is None or channel.name != self.game_channel_name or channel.guild.name != self.game_guild_name:
+                return
+        elif not any(player.discord_name == user_name for player in self.game.get_players_in_registry()):
+            return
+        
+        self.trace.reaction(user_name, str(payload.emoji), payload.message_id, removed)
+    
+    async def trace_reaction_add(self, payload):
+        self.trace_reaction(payload, False)
+    
+    async def trace_reaction_remove(self, payload):
+        self.trace_reaction(payload, True)
+    
+    async def report_metrics(self):
+        """
+        sends a snapshot of this process' metrics to the host every metrics.REPORT_INTERVAL seconds
+        """
+        
+        while True:
+            await asyncio.sleep(metrics.REPORT_INTERVAL)
+            self.send_metrics()
+    
+    async def profile(self, seconds, mode = "sample"):
+        """
+        profiles this game for 'seconds' seconds (see profiler.py) and returns (file name, file contents, summary)
+        """
+        
+        return await profiler.profile_for(seconds, mode)
+    
+    async def memory_report(self, trace_seconds = 0):
+        """
+        returns a memory report of this game (see memoryReport.py), tracing allocations for 'trace_seconds' seconds first if it's more than 0
+        """
+        
+        if trace_seconds > 0:
+            return await memoryReport.make_traced_report(trace_seconds, self.game, self.bot)
+        
+        #don't let the game change while its fields are being measured
+        async with self.game_lock:
+            return memoryReport.make_report(self.game, self.bot)
+    
+    async def restart(self, reason):
+        """
+        ends this game so the host starts a new one in its place (the game in progress is lost)
+        """
+        
+        guild = discord.utils.find(lambda guild: guild.name == self.game_guild_name, self.bot.guilds)
+        if guild is not None:
+            game_channel = discord.utils.find(lambda channel: channel.name == self.game_channel_name, guild.channels)
+            if game_channel is not None:
+                #the restart can't wait on the notice (ex. if it's rate limited)
+                try:
+                    await game_channel.send(f"Restarting the game with prefix {self.command_prefix} since {reason}. The game in progress will have to be started again")
+                except discord.HTTPException:
+                    pass
+        
+        self.game.kill_game()
+        self.send_metrics()
+        
+        self.exit_code = memoryReport.RESTART_EXIT_CODE
+        await self.bot.logout()
+    
+    def send_metrics(self):
+        if self.metrics_queue is not None:
+            self.metrics.set_gauge(metrics.RSS_BYTES, memoryReport.get_rss(), source = self.game_name)
+            self.metrics_queue.put((os.getpid(), self.metrics.snapshot()))
+    
+    def find_game_channel(self):
+        """
+        returns the channel the game is using
+        """
+        
+        guild = discord.utils.find(lambda guild: guild.name == self.game_guild_name, self.bot.guilds)
+        return discord.utils.find(lambda channel: channel.name == self.game_channel_name, guild.channels)
+    
+    async def wait_for_reaction(self, pending : gameMigration.PendingWait, check, timeout):
+        """
+        waits for a reaction that passes 'check' on the prompt/interrupt 'pending' is showing (the reactions it missed while
+        it was being moved here come first). Raises an asyncio.TimeoutError if none comes within 'timeout' seconds
+        
+        Whatever comes in while the game is stopped to be moved (see gameMigration.py) waits until it's resumed
+        """
+        
+        if len(pending.missed_reactions):
+            return pending.missed_reactions.pop(0)
+        
+        timeout = pending.get_timeout(timeout)
+        if timeout is not None:
+            pending.deadline = asyncio.get_event_loop().time() + timeout
+        pending.waiting = True
+        
+        try:
+            result = await self.timers.wait_for(self.bot.wait_for("reaction_add", check = check), timeout)
+        except asyncio.TimeoutError:
+            result = None
+        
+        #(if the game is moved instead, this is cancelled and the new process picks the reaction up from the message)
+        await self.not_quiesced.wait()
+        pending.waiting = False
+        pending.deadline = None
+        
+        if result is None:
+            raise asyncio.TimeoutError()
+        return result
+    
+    async def pick_up_wait(self, channel, pending : gameMigration.PendingWait, check, is_counted):
+        """
+        fetches the message of a prompt/interrupt that was moved here from another process and queues up the reactions on it
+        that pass 'check' but that it hadn't counted yet ('is_counted' is True for a reaction it already counted)
+        
+        :return (discord.Message): its message (None if the message is gone, it's then sent again)
+        """
+        
+        try:
+            message = await channel.fetch_message(pending.message_id)
+        except discord.NotFound:
+            return None
+        
+        for reaction in message.reactions:
+            #the bot's own reactions are the choices
+            if reaction.count <= (1 if reaction.me else 0) or is_counted(reaction):
+                continue
+            
+            async for user in reaction.users():
+                if check(reaction, user):
+                    pending.missed_reactions.append((reaction, user))
+        
+        pending.message = message
+        return message
+    
+    async def export_game(self):
+        """
+        stops this game between commands and returns its state (see gameMigration.dump_state) so another process can take it over.
+        It stays stopped until it's released (it's been taken over) or resumed (it wasn't)
+        
+        Raises a gameMigration.MigrationError if it can't be moved
+        """
+        
+        if self.trace is not None:
+            raise gameMigration.MigrationError("The game is being traced and its trace couldn't be replayed if it moved")
+        if self.standby or self.quiesced:
+            raise gameMigration.MigrationError("The game is already being moved")
+        
+        self.quiesced = True
+        self.not_quiesced.clear()
+        
+        try:
+            #wait for every command to be waiting on its prompts/interrupt (or done)
+            loop = asyncio.get_event_loop()
+            give_up = loop.time() + gameMigration.QUIESCE_TIMEOUT
+            while not all(pending.is_waiting() for pending in self.pending_commands):
+                if loop.time() > give_up:
+                    raise gameMigration.MigrationError(f"The game was still in the middle of a command after {gameMigration.QUIESCE_TIMEOUT} seconds")
+                self.check_held_messages()
+                await asyncio.sleep(gameMigration.QUIESCE_POLL)
+            
+            self.check_held_messages()
+            async with self.game_lock:
+                live_board_id = None if self.live_board_message is None else self.live_board_message.id
+                
+                return gameMigration.dump_state({
+                    "game" : self.game,
+                    "commands" : list(self.pending_commands),
+                    "live_board" : (live_board_id, self.live_board_state, self.live_board_image_state),
+                    "pages" : list(self.page_turns.values()),
+                    "handled_messages" : list(self.handled_messages),
+                })
+        
+        except:
+            await self.resume_game()
+            raise
+    
+    async def import_game(self, dumped):
+        """
+        takes over a game exported by another process (see export_game). This game has to have been started in standby
+        
+        It carries on with the commands and page turning the game was in the middle of and then answers the messages it held
+        (except the ones the other process already answered)
+        """
+        
+        if not self.standby:
+            raise gameMigration.MigrationError("Only a game started in standby can take over another game")
+        
+        await self.bot.wait_until_ready()
+        state = await gameMigration.load_state(dumped, self.bot)
+        
+        live_board_id, live_board_state, live_board_image_state = state["live_board"]
+        if live_board_id is not None:
+            try:
+                self.live_board_message = await self.find_game_channel().fetch_message(live_board_id)
+                self.live_board_state = live_board_state
+                self.live_board_image_state = live_board_image_state
+            except discord.NotFound:
+                #someone deleted the board message so a new one is posted next time
+                pass
+        
+        #(nothing's been taken over yet, so the game carries on in the other process if this fails)
+        self.check_held_messages(state["handled_messages"])
+        
+        #the game made when this runner started never got going, so it's thrown out
+        self.game.kill_game()
+        self.game = state["game"]
+        self.game.on_migrated()
+        self.standby = False
+        
+        for pending in state["commands"]:
+            self.bot.loop.create_task(self.command_resumers[pending.command_name](pending))
+        
+        for pending_pages in state["pages"]:
+            self.bot.loop.create_task(self.resume_pages(pending_pages))
+        
+        await self.process_held_messages(set(state["handled_messages"]))
+    
+    def check_held_messages(self, handled = None):
+        """
+        raises a gameMigration.MigrationError if this game can't be sure of answering every message it's holding exactly once:
+        there are more than gameMigration.MESSAGE_HISTORY of them, or ('handled' being the ids of the messages the other
+        process answered, when taking over a game) some are older than any it remembers answering
+        """
+        
+        if len(self.held_messages) > gameMigration.MESSAGE_HISTORY:
+            raise gameMigration.MigrationError(f"More than {gameMigration.MESSAGE_HISTORY} messages came in while the game was being moved")
+        
+        #the other process only remembers the last messages it answered, so an older message might have been answered already
+        if (handled is not None) and (len(handled) >= gameMigration.MESSAGE_HISTORY):
+            oldest = min(handled)
+            if any(message.id < oldest for message in self.held_messages):
+                raise gameMigration.MigrationError(f"More than {gameMigration.MESSAGE_HISTORY} messages were answered while the game was being moved")
+    
+    async def resume_game(self):
+        """
+        carries on with a game stopped by export_game that wasn't taken over
+        """
+        
+        self.quiesced = False
+        self.not_quiesced.set()
+        
+        await self.process_held_messages()
+    
+    async def release(self):
+        """
+        lets go of a game that another process took over (it isn't killed since it's still going over there) and stops its bot
+        """
+        
+        for pending in list(self.pending_commands):
+            pending.task.cancel()
+        
+        for pending_pages in list(self.page_turns.values()):
+            pending_pages.task.cancel()
+        
+        self.held_messages.clear()
+        self.send_metrics()
+        await self.bot.logout()
+    
+    async def process_held_messages(self, handled = ()):
+        """
+        answers the messages held while the game was being moved, except the ones with their id in 'handled'
+        """
+        
+        held = list(self.held_messages)
+        self.held_messages.clear()
+        
+        #(each one is run on its own since a command can wait on its prompts for a long time)
+        for message in held:
+            if message.id not in handled:
+                self.bot.loop.create_task(self.on_message(message))
+    
+    async def update_live_board(self, game_channel, board : games.common.GameClasses.CommandResultLiveBoard):
+        """
+        edits the live board message to show 'board'
+        
+        Nothing is sent if the board hasn't changed since it was last shown. The message is only reposted (and re-pinned)
+        if the board image changed since discord can't replace the attachment of a message that's already been sent
+        """
+        
+        image = board.image
+        is_encoded = isinstance(image, games.common.GameClasses.EncodedImage)
+        if (not self.use_images) or (image is not None and not is_encoded and not os.path.isfile(image)):
+            image = None
+        
+        #an image file is considered changed whenever it's been rewritten
+        if image is None:
+            image_state = None
+        elif is_encoded:
+            image_state = (image.filename, hash(image.data))
+        else:
+            image_stat = os.stat(image)
+            image_state = (image, image_stat.st_mtime_ns, image_stat.st_size)
+        
+        state = board.state
+        if state is None:
+            state = (board.title, board.description)
+        state = (state, image_state)
+        
+        if (self.live_board_message is not None) and (state == self.live_board_state):
+            return
+        
+        embedding = discord.Embed(title = board.title, color = board.color)
+        if board.description is not None:
+            embedding.description = board.description
+        if image is not None:
+            embedding.set_image(url = f"attachment://{image.filename if is_encoded else os.path.basename(image)}")
+        
+        if (self.live_board_message is not None) and (image_state == self.live_board_image_state):
+            try:
+                await self.live_board_message.edit(embed = embedding)
+                self.live_board_state = state
+                return
+            except discord.NotFound:
+                #someone deleted the board message so post a new one
+                self.live_board_message = None
+        
+        kwargs = {"embed" : embedding}
+        if image is not None:
+            kwargs["file"] = messageBatcher.make_file(image)
+        
+        new_message = await game_channel.send(**kwargs)
+        
+        try:
+            await new_message.pin()
+        except discord.HTTPException:
+            #the bot might not have permission to pin messages. The board still works it just won't be pinned
+            pass
+        
+        if self.live_board_message is not None:
+            try:
+                await self.live_board_message.delete()
+            except discord.HTTPException:
+                pass
+        
+        self.live_board_message = new_message
+        self.live_board_state = state
+        self.live_board_image_state = image_state
+    
+    async def turn_pages(self, message, paged_message : messageBatcher.PagedMessage, page = None):
+        """
+        lets anyone flip through the pages of 'message' with reactions until no one has turned a page for the pages' timeout
+        
+        'page' is the page it's showing if it was moved here from another process (it already has its reactions then)
+        """
+        
+        previous_emoji = games.common.GameClasses.PREVIOUS_PAGE_EMOJI
+        next_emoji = games.common.GameClasses.NEXT_PAGE_EMOJI
+        page_count = len(paged_message.pages.pages)
+        
+        if page is None:
+            await message.add_reaction(previous_emoji)
+            await message.add_reaction(next_emoji)
+            page = 0
+        
+        def check(reaction, user):
+            return (reaction.message.id == message.id) and (user != self.bot.user) and (reaction.emoji in [previous_emoji, next_emoji])
+        
+        #keep track of it so it moves along with the game
+        pending = gameMigration.PendingPages(message.channel, message.id, paged_message, page)
+        pending.task = asyncio.current_task()
+        self.page_turns[message.id] = pending
+        
+        try:
+            while True:
+                try:
+                    reaction, user = await self.timers.wait_for(self.bot.wait_for("reaction_add", check = check), paged_message.pages.timeout)
+                except asyncio.TimeoutError:
+                    reaction = None
+                
+                #the pages don't change while the game is stopped to be moved
+                await self.not_quiesced.wait()
+                if reaction is None:
+                    break
+                
+                try:
+                    await message.remove_reaction(reaction, user)
+                except discord.HTTPException:
+                    #can't remove other people's reactions in a DM. They'll just have to unreact themselves
+                    pass
+                
+                if reaction.emoji == next_emoji:
+                    page = (page + 1) % page_count
+                else:
+                    page = (page - 1) % page_count
+                pending.page = page
+                
+                try:
+                    await message.edit(embed = paged_message.make_embed(page))
+                except discord.NotFound:
+                    return
+            
+            try:
+                await message.clear_reactions()
+            except discord.HTTPException:
+                pass
+        
+        finally:
+            self.page_turns.pop(message.id, None)
+    
+    async def resume_pages(self, pending : gameMigration.PendingPages):
+        """
+        carries on turning the pages of a message whose pages were being turned when the game was moved here from another process
+        """
+        
+        try:
+            message = await pending.channel.fetch_message(pending.message_id)
+        except discord.NotFound:
+            return
+        
+        await self.turn_pages(message, pending.paged_message, pending.page)
+    
     def make_kill_command(self):
     
         async def kill_function(ctx):
@@ -460,6 +1148,7 @@ class GameRunner:
             self.game.kill_game()
             
             await ctx.send(f"killing game with prefix {self.command_prefix}")
+            self.send_metrics()
             await self.bot.logout()
             
         kill_command = commands.Command(kill_function, name="killGame", help=f"Kill this game")
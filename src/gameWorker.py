@@ -0,0 +1,654 @@
+"""
+Runs games in long-lived worker processes that each host several games, and places new games on them by load
+
+Without workers every game gets a process of its own. With "WORKERS" turned on the host (discordBot) keeps a WorkerPool:
+
+    each worker (GameWorker) runs up to "GamesPerWorker" games on one event loop, each game with its own bot connection
+    every worker reports its load over its control pipe: the games it's running, the lag of its event loop and its RSS
+    a new game goes to the least loaded worker that has room (fewest games, then least loop lag, then least memory)
+    a worker whose loop lag is over "MaxLoopLag" seconds or whose RSS is over "MaxWorkerMB" doesn't get new games
+    a new worker is started when none has room, up to "MaxWorkers" (the number of CPUs if null)
+
+Whether or not workers are on, a game is refused once the host is running "MaxGames" games
+or its guild is already running "GuildQuota" games (null means no limit)
+
+A running game can be moved to another worker without ending it (see gameMigration.py), ex. to even out the load or to empty
+a worker before stopping it ('draining' it). A draining worker doesn't get new games
+
+The settings come from the "WORKERS" field of the settings (configure has to be called before any game is started)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import traceback
+import tracemalloc
+import collections
+from multiprocessing import Process, Pipe
+
+import metrics
+import sharding
+import gameControl
+import memoryReport
+import gameMigration
+from gameRunner import GameRunner
+
+DEFAULT_SETTINGS = {
+    "Enabled" : False,
+    "GamesPerWorker" : 8,
+    "MaxWorkers" : None,
+    "MaxLoopLag" : 0.5,
+    "MaxWorkerMB" : None,
+    "MaxGames" : None,
+    "GuildQuota" : None,
+}
+
+#how often (in seconds) a worker measures the lag of its event loop, and how many of the last measurements its load covers
+LAG_INTERVAL = 0.5
+LAG_SAMPLES = 20
+
+#how long (in seconds) the host waits for a worker's load or for it to start a game
+LOAD_TIMEOUT = 5
+START_TIMEOUT = 30
+
+_settings = dict(DEFAULT_SETTINGS)
+
+def configure(settings):
+    """
+    sets the worker and placement settings from the "WORKERS" settings
+    """
+
+    global _settings
+
+    _settings = dict(DEFAULT_SETTINGS)
+    _settings.update(settings)
+
+def get_settings():
+    return _settings
+
+def is_enabled():
+    return _settings.get("Enabled", False)
+
+class PlacementError(Exception):
+    """
+    A game can't be started (a limit was hit or no worker could take it)
+    """
+    pass
+
+def check_limits(running_games, guild_id, starting_games = None):
+    """
+    raises a PlacementError if a new game in the guild with id 'guild_id' would go over "MaxGames" or "GuildQuota"
+
+    :param running_games (Dict[str, dict]): the host's running games (each with its "guild_id")
+    :param starting_games (Dict[str, int]): {game id : guild id} of the games the host is starting (they count too)
+    """
+
+    starting_games = starting_games or {}
+
+    max_games = _settings.get("MaxGames")
+    if max_games is not None and len(running_games) + len(starting_games) >= max_games:
+        raise PlacementError(f"The bot is already running as many games as it can ({max_games}). Try again once a game has ended")
+
+    guild_quota = _settings.get("GuildQuota")
+    if guild_quota is not None:
+        guild_games = sum(1 for info in running_games.values() if info.get("guild_id") == guild_id)
+        guild_games += sum(1 for starting_guild_id in starting_games.values() if starting_guild_id == guild_id)
+        if guild_games >= guild_quota:
+            raise PlacementError(f"This server is already running {guild_games} games (the limit is {guild_quota}). End one to start another")
+
+########
+#Worker#
+########
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a sleep, which is how long everything on it is waiting to run
+
+    instance methods:
+
+    async .run(self)
+
+    .get_lag(self) -> float
+
+        the worst lag (in seconds) of the last LAG_SAMPLES measurements
+    """
+
+    def __init__(self):
+        self.samples = collections.deque(maxlen = LAG_SAMPLES)
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.samples.append(max(0.0, loop.time() - start - LAG_INTERVAL))
+
+    def get_lag(self):
+        return max(self.samples) if len(self.samples) else 0.0
+
+class GameWorker:
+    """
+    A worker process' games (see above). The host starts and stops games and asks for the worker's load over the control pipe
+
+    contructors:
+
+    __init__(self, worker_id : int, game_classes : Dict[str, type], token : str, logging_info : dict, metrics_queue : multiprocessing.Queue, control_connection : multiprocessing.connection.Connection)
+
+    instance methods:
+
+    .run(self)
+
+        runs the worker's event loop until it's stopped (by the memory watchdog)
+
+    instance fields:
+
+    runners (Dict[str, GameRunner]) : {game id : the runner of the game}
+
+    restarts (Set[str]) : The ids of the games that ended asking to be restarted, until the host picks them up
+
+    A game being moved here is started in standby and only counts as one of its games once it's taken over (see gameMigration.py)
+    """
+
+    def __init__(self, worker_id, game_classes, token, logging_info, metrics_queue, control_connection):
+        self.worker_id = worker_id
+        self.name = f"worker{worker_id}"
+        self.game_classes = game_classes
+        self.token = token
+        self.logging_info = logging_info
+        self.metrics_queue = metrics_queue
+
+        #the worker is forked from the host's running event loop, so it gets a new one
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        self.runners = {}
+        self.restarts = set()
+        self.exit_code = None
+
+        self.lag_monitor = LoopLagMonitor()
+        self.metrics = metrics.get_registry()
+
+        handlers = {
+            "start" : self.start_game, "stop" : self.stop_game, "load" : self.get_load, "profile" : self.profile, "memory" : self.memory_report,
+            "ready" : self.wait_until_ready, "export" : self.export_game, "import" : self.import_game, "resume" : self.resume_game, "release" : self.release_game,
+            "exit" : self.exit_worker,
+        }
+        self.control = gameControl.ControlServer(control_connection, handlers)
+        self.control.attach(self.loop)
+
+        #the memory limits are for the whole worker here instead of for each game
+        if memoryReport.get_limits().get("Tracemalloc"):
+            tracemalloc.start()
+        self.watchdog = memoryReport.MemoryWatchdog(self.name, self.make_memory_report, self.restart)
+
+    def run(self):
+        self.loop.create_task(self.lag_monitor.run())
+        self.loop.create_task(self.watchdog.run())
+        self.loop.create_task(self.report_metrics())
+
+        self.loop.run_forever()
+
+        if self.exit_code is not None:
+            sys.exit(self.exit_code)
+
+    async def start_game(self, game_id, game_name, guild, channel, command_prefix, use_images, debug, live_board, guild_id, shard, standby = False):
+        """
+        starts a game on this worker (returns once it's set up, it connects to discord in the background)
+
+        A game started in 'standby' waits to take over the game being moved here (see import_game)
+        """
+
+        if game_id in self.runners:
+            raise ValueError(f"{game_id} is already running on {self.name}")
+
+        bot = sharding.make_game_bot(command_prefix, shard)
+        runner = GameRunner(self.game_classes[game_name], self.token, guild, channel, command_prefix, self.logging_info, use_images, debug, live_board,
+                            game_guild_id = guild_id, shard = shard, bot = bot, run = False, memory_watchdog = False, standby = standby)
+
+        self.runners[game_id] = runner
+        self.loop.create_task(self.run_game(game_id, runner))
+
+    async def run_game(self, game_id, runner):
+        try:
+            await runner.bot.start(self.token)
+        except Exception:
+            print(f"{self.name}: {game_id} stopped with an error")
+            traceback.print_exc()
+            runner.game.kill_game()
+        finally:
+            runner.close()
+            #(a game stopped by the host was already taken out, and another game might have its id by now)
+            if self.runners.get(game_id) is runner:
+                del self.runners[game_id]
+
+            if runner.exit_code == memoryReport.RESTART_EXIT_CODE:
+                self.restarts.add(game_id)
+
+            self.send_metrics()
+
+    async def stop_game(self, game_id, abandon_move = False):
+        """
+        stops a game on this worker. With 'abandon_move' it's the copy of a game that was being moved here, which is let go
+        of without killing it if it took over the game anyway (the host gave up on the move and the game carries on where it was)
+        """
+
+        #it's taken out right away so the next load the host gets doesn't have it
+        runner = self.get_runner(game_id)
+        self.runners.pop(game_id)
+
+        if abandon_move and not runner.standby:
+            await runner.release()
+            return
+
+        runner.game.kill_game()
+        await runner.bot.logout()
+
+    async def get_load(self):
+        """
+        returns this worker's load (the restarted games are only reported once)
+        """
+
+        restarts = list(self.restarts)
+        self.restarts.clear()
+
+        games = [game_id for game_id, runner in self.runners.items() if not runner.standby]
+
+        return {"pid" : os.getpid(), "games" : games, "restarts" : restarts, "loop_lag" : self.lag_monitor.get_lag(), "rss" : memoryReport.get_rss()}
+
+    async def wait_until_ready(self, game_id):
+        await self.get_runner(game_id).bot.wait_until_ready()
+
+    async def export_game(self, game_id):
+        return await self.get_runner(game_id).export_game()
+
+    async def import_game(self, game_id, dumped):
+        await self.get_runner(game_id).import_game(dumped)
+
+    async def resume_game(self, game_id):
+        await self.get_runner(game_id).resume_game()
+
+    async def release_game(self, game_id):
+        #(like stop_game but the game isn't killed, another worker has it now)
+        runner = self.get_runner(game_id)
+        self.runners.pop(game_id)
+
+        await runner.release()
+
+    async def exit_worker(self):
+        """
+        ends this worker once it has no games left (ex. after it's been drained)
+        """
+
+        if len(self.runners):
+            raise ValueError(f"{self.name} is still running {len(self.runners)} games")
+
+        self.send_metrics()
+        #(stopped once the answer has been sent)
+        self.loop.call_soon(self.loop.stop)
+
+    async def profile(self, game_id, seconds, mode = "sample"):
+        return await self.get_runner(game_id).profile(seconds, mode)
+
+    async def memory_report(self, game_id, trace_seconds = 0):
+        return await self.get_runner(game_id).memory_report(trace_seconds)
+
+    def get_runner(self, game_id):
+        runner = self.runners.get(game_id)
+        if runner is None:
+            raise KeyError(f"{game_id} isn't running on {self.name}")
+        return runner
+
+    def make_memory_report(self):
+        return "\n\n".join(f"{game_id}:\n{memoryReport.make_report(runner.game, runner.bot)}" for game_id, runner in self.runners.items())
+
+    async def restart(self, reason):
+        """
+        restarts every game on this worker, then ends the worker (the host starts the games again, on other workers if they have room)
+        """
+
+        for game_id, runner in list(self.runners.items()):
+            #a game that's being moved here is just stopped, it's still going where it's coming from
+            if runner.standby:
+                await self.stop_game(game_id)
+            else:
+                await runner.restart("the worker it's running in is using too much memory")
+
+        while len(self.runners):
+            await asyncio.sleep(0.1)
+
+        self.exit_code = memoryReport.RESTART_EXIT_CODE
+        self.send_metrics()
+        self.loop.stop()
+
+    async def report_metrics(self):
+        while True:
+            await asyncio.sleep(metrics.REPORT_INTERVAL)
+            self.send_metrics()
+
+    def send_metrics(self):
+        self.metrics.set_gauge(metrics.RSS_BYTES, memoryReport.get_rss(), source = self.name)
+        self.metrics_queue.put((os.getpid(), self.metrics.snapshot()))
+
+def run_worker(worker_id, game_classes, token, logging_info, metrics_queue, control_connection):
+    """
+    the target of a worker process
+    """
+
+    GameWorker(worker_id, game_classes, token, logging_info, metrics_queue, control_connection).run()
+
+######
+#Host#
+######
+
+class WorkerGameControl:
+    """
+    Sends a game's control requests (ex. 'Admin Profile') to the worker it's running on, like a gameControl.ControlClient
+    """
+
+    def __init__(self, worker, game_id):
+        self.worker = worker
+        self.game_id = game_id
+
+    async def request(self, request, *args, timeout = 30):
+        return await self.worker.control.request(request, self.game_id, *args, timeout = timeout)
+
+class Worker:
+    """
+    The host's handle on a worker process
+
+    instance fields:
+
+    process (multiprocessing.Process) : The worker process
+
+    control (gameControl.ControlClient) : The host's end of its control pipe
+
+    games (Set[str]) : The ids of the games on it
+
+    starting (Set[str]) : The ids of the games it's starting
+
+    load (dict) : Its last load report (see GameWorker.get_load)
+
+    draining (bool) : Whether its games are being moved off of it (it doesn't get new games)
+    """
+
+    def __init__(self, worker_id, process, control):
+        self.worker_id = worker_id
+        self.process = process
+        self.control = control
+        self.games = set()
+        self.starting = set()
+        self.load = {"pid" : process.pid, "games" : [], "restarts" : [], "loop_lag" : 0.0, "rss" : 0}
+        self.started_at = time.monotonic()
+        self.draining = False
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def has_room(self, settings):
+        if self.draining:
+            return False
+        if len(self.games) + len(self.starting) >= settings["GamesPerWorker"]:
+            return False
+        max_lag = settings.get("MaxLoopLag")
+        if max_lag is not None and self.load["loop_lag"] > max_lag:
+            return False
+        max_mb = settings.get("MaxWorkerMB")
+        if max_mb is not None and self.load["rss"] > max_mb * 1024 * 1024:
+            return False
+        return True
+
+    def get_load_key(self):
+        return (len(self.games) + len(self.starting), self.load["loop_lag"], self.load["rss"])
+
+class WorkerPool:
+    """
+    The host's worker processes (see above)
+
+    contructors:
+
+    __init__(self, game_classes : Dict[str, type], token : str, logging_info : dict, metrics_queue : multiprocessing.Queue)
+
+    instance methods:
+
+    async .start_game(self, game_id : str, game_name : str, guild : str, channel : str, command_prefix : str, options : tuple, guild_id : int, shard : Tuple[int, int]) -> Worker
+
+        starts a game on the least loaded worker that has room (starting a new worker if none does) and returns the worker.
+        Raises a PlacementError if every worker is full
+
+    async .stop_game(self, worker : Worker, game_id : str)
+
+    async .migrate_game(self, source : Worker, game_id : str, game_name : str, guild : str, channel : str, command_prefix : str, options : tuple, guild_id : int, shard : Tuple[int, int], target : Worker) -> Worker
+
+        moves a running game from 'source' to 'target' (the least loaded other worker with room if None) without ending it
+        (see gameMigration.py) and returns the worker it's on now. Raises a PlacementError if it couldn't be moved (it keeps running on 'source')
+
+    async .stop_worker(self, worker : Worker)
+
+        ends a worker that has no games left (ex. one that's been drained)
+
+    async .refresh(self) -> Tuple[Set[str], Set[str]]
+
+        gets the load of every worker and returns (ids of the games that ended, ids of the games that asked to be restarted).
+        The games of a worker that's gone have ended (or asked to be restarted if the worker was restarted)
+
+    .shutdown(self)
+
+        stops every worker (and the games on them)
+
+    instance fields:
+
+    workers (Dict[int, Worker]) : {worker id : worker}
+
+    retired_pids (List[int]) : The pids of the workers that are gone since this was last emptied (for the metrics and the temp directory janitor)
+
+    moving (Set[str]) : The ids of the games being moved (they haven't ended when they leave their worker)
+    """
+
+    def __init__(self, game_classes, token, logging_info, metrics_queue):
+        self.game_classes = game_classes
+        self.token = token
+        self.logging_info = logging_info
+        self.metrics_queue = metrics_queue
+
+        self.workers = {}
+        self.next_worker_id = 0
+        self.retired_pids = []
+        self.moving = set()
+
+    def get_max_workers(self):
+        max_workers = _settings.get("MaxWorkers")
+        return max_workers if max_workers is not None else (os.cpu_count() or 1)
+
+    def spawn_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+
+        control_connection, worker_control_connection = Pipe()
+
+        process = Process(target = run_worker, args = (worker_id, self.game_classes, self.token, self.logging_info, self.metrics_queue, worker_control_connection))
+        process.start()
+
+        #the worker has its own copy of its end of the pipe now
+        worker_control_connection.close()
+
+        worker = Worker(worker_id, process, gameControl.ControlClient(control_connection))
+        self.workers[worker_id] = worker
+        print(f"Started worker {worker_id} (pid {process.pid})")
+
+        return worker
+
+    def choose_worker(self, exclude = None):
+        """
+        returns the least loaded worker (other than 'exclude') with room for another game, a new worker if none has room (None if there can't be another worker)
+        """
+
+        candidates = [worker for worker in self.workers.values() if worker is not exclude and worker.is_alive() and worker.has_room(_settings)]
+        if len(candidates):
+            return min(candidates, key = Worker.get_load_key)
+
+        #a draining worker is on its way out so it doesn't count
+        if sum(1 for worker in self.workers.values() if not worker.draining) < self.get_max_workers():
+            return self.spawn_worker()
+
+        return None
+
+    async def start_game(self, game_id, game_name, guild, channel, command_prefix, options, guild_id = None, shard = None):
+        worker = self.choose_worker()
+        if worker is None:
+            raise PlacementError(f"Every worker is full ({len(self.workers)} workers with up to {_settings['GamesPerWorker']} games each). Try again once a game has ended")
+
+        #count the game right away so games started at the same time are spread out
+        worker.starting.add(game_id)
+
+        try:
+            await worker.control.request("start", game_id, game_name, guild, channel, command_prefix, *options, guild_id, shard, timeout = START_TIMEOUT)
+        except gameControl.ControlError as e:
+            raise PlacementError(f"Worker {worker.worker_id} couldn't start the game: {e}")
+        finally:
+            worker.starting.discard(game_id)
+
+        worker.games.add(game_id)
+        return worker
+
+    async def stop_game(self, worker, game_id):
+        await worker.control.request("stop", game_id)
+
+    async def migrate_game(self, source, game_id, game_name, guild, channel, command_prefix, options, guild_id = None, shard = None, target = None):
+        if target is None:
+            target = self.choose_worker(exclude = source)
+        if target is None or target is source:
+            raise PlacementError(f"There's no other worker with room for the game ({len(self.workers)} workers with up to {_settings['GamesPerWorker']} games each)")
+
+        target.starting.add(game_id)
+        self.moving.add(game_id)
+
+        try:
+            #the new copy connects to discord before the game is stopped so the game is only stopped for as long as it takes to move it
+            try:
+                await target.control.request("start", game_id, game_name, guild, channel, command_prefix, *options, guild_id, shard, True, timeout = START_TIMEOUT)
+            except gameControl.ControlError as e:
+                raise PlacementError(f"Worker {target.worker_id} couldn't start the game: {e}")
+
+            try:
+                await target.control.request("ready", game_id, timeout = START_TIMEOUT)
+                dumped = await source.control.request("export", game_id, timeout = gameMigration.QUIESCE_TIMEOUT + START_TIMEOUT)
+            except gameControl.ControlError as e:
+                await self.stop_standby(target, game_id)
+                #(an export that timed out might have stopped the game just before it was cancelled)
+                await self.resume(source, game_id)
+                raise PlacementError(f"Couldn't stop the game to move it: {e}")
+
+            try:
+                await target.control.request("import", game_id, dumped, timeout = START_TIMEOUT)
+            except gameControl.ControlError as e:
+                #the game carries on where it was. The copy goes first since an import that timed out might have taken over just before it was cancelled
+                await self.stop_standby(target, game_id)
+                await self.resume(source, game_id)
+                raise PlacementError(f"Worker {target.worker_id} couldn't take over the game: {e}")
+
+            try:
+                await source.control.request("release", game_id)
+            except gameControl.ControlError as e:
+                #the game is running on the target either way
+                print(f"Couldn't release game {game_id} on worker {source.worker_id}: {e}")
+
+            source.games.discard(game_id)
+            target.games.add(game_id)
+
+        finally:
+            target.starting.discard(game_id)
+            self.moving.discard(game_id)
+
+        return target
+
+    async def stop_standby(self, worker, game_id):
+        try:
+            await worker.control.request("stop", game_id, True)
+        except gameControl.ControlError as e:
+            print(f"Couldn't stop the copy of game {game_id} on worker {worker.worker_id}: {e}")
+
+    async def resume(self, worker, game_id):
+        try:
+            await worker.control.request("resume", game_id)
+        except gameControl.ControlError as e:
+            print(f"Couldn't resume game {game_id} on worker {worker.worker_id}: {e}")
+
+    async def stop_worker(self, worker):
+        await worker.control.request("exit")
+
+        #(joined off the event loop, it takes a moment to exit)
+        await asyncio.get_event_loop().run_in_executor(None, worker.process.join, 5)
+        if worker.process.is_alive():
+            worker.process.terminate()
+
+        self.workers.pop(worker.worker_id, None)
+        self.retired_pids.append(worker.pid)
+
+    async def refresh(self):
+        ended = set()
+        restarts = set()
+
+        for worker_id, worker in list(self.workers.items()):
+
+            if not worker.is_alive():
+                #a prune running at the same time might have taken it out (and restarted its games) already
+                if self.workers.pop(worker_id, None) is None:
+                    continue
+                self.retired_pids.append(worker.pid)
+
+                if worker.process.exitcode == memoryReport.RESTART_EXIT_CODE:
+                    restarts.update(worker.games)
+                else:
+                    ended.update(worker.games)
+                    print(f"Worker {worker_id} (pid {worker.pid}) stopped with exit code {worker.process.exitcode}")
+                continue
+
+            #a worker busy with a long request (ex. 'Admin Profile') keeps its last load until it's done
+            if worker.control.is_busy():
+                continue
+
+            try:
+                load = await worker.control.request("load", timeout = LOAD_TIMEOUT)
+            except gameControl.ControlError as e:
+                print(f"Couldn't get the load of worker {worker_id}: {e}")
+                continue
+
+            worker.load = load
+            restarts.update(load["restarts"])
+            ended.update(worker.games - set(load["games"]) - set(load["restarts"]) - self.moving)
+            worker.games = set(load["games"])
+
+        return ended, restarts
+
+    def get_worker(self, game_id):
+        return next((worker for worker in self.workers.values() if game_id in worker.games), None)
+
+    def shutdown(self):
+        for worker in self.workers.values():
+            worker.process.terminate()
+        for worker in self.workers.values():
+            worker.process.join(5)
+            self.retired_pids.append(worker.pid)
+        self.workers = {}
+
+    def format_load(self):
+        """
+        returns a line on the load of each worker (for 'Admin Workers')
+        """
+
+        if len(self.workers) == 0:
+            return "No workers are running"
+
+        lines = []
+        for worker_id, worker in sorted(self.workers.items()):
+            line = f"Worker {worker_id} (pid {worker.pid}) | Games: {len(worker.games)}/{_settings['GamesPerWorker']} | Loop Lag: {worker.load['loop_lag'] * 1000:.0f} ms | RSS: {memoryReport.format_mb(worker.load['rss'])}"
+            if worker.draining:
+                line += " | Draining"
+            lines.append(line)
+        return "\n\n".join(lines)
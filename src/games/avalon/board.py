@@ -1,47 +1,33 @@
-import numpy as np
-import imageio  
 import os
 
+from .logs import GameLog
+
 from ..common import GameClasses
 from ..common import GameExceptions
+from ..common import utils
+from ..common.ImageCache import ImageCache
 
-CURRENT_BOARD_IMAGE = "current_board.jpg"
-
-def merge_image_files(image_files, output_file):
+#the order of the revealed cards doesn't matter, so every game in the process shares one image per (passes, fails)
+_mission_reveal_cache = ImageCache()
+_board_cache = ImageCache(max_size = 128)
 
-    images = [imageio.imread(f) for f in image_files]
-    
-    output_image = np.concatenate(images, axis=1)
-    
-    imageio.imsave(output_file, output_image)
-    
-def cut_image_file(image_file, cuts, output_file_base="output.jpg"):
-    
-    output_file_name, output_file_ext = os.path.splitext(output_file_base)
+def create_board(base_directory, player_count, mission_results):
+    """
+    returns the image of the board for 'mission_results' (None if there are no board images for this player count)
     
-    image = imageio.imread(image_file)
+    There are only a few dozen possible boards per player count so every game in the process shares them
     
-    left_cut = [0] + cuts
-    right_cut = cuts + [image.shape[1]]
-    
-    images = [image[:, start:finish, :] for start, finish in zip(left_cut, right_cut)]
-    
-    [imageio.imsave(f"{output_file_name}_{i}.{output_file_ext}", img) for i, img in enumerate(images)]
-    
-def create_board(temp_directory, base_directory, player_count, mission_results):
+    :return (EncodedImage): The encoded board image
+    """
 
     board_directory = os.path.join(base_directory, "boards", f"{player_count}_players")
     
-    board_file = os.path.join(temp_directory,CURRENT_BOARD_IMAGE)
+    if not os.path.isdir(board_directory):
+        return None
     
-    if os.path.isfile(board_file):
-        os.remove(board_file)
+    files = [os.path.join(board_directory, f"game_board_{player_count}_{i}_{result}.jpg") for i, result in enumerate(mission_results)]
     
-    if os.path.isdir(board_directory):
-    
-        files = [os.path.join(board_directory, f"game_board_{player_count}_{i}_{result}.jpg") for i, result in enumerate(mission_results)]
-    
-        merge_image_files(files, board_file)
+    return _board_cache.get(tuple(files), lambda: utils.merge_encoded_images(files, f"board_{player_count}", "Avalon", "channel"))
         
 class GameBoard():
     
@@ -82,23 +68,29 @@ class GameBoard():
         self.failed_mission_count = 0
         self.passed_mission_count = 0
         
-        self.mission_log = ["================================"]
-        self.vote_log = ["================================"]
+        #typed mission/vote records. They're only turned into text when someone asks for the logs
+        self.log = GameLog()
         
         self.results = [self._current_token] + [self._empty_token for m in range(0, len(self.get_mission_counts()) - 1)]
         
         self.render_board()
     
     def generate_board(self, channel = None):
+        """
+        returns the messages showing the current board
+        
+        If 'channel' is None the board is wrapped in a CommandResultLiveBoard so the GameRunner can edit it in place (if enabled)
+        Otherwise the board is sent to 'channel' as normal messages
+        """
     
         main_text = "\n".join(self.generate_mission_info())
-        main_image = os.path.join(self.temp_dir, CURRENT_BOARD_IMAGE)
+        main_image = self.board_image
     
         result = []
     
         result.append(GameClasses.CommandResultEmbedding(title = "Board Summary:", description=main_text, destination = channel))
     
-        if os.path.isfile(main_image):
+        if main_image is not None:
             result.append(GameClasses.CommandResultMessage(image=main_image, destination = channel))
         
         sub_board_info = [
@@ -109,7 +101,13 @@ class GameBoard():
         
         result.append(GameClasses.CommandResultEmbedding(title = "Board Summary:", description="\n".join(sub_board_info), destination = channel))
         
-        return result
+        if channel is not None:
+            return result
+        
+        live_board_text = main_text + "\n\n" + "\n".join(sub_board_info)
+        state = (tuple(self.results), self.vote_track)
+        
+        return [GameClasses.CommandResultLiveBoard(title = "Board Summary:", description = live_board_text, image = main_image, state = state, fallback = result)]
     
     def render_board(self):
     
@@ -122,7 +120,7 @@ class GameBoard():
     
         mission_results = [translation_dict[r] for r in self.results]
         
-        create_board(self.temp_dir, self.avalon_resources_folder, self.player_count, mission_results)
+        self.board_image = create_board(self.avalon_resources_folder, self.player_count, mission_results)
         
     def generate_mission_info(self):
         return [f"Mission #{m+1} | Player Count = {count} | Fails Required: {self.number_fails_required(m)} | {self.results[m]}" for m, count in enumerate(self.get_mission_counts())]
@@ -151,14 +149,28 @@ class GameBoard():
     def set_mission_results(self, mission, results):
         self.results[mission] = results
         
-    def create_mission_reveal(self, temp_directory, mission_cards, file_name = "current_mission.jpg"):
-
-        other_directory = os.path.join(self.avalon_resources_folder, "other")
-    
-        mission_card_file = os.path.join(temp_directory, file_name)
+    def get_mission_reveal(self, passes, fails):
+        """
+        returns the image of the revealed mission cards (passes then fails)
+        
+        The image is only composed the first time it's needed in the process
+        
+        :return (EncodedImage): The encoded mission reveal image
+        """
     
-        if os.path.isfile(mission_card_file):
-            os.remove(mission_card_file)
+        other_directory = os.path.join(self.avalon_resources_folder, "other")
+        
+        def build():
+            files = [os.path.join(other_directory, "pass.jpg")] * passes + [os.path.join(other_directory, "fail.jpg")] * fails
+            return utils.merge_encoded_images(files, f"mission_{passes}_{fails}", "Avalon", "channel")
+        
+        return _mission_reveal_cache.get((other_directory, passes, fails), build)
+        
+    def warm_mission_reveals(self):
+        """
+        builds every mission reveal image this board can need so resolving a mission doesn't do any image work
+        """
         
-        files = [os.path.join(other_directory, f"{card}.jpg") for card in mission_cards]
-        merge_image_files(files, mission_card_file)
\ No newline at end of file
+        for team_size in set(self.get_mission_counts()):
+            for fails in range(team_size + 1):
+                self.get_mission_reveal(team_size - fails, fails)
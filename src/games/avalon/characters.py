@@ -0,0 +1,447 @@
+import os
+import json
+import random
+import itertools
+import numpy as np
+
+from ..common import GameExceptions
+
+RESOURCES_FOLDER = os.path.join("..", "resources")
+
+CHARACTERS_FOLDER = os.path.join(RESOURCES_FOLDER, "avalon", "characters")
+
+#any .json files in here are loaded as extra characters (see load_custom_characters)
+CUSTOM_CHARACTERS_FOLDER = os.path.join(CHARACTERS_FOLDER, "custom")
+
+TEAMS = ["Team Good", "Team Evil"]
+
+class VisibilityRule:
+    """
+    Describes who a character sees at the start of the game
+
+    contructors:
+
+    __init__(self, description : str, teams : List[str], names : List[str], unless : List[str], count_messages : Dict[int -> str])
+
+        description (str) : The line shown above the players this character sees (ex. "You know the following are members of Team Evil")
+
+        teams (List[str]) : This character sees characters on these teams (if None, characters on any team)
+
+        names (List[str]) : This character sees characters with these names (if None, characters with any name)
+
+        unless (List[str]) : This character doesn't see characters with any of these flags set (ex. 'hidden_from_merlin').
+                             The player is told those characters are unknown to them
+
+        count_messages (Dict[int -> str]) : An extra line shown depending on how many players are seen (ex. {1 : "This player is Merlin!"})
+
+    instance methods:
+
+    .matches(self, character : AvalonCharacter) -> bool
+
+        returns True iff a character with this rule sees 'character'
+
+    .is_hidden(self, character : AvalonCharacter) -> bool
+
+        returns True iff 'character' would be seen, but one of the 'unless' flags hides it
+    """
+
+    def __init__(self, description, teams = None, names = None, unless = None, count_messages = None):
+
+        if unless is None:
+            unless = []
+        if count_messages is None:
+            count_messages = {}
+
+        self.description = description
+        self.teams = teams
+        self.names = names
+        self.unless = unless
+        self.count_messages = {int(count) : message for count, message in count_messages.items()}
+
+    def selects(self, character):
+        return (self.teams is None or character.team in self.teams) and (self.names is None or character.name in self.names)
+
+    def matches(self, character):
+        return self.selects(character) and not any([getattr(character, flag, False) for flag in self.unless])
+
+    def is_hidden(self, character):
+        return self.selects(character) and not self.matches(character)
+
+#Team Evil knows who's on Team Evil (except for characters hidden from evil)
+EVIL_VISIBILITY = VisibilityRule(description = "You know the following are members of Team Evil",
+                                 teams = ["Team Evil"],
+                                 unless = ["hidden_from_evil"])
+
+class AvalonCharacter:
+    def __init__(self, name, team, description, requires = None, prohibits = None, required_by = None, character_cards = None, special_character = False, hidden_from_merlin = False, hidden_from_evil = False, visibility = None):
+
+        self.name = name
+        self.team = team
+        self.description = description
+
+        #dependancies on other characters
+        if requires is None:
+            requires = set()
+        if prohibits is None:
+            prohibits = set()
+        if required_by is None:
+            required_by = set()
+
+        self.requires = requires
+        self.prohibits = prohibits
+        self.required_by = required_by
+
+        #location of character card files
+        if character_cards is None:
+            character_cards = [os.path.join(CHARACTERS_FOLDER, "unknown.jpg")]
+
+        self.character_cards = character_cards
+
+        #whether this is a special character or a Vanilla Character
+        self.special_character = special_character
+
+        #special rules
+        self.hidden_from_merlin = hidden_from_merlin
+        self.hidden_from_evil = hidden_from_evil
+
+        #who this character sees at the start of the game (None if they don't see anyone)
+        self.visibility = visibility
+
+    def get_random_character_card(self, rng = random):
+
+        return rng.choice(self.character_cards)
+
+    def __str__(self):
+        return str(self.name)
+
+    def __reduce__(self):
+        #the game matches characters by identity, so a pickled character (ex. in a game moved to another process) comes back as the game's own
+        from .game import Avalon
+        return (Avalon.get_character_from_name, (self.name,))
+
+def load_custom_characters(folder = CUSTOM_CHARACTERS_FOLDER):
+    """
+    loads the characters from every .json file in 'folder'
+
+    Each file holds a list of characters with the same fields as AvalonCharacter. ex:
+
+    [
+        {
+            "name" : "Lancelot",
+            "team" : "Team Good",
+            "description" : "Just a Loyal Servant with a fancy card",
+            "requires" : ["Merlin"],
+            "character_cards" : ["Lancelot.jpg"],
+            "special_character" : true
+        }
+    ]
+
+    'requires', 'prohibits' and 'required_by' are lists of character names
+    and the paths in 'character_cards' are relative to the .json file
+
+    'visibility' is either "evil" (to see Team Evil like the other evil characters)
+    or an object with the same fields as VisibilityRule. ex:
+
+        "visibility" : {"description" : "You see the following players", "names" : ["Merlin"], "count_messages" : {"1" : "This player is Merlin!"}}
+
+    :param folder (str): The folder to look in. If it doesn't exist no characters are loaded
+    :return (List[AvalonCharacter]): The characters that were loaded
+    """
+
+    characters = []
+
+    if not os.path.isdir(folder):
+        return characters
+
+    for file_name in sorted(os.listdir(folder)):
+
+        if not file_name.endswith(".json"):
+            continue
+
+        file_path = os.path.join(folder, file_name)
+
+        try:
+            with open(file_path) as character_file:
+                character_data = json.load(character_file)
+
+            for data in character_data:
+                data = dict(data)
+
+                for field in ["requires", "prohibits", "required_by"]:
+                    if field in data:
+                        data[field] = set(data[field])
+
+                if "character_cards" in data:
+                    data["character_cards"] = [os.path.join(folder, card) for card in data["character_cards"]]
+
+                if data.get("visibility") == "evil":
+                    data["visibility"] = EVIL_VISIBILITY
+                elif data.get("visibility") is not None:
+                    data["visibility"] = VisibilityRule(**data["visibility"])
+
+                characters.append(AvalonCharacter(**data))
+
+        except (ValueError, TypeError) as e:
+            raise GameExceptions.DiscordGameError(f"Could not load custom Avalon characters from '{file_path}': {e}")
+
+    return characters
+
+class CharacterGraph:
+    """
+    The dependancies between the Avalon characters compiled once so compositions can be checked without searching the character list
+
+    Each special character gets a bit, so a set of special characters (a "composition") is just an int and
+    adding/removing/checking characters are a couple of bitwise operations
+
+    contructors:
+
+    __init__(self, characters : List[AvalonCharacter], team_evil_counts : Dict[int -> int])
+
+        characters (List[AvalonCharacter]) : Every character that can be in the game
+
+        team_evil_counts (Dict[int -> int]) : Maps each supported player count to how many of those players are on Team Evil
+
+    instance methods:
+
+    .get_character(self, character_name : str) -> AvalonCharacter
+
+    .add(self, composition : Set[AvalonCharacter], character : AvalonCharacter) -> (Set, List[str], List[str])
+
+        returns the new composition after adding 'character' and the names of the characters that also had to be added/removed
+
+    .remove(self, composition : Set[AvalonCharacter], character : AvalonCharacter) -> (Set, List[str])
+
+        returns the new composition after removing 'character' and the names of the other characters that had to be removed
+
+    .get_problems(self, composition : Set[AvalonCharacter], player_count : int) -> List[str]
+
+        returns why a composition can't be played with 'player_count' players (an empty list if it can)
+
+    .suggest(self, composition : Set[AvalonCharacter], player_count : int, count : int) -> List[List[str]]
+
+        returns the valid compositions for 'player_count' players that are the fewest changes away from 'composition'
+
+    instance fields:
+
+    characters (Dict[str -> AvalonCharacter]) : Every character by name
+
+    special_characters (List[AvalonCharacter]) : The special characters in the order of their bits
+
+    valid_compositions (Dict[int -> List[int]]) : The valid compositions (as bitmasks) for each player count
+
+    visibility_table (np.ndarray) : visibility_table[i, j] is True iff character i sees character j (in the order of 'characters')
+
+    hidden_table (np.ndarray) : hidden_table[i, j] is True iff character j is hidden from character i by one of its 'unless' flags
+    """
+
+    def __init__(self, characters, team_evil_counts):
+
+        self.characters = {}
+        for character in characters:
+            if character.name in self.characters:
+                raise GameExceptions.DiscordGameError(f"Two Avalon characters are named '{character.name}'")
+            if character.team not in TEAMS:
+                raise GameExceptions.DiscordGameError(f"Character '{character}' has unknown team: {character.team}")
+            self.characters[character.name] = character
+
+        self.character_index = {character.name : i for i, character in enumerate(characters)}
+
+        self.special_characters = [character for character in characters if character.special_character]
+        self.bits = {character.name : 1 << i for i, character in enumerate(self.special_characters)}
+
+        self.team_evil_counts = dict(team_evil_counts)
+
+        #direct dependancies as bitmasks
+        requires = {}
+        prohibits = {}
+        for character in self.special_characters:
+            requires[character.name] = self.get_mask(character.requires, character)
+            prohibits[character.name] = self.get_mask(character.prohibits, character)
+
+        #everything that (directly or indirectly) needs a character has to go with it
+        #('required_by' is also honored for any extra links only written in that direction)
+        needed_by = {character.name : self.get_mask(character.required_by, character) for character in self.special_characters}
+        for character in self.special_characters:
+            for name in self.get_names(requires[character.name]):
+                needed_by[name] |= self.bits[character.name]
+
+        self.requires_closure = {character.name : self.get_closure(requires, character.name) for character in self.special_characters}
+        self.required_by_closure = {character.name : self.get_closure(needed_by, character.name) for character in self.special_characters}
+
+        #prohibitions go both ways
+        self.prohibits = dict(prohibits)
+        for character in self.special_characters:
+            for name in self.get_names(prohibits[character.name]):
+                self.prohibits[name] |= self.bits[character.name]
+
+        self.evil_mask = self.get_mask([character for character in self.special_characters if character.team == "Team Evil"])
+        self.good_mask = self.get_mask([character for character in self.special_characters if character.team == "Team Good"])
+
+        #work out who sees who once for every pair of characters, so setting up a game is just indexing into these
+        self.visibility_table = np.zeros((len(characters), len(characters)), dtype = bool)
+        self.hidden_table = np.zeros((len(characters), len(characters)), dtype = bool)
+        for i, viewer in enumerate(characters):
+            if viewer.visibility is not None:
+                for j, character in enumerate(characters):
+                    self.visibility_table[i, j] = viewer.visibility.matches(character)
+                    self.hidden_table[i, j] = viewer.visibility.is_hidden(character)
+
+        #precompute every valid composition for each player count
+        closed_compositions = [mask for mask in range(1 << len(self.special_characters)) if self.is_closed(mask)]
+
+        self.valid_compositions = {}
+        for player_count, evil_count in self.team_evil_counts.items():
+            good_count = player_count - evil_count
+            self.valid_compositions[player_count] = [mask for mask in closed_compositions
+                                                     if bin(mask & self.evil_mask).count("1") <= evil_count
+                                                     and bin(mask & self.good_mask).count("1") <= good_count]
+
+    def get_mask(self, characters, referenced_by = None):
+        mask = 0
+        for character in characters:
+            name = str(character)
+            if name not in self.bits:
+                if referenced_by is not None:
+                    raise GameExceptions.DiscordGameError(f"Character '{referenced_by}' refers to unknown special character: {name}")
+                raise GameExceptions.DiscordGameError(f"Requested character name not found: {name}")
+            mask |= self.bits[name]
+        return mask
+
+    def get_closure(self, edges, character_name):
+        """
+        returns the bitmask of every character reachable from 'character_name' following 'edges' (not including itself)
+        """
+
+        closure = 0
+        to_visit = edges[character_name]
+        while to_visit:
+            closure |= to_visit
+            reachable = 0
+            for name in self.get_names(to_visit):
+                reachable |= edges[name]
+            to_visit = reachable & ~closure
+
+        return closure & ~self.bits[character_name]
+
+    def get_names(self, mask):
+        return [character.name for character in self.special_characters if mask & self.bits[character.name]]
+
+    def get_characters(self, mask):
+        return {character for character in self.special_characters if mask & self.bits[character.name]}
+
+    def get_character(self, character_name):
+        character = self.characters.get(character_name)
+
+        if character is None:
+            raise GameExceptions.DiscordGameError(f"Requested character name not found: {character_name}")
+
+        return character
+
+    def is_special_character(self, character_name):
+        return character_name in self.bits
+
+    def is_closed(self, mask):
+        """
+        returns True iff every character in the composition has its requirements and none of them prohibit each other
+        """
+
+        for name in self.get_names(mask):
+            if self.requires_closure[name] & ~mask:
+                return False
+            if self.prohibits[name] & mask:
+                return False
+
+        return True
+
+    def add(self, composition, character):
+
+        mask = self.get_mask(composition)
+        bit = self.bits[character.name]
+
+        added = (bit | self.requires_closure[character.name]) & ~mask
+        new_mask = mask | added
+
+        #remove anything prohibited by the new characters (and whatever needed those)
+        removed = 0
+        for name in self.get_names(added):
+            removed |= self.prohibits[name] & new_mask
+        for name in self.get_names(removed):
+            removed |= self.required_by_closure[name] & new_mask
+        new_mask &= ~removed
+
+        return self.get_characters(new_mask), self.get_names(added & ~bit), self.get_names(removed)
+
+    def remove(self, composition, character):
+
+        mask = self.get_mask(composition)
+        bit = self.bits[character.name]
+
+        removed = self.required_by_closure[character.name] & mask & ~bit
+        new_mask = mask & ~bit & ~removed
+
+        return self.get_characters(new_mask), self.get_names(removed)
+
+    def is_supported_player_count(self, player_count):
+        return player_count in self.valid_compositions
+
+    def get_problems(self, composition, player_count):
+
+        mask = self.get_mask(composition)
+        problems = []
+
+        if not self.is_supported_player_count(player_count):
+            problems.append(f"Avalon needs between {min(self.team_evil_counts)} and {max(self.team_evil_counts)} players (there are {player_count})")
+            return problems
+
+        evil_count = self.team_evil_counts[player_count]
+        good_count = player_count - evil_count
+
+        evil_specials = bin(mask & self.evil_mask).count("1")
+        good_specials = bin(mask & self.good_mask).count("1")
+
+        if evil_specials > evil_count:
+            problems.append(f"Too many evil special characters for {player_count} players: {evil_specials} (max {evil_count})")
+        if good_specials > good_count:
+            problems.append(f"Too many good special characters for {player_count} players: {good_specials} (max {good_count})")
+
+        if not self.is_closed(mask):
+            problems.append("The special characters don't meet each others requirements")
+
+        return problems
+
+    def get_visibility_matrix(self, characters):
+        """
+        returns who sees who for the characters dealt to the players
+
+        :param characters (List[AvalonCharacter]): the character of each player (in seat order)
+        :return (np.ndarray): a boolean (player x player) matrix. [i, j] is True iff player i sees player j
+        """
+
+        indices = [self.character_index[character.name] for character in characters]
+        return self.visibility_table[np.ix_(indices, indices)]
+
+    def get_hidden_characters(self, viewer, characters):
+        """
+        returns the characters in play that would be seen by 'viewer' if they weren't hidden from it
+        """
+
+        row = self.hidden_table[self.character_index[viewer.name]]
+
+        hidden = []
+        for character in characters:
+            if row[self.character_index[character.name]] and character not in hidden:
+                hidden.append(character)
+
+        return hidden
+
+    def suggest(self, composition, player_count, count = 3):
+
+        if not self.is_supported_player_count(player_count):
+            return []
+
+        mask = self.get_mask(composition)
+
+        #fewest changes first, then keep as many special characters as possible
+        ranked = sorted(self.valid_compositions[player_count], key = lambda valid: (bin(valid ^ mask).count("1"), -bin(valid).count("1"), valid))
+
+        return [self.get_names(valid) for valid in itertools.islice(ranked, count)]
@@ -1,64 +1,23 @@
 import os
-import shutil
-import random
 from emoji import EMOJI_ALIAS_UNICODE as EMOJIS
 
 from .board import GameBoard
 from .players import AvalonPlayer
+from .characters import AvalonCharacter, CharacterGraph, VisibilityRule, EVIL_VISIBILITY, load_custom_characters
+from .logs import VoteRecord, MissionRecord
 
 from ..common import GameBase
 from ..common import GameClasses
 from ..common import GameExceptions
 from ..common import utils
+from ..common import TempDirs
 
 RESOURCES_FOLDER = os.path.join("..", "resources")
   
 AVALON_FOLDER=os.path.join(RESOURCES_FOLDER, "avalon")
 CHARACTERS_FOLDER = os.path.join(RESOURCES_FOLDER, "avalon", "characters")
 
-TEMP_BASE = os.path.join(RESOURCES_FOLDER, "temp")
-if not os.path.isdir(TEMP_BASE):
-    os.mkdir(TEMP_BASE)
 
-class AvalonCharacter:
-    def __init__(self, name, team, description, requires = None, prohibits = None, required_by = None, character_cards = None, special_character = False, hidden_from_merlin = False, hidden_from_evil = False):
-   
-        self.name = name
-        self.team = team
-        self.description = description
-        
-        #dependancies on other characters
-        if requires is None:
-            requires = set()
-        if prohibits is None:
-            prohibits = set()
-        if required_by is None:
-            required_by = set()
-        
-        self.requires = requires
-        self.prohibits = prohibits
-        self.required_by = required_by
-        
-        #location of character card files
-        if character_cards is None:
-            character_cards = [os.path.join(CHARACTERS_FOLDER, "unknown.jpg")]
-        
-        self.character_cards = character_cards
-        
-        #whether this is a special character or a Vanilla Character
-        self.special_character = special_character
-        
-        #special rules
-        self.hidden_from_merlin = hidden_from_merlin
-        self.hidden_from_evil = hidden_from_evil
-        
-    def get_random_character_card(self):
-    
-        return random.choice(self.character_cards)
-        
-    def __str__(self):
-        return str(self.name)
-        
 DiscordGame = GameBase.getBaseGameClass()
 class Avalon(DiscordGame):
     
@@ -75,7 +34,8 @@ class Avalon(DiscordGame):
         AvalonCharacter(name = "Vanilla Evil",
                         team = "Team Evil",
                         description = "Minion of Mordred (Team Evil)",
-                        character_cards = [os.path.join(CHARACTERS_FOLDER, f"Minion{i}.jpg") for i in [1,2,3]]
+                        character_cards = [os.path.join(CHARACTERS_FOLDER, f"Minion{i}.jpg") for i in [1,2,3]],
+                        visibility = EVIL_VISIBILITY
                         ),
     
         AvalonCharacter(name = "Merlin",
@@ -84,7 +44,10 @@ class Avalon(DiscordGame):
                         requires = {"Assassin"},
                         required_by = {"Assassin", "Percival", "Morgana", "Mordred", "Oberon", "Mordroberon"},
                         character_cards = [os.path.join(CHARACTERS_FOLDER, "Merlin.jpg")],
-                        special_character = True
+                        special_character = True,
+                        visibility = VisibilityRule(description = "You know the following are members of Team Evil",
+                                                    teams = ["Team Evil"],
+                                                    unless = ["hidden_from_merlin"])
                         ),
                         
         AvalonCharacter(name = "Assassin",
@@ -93,7 +56,8 @@ class Avalon(DiscordGame):
                         requires = {"Merlin"},
                         required_by = {"Merlin", "Percival", "Morgana", "Mordred", "Oberon", "Mordroberon"},
                         character_cards = [os.path.join(CHARACTERS_FOLDER, "Assassin.jpg")],
-                        special_character = True
+                        special_character = True,
+                        visibility = EVIL_VISIBILITY
                         ),
                         
         AvalonCharacter(name = "Percival",
@@ -102,7 +66,10 @@ class Avalon(DiscordGame):
                         requires = {"Merlin", "Assassin"},
                         required_by = {"Morgana"},
                         character_cards = [os.path.join(CHARACTERS_FOLDER, "Percival.jpg")],
-                        special_character = True
+                        special_character = True,
+                        visibility = VisibilityRule(description = "You see the following players",
+                                                    names = ["Merlin", "Morgana"],
+                                                    count_messages = {1 : "This player is Merlin!", 2 : "One of them in Merlin, the other Morgana"})
                         ),
 
         AvalonCharacter(name = "Morgana",
@@ -110,7 +77,8 @@ class Avalon(DiscordGame):
                         description = "Appears as Merlin to Percival",
                         requires = {"Merlin", "Assassin", "Percival"},
                         character_cards = [os.path.join(CHARACTERS_FOLDER, "Morgana.jpg")],
-                        special_character = True
+                        special_character = True,
+                        visibility = EVIL_VISIBILITY
                         ),
 
         AvalonCharacter(name = "Mordred",
@@ -120,7 +88,8 @@ class Avalon(DiscordGame):
                         prohibits = {"Mordroberon"},
                         character_cards = [os.path.join(CHARACTERS_FOLDER, "Mordred.jpg")],
                         special_character = True,
-                        hidden_from_merlin = True
+                        hidden_from_merlin = True,
+                        visibility = EVIL_VISIBILITY
                         ),
 
         AvalonCharacter(name = "Oberon",
@@ -143,7 +112,10 @@ class Avalon(DiscordGame):
                         hidden_from_merlin = True,
                         hidden_from_evil = True
                         )                          
-    ]
+    ] + load_custom_characters()
+    
+    #the character dependancies and every valid composition for each player count, worked out once
+    _character_graph = CharacterGraph(_all_characters, GameBoard._team_evil_counts)
     
     _all_enable_rules = {
     
@@ -180,6 +152,13 @@ class Avalon(DiscordGame):
             "enable_message" : "Button Prompts Enabled! (Now most in game actions will be controlled via Emoji Buttons)",
             "disable_message" : "Button Prompts Disabled!",
             "default" : True
+        },
+        
+        "turn_clock" : {
+            "description" : "Enable to have a player's vote count as 'reject' if their Vote Prompt times out (instead of waiting for them to vote manually)",
+            "enable_message" : "Turn Clock Enabled! (Vote Prompts that time out will automatically 'reject')",
+            "disable_message" : "Turn Clock Disabled!",
+            "default" : False
         }
     
     }
@@ -228,6 +207,8 @@ class Avalon(DiscordGame):
     _stab_prompt_timeout = 300.0 #Give them 2 min to vote
     
     def __init__(self, debug):
+        super().__init__()
+        
         self.debug = debug
     
         self.state = "new_game"
@@ -241,7 +222,7 @@ class Avalon(DiscordGame):
         self.mission_cards = []
         
         self.winning_team = None
-        self.temp_dir = utils.generate_temp_dir(TEMP_BASE)
+        self.temp_dir = TempDirs.create_temp_dir("Avalon")
         
         self.lock_voting = False
         
@@ -250,6 +231,7 @@ class Avalon(DiscordGame):
         self.enable_auto_next = self._all_enable_rules["auto_next"]["default"]
         self.enable_emojis = self._all_enable_rules["emojis"]["default"]
         self.enable_button_prompts = self._all_enable_rules["button_prompts"]["default"]
+        self.enable_turn_clock = self._all_enable_rules["turn_clock"]["default"]
     
     def validate_player_name(self, player_name):
     
@@ -275,13 +257,10 @@ class Avalon(DiscordGame):
         else:
             return symbol
     
-    def get_character_from_name(self, character_name):
+    @classmethod
+    def get_character_from_name(cls, character_name):
     
-        for character in self._all_characters:
-            if character.name == character_name:
-                return character
-         
-        raise GameExceptions.DiscordGameError(f"Requested character name not found: {character_name}")   
+        return cls._character_graph.get_character(character_name)
     
     def add_character(self, character):
     
@@ -290,14 +269,7 @@ class Avalon(DiscordGame):
         else:
             message = [f"Added {character} to the game."]
     
-        self.special_characters.add(character)
-        special_character_names = [character.name for character in self.special_characters]
-        
-        to_add = [character_name for character_name in character.requires if character_name not in special_character_names]
-        to_remove = [character_name for character_name in character.prohibits if character_name in special_character_names]
-        
-        [self.special_characters.add(self.get_character_from_name(character_name)) for character_name in to_add]
-        [self.special_characters.remove(self.get_character_from_name(character_name)) for character_name in to_remove] 
+        self.special_characters, to_add, to_remove = self._character_graph.add(self.special_characters, character)
 
         if len(to_add):
             message.append(f"Also added the following dependant characters from the game: {to_add}")
@@ -314,20 +286,41 @@ class Avalon(DiscordGame):
         else:
             message = [f"Removed {character} from the game"]
             
-        self.special_characters.remove(character)
-        special_character_names = [character.name for character in self.special_characters]
-           
-        to_remove = [character_name for character_name in character.required_by if character_name in special_character_names]
-        
-        [self.special_characters.remove(self.get_character_from_name(character_name)) for character_name in to_remove] 
+        self.special_characters, to_remove = self._character_graph.remove(self.special_characters, character)
 
         if len(to_remove):
             message.append(f"Removed the following characters that require {character}: {to_remove}")
             
         return message
     
+    def check_composition(self, player_count = None):
+        """
+        returns a list of warnings (with suggested fixes) if the special characters can't be played with 'player_count' players
+        
+        :param player_count (int): The number of players to check against (defaults to the number of players who've joined)
+        :return (List[str]): the warnings (an empty list if the composition is fine)
+        """
+        
+        if player_count is None:
+            player_count = len(self.get_players_in_registry())
+        
+        problems = self._character_graph.get_problems(self.special_characters, player_count)
+        
+        if len(problems) == 0 or not self._character_graph.is_supported_player_count(player_count):
+            return problems
+            
+        message = list(problems)
+        message.append(f"Valid special characters for {player_count} players with the fewest changes:")
+        message += [f"    {suggestion}" for suggestion in self._character_graph.suggest(self.special_characters, player_count)]
+        
+        return message
+    
     def kill_game(self):
-        shutil.rmtree(self.temp_dir)
+        TempDirs.remove_temp_dir(self.temp_dir)
+    
+    def on_migrated(self):
+        #the temp directory (the board images and logs) stays where it is, this process just owns it now
+        TempDirs.adopt_temp_dir(self.temp_dir)
     
     def reset_player(self, player):
         player.clear_game_fields()
@@ -406,12 +399,12 @@ class Avalon(DiscordGame):
         
         log_file = os.path.join(self.temp_dir, "log.txt")
         
+        #nothing to save if a game never started
+        if self.game_board is None:
+            return
+        
         with open(log_file, "a+") as log:
-            log.write("================================\n")
-            log.write("missions\n")
-            log.write("\n".join(self.game_board.mission_log))
-            log.write("votes\n")
-            log.write("\n".join(self.game_board.vote_log))
+            log.write(self.game_board.log.render_text(self.get_message_symbol))
     
     ################################
     #Normal Game Progress Functions#
@@ -423,9 +416,18 @@ class Avalon(DiscordGame):
         #Generate Game Board and Shuffle Player Order#
         ##############################################
     
-        self.game_board = GameBoard(len(self.get_players_in_registry()), self.temp_dir, AVALON_FOLDER)
+        player_count = len(self.get_players_in_registry())
+        
+        #make sure the special characters work for this many players before setting anything up
+        if self._character_graph.is_supported_player_count(player_count):
+            composition_warnings = self.check_composition(player_count)
+            if len(composition_warnings):
+                raise GameExceptions.DiscordGameIllegalMove("\n".join(["Cannot start the game with the current special characters:"] + composition_warnings))
+    
+        self.game_board = GameBoard(player_count, self.temp_dir, AVALON_FOLDER)
+        self.game_board.warm_mission_reveals()
        
-        random.shuffle(self.player_order)
+        self.random.shuffle(self.player_order)
         
         #######################################################################
         #Determine Character Card Deck and assign each Player a Character Card#
@@ -467,7 +469,7 @@ class Avalon(DiscordGame):
             raise GameExceptions.DiscordGameIllegalMove("Too many good special characters for current player count")
         
         #Shuffle Character Deck
-        random.shuffle(character_card_deck)
+        self.random.shuffle(character_card_deck)
         
         #Assign Each Player a Character Card and subsequent roles: "team_evil", "team_good", "assassin", etc
         for player_name, character_card in zip(self.player_order, character_card_deck):
@@ -489,60 +491,38 @@ class Avalon(DiscordGame):
         #Determine private info each player knows#
         ##########################################
         
-        #merlin knows all the non Mordred/Mordroberon Spies
-        merlin_info = [player.name for player in self.get_players_in_registry() if (player.character.team == "Team Evil" and (not player.character.hidden_from_merlin))]
-        
-        #percival knows Merlin and Morgana
-        percival_info = [player.name for player in self.get_players_in_registry() if (player.character.name in ["Merlin", "Morgana"])]
-        
-        #Team Evil (except for Mordroberon/Oberon) knows who's on Team Evil (except for Mordroberon/Oberon)
-        evil_info = [player.name for player in self.get_players_in_registry() if (player.character.team == "Team Evil" and (not player.character.hidden_from_evil))]
+        #work out who sees who from each character's visibility rule
+        players = [self.get_player_from_name(player_name) for player_name in self.player_order]
+        dealt_characters = [player.character for player in players]
+        visibility_matrix = self._character_graph.get_visibility_matrix(dealt_characters)
         
-        #shuffle the hidden information
-        random.shuffle(merlin_info)
-        random.shuffle(percival_info)
-        random.shuffle(evil_info)
+        #shuffle the order players are listed in (the same order for everyone) so it doesn't give away the seating
+        listing_order = list(range(len(players)))
+        self.random.shuffle(listing_order)
         
         #set each individual players private info
-        for player_name in self.player_order:
+        for i, player in enumerate(players):
             
-            player = self.get_player_from_name(player_name)
             info = f"Your Player name is: {player.name}\n"
             info += f"Your Character is: {player.character.name}\n"
             info += f"You are on: {player.character.team}\n"
             
-            #case: Merlin
-            if player.character.name == "Merlin":
-                info += "You know the following are members of Team Evil:\n  " + "\n  ".join(merlin_info)
-                if "Mordred" in [special_character.name for special_character in self.special_characters]:
-                    info += "\n\nHowever Mordred (evil) is unknown to you"
-                if "Mordroberon" in [special_character.name for special_character in self.special_characters]:
-                    info += "\n\nHowever Mordroberon (evil) is unknown to you"
-            
-            #case: Percival
-            elif player.character.name == "Percival":
-                info += "You see the following players:\n  " + "\n  ".join(percival_info)
-                if len(percival_info) == 1:
-                    info += "\n\nThis player is Merlin!"
-                elif len(percival_info) == 2:
-                    info += "\n\nOne of them in Merlin, the other Morgana"
-                else:
-                    self.reset_game()
-                    raise DIscordGameError("Percival sees more than two characters???")
-
-            #case: Team Evil but not 'hidden_from_evil'
-            elif (player.character.team == "Team Evil") and (not player.character.hidden_from_evil):
-                info += "You know the following are members of Team Evil:\n  " + "\n  ".join(evil_info)
-                if "Oberon" in [special_character.name for special_character in self.special_characters]:
-                    info += "\n\nHowever Oberon (evil) is unknown to you"
-                if "Mordroberon" in [special_character.name for special_character in self.special_characters]:
-                    info += "\n\nHowever Mordroberon (evil) is unknown to you"
-            
-            #case: 'hidden_from_evil' or Team Good and without special information
-            else:
+            visibility = player.character.visibility
+            
+            if visibility is None:
                 info += "You don't know who anyone is. Good Luck!"
+                
+            else:
+                seen = [players[j].name for j in listing_order if visibility_matrix[i, j]]
+                info += f"{visibility.description}:\n  " + "\n  ".join(seen)
+                
+                for hidden_character in self._character_graph.get_hidden_characters(player.character, dealt_characters):
+                    info += f"\n\nHowever {hidden_character} ({hidden_character.team.split()[-1].lower()}) is unknown to you"
+                    
+                if len(seen) in visibility.count_messages:
+                    info += f"\n\n{visibility.count_messages[len(seen)]}"
         
-            character_card = player.character.get_random_character_card()
+            character_card = utils.get_image_file(player.character.get_random_character_card(self.random))
         
             player.private_info = player.create_message_for(text = info, image = character_card, send_both = True)
                         
@@ -559,41 +539,40 @@ class Avalon(DiscordGame):
         hammer_player = self.get_player_from_name(self.player_order[4])
         hammer_player.public_info[0] = self.get_message_symbol("hammer")
         
-        ##############################################################################################################
-        #Create a Message with the game board, public player info, each players private info and poke the team leader#
-        ##############################################################################################################
+        ######################################
+        #Move to 'team_select' and Start Game#
+        ######################################
+        self.state = "team_select"
+        self.on_mission = set()
+        
+        return self.generate_set_up_messages(starting_player)
+    
+    def generate_set_up_messages(self, starting_player):
+        """
+        yields the messages starting the game one at a time (so the board goes out while the player info is still being made)
+        
+        the game board, public player info, each players private info, the DM to the team leader, the help message and the team select prompt
+        """
         
         #game board info
-        message = self.game_board.generate_board()
+        yield self.game_board.generate_board()
         
         #public player info
-        message.append(self.get_public_player_info())
+        yield self.get_public_player_info()
         
         #private player info
         for player_name in self.player_order:
             player = self.get_player_from_name(player_name)
-            message.append(self.get_player_info(player))
+            yield self.get_player_info(player)
         
         #DM the Team Leader
-        team_leader_message = starting_player.create_message_for(f"{starting_player.name}: You are the Team Leader! Choose {self.game_board.get_current_mission_count()} players for your Mission! [command: 'choose <player_name>']")
-        message.append(team_leader_message)
+        yield starting_player.create_message_for(f"{starting_player.name}: You are the Team Leader! Choose {self.game_board.get_current_mission_count()} players for your Mission! [command: 'choose <player_name>']")
         
-        #####################################################################
-        #Move to 'team_select', add the help message, and return the message#
-        #####################################################################
-        self.state = "team_select"
-        self.on_mission = set()
-        message.append(self.get_help_message())
-        
-        ##############################################
-        #Create the CommandResultPrompt if neccessary#
-        ##############################################
+        yield self.get_help_message()
         
         #add a CommandResultPrompt if playing with "Button Prompts Enabled"
         if self.enable_button_prompts:
-            message.append(self.create_team_select_prompt(starting_player))
-        
-        return message
+            yield self.create_team_select_prompt(starting_player)
 
     def start_vote(self):
        
@@ -650,6 +629,12 @@ class Avalon(DiscordGame):
             title += f"     Vote Track: {self.game_board.vote_track}"
             description = f"Approve: {self._yes_no_emojis[0]} \n Reject: {self._yes_no_emojis[1]}"
             result_message = f"You chose:"
+            
+            #with the turn clock on a player who doesn't vote in time rejects the mission
+            if self.enable_turn_clock:
+                default = [self._yes_no_emojis[1]]
+            else:
+                default = None
         
             for player in self.get_players_in_registry():
                 message.append(GameClasses.CommandResultPrompt(player = player,
@@ -659,7 +644,8 @@ class Avalon(DiscordGame):
                                                                dm = True,
                                                                description = description,
                                                                result_message = result_message,
-                                                               timeout = self._vote_prompt_timeout))
+                                                               timeout = self._vote_prompt_timeout,
+                                                               default = default))
         
         return message
     
@@ -698,20 +684,20 @@ class Avalon(DiscordGame):
         #find the team leader
         team_leader = self.find_team_leader()        
         
-        #create a vote log of how everyone voted and add that to the vote log and message
-        vote_log = f"MISSION {self.game_board.current_mission + 1}\n"
-        vote_log += f"Vote Track: {self.game_board.vote_track}\n"
-        vote_log += f"Team Leader: {team_leader.name}\n"
-        vote_log += f"Team: {[player.name for player in self.on_mission]}\n\n"
-        vote_log += "\n".join([f"{player.name} : {self.get_message_symbol(player.vote)}" for player in players])
-        vote_log += "\n"
+        #record how everyone voted and add that to the vote log and message
+        vote_record = VoteRecord(mission = self.game_board.current_mission + 1,
+                                 vote_track = self.game_board.vote_track,
+                                 leader = team_leader.name,
+                                 team = [player.name for player in self.on_mission],
+                                 voters = [player.name for player in players],
+                                 approvals = [player.name for player in players if player.vote == "approve"])
         
-        #add the vote log to the games vote log
-        self.game_board.vote_log.append(vote_log)
+        #add the record to the games vote log
+        self.game_board.log.add_vote(vote_record)
         
         #start add the vote log to the message
         title = "Vote Summary:"
-        description = vote_log
+        description = vote_record.render(self.get_message_symbol)
         message.append(GameClasses.CommandResultEmbedding(title=title, description=description))
         
         #remove all the votes from each player
@@ -904,29 +890,25 @@ class Avalon(DiscordGame):
         #determine the team leader
         team_leader = self.find_team_leader()       
                 
-        #log the mission and player information
-        mission_info = [f"MISSION {self.game_board.current_mission + 1}"]
-        mission_info += [f"Team Leader: {team_leader.name}"]
-        mission_info += [f"Team: {[player.name for player in self.on_mission]}"]
-        
-        msg_text = "\n".join(mission_info)        
-        
-        #add pass/fail count to message
-        msg_text += f"\n\nThere were:\nPasses: {passes}\nFails: {fails}"
-        
-        #generate the image message (The Pass/Fail cards)
-        mission_array = (["pass"] * passes) + (["fail"] * fails)
-        file_name = f"mission_{self.game_board.current_mission}.jpg"
-        self.game_board.create_mission_reveal(self.temp_dir, mission_array, file_name)
-        
-        msg_image = os.path.join(self.temp_dir, file_name)
+        #log the mission and player information along with the pass/fail count
+        mission_record = MissionRecord(mission = self.game_board.current_mission + 1,
+                                       leader = team_leader.name,
+                                       team = [player.name for player in self.on_mission],
+                                       passes = passes,
+                                       fails = fails,
+                                       failed = mission_failure)
+        
+        msg_text = mission_record.render()
+        
+        #get the image message (The Pass/Fail cards)
+        msg_image = self.game_board.get_mission_reveal(passes, fails)
 
         #create mission log message
         mission_log_image = GameClasses.CommandResultMessage(image = msg_image)
         mission_log_text =  GameClasses.CommandResultEmbedding(title = "Mission Summary:", description = msg_text)
         
         #Log Mission Results
-        self.game_board.mission_log.append(msg_text)
+        self.game_board.log.add_mission(mission_record)
         
         #Display Mission results
         message.append(mission_log_image)
@@ -1471,7 +1453,7 @@ class Avalon(DiscordGame):
         else:
             raise GameExceptions.DiscordGameIllegalMove(f"{player_name} not found")
     
-    @DiscordGame.command(player=_all_states, help="options: board, players, rules, my_info, help")
+    @DiscordGame.command(player=_all_states, help="options: board, players, rules, my_info, help, mission_log, vote_log, log_summary")
     def check(self, category, *, DiscordAuthorContext, DiscordChannelContext):
         
         category = category.lower()
@@ -1526,12 +1508,10 @@ class Avalon(DiscordGame):
                     
                 else:
                 
-                    mission_logs = [GameClasses.CommandResultEmbedding(title = f"Mission Log: Mission {i+1}", destination = DiscordChannelContext, description = log) for i, log in enumerate(self.game_board.mission_log[1:])]
-                    
-                    if len(mission_logs) == 0:
+                    if len(self.game_board.log.missions) == 0:
                         return GameClasses.CommandResultEmbedding(title = "Mission Log:", description = "There are no Mission Logs yet", destination = DiscordChannelContext)
                     else:
-                        return mission_logs
+                        return GameClasses.CommandResultPages(title = "Mission Log:", pages = self.game_board.log.render_mission_pages(), destination = DiscordChannelContext)
                     
             else:
             
@@ -1547,16 +1527,36 @@ class Avalon(DiscordGame):
                     
                 else:
                 
-                    vote_logs = [GameClasses.CommandResultEmbedding(title = "Vote Log:", destination = DiscordChannelContext, description = log) for log in self.game_board.vote_log[1:]]
-                    
-                    if len(vote_logs) == 0:
+                    if len(self.game_board.log.votes) == 0:
                         return GameClasses.CommandResultEmbedding(title = "Vote Log:", description = "There are no Vote Logs yet", destination = DiscordChannelContext)
                     else:
-                        return vote_logs
+                        return GameClasses.CommandResultPages(title = "Vote Log:", pages = self.game_board.log.render_vote_pages(self.get_message_symbol), destination = DiscordChannelContext)
             else:
             
                 raise GameExceptions.DiscordGameIllegalMove("Checking the Vote Log is not enabled")
         
+        elif category == "log_summary":
+        
+            if self.enable_mission_log or self.enable_vote_log:
+            
+                if self.state == "new_game":
+                
+                    return GameClasses.CommandResultMessage(destination = DiscordChannelContext, text = "No Game History Available")
+                    
+                else:
+                
+                    #only summarize the logs that are enabled
+                    summary = self.game_board.log.render_summary(missions = self.enable_mission_log, votes = self.enable_vote_log)
+                    
+                    if summary == "":
+                        summary = "There are no Logs yet"
+                    
+                    return GameClasses.CommandResultEmbedding(title = "Log Summary:", description = summary, destination = DiscordChannelContext)
+                    
+            else:
+            
+                raise GameExceptions.DiscordGameIllegalMove("Checking the Mission Log and Vote Log is not enabled")
+        
         else:
             raise GameExceptions.DiscordGameIllegalMove(f"check option '{category}' not recognized")
     
@@ -1576,11 +1576,21 @@ class Avalon(DiscordGame):
         
         #add characters rules
         message.append("Special Characters:")
-        for character in [character for character in self._all_characters if character.special_character]:
+        for character in self._character_graph.special_characters:
             message.append(f"rule: {character} | options: 'add' 'remove' | description: {character.description}")
 
         message.append("")
         
+        #suggest valid compositions for the players who've joined so far
+        player_count = len(self.get_players_in_registry())
+        if self._character_graph.is_supported_player_count(player_count):
+            composition_warnings = self.check_composition(player_count)
+            if len(composition_warnings):
+                message += composition_warnings
+            else:
+                message.append(f"The current special characters are valid for {player_count} players")
+            message.append("")
+        
         #add enable rules
         message.append("Enable/Disable-able rules:")
         for rule, info in self._all_enable_rules.items():
@@ -1593,19 +1603,26 @@ class Avalon(DiscordGame):
         
         value = value.lower()
         
-        if rule in [character.name for character in self._all_characters if character.special_character]:
+        if self._character_graph.is_special_character(rule):
         
             if value == "add":
             
-                return self.add_character(self.get_character_from_name(rule))
+                message = self.add_character(self.get_character_from_name(rule))
                 
             elif value == "remove":
                 
-                return self.remove_character(self.get_character_from_name(rule))
+                message = self.remove_character(self.get_character_from_name(rule))
                 
             else:
             
                 raise GameExceptions.DiscordGameIllegalMove(f"modifiyer not recognized, please select 'add' or 'remove' to change the character rule {rule}")
+            
+            #warn right away if the new characters won't work with the players who've joined (players can still join/leave before starting)
+            player_count = len(self.get_players_in_registry())
+            if self._character_graph.is_supported_player_count(player_count):
+                message += self.check_composition(player_count)
+                
+            return message
         
         elif rule in self._all_enable_rules:
         
@@ -1633,6 +1650,8 @@ class Avalon(DiscordGame):
                 self.enable_emojis = rule_boolean
             elif rule == "button_prompts":
                 self.enable_button_prompts = rule_boolean
+            elif rule == "turn_clock":
+                self.enable_turn_clock = rule_boolean
             else:
                 raise GameExceptions.DiscordGameError(f"Rule dictionary misconfigured for rule: {rule}")
                 
@@ -0,0 +1,202 @@
+SEPARATOR = "================================"
+
+class VoteRecord:
+    """
+    A record of one team vote
+
+    Only the names and an approval bitmask are stored. The text is only built when the record is rendered
+
+    contructors:
+
+    __init__(self, mission : int, vote_track : int, leader : str, team : List[str], voters : List[str], approvals : List[str])
+
+        mission (int) : The mission number (starting at 1)
+
+        vote_track (int) : The position on the vote track when the vote happened
+
+        leader (str) : The name of the Team Leader
+
+        team (List[str]) : The names of the players on the proposed team
+
+        voters (List[str]) : The names of the players who voted (in seat order)
+
+        approvals (List[str]) : The names of the players who voted to approve
+
+    instance methods:
+
+    .render(self, get_symbol : function) -> str
+
+        returns the full text of the record. 'get_symbol' turns 'approve'/'reject' into the text to show
+
+    .summary(self) -> str
+
+        returns a one line summary of the record
+    """
+
+    __slots__ = ("mission", "vote_track", "leader", "team", "voters", "approval_mask")
+
+    def __init__(self, mission, vote_track, leader, team, voters, approvals):
+        self.mission = mission
+        self.vote_track = vote_track
+        self.leader = leader
+        self.team = tuple(team)
+        self.voters = tuple(voters)
+
+        approvals = set(approvals)
+        self.approval_mask = sum(1 << i for i, voter in enumerate(self.voters) if voter in approvals)
+
+    def approved_by(self, i):
+        return bool(self.approval_mask & (1 << i))
+
+    @property
+    def approve_count(self):
+        return bin(self.approval_mask).count("1")
+
+    @property
+    def reject_count(self):
+        return len(self.voters) - self.approve_count
+
+    @property
+    def approved(self):
+        return self.approve_count > self.reject_count
+
+    def render(self, get_symbol = str):
+        text = f"MISSION {self.mission}\n"
+        text += f"Vote Track: {self.vote_track}\n"
+        text += f"Team Leader: {self.leader}\n"
+        text += f"Team: {list(self.team)}\n\n"
+        text += "\n".join([f"{voter} : {get_symbol('approve' if self.approved_by(i) else 'reject')}" for i, voter in enumerate(self.voters)])
+        text += "\n"
+        return text
+
+    def summary(self):
+        result = "approved" if self.approved else "rejected"
+        return f"Mission {self.mission} vote {self.vote_track}: {self.leader} proposed {', '.join(self.team)} | {result} {self.approve_count}-{self.reject_count}"
+
+class MissionRecord:
+    """
+    A record of one mission that was played
+
+    contructors:
+
+    __init__(self, mission : int, leader : str, team : List[str], passes : int, fails : int, failed : bool)
+
+        mission (int) : The mission number (starting at 1)
+
+        leader (str) : The name of the Team Leader
+
+        team (List[str]) : The names of the players on the mission
+
+        passes (int) : How many pass cards were played
+
+        fails (int) : How many fail cards were played
+
+        failed (bool) : Whether the mission failed
+
+    instance methods:
+
+    .render(self) -> str
+
+        returns the full text of the record
+
+    .summary(self) -> str
+
+        returns a one line summary of the record
+    """
+
+    __slots__ = ("mission", "leader", "team", "passes", "fails", "failed")
+
+    def __init__(self, mission, leader, team, passes, fails, failed):
+        self.mission = mission
+        self.leader = leader
+        self.team = tuple(team)
+        self.passes = passes
+        self.fails = fails
+        self.failed = failed
+
+    def render(self):
+        text = f"MISSION {self.mission}\n"
+        text += f"Team Leader: {self.leader}\n"
+        text += f"Team: {list(self.team)}"
+        text += f"\n\nThere were:\nPasses: {self.passes}\nFails: {self.fails}"
+        return text
+
+    def summary(self):
+        result = "FAILED" if self.failed else "PASSED"
+        return f"Mission {self.mission}: {result} ({self.passes} pass / {self.fails} fail) | {self.leader} led {', '.join(self.team)}"
+
+class GameLog:
+    """
+    The mission and vote history of one game of Avalon
+
+    instance methods:
+
+    .add_vote(self, record : VoteRecord)
+
+    .add_mission(self, record : MissionRecord)
+
+    .render_mission_pages(self, per_page : int) -> List[str]
+
+        returns the mission log split into pages of 'per_page' missions
+
+    .render_vote_pages(self, get_symbol : function, per_page : int) -> List[str]
+
+        returns the vote log split into pages of 'per_page' votes
+
+    .render_summary(self, missions : bool, votes : bool) -> str
+
+        returns a compact summary with one line per vote and/or mission
+
+    .render_text(self, get_symbol : function) -> str
+
+        returns the whole log as text (for saving to a file)
+    """
+
+    def __init__(self):
+        self.missions = []
+        self.votes = []
+
+    def add_vote(self, record):
+        self.votes.append(record)
+
+    def add_mission(self, record):
+        self.missions.append(record)
+
+    def render_mission_pages(self, per_page = 5):
+        return paginate([record.render() for record in self.missions], per_page)
+
+    def render_vote_pages(self, get_symbol = str, per_page = 4):
+        return paginate([record.render(get_symbol) for record in self.votes], per_page)
+
+    def render_summary(self, missions = True, votes = True):
+
+        lines = []
+
+        #show each mission's votes right before its result
+        for mission in range(1, len(self.missions) + 2):
+
+            if votes:
+                lines += [record.summary() for record in self.votes if record.mission == mission]
+
+            if missions:
+                lines += [record.summary() for record in self.missions if record.mission == mission]
+
+        return "\n".join(lines)
+
+    def render_text(self, get_symbol = str):
+        text = SEPARATOR + "\n"
+        text += "missions\n"
+        text += "\n".join([record.render() for record in self.missions])
+        text += "\nvotes\n"
+        text += "\n".join([record.render(get_symbol) for record in self.votes])
+        text += "\n"
+        return text
+
+def paginate(entries, per_page):
+    """
+    groups 'entries' into pages of (at most) 'per_page' entries each
+
+    :return (List[str]): the text of each page
+    """
+
+    return ["\n\n".join(entries[i:i + per_page]) for i in range(0, len(entries), per_page)]
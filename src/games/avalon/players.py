@@ -2,6 +2,8 @@ from ..common import GameClasses
 
 class AvalonPlayer(GameClasses.Player):
 
+    __slots__ = ("player_id", "public_info", "private_info", "character", "vote", "mission_card")
+
     def __init__(self, DiscordAuthorContext, name = None):
         
         super().__init__(DiscordAuthorContext, name)
@@ -1,66 +1,192 @@
 import random
+from collections import deque, Counter
+from itertools import islice
 
 from . import GameExceptions
 
+class CardTable:
+    """
+    A table mapping card objects to small integer ids so decks can store ids instead of the cards themselves
+
+    A game builds one CardTable from its card types and shares it between all its decks
+    (Cards are matched by identity, so copies of the same card type should be the same object)
+
+    contructors:
+
+    __init__(self, cards : List[object])
+
+        cards (List[object]) : The card types to put in the table. More can be added later with .get_id
+
+    instance methods:
+
+    .get_id(self, card : object) -> int
+
+        returns the id of 'card', adding it to the table if it isn't there yet
+
+    .get_card(self, card_id : int) -> object
+
+        returns the card with the id 'card_id'
+    """
+
+    def __init__(self, cards = None):
+        self._cards = []
+        self._ids = {}
+
+        if cards is not None:
+            for card in cards:
+                self.get_id(card)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def get_id(self, card):
+        card_id = self._ids.get(id(card))
+        if card_id is None:
+            card_id = len(self._cards)
+            self._ids[id(card)] = card_id
+            self._cards.append(card)
+
+        return card_id
+
+    def get_card(self, card_id):
+        return self._cards[card_id]
+
+    def __getstate__(self):
+        #the cards are keyed by their id() which only holds in this process, so an unpickled table is built again from its cards
+        return {"_cards" : self._cards}
+
+    def __setstate__(self, state):
+        self.__init__(state["_cards"])
+
 class DeckOfCards:
-    def __init__(self, cards, shuffle=True, autoreshuffle=False):
-        
-        self.deck = list(cards)
+    """
+    A deck (and discard pile) of cards
+
+    The cards are stored as ids from a CardTable in deques so drawing or adding cards at either end is O(1)
+    and the number of copies of a card left in the deck is kept in a Counter
+
+    contructors:
+
+    __init__(self, cards : List[object], shuffle : bool, autoreshuffle : bool, card_table : CardTable, rng : random.Random)
+
+        cards (List[object]) : The cards that start in the deck (top card first)
+
+        shuffle (bool) : Set to True to shuffle the deck to start
+
+        autoreshuffle (bool) : Set to True to shuffle the discard pile into the bottom of the deck when there aren't enough cards to draw
+
+        card_table (CardTable) : The table used to map cards to ids. If None a new one is made from 'cards'
+
+        rng (random.Random) : The random numbers the deck is shuffled with (ex. the game's own). If None a new one is made
+
+    instance fields:
+
+    deck (List[object]) : A copy of the cards in the deck (top card first)
+
+    discard (List[object]) : A copy of the cards in the discard pile (top card first)
+    """
+
+    def __init__(self, cards, shuffle=True, autoreshuffle=False, card_table=None, rng=None):
+
+        if card_table is None:
+            card_table = CardTable()
+
+        self.card_table = card_table
         self.autoreshuffle = autoreshuffle
-        self.discard = []
-        
+        self.rng = random.Random() if rng is None else rng
+
+        self._deck = deque(self.card_table.get_id(card) for card in cards)
+        self._discard = deque()
+        self._counts = Counter(self._deck)
+
         if shuffle:
             self.shuffle()
-            
+
+    @property
+    def deck(self):
+        return [self.card_table.get_card(card_id) for card_id in self._deck]
+
+    @property
+    def discard(self):
+        return [self.card_table.get_card(card_id) for card_id in self._discard]
+
+    def __len__(self):
+        return len(self._deck)
+
+    def count(self, card):
+        """
+        returns how many copies of 'card' are in the deck (not counting the discard pile)
+        """
+
+        return self._counts[self.card_table.get_id(card)]
+
     def shuffle(self):
-        random.shuffle(self.deck)
-    
-    def draw(self, number = 1, from_top = True):
-        if number > len(self.deck):
-            if self.autoreshuffle and (number <= len(self.deck + self.discard)):
-                random.shuffle(self.discard)
-                self.deck += self.discard
-                return self.draw(number, from_top)
+        #shuffling a deque in place is O(n^2) because of its indexing, so shuffle a list copy instead
+        shuffled = list(self._deck)
+        self.rng.shuffle(shuffled)
+        self._deck = deque(shuffled)
+
+    def reshuffle_discard(self):
+        """
+        shuffles the discard pile and puts it on the bottom of the deck
+        """
+
+        shuffled = list(self._discard)
+        self.rng.shuffle(shuffled)
+        self._deck.extend(shuffled)
+        self._counts.update(shuffled)
+        self._discard.clear()
+
+    def _check_count(self, number, error_message):
+        if number > len(self._deck):
+            if self.autoreshuffle and (number <= len(self._deck) + len(self._discard)):
+                self.reshuffle_discard()
             else:
-                raise GameExceptions.DiscordGameError("Not enough cards to draw from deck")
-        
+                raise GameExceptions.DiscordGameError(error_message)
+
+    def draw(self, number = 1, from_top = True):
+        self._check_count(number, "Not enough cards to draw from deck")
+
         if from_top:
-            drawn = self.deck[:number]
-            rest = self.deck[number:]
+            pop = self._deck.popleft
         else:
-            drawn = self.deck[(-1*number):]
-            rest = self.deck[:(-1*number)]
-            
-        self.deck = rest
-        return drawn
-    
+            pop = self._deck.pop
+
+        drawn_ids = [pop() for _ in range(number)]
+
+        #cards drawn from the bottom are still returned in the order they were in the deck
+        if not from_top:
+            drawn_ids.reverse()
+
+        self._counts.subtract(drawn_ids)
+        return [self.card_table.get_card(card_id) for card_id in drawn_ids]
+
     def mill(self, number = 1, from_top = True):
         milled_cards = self.draw(number, from_top)
-        self.discard = milled_cards + self.discard
+        self.add_to_discard(milled_cards)
         return milled_cards
-        
+
     def peak(self, number = 1, from_top = True):
-        if number > len(self.deck):
-            if self.autoreshuffle and (number <= len(self.deck + self.discard)):
-                random.shuffle(self.discard)
-                self.deck += self.discard
-                return self.draw(number, from_top)
-            else:
-                raise GameExceptions.DiscordGameError("Not enough cards to in deck")
-        
+        self._check_count(number, "Not enough cards to in deck")
+
         if from_top:
-            drawn = self.deck[:number]
+            peaked_ids = islice(self._deck, number)
         else:
-            drawn = self.deck[(-1*number):]
-            
-        return drawn
-    
+            peaked_ids = islice(self._deck, len(self._deck) - number, None)
+
+        return [self.card_table.get_card(card_id) for card_id in peaked_ids]
+
     def add_to_deck(self, cards, on_top = True):
+        card_ids = [self.card_table.get_id(card) for card in cards]
+
         if on_top:
-            self.deck = cards + self.deck
+            #extendleft adds the cards one at a time, so reverse them to keep their order
+            self._deck.extendleft(reversed(card_ids))
         else:
-            self.deck += cards
-     
+            self._deck.extend(card_ids)
+
+        self._counts.update(card_ids)
+
     def add_to_discard(self, cards):
-        self.discard = cards + self.discard
-        
\ No newline at end of file
+        card_ids = [self.card_table.get_id(card) for card in cards]
+        self._discard.extendleft(reversed(card_ids))
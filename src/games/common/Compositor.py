@@ -0,0 +1,179 @@
+"""
+Puts image tiles (decoded images as numpy arrays, ex. from utils.read_image) together into one image
+
+Every layout is a grid (a horizontal layout is one row, a vertical layout is one column).
+The output is allocated once and each tile is copied straight into its place in it
+
+Tiles don't have to be the same size:
+
+    fit = "pad" : tiles keep their size and are padded with 'background' to fill their row/column
+    fit = "scale" : tiles are scaled (nearest neighbour) to the height of the row (horizontal),
+                    the width of the column (vertical) or to fit the largest tile (grid)
+
+'align' ("start", "center" or "end") sets where a tile smaller than its space is placed
+"""
+
+import math
+import numpy as np
+
+_alignments = ["start", "center", "end"]
+_fits = ["pad", "scale"]
+
+def as_rgb(tile):
+    """
+    returns 'tile' as a (height, width, channels) array with 3 channels (alpha is dropped, grayscale is repeated)
+
+    Doesn't copy a tile that's already RGB
+    """
+
+    tile = np.asarray(tile)
+
+    if tile.ndim == 2:
+        return np.repeat(tile[:, :, np.newaxis], 3, axis = 2)
+
+    if tile.shape[2] == 1:
+        return np.repeat(tile, 3, axis = 2)
+
+    if tile.shape[2] > 3:
+        return tile[:, :, :3]
+
+    return tile
+
+def scale_tile(tile, height, width):
+    """
+    returns 'tile' scaled to (height, width) with nearest neighbour sampling (the tile itself if it's already that size)
+    """
+
+    if tile.shape[0] == height and tile.shape[1] == width:
+        return tile
+
+    rows = (np.arange(height) * tile.shape[0]) // height
+    columns = (np.arange(width) * tile.shape[1]) // width
+
+    return tile[rows[:, np.newaxis], columns]
+
+def get_target_size(tile, fit, cell_height, cell_width):
+    """
+    returns the (height, width) 'tile' takes up in the output
+    """
+
+    height, width = tile.shape[:2]
+
+    if fit == "pad":
+        return height, width
+
+    factor = min(cell_height / height if cell_height is not None else math.inf,
+                 cell_width / width if cell_width is not None else math.inf)
+
+    return max(1, round(height * factor)), max(1, round(width * factor))
+
+def get_offset(free_space, align):
+    if align == "start":
+        return 0
+    if align == "end":
+        return free_space
+    return free_space // 2
+
+def grid(tiles, columns, fit = "pad", align = "center", background = 255, out = None, cell_height = None, cell_width = None):
+    """
+    puts the tiles in a grid, left to right and then top to bottom
+
+    :param tiles (List[np.ndarray]): The tiles
+    :param columns (int): How many tiles in each row
+    :param fit (str): "pad" or "scale" (see above)
+    :param align (str): "start", "center" or "end" (see above)
+    :param background (int): The value of the pixels not covered by any tile
+    :param out (np.ndarray): A buffer of the right shape and dtype to draw into (one is allocated if None)
+    :param cell_height (int): The height "scale" fits tiles to (defaults to the tallest tile)
+    :param cell_width (int): The width "scale" fits tiles to (defaults to the widest tile)
+
+    :return (np.ndarray): The composed image
+    """
+
+    if len(tiles) == 0:
+        raise ValueError("Can't compose an image out of 0 tiles")
+
+    if fit not in _fits:
+        raise ValueError(f"Unknown fit: {fit} (expected one of {_fits})")
+
+    if align not in _alignments:
+        raise ValueError(f"Unknown align: {align} (expected one of {_alignments})")
+
+    tiles = [as_rgb(tile) for tile in tiles]
+
+    if fit == "scale" and cell_height is None and cell_width is None:
+        cell_height = max(tile.shape[0] for tile in tiles)
+        cell_width = max(tile.shape[1] for tile in tiles)
+
+    sizes = [get_target_size(tile, fit, cell_height, cell_width) for tile in tiles]
+
+    row_count = math.ceil(len(tiles) / columns)
+    row_heights = [max(height for height, _ in sizes[row * columns:(row + 1) * columns]) for row in range(row_count)]
+    column_widths = [max(width for _, width in sizes[column::columns]) for column in range(min(columns, len(tiles)))]
+
+    shape = (sum(row_heights), sum(column_widths), 3)
+
+    #only fill in the background if some of it will show
+    covered = sum(height * width for height, width in sizes)
+    if out is None:
+        if covered == shape[0] * shape[1]:
+            out = np.empty(shape, dtype = tiles[0].dtype)
+        else:
+            out = np.full(shape, background, dtype = tiles[0].dtype)
+    else:
+        if out.shape != shape:
+            raise ValueError(f"Output buffer has shape {out.shape}, expected {shape}")
+        if covered != shape[0] * shape[1]:
+            out[...] = background
+
+    row_starts = np.cumsum([0] + row_heights)
+    column_starts = np.cumsum([0] + column_widths)
+
+    for i, (tile, (height, width)) in enumerate(zip(tiles, sizes)):
+        row, column = divmod(i, columns)
+
+        top = row_starts[row] + get_offset(row_heights[row] - height, align)
+        left = column_starts[column] + get_offset(column_widths[column] - width, align)
+
+        out[top:top + height, left:left + width] = scale_tile(tile, height, width)
+
+    return out
+
+def hstack(tiles, fit = "pad", align = "center", background = 255, out = None):
+    """
+    puts the tiles side by side, left to right (see grid for the arguments)
+
+    With fit = "scale" every tile is scaled to the height of the tallest tile
+    """
+
+    cell_height = max(np.shape(tile)[0] for tile in tiles) if fit == "scale" and len(tiles) else None
+
+    return grid(tiles, len(tiles), fit, align, background, out, cell_height = cell_height)
+
+def vstack(tiles, fit = "pad", align = "center", background = 255, out = None):
+    """
+    puts the tiles on top of each other, top to bottom (see grid for the arguments)
+
+    With fit = "scale" every tile is scaled to the width of the widest tile
+    """
+
+    cell_width = max(np.shape(tile)[1] for tile in tiles) if fit == "scale" and len(tiles) else None
+
+    return grid(tiles, 1, fit, align, background, out, cell_width = cell_width)
+
+def split(image, cuts, axis = 1):
+    """
+    cuts an image into pieces at the pixel positions in 'cuts' (along the width for axis = 1, the height for axis = 0)
+
+    :return (List[np.ndarray]): The pieces (views into 'image', nothing is copied)
+    """
+
+    if axis not in [0, 1]:
+        raise ValueError(f"Can only split an image along axis 0 or 1, not {axis}")
+
+    bounds = [0] + list(cuts) + [image.shape[axis]]
+
+    if axis == 0:
+        return [image[start:finish] for start, finish in zip(bounds[:-1], bounds[1:])]
+
+    return [image[:, start:finish] for start, finish in zip(bounds[:-1], bounds[1:])]
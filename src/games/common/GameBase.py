@@ -1,4 +1,5 @@
 import os
+import random
 import inspect
 import discord
 
@@ -19,7 +20,12 @@ def getBaseGameClass():
         
         """
     
-        _player_registry = []
+        def __init__(self):
+            #each game keeps its own players (a class level registry would be shared by every game of the same type in a process)
+            self._player_registry = []
+            
+            #the game's own random numbers (the runner seeds them when the game is traced so a replay makes the same shuffles and deals)
+            self.random = random.Random()
     
         class command:
             _command_registry = []
@@ -159,6 +165,13 @@ def getBaseGameClass():
             Override this function to have the game clean up stuff when killed
             """
             pass
+        
+        def on_migrated(self):
+            """
+            Override this function to have the game take over anything it keeps outside of itself (ex. its temp directory)
+            after it's been moved to another process (see gameMigration.py)
+            """
+            pass
                
 
     return DiscordGame
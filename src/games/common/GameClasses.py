@@ -4,6 +4,8 @@ from emoji import EMOJI_ALIAS_UNICODE as EMOJIS
 from . import GameExceptions
 
 END_EMOJI = EMOJIS[":x:"]
+PREVIOUS_PAGE_EMOJI = EMOJIS[":arrow_backward:"]
+NEXT_PAGE_EMOJI = EMOJIS[":arrow_forward:"]
 
 class CommandInfo:
     """
@@ -109,7 +111,7 @@ class CommandResultMessage:
         
         text (str): The text of the message
         
-        image (str): The path to the image to send
+        image (str/EncodedImage): The path to the image to send (or the already encoded image)
         
         send_both (bool) : Set to True if both the text AND the image should be sent
     
@@ -127,12 +129,39 @@ class CommandResultMessage:
         Send the 'text' content if there is no image sent or if 'send_both' is set to True
     """
     
+    __slots__ = ("destination", "text", "image", "send_both")
+    
     def __init__(self, destination = None, text = None, image = None, send_both = False):
         self.destination = destination
         self.text = text
         self.image = image
         self.send_both = send_both
 
+class EncodedImage:
+    """
+    An image that's already been encoded (ex. as a jpg) in memory.
+
+    It can be used anywhere a CommandResultMessage takes an image file path,
+    so an image that's sent over and over (ex. from an ImageCache) doesn't have to be written to disk first
+
+    Contructors:
+
+    __init__(self, data : bytes, filename : str)
+
+        data (bytes): The encoded image
+
+        filename (str): The name of the file when it's attached to a message (the extension tells discord what kind of image it is)
+    """
+
+    __slots__ = ("data", "filename")
+
+    def __init__(self, data, filename):
+        self.data = data
+        self.filename = filename
+
+    def __len__(self):
+        return len(self.data)
+
 class CommandResultEmbedding:
     """
     An object used for sending results back for a DiscordGame Command but in an embedding. 
@@ -163,6 +192,8 @@ class CommandResultEmbedding:
 
     """
     
+    __slots__ = ("title", "destination", "description", "color")
+    
     def __init__(self, title, destination = None, description = None, color=None):
         self.title = title
         self.destination = destination
@@ -171,10 +202,98 @@ class CommandResultEmbedding:
             color = discord.Color.default()
         self.color = color
 
+class CommandResultLiveBoard:
+    """
+    An object used for sending the current state of the game board back from a DiscordGame Command.
+
+    If the GameRunner is running in "live board" mode it keeps a single pinned board message in the game channel
+    and edits it in place whenever a CommandResultLiveBoard with a new state is returned (unchanged boards aren't sent at all).
+    Otherwise the GameRunner just sends the 'fallback' results like any other command result
+
+    Contructors:
+
+    __init__(self, title : str, description : str, image : str, state : object, fallback : List, color : discord.Color)
+
+        title (str): The title of the board embedding
+
+        description (str): The description of the board embedding
+
+        image (str): The path to an image of the board (shown inside the embedding)
+
+        state (object): A hashable summary of the board. If None the GameRunner uses the title, description and image
+
+        fallback (List): The results to send instead when the GameRunner isn't in "live board" mode.
+                         If None an embedding (and image message) built from the fields above is sent
+
+        color (discord.Color): The color of the board embedding
+    """
+
+    __slots__ = ("title", "description", "image", "state", "fallback", "color")
+
+    def __init__(self, title, description = None, image = None, state = None, fallback = None, color = None):
+        if color is None:
+            color = discord.Color.default()
+
+        if fallback is None:
+            fallback = [CommandResultEmbedding(title = title, description = description, color = color)]
+            if image is not None:
+                fallback.append(CommandResultMessage(image = image))
+
+        self.title = title
+        self.description = description
+        self.image = image
+        self.state = state
+        self.fallback = fallback
+        self.color = color
+
+class CommandResultPages:
+    """
+    An object used for sending a long embedding (ex. a game log) back from a DiscordGame Command one page at a time.
+
+    The GameRunner sends the first page as a single message and anyone can flip through the pages
+    by reacting with the previous/next page emojis until no one has turned a page for 'timeout' seconds
+
+    Contructors:
+
+    __init__(self, title : str, pages : List[str], destination : Context, timeout : float, color : discord.Color)
+
+        title (str): The title of the embedding (the same on every page)
+
+        pages (List[str]): The description of the embedding on each page
+
+        destination (Context): Where the pages are sent (defaults to the game channel)
+
+        timeout (float): How long (in seconds) the pages can be turned after the last page turn
+
+        color (discord.Color): The color of the embedding
+    """
+
+    __slots__ = ("title", "pages", "destination", "timeout", "color")
+
+    def __init__(self, title, pages, destination = None, timeout = 300.0, color = None):
+        if color is None:
+            color = discord.Color.default()
+
+        if len(pages) == 0:
+            pages = [""]
+
+        self.title = title
+        self.pages = list(pages)
+        self.destination = destination
+        self.timeout = timeout
+        self.color = color
+
+    def get_page_title(self, page):
+        if len(self.pages) == 1:
+            return self.title
+        return f"{self.title} (Page {page + 1}/{len(self.pages)})"
+
 class CommandResultInterrupt:
 
     """See if any player wants to respond to the current game action"""
     
+    __slots__ = ("players", "func_name", "title", "result_message", "emojis", "end_emoji", "max_responses", "timeout", "color")
+    
     def __init__(self, title, players, func_name, emojis, end_emoji = None, max_responses = None, result_message = "", timeout = 30.0, color=None):
       
         #default end_emoji
@@ -198,9 +317,16 @@ class CommandResultInterrupt:
 
 class CommandResultPrompt:
 
-    """Prompt a Player to make a Selection or Selections"""
+    """
+    Prompt a Player to make a Selection or Selections
+    
+    If 'default' is set (a list of 'count' of the emojis) it is used as the Player's selection when the prompt times out.
+    Otherwise a timeout returns None for the Player's selection
+    """
+    
+    __slots__ = ("player", "key", "func_name", "channel", "title", "description", "result_message", "emojis", "count", "timeout", "color", "default")
 
-    def __init__(self, player, title, func_name, emojis = None, dm = False, count = 1, key = None, description = None, result_message = None, timeout = 30.0, color=None):
+    def __init__(self, player, title, func_name, emojis = None, dm = False, count = 1, key = None, description = None, result_message = None, timeout = 30.0, color=None, default = None):
         
         if not isinstance(count, int):
             raise GameExceptions.DiscordGameError(f"count for CommandResultPrompt must be of type 'int': type(count) = {type(count)}")
@@ -223,6 +349,12 @@ class CommandResultPrompt:
                 
         if len(set(emojis)) < len(emojis):
             raise GameExceptions.DiscordGameError(f"emoji list must contain no duplicates")
+            
+        if default is not None:
+            if len(set(default)) != count:
+                raise GameExceptions.DiscordGameError(f"default must contain exactly {count} different emojis: default = {default}")
+            if any([emoji not in emojis for emoji in default]):
+                raise GameExceptions.DiscordGameError(f"default must only contain emojis from the emoji list: emojis = {emojis} | default = {default}")
     
         if color is None:
             color = discord.Color.default()
@@ -243,6 +375,7 @@ class CommandResultPrompt:
         self.count = count
         self.timeout = timeout
         self.color = color
+        self.default = default
                
 class Player:
     """
@@ -298,13 +431,18 @@ class Player:
     
     instance_fields:
     
-    _discord_channel
+    discord_channel
     discord_name
     name
     roles
-    _player_cache
+    player_cache
+    
+    Player (and any subclass of it) uses __slots__ to keep each instance small,
+    so a subclass needs to list any new fields it adds in its own __slots__
     """
     
+    __slots__ = ("discord_channel", "discord_name", "name", "roles", "player_cache")
+    
     def __init__(self,  DicordAuthorContext, name=None):
         
         self.discord_channel = DicordAuthorContext
@@ -355,7 +493,7 @@ class Player:
         
         :param text (str): The text of the message
         
-        :param image (str) : The file path to the image file
+        :param image (str/EncodedImage) : The file path to the image file (or the already encoded image)
         
         :param send_both (bool) : Whether to send both the text and image if both are present AND send_images is True
         
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+class ImageCache:
+    """
+    A least recently used cache of encoded images (EncodedImage) shared by every game in a process
+
+    Images that only depend on a small amount of game state (ex. which cards are in a hand)
+    only have to be composed and encoded the first time they're needed
+
+    contructors:
+
+    __init__(self, max_size : int)
+
+        max_size (int) : The most images kept in the cache. The least recently used image is dropped past that (None for no limit)
+
+    instance methods:
+
+    .get(self, key : object, build : function) -> EncodedImage
+
+        returns the image for 'key', calling 'build()' to create it if it isn't cached
+
+    .clear(self)
+
+        drops every image in the cache
+
+    instance fields:
+
+    hits (int) : How many times .get found the image in the cache
+
+    misses (int) : How many times .get had to build the image
+
+    size_bytes (int) : The total size of the images in the cache
+    """
+
+    def __init__(self, max_size = None):
+        self.max_size = max_size
+
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._images)
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def get(self, key, build):
+
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+
+            self.misses += 1
+
+        #build outside the lock so a slow encode doesn't block lookups. The worst case is two callers building the same image
+        image = build()
+
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+
+            if self.max_size is not None:
+                while len(self._images) > self.max_size:
+                    self._images.popitem(last = False)
+
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+    @property
+    def size_bytes(self):
+        return sum(len(image) for image in self._images.values())
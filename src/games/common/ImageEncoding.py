@@ -0,0 +1,199 @@
+import io
+import os
+import numpy as np
+from PIL import Image
+
+from . import GameClasses
+
+class EncodeProfile:
+    """
+    One way of encoding an image (format, quality, size limit)
+
+    contructors:
+
+    __init__(self, format : str, quality : int, max_width : int, progressive : bool, optimize : bool)
+
+        format (str) : "jpeg", "webp" or "png"
+
+        quality (int) : The quality (1-100) for jpeg/webp (ignored for png)
+
+        max_width (int) : Images wider than this are scaled down to it (None to keep the size)
+
+        progressive (bool) : Whether a jpeg is progressive (shows a blurry version while it's loading)
+
+        optimize (bool) : Whether the encoder should spend extra time making the file smaller
+
+    instance methods:
+
+    .encode(self, image : np.ndarray, name : str) -> EncodedImage
+
+        encodes an image. The file extension for the format is added to 'name'
+    """
+
+    __slots__ = ("format", "quality", "max_width", "progressive", "optimize")
+
+    _extensions = {
+        "jpeg" : ".jpg",
+        "webp" : ".webp",
+        "png" : ".png",
+    }
+
+    def __init__(self, format = "jpeg", quality = 85, max_width = None, progressive = False, optimize = True):
+
+        format = format.lower()
+        if format == "jpg":
+            format = "jpeg"
+
+        if format not in self._extensions:
+            raise ValueError(f"Unknown image format: {format} (expected one of {list(self._extensions.keys())})")
+
+        self.format = format
+        self.quality = quality
+        self.max_width = max_width
+        self.progressive = progressive
+        self.optimize = optimize
+
+    def __repr__(self):
+        return f"EncodeProfile({self.format}, quality={self.quality}, max_width={self.max_width}, progressive={self.progressive})"
+
+    def get_save_kwargs(self):
+
+        if self.format == "jpeg":
+            return {"quality" : self.quality, "progressive" : self.progressive, "optimize" : self.optimize}
+
+        if self.format == "webp":
+            return {"quality" : self.quality, "method" : 6 if self.optimize else 4}
+
+        return {"optimize" : self.optimize}
+
+    def encode(self, image, name):
+
+        pil_image = Image.fromarray(np.asarray(image))
+        if pil_image.mode not in ["RGB", "L"]:
+            pil_image = pil_image.convert("RGB")
+
+        if (self.max_width is not None) and (pil_image.width > self.max_width):
+            height = max(1, round(pil_image.height * self.max_width / pil_image.width))
+            pil_image = pil_image.resize((self.max_width, height), Image.LANCZOS)
+
+        data = io.BytesIO()
+        pil_image.save(data, format = self.format, **self.get_save_kwargs())
+
+        return GameClasses.EncodedImage(data.getvalue(), os.path.splitext(name)[0] + self._extensions[self.format])
+
+#profiles that can be referred to by name in an EncodePolicy (or in the settings file)
+PROFILES = {
+    "jpeg_high" : EncodeProfile("jpeg", quality = 90, progressive = True),
+    "jpeg" : EncodeProfile("jpeg", quality = 80, progressive = True),
+    "jpeg_small" : EncodeProfile("jpeg", quality = 65, max_width = 800, progressive = True),
+    "webp" : EncodeProfile("webp", quality = 80),
+    "webp_small" : EncodeProfile("webp", quality = 60, max_width = 800),
+    "png" : EncodeProfile("png"),
+}
+
+def get_profile(profile):
+    """
+    returns an EncodeProfile from a profile name, a dict of EncodeProfile arguments or an EncodeProfile
+    """
+
+    if isinstance(profile, EncodeProfile):
+        return profile
+
+    if isinstance(profile, dict):
+        return EncodeProfile(**profile)
+
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown encode profile: {profile} (expected one of {list(PROFILES.keys())})")
+
+    return PROFILES[profile]
+
+class EncodePolicy:
+    """
+    Picks how to encode an image from a list of profiles and a byte budget
+
+    The profiles are tried best first and the first one that fits in the byte budget is used.
+    If none of them fit the smallest result is used
+
+    contructors:
+
+    __init__(self, profiles : List, byte_budget : int)
+
+        profiles (List) : The profiles (names, dicts of EncodeProfile arguments or EncodeProfiles) from best to smallest
+
+        byte_budget (int) : The most bytes an image should take (None to always use the first profile)
+
+    instance methods:
+
+    .encode(self, image : np.ndarray, name : str) -> EncodedImage
+
+        encodes an image with the best profile that fits in the budget
+    """
+
+    __slots__ = ("profiles", "byte_budget")
+
+    def __init__(self, profiles, byte_budget = None):
+
+        if len(profiles) == 0:
+            raise ValueError("An EncodePolicy needs at least one profile")
+
+        self.profiles = [get_profile(profile) for profile in profiles]
+        self.byte_budget = byte_budget
+
+    def encode(self, image, name):
+
+        smallest = None
+        for profile in self.profiles:
+
+            try:
+                encoded = profile.encode(image, name)
+            except (KeyError, OSError, ValueError):
+                #this install of pillow might not support the format (ex. webp), just try the next profile
+                continue
+
+            if (self.byte_budget is None) or (len(encoded) <= self.byte_budget):
+                return encoded
+
+            if (smallest is None) or (len(encoded) < len(smallest)):
+                smallest = encoded
+
+        if smallest is None:
+            raise ValueError(f"None of the encode profiles could encode '{name}': {self.profiles}")
+
+        return smallest
+
+#images for the game channel show up in the embed at full width, while images sent to a player (ex. their hand) are small
+DEFAULT_POLICIES = {
+    "channel" : EncodePolicy(["jpeg_high", "jpeg", "jpeg_small"], byte_budget = 250 * 1024),
+    "player" : EncodePolicy(["jpeg_high", "jpeg"], byte_budget = 150 * 1024),
+}
+
+#game name -> destination -> EncodePolicy. Anything not set here uses DEFAULT_POLICIES
+_policies = {}
+
+def configure(settings):
+    """
+    sets the encode policies from the "IMAGE_ENCODING" section of the settings file
+
+    ex. {"default" : {"channel" : {"profiles" : ["webp", "jpeg"], "byte_budget" : 200000}},
+         "Avalon" : {"channel" : {"profiles" : [{"format" : "jpeg", "quality" : 70, "max_width" : 600}]}}}
+
+    This has to be called before the games are started (each game process keeps the policies it started with)
+    """
+
+    _policies.clear()
+
+    for game_name, destinations in settings.items():
+        for destination, policy in destinations.items():
+            _policies.setdefault(game_name, {})[destination] = EncodePolicy(policy["profiles"], policy.get("byte_budget"))
+
+def get_policy(game_name, destination):
+    """
+    returns the EncodePolicy for images a game sends to a destination ("channel" or "player")
+    """
+
+    for name in [game_name, "default"]:
+        policy = _policies.get(name, {}).get(destination)
+        if policy is not None:
+            return policy
+
+    return DEFAULT_POLICIES[destination]
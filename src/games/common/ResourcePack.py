@@ -0,0 +1,144 @@
+import os
+import json
+import numpy as np
+
+RESOURCES_FOLDER = os.path.join("..", "resources")
+PACKS_FOLDER = os.path.join(RESOURCES_FOLDER, "packs")
+
+#the file in PACKS_FOLDER holding the version of the pack to use
+CURRENT_PACK_FILE = "current"
+MANIFEST_FILE = "manifest.json"
+
+#bump this whenever the layout of a pack changes so old packs are ignored
+PACK_FORMAT = 1
+
+class ResourcePack:
+    """
+    A pack of pre-scaled, pre-encoded images and decoded tiles built ahead of time from the resources folder (see buildResourcePack.py)
+
+    The decoded tiles are .npy files that are memory mapped instead of read,
+    so every game process shares the same pages instead of each holding its own decoded copy
+
+    A resource that was changed after the pack was built (or isn't in the pack) isn't served from the pack,
+    so callers should fall back to the original file when they get None
+
+    contructors:
+
+    __init__(self, pack_folder : str, resources_folder : str)
+
+        pack_folder (str) : The folder the pack was built to (it has the manifest in it)
+
+        resources_folder (str) : The resources folder the pack was built from
+
+    instance methods:
+
+    .get_tile(self, resource_file : str) -> np.ndarray
+
+        returns the decoded (read only, memory mapped) image for 'resource_file' or None if the pack doesn't have it
+
+    .get_image_file(self, resource_file : str) -> str
+
+        returns the path to the pack's encoded copy of 'resource_file' or None if the pack doesn't have it
+
+    instance fields:
+
+    version (str) : The version of the pack (a hash of the sources and build settings)
+    """
+
+    def __init__(self, pack_folder, resources_folder = RESOURCES_FOLDER):
+        self.pack_folder = pack_folder
+        self.resources_folder = os.path.abspath(resources_folder)
+
+        with open(os.path.join(pack_folder, MANIFEST_FILE), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+
+        if manifest.get("format") != PACK_FORMAT:
+            raise ValueError(f"Resource pack at {pack_folder} has format {manifest.get('format')}, expected {PACK_FORMAT}")
+
+        self.version = manifest["version"]
+        self.resources = manifest["resources"]
+
+        self._tiles = {}
+
+    def get_key(self, resource_file):
+        """
+        returns the key of 'resource_file' in the manifest (its path relative to the resources folder)
+        """
+
+        return os.path.relpath(os.path.abspath(resource_file), self.resources_folder).replace(os.sep, "/")
+
+    def get_entry(self, resource_file):
+        """
+        returns the manifest entry for 'resource_file' or None if it isn't in the pack or changed since the pack was built
+        """
+
+        entry = self.resources.get(self.get_key(resource_file))
+        if entry is None:
+            return None
+
+        try:
+            source_stat = os.stat(resource_file)
+        except OSError:
+            return None
+
+        if source_stat.st_size != entry["source_size"] or source_stat.st_mtime_ns != entry["source_mtime_ns"]:
+            return None
+
+        return entry
+
+    def get_tile(self, resource_file):
+
+        key = self.get_key(resource_file)
+        if key in self._tiles:
+            return self._tiles[key]
+
+        entry = self.get_entry(resource_file)
+        if entry is None:
+            return None
+
+        tile = np.load(os.path.join(self.pack_folder, entry["tile"]), mmap_mode = "r")
+        self._tiles[key] = tile
+
+        return tile
+
+    def get_image_file(self, resource_file):
+
+        entry = self.get_entry(resource_file)
+        if entry is None:
+            return None
+
+        return os.path.join(self.pack_folder, entry["image"])
+
+def load_current_pack(packs_folder = PACKS_FOLDER, resources_folder = RESOURCES_FOLDER):
+    """
+    returns the ResourcePack named in the packs folder's 'current' file, or None if no usable pack has been built
+    """
+
+    current_file = os.path.join(packs_folder, CURRENT_PACK_FILE)
+    if not os.path.isfile(current_file):
+        return None
+
+    with open(current_file, "r") as current:
+        version = current.read().strip()
+
+    try:
+        return ResourcePack(os.path.join(packs_folder, version), resources_folder)
+    except (OSError, ValueError, KeyError):
+        return None
+
+#the pack is loaded once per process
+_resource_pack = None
+_resource_pack_loaded = False
+
+def get_resource_pack():
+    """
+    returns the ResourcePack for this process (None if there isn't one)
+    """
+
+    global _resource_pack, _resource_pack_loaded
+
+    if not _resource_pack_loaded:
+        _resource_pack = load_current_pack()
+        _resource_pack_loaded = True
+
+    return _resource_pack
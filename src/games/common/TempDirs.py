@@ -0,0 +1,231 @@
+"""
+Creates, tracks and cleans up the temp directories games use
+
+Each game gets its own directory from tempfile.mkdtemp (so creating one is O(1) and can't race with another process)
+with an owner file in it naming the process that made it. The host (discordBot) runs the janitor (clean_orphans)
+to delete the directories of processes that are gone, since a game killed with 'Admin Kill Game' never gets to clean up after itself
+
+The temp directories go in resources/temp by default. Setting "TEMP_DIR" in the settings file
+to a folder on a tmpfs (ex. /dev/shm/discordGameBot) keeps them in memory instead
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+
+RESOURCES_FOLDER = os.path.join("..", "resources")
+DEFAULT_TEMP_BASE = os.path.join(RESOURCES_FOLDER, "temp")
+
+OWNER_FILE = ".owner"
+
+#directories without an owner file (ex. from an older version of the bot) are only deleted once they're this old (in seconds)
+UNOWNED_GRACE_PERIOD = 60 * 60
+
+_temp_base = DEFAULT_TEMP_BASE
+
+def configure(temp_base = None):
+    """
+    sets the folder temp directories are made in (None for the default)
+
+    This has to be called before the games are started (each game process keeps the folder it started with)
+    """
+
+    global _temp_base
+
+    _temp_base = DEFAULT_TEMP_BASE if temp_base is None else temp_base
+
+def get_temp_base():
+    return _temp_base
+
+def get_process_start_time(pid):
+    """
+    returns when a process started (in clock ticks since boot) or None if that can't be found out
+
+    Used along with the pid so a new process that happens to reuse a dead game's pid isn't mistaken for it
+    """
+
+    try:
+        with open(f"/proc/{pid}/stat", "r") as stat_file:
+            stat = stat_file.read()
+    except OSError:
+        return None
+
+    #the process name (field 2) can have spaces in it, so count the fields from the closing parenthesis
+    fields = stat[stat.rfind(")") + 2:].split()
+
+    return fields[19] if len(fields) > 19 else None
+
+def is_process_alive(pid, start_time = None):
+    """
+    returns True if the process 'pid' is running (and started at 'start_time' if that's known)
+    """
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        #it exists, it just belongs to someone else
+        pass
+
+    if start_time is not None:
+        current_start_time = get_process_start_time(pid)
+        if current_start_time is not None and current_start_time != start_time:
+            return False
+
+    return True
+
+def create_temp_dir(game_name):
+    """
+    creates a new temp directory for a game owned by the current process
+
+    :param game_name (str): The name of the game (used in the directory name)
+
+    :return (str): The path of the new temp directory
+    """
+
+    os.makedirs(_temp_base, exist_ok = True)
+
+    temp_dir = tempfile.mkdtemp(prefix = f"{game_name}_", dir = _temp_base)
+
+    pid = os.getpid()
+    owner = {
+        "pid" : pid,
+        "start_time" : get_process_start_time(pid),
+        "game" : game_name,
+        "created" : time.time(),
+    }
+
+    with open(os.path.join(temp_dir, OWNER_FILE), "w") as owner_file:
+        json.dump(owner, owner_file)
+
+    return temp_dir
+
+def adopt_temp_dir(temp_dir):
+    """
+    makes the current process the owner of a temp directory another process made (ex. for a game that moved to another worker)
+
+    so the janitor doesn't delete it once the process that made it is gone
+    """
+
+    owner = read_owner(temp_dir) or {}
+
+    pid = os.getpid()
+    owner.update({
+        "pid" : pid,
+        "start_time" : get_process_start_time(pid),
+    })
+
+    with open(os.path.join(temp_dir, OWNER_FILE), "w") as owner_file:
+        json.dump(owner, owner_file)
+
+def remove_temp_dir(temp_dir):
+    """
+    deletes a temp directory (does nothing if it's already gone)
+    """
+
+    shutil.rmtree(temp_dir, ignore_errors = True)
+
+def read_owner(temp_dir):
+    """
+    returns the owner info of a temp directory or None if it doesn't have any
+    """
+
+    try:
+        with open(os.path.join(temp_dir, OWNER_FILE), "r") as owner_file:
+            return json.load(owner_file)
+    except (OSError, ValueError):
+        return None
+
+def get_disk_usage(path):
+    """
+    returns the total size in bytes of the files under 'path'
+    """
+
+    total = 0
+
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.lstat(os.path.join(root, file_name)).st_size
+            except OSError:
+                pass
+
+    return total
+
+def list_temp_dirs(temp_base = None):
+    """
+    returns (path, owner info) for every temp directory (owner info is None if it doesn't have an owner file)
+    """
+
+    if temp_base is None:
+        temp_base = _temp_base
+
+    if not os.path.isdir(temp_base):
+        return []
+
+    temp_dirs = []
+    for entry in os.scandir(temp_base):
+        if entry.is_dir(follow_symlinks = False):
+            temp_dirs.append((entry.path, read_owner(entry.path)))
+
+    return temp_dirs
+
+def get_usage_by_pid(temp_base = None):
+    """
+    returns {pid : (number of temp directories, bytes used)} for every process that owns a temp directory
+    """
+
+    usage = {}
+
+    for temp_dir, owner in list_temp_dirs(temp_base):
+        if owner is None:
+            continue
+
+        count, size = usage.get(owner["pid"], (0, 0))
+        usage[owner["pid"]] = (count + 1, size + get_disk_usage(temp_dir))
+
+    return usage
+
+def clean_orphans(temp_base = None, dead_pids = None):
+    """
+    deletes the temp directories whose owning process is gone
+
+    :param temp_base (str): The folder to clean (defaults to the configured one)
+    :param dead_pids (List[int]): pids known to be dead (ex. a game that was just killed), deleted without checking
+
+    :return (List[str]): The temp directories that were deleted
+    """
+
+    now = time.time()
+    removed = []
+
+    for temp_dir, owner in list_temp_dirs(temp_base):
+
+        if owner is None:
+            try:
+                orphaned = now - os.stat(temp_dir).st_mtime > UNOWNED_GRACE_PERIOD
+            except OSError:
+                continue
+
+        elif dead_pids is not None and owner["pid"] in dead_pids:
+            orphaned = True
+
+        else:
+            orphaned = not is_process_alive(owner["pid"], owner.get("start_time"))
+
+        if orphaned:
+            remove_temp_dir(temp_dir)
+            removed.append(temp_dir)
+
+    return removed
+
+def format_bytes(size):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+    return f"{size:.1f} GB"
@@ -1,31 +1,73 @@
-import numpy as np
 import imageio  
-import os
+import functools
 
-def merge_image_files(image_files, output_file):
+from . import ResourcePack
+from . import ImageEncoding
+from . import Compositor
 
-    images = [imageio.imread(f) for f in image_files]
+@functools.lru_cache(maxsize = 128)
+def read_image(image_file):
+    """
+    reads an image file (each file is only decoded once per process)
     
-    output_image = np.concatenate(images, axis=1)
+    If the resource pack has the image its memory mapped tile is used instead of decoding the file
     
-    imageio.imsave(output_file, output_image)
-
-def generate_temp_dir(temp_base):
+    The array returned is shared by every caller so it's read only
     """
-    generate a new temp directory in the base temp directory folder for this game
     
-    This function will try to make a temp directory at os.path.join(temp_base, 'temp_0'),
-    if that temp directory already exists it will try os.path.join(temp_base, 'temp_1')
-    and so on until it finds an unused temp directory name
+    pack = ResourcePack.get_resource_pack()
+    if pack is not None:
+        tile = pack.get_tile(image_file)
+        if tile is not None:
+            return tile
+    
+    image = imageio.imread(image_file)
+    image.flags.writeable = False
     
-    It will then return the temp directory name after it makes the temp directory
+    return image
+    
+def get_image_file(image_file):
     """
-
-    index = 0
-    while os.path.isdir(os.path.join(temp_base, f"temp_{index}")):
-        index+=1
-        
-    temp_dir = os.path.join(temp_base, f"temp_{index}")
-    os.mkdir(temp_dir)
-    
-    return temp_dir   
\ No newline at end of file
+    returns the resource pack's pre-scaled copy of an image file if there is one (otherwise 'image_file' itself)
+    """
+    
+    pack = ResourcePack.get_resource_pack()
+    if pack is not None:
+        pack_file = pack.get_image_file(image_file)
+        if pack_file is not None:
+            return pack_file
+    
+    return image_file
+    
+def encode_image(image, name, game_name = "default", destination = "channel"):
+    """
+    encodes an image array in memory with the game's encode policy for 'destination'
+    
+    :param image (np.ndarray): The image to encode
+    :param name (str): The name the image is attached as (the extension is set by the encode profile that's picked)
+    :param game_name (str): The game sending the image (encode policies can be set per game)
+    :param destination (str): "channel" for the game channel or "player" for a message to a player
+    
+    :return (EncodedImage): The encoded image
+    """
+    
+    return ImageEncoding.get_policy(game_name, destination).encode(image, name)
+    
+def merge_encoded_images(image_files, name, game_name = "default", destination = "channel", columns = None, fit = "pad"):
+    """
+    puts the images side by side and encodes the result in memory (like encode_image)
+    
+    :param columns (int): If set the images are put in a grid with this many columns instead of a single row
+    :param fit (str): How images of different sizes are put together ("pad" or "scale", see Compositor)
+    
+    :return (EncodedImage): The encoded image
+    """
+    
+    images = [read_image(f) for f in image_files]
+    
+    if columns is None:
+        image = Compositor.hstack(images, fit = fit)
+    else:
+        image = Compositor.grid(images, columns, fit = fit)
+    
+    return encode_image(image, name, game_name, destination)
@@ -1,6 +1,4 @@
 import os
-import shutil
-import random
 from emoji import EMOJI_ALIAS_UNICODE as EMOJIS
 
 from .players import CoupPlayer
@@ -8,16 +6,13 @@ from .players import CoupPlayer
 from ..common import GameBase
 from ..common import GameClasses
 from ..common import GameExceptions
-from ..common import utils
+from ..common import TempDirs
 from ..common import CommonGamePieces
 
 RESOURCES_FOLDER = os.path.join("..", "resources")
   
 COUP_FOLDER=os.path.join(RESOURCES_FOLDER, "coup")
 
-TEMP_BASE = os.path.join(RESOURCES_FOLDER, "temp")
-if not os.path.isdir(TEMP_BASE):
-    os.mkdir(TEMP_BASE)
 
 class CoupCard:
     def __init__(self, name, action = None, effect = None, reaction = None, card_image = None):
@@ -39,6 +34,10 @@ class CoupCard:
         
     def __str__(self):
         return str(self.name)
+    
+    def __reduce__(self):
+        #the game matches cards by identity, so a pickled card (ex. in a game moved to another process) comes back as the shared card
+        return (Coup.get_card_from_name, (self.name,))
        
 DiscordGame = GameBase.getBaseGameClass()
 class Coup(DiscordGame):
@@ -89,6 +88,9 @@ class Coup(DiscordGame):
                  card_image = os.path.join(COUP_FOLDER, "contessa.jpg")),                 
     ]
     
+    #shared by every court deck so the decks only store card ids
+    _card_table = CommonGamePieces.CardTable(_all_cards)
+    
     _non_character_actions = [
         ["Income", "Take 1 coin"],
         ["Foreign Aid", "Take 2 coins"],
@@ -163,6 +165,13 @@ class Coup(DiscordGame):
             "enable_message" : "Button Prompts Enabled! (Now Interrupts will use button prompts if 'Button Prompts' is also enabled)",
             "disable_message" : "Button Prompts Disabled!",
             "default" : True
+        },
+        
+        "turn_clock" : {
+            "description" : "Enable to have a player take 'income' if their Action Prompt times out (instead of waiting for them to act manually)",
+            "enable_message" : "Turn Clock Enabled! (Action Prompts that time out will automatically take 'income')",
+            "disable_message" : "Turn Clock Disabled!",
+            "default" : False
         }
     
     }
@@ -172,6 +181,8 @@ class Coup(DiscordGame):
     _default_starting_money = 2
     
     def __init__(self, debug):
+        super().__init__()
+        
         self.debug = debug
     
         self.state = "new_game"
@@ -185,11 +196,12 @@ class Coup(DiscordGame):
         
         self.player_order = []
         
-        self.temp_dir = utils.generate_temp_dir(TEMP_BASE)
+        self.temp_dir = TempDirs.create_temp_dir("Coup")
         
         self.enable_emojis = True
         self.enable_buttons = True
         self.enable_interrupts = True
+        self.enable_turn_clock = False
         
         self.hand_size = self._default_hand_size
         self.deck_size = self._default_deck_size
@@ -220,7 +232,11 @@ class Coup(DiscordGame):
             return symbol
     
     def kill_game(self):
-        shutil.rmtree(self.temp_dir)
+        TempDirs.remove_temp_dir(self.temp_dir)
+    
+    def on_migrated(self):
+        #the temp directory (the board images and logs) stays where it is, this process just owns it now
+        TempDirs.adopt_temp_dir(self.temp_dir)
     
     def reset_player(self, player):
         player.remove_role("current_player")
@@ -242,7 +258,12 @@ class Coup(DiscordGame):
         self.revealed_cards = []
         self.deck = None
     
-    def generate_board(self):   
+    def generate_board(self, destination = None):
+        """
+        returns the current game board
+        
+        If 'destination' is None the board is a CommandResultLiveBoard so the GameRunner can edit it in place (if enabled)
+        """
 
         title = "Game Board:"        
         
@@ -253,11 +274,15 @@ class Coup(DiscordGame):
             if player.has_role("current_player"):
                 message += f"| {self.get_message_symbol('current_player')}"
         
-        return GameClasses.CommandResultEmbedding(title = title, description = message)
+        if destination is None:
+            return GameClasses.CommandResultLiveBoard(title = title, description = message)
+        
+        return GameClasses.CommandResultEmbedding(title = title, description = message, destination = destination)
 
-    def get_card_from_name(self, card_name):
+    @classmethod
+    def get_card_from_name(cls, card_name):
         
-        for card in self._all_cards:
+        for card in cls._all_cards:
             if card.name == card_name:
                 return card
                
@@ -340,6 +365,12 @@ class Coup(DiscordGame):
             title = f"{player.name}: It is your turn. Choose a game action to take"
             description = "\n\n".join([f"{emoji} : {self._option_emojis[emoji]}" for emoji in emojis])
             result_message = "You chose to take the following action:"
+            
+            #with the turn clock on a player who doesn't act in time takes income
+            if self.enable_turn_clock:
+                default = [emoji for emoji in emojis if self._option_emojis[emoji] == "income"]
+            else:
+                default = None
     
             return GameClasses.CommandResultPrompt(player = player,
                                                    title = title,
@@ -349,7 +380,8 @@ class Coup(DiscordGame):
                                                    count = 1,
                                                    key = player.name,
                                                    description = description,
-                                                   timeout = self._prompt_timeout)
+                                                   timeout = self._prompt_timeout,
+                                                   default = default)
      
     def create_target_prompt(self, player, pretitle = None):
     
@@ -943,7 +975,7 @@ class Coup(DiscordGame):
         
         player.take_cards(lost_card)
         self.revealed_cards.append(lost_card)
-        message += player.create_card_messages(self.temp_dir)
+        message += player.create_card_messages()
         
         title = f"{player.name} has lost an influence!"
         description = f"Revealed card: {lost_card.name}"
@@ -1107,14 +1139,14 @@ class Coup(DiscordGame):
         if player_count > max_player_count:
             raise GameExceptions.DiscordGameIllegalMove(f"Max player count is {max_player_count}! There are currently: {player_count}")
     
-        self.deck = CommonGamePieces.DeckOfCards(cards = list(self._all_cards * self.deck_size))
+        self.deck = CommonGamePieces.DeckOfCards(cards = list(self._all_cards * self.deck_size), card_table = self._card_table, rng = self.random)
         for player in players:
             hand = self.deck.draw(self.hand_size)
             player.give_cards(*hand)
             player.money = self.starting_money
         
         self.player_order = [player.name for player in players]
-        random.shuffle(self.player_order)
+        self.random.shuffle(self.player_order)
         
         first_player = self.get_player_from_name(self.player_order[0])
         first_player.give_role("current_player")
@@ -1129,26 +1161,30 @@ class Coup(DiscordGame):
         self.current_action = None
         self.current_action_target = None
         
+        return self.generate_start_game_messages(players, first_player)
+    
+    def generate_start_game_messages(self, players, first_player):
+        """
+        yields the messages starting the game one at a time (so the first hands go out while the rest are still being rendered)
+        """
+        
         #create a message to each player to let them know their hand
-        message = []
         for player in players:
-            message += player.create_card_messages(self.temp_dir)
+            yield player.create_card_messages()
             
-        message.append(GameClasses.CommandResultEmbedding(title="Begining Game of Coup!"))
-        message.append(self.generate_board())
+        yield GameClasses.CommandResultEmbedding(title="Begining Game of Coup!")
+        yield self.generate_board()
         
         if self.enable_buttons:
-            message.append(self.create_action_prompt(first_player))
+            yield self.create_action_prompt(first_player)
         else:
             
             title = f"{first_player.name} it's your turn:"
             description = "Use the command 'action [action]' to take a game action\n\n"
             description += f"Options: {self._all_game_actions}"
-            message.append(GameClasses.CommandResultEmbedding(title=title, description=description))
+            yield GameClasses.CommandResultEmbedding(title=title, description=description)
             
-            message.append(first_player.create_message_for(text = f"{first_player.name} it's your turn. Please take a game action: 'action [action]'"))
-            
-        return message   
+            yield first_player.create_message_for(text = f"{first_player.name} it's your turn. Please take a game action: 'action [action]'")
     
     def process_next_turn(self, message = None):
     
@@ -1549,7 +1585,7 @@ class Coup(DiscordGame):
             player.give_cards(*drawn_cards)
             
             #send the player a DM letting them know what their new hand is
-            message += player.create_card_messages(self.temp_dir)
+            message += player.create_card_messages()
         
             return self.lose_influence(self.challenging_player.name, message)
         else:
@@ -1581,7 +1617,7 @@ class Coup(DiscordGame):
         #remove the two exchanged cards from the player and send DM's to the player letting them know their new hand
         player.take_cards(card_1, card_2)
         message = [player.create_message_for(text = f"You returned {card_1_name} and {card_2_name} to the court deck")]
-        message += player.create_card_messages(self.temp_dir)
+        message += player.create_card_messages()
         
         title = "Action: Exchange"
         description = f"{player.name} returned 2 cards to the court deck\n\n"
@@ -1620,10 +1656,7 @@ class Coup(DiscordGame):
         text = f"{winning_player.name}'s hand:\n"
         text += "\n".join([card.name for card in winning_player.cards])
         
-        output_file = os.path.join(self.temp_dir, winning_player.name + ".jpg")
-        utils.merge_image_files([card.card_image for card in winning_player.cards], output_file)
-        
-        message.append(GameClasses.CommandResultMessage(text=text, image = output_file, send_both=True))
+        message.append(GameClasses.CommandResultMessage(text=text, image = winning_player.get_hand_image("channel"), send_both=True))
         
         #create "Play Again?" message
         title = "Play Again?"
@@ -1817,7 +1850,7 @@ class Coup(DiscordGame):
         new_cards = self.deck.draw(number=2)
         player.give_cards(*new_cards)
         
-        message += player.create_card_messages(self.temp_dir)
+        message += player.create_card_messages()
         
         if self.enable_buttons:
             message.append(GameClasses.CommandResultEmbedding(title=title, description=description))
@@ -1984,7 +2017,7 @@ class Coup(DiscordGame):
             if self.state == "new_game":
                 return GameClasses.CommandResultMessage(text = "NEW GAME", destination = DiscordChannelContext)
             else:
-                return self.generate_board()
+                return self.generate_board(destination = DiscordChannelContext)
             
         elif category == "players":
             
@@ -2038,7 +2071,7 @@ class Coup(DiscordGame):
             else:
                 player_name = self.controls[str(DiscordAuthorContext)]
                 player = self.get_player_from_name(player_name)
-                return player.create_card_messages(self.temp_dir)
+                return player.create_card_messages()
                 
         else:
             raise GameExceptions.DiscordGameIllegalMove(f"check option '{category}' not recognized")
@@ -2091,6 +2124,8 @@ class Coup(DiscordGame):
                 self.enable_buttons = option_boolean
             elif option == "interrupt_prompts":
                 self.enable_interrupts = option_boolean
+            elif option == "turn_clock":
+                self.enable_turn_clock = option_boolean
             else:
                 raise GameExceptions.DiscordGameError(f"Option dictionary misconfigured for option: {option}")
                 
@@ -1,10 +1,17 @@
-import os
+from collections import Counter
 
 from ..common import GameClasses
 from ..common import utils
+from ..common.ImageCache import ImageCache
+
+#a hand's image shows its cards sorted by name, so every game in the process can share one image per distinct hand
+#(5 card types in hands of 1 to 4 cards is only 125 hands, for each destination)
+_hand_image_cache = ImageCache(max_size = 256)
 
 class CoupPlayer(GameClasses.Player):
 
+    __slots__ = ("player_id", "public_info", "cards", "card_counts", "money")
+
     def __init__(self, DiscordAuthorContext, name = None):
         
         super().__init__(DiscordAuthorContext, name)
@@ -16,25 +23,37 @@ class CoupPlayer(GameClasses.Player):
              
         self.public_info = ["blank", "blank"]
         self.cards = []
+        self.card_counts = Counter()
         self.money = 0
     
     def give_cards(self, *cards):
         self.cards += cards
+        self.card_counts.update(cards)
         
     def take_cards(self, *cards):
         for card in cards:
             self.cards.remove(card)
+            self.card_counts[card] -= 1
      
     def get_card_count(self, card):
-        #return how many copies of a particular card this player has_key
-        count = 0
-        for c in self.cards:
-            if c == card:
-                count += 1
-                
-        return count
+        #return how many copies of a particular card this player has
+        return self.card_counts[card]
      
-    def create_card_messages(self, temp_dir, destination = None):
+    def get_hand_image(self, destination = "player"):
+        """
+        returns the image of this player's hand (an EncodedImage from the shared hand image cache)
+        
+        :param destination (str): "player" if the image is sent to the player or "channel" if it's sent to the game channel
+        """
+        
+        #only the image is sorted (the cache key), the hand stays in the order it was dealt
+        cards = sorted(self.cards, key = lambda card: card.name)
+        card_names = tuple(card.name for card in cards)
+        card_images = [card.card_image for card in cards]
+        
+        return _hand_image_cache.get((card_names, destination), lambda: utils.merge_encoded_images(card_images, "hand_" + "_".join(card_names).lower(), "Coup", destination))
+     
+    def create_card_messages(self, destination = None):
         text = f"{self.name}'s hand:\n"
         
         if len(self.cards) == 0:
@@ -42,10 +61,7 @@ class CoupPlayer(GameClasses.Player):
         
         text += "\n".join([card.name for card in self.cards])
         
-        output_file = os.path.join(temp_dir, self.name + ".jpg")
-        utils.merge_image_files([card.card_image for card in self.cards], output_file)
-        
-        return [GameClasses.CommandResultMessage(destination=self.discord_channel, text=text, image = output_file, send_both=True)]
+        return [GameClasses.CommandResultMessage(destination=self.discord_channel, text=text, image = self.get_hand_image(), send_both=True)]
         
         
         
\ No newline at end of file
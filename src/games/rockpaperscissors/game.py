@@ -21,6 +21,8 @@ class RockPaperScissors(DiscordGame):
     }
     
     def __init__(self, debug):
+        super().__init__()
+        
         self.debug = debug
     
         self.state = "player_select"
@@ -53,9 +55,15 @@ class RockPaperScissors(DiscordGame):
     
     def process_throws(self, throws):
     
+        timed_out = []
+        
         for player_name, selection in throws.items():
             player = self.get_player_from_name(player_name)
-            if len(selection) == 0:
+            if selection is None:
+                #their prompt timed out, they can still throw manually
+                timed_out.append(player_name)
+                continue
+            elif len(selection) == 0:
                 raise GameExceptions.DiscordGameError(f"{player_name} never made a choice and timed out! Please Reset Game.")
             elif len(selection) == 1:
                 pass
@@ -76,6 +84,9 @@ class RockPaperScissors(DiscordGame):
             else:
                 raise GameExceptions.DiscordGameError(f"Unknown Throw Registered: player = {player_name} | throw = {selection[0]}")
             
+        if len(timed_out):
+            raise GameExceptions.DiscordGameIllegalMove(f"The Throw Prompt Timed Out for {timed_out}. Please Throw Manually (with 'throw <selection>')")
+            
         return self.process_result()
     
     def process_result(self, message = None):
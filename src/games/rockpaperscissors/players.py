@@ -3,6 +3,8 @@ from ..common import GameExceptions
 
 class RPSPlayer(GameClasses.Player):
 
+    __slots__ = ("player_id", "throw")
+
     def __init__(self, DiscordAuthorContext, name = None):
         
         super().__init__(DiscordAuthorContext, name)
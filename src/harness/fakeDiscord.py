@@ -0,0 +1,362 @@
+"""
+A stand-in for the discord.py client a GameRunner uses, so a game can be run without connecting to anything
+
+It has just what the GameRunner touches: one guild with its channels, members that can be DMed, messages that record
+their edits and reactions, commands that are invoked directly and 'wait_for("reaction_add")'. The users, channels and
+messages can be looked up by id too, which is all a game being moved to another runner needs (see gameMigration.py).
+The users and channels are subclasses of discord.py's classes so the runner's isinstance checks work the same
+"""
+
+import itertools
+
+import discord
+
+class FakeUser(discord.abc.User):
+    """
+    A guild member/user. str() gives "name#0000" like discord.py, which is what the games store as the player's discord_name
+
+    instance methods:
+
+    async .send(self, content : str = None, **kwargs) -> FakeMessage
+
+        sends a message to the user's DM channel
+
+    async .fetch_message(self, message_id : int) -> FakeMessage
+
+        returns a message from the user's DM channel
+    """
+
+    def __init__(self, client, name, bot = False):
+        self.client = client
+        self.id = client.next_id()
+        self.name = name
+        self.discriminator = "0000"
+        self.bot = bot
+        self.dm_channel = FakeDMChannel(client, self)
+
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+    def __repr__(self):
+        return f"<FakeUser {self}>"
+
+    @property
+    def display_name(self):
+        return self.name
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    async def send(self, content = None, **kwargs):
+        return await self.dm_channel.send(content, **kwargs)
+
+    async def fetch_message(self, message_id):
+        return await self.dm_channel.fetch_message(message_id)
+
+class FakeMessage:
+    """
+    A message a FakeClient sent
+
+    instance fields:
+
+    channel (FakeTextChannel/FakeDMChannel) : Where it was sent
+
+    content (str) : The text of the message
+
+    embed (discord.Embed) : The (last) embed of the message
+
+    edits (List[dict]) : The kwargs of every edit, in order
+
+    reactions (List[FakeReaction]) : Each emoji it was reacted with (with the users who did, the bot included)
+
+    created_at (float) : The time on the event loop when it was sent
+    """
+
+    def __init__(self, client, channel, content = None, embed = None, embeds = None, file = None, files = None):
+        self.client = client
+        self.id = client.next_id()
+        self.channel = channel
+        self.content = content
+        self.embeds = list(embeds or []) + ([embed] if embed is not None else [])
+        self.files = list(files or []) + ([file] if file is not None else [])
+        self.edits = []
+        self.reactions = []
+        self.pinned = False
+        self.deleted = False
+        self.created_at = client.loop.time()
+
+    @property
+    def embed(self):
+        return self.embeds[-1] if len(self.embeds) else None
+
+    def __repr__(self):
+        title = self.embed.title if self.embed is not None else None
+        return f"<FakeMessage {self.id} in {self.channel} content={self.content!r} title={title!r}>"
+
+    def find_reaction(self, emoji):
+        emoji = str(getattr(emoji, "emoji", emoji))
+        return discord.utils.find(lambda reaction: reaction.emoji == emoji, self.reactions)
+
+    def record_reaction(self, user, emoji):
+        reaction = self.find_reaction(emoji)
+        if reaction is None:
+            reaction = FakeReaction(self, str(emoji))
+            self.reactions.append(reaction)
+
+        reaction.reacted.append(user)
+        return reaction
+
+    async def add_reaction(self, emoji):
+        self.record_reaction(self.client.user, emoji)
+
+    async def remove_reaction(self, emoji, user):
+        reaction = self.find_reaction(emoji)
+        if reaction is not None and user in reaction.reacted:
+            reaction.reacted.remove(user)
+            #discord drops an emoji no one is reacting with anymore
+            if reaction.count == 0:
+                self.reactions.remove(reaction)
+
+    async def clear_reactions(self):
+        self.reactions = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+        if "content" in kwargs:
+            self.content = kwargs["content"]
+        if "embed" in kwargs:
+            self.embeds = [] if kwargs["embed"] is None else [kwargs["embed"]]
+
+    async def pin(self):
+        self.pinned = True
+
+    async def delete(self):
+        self.deleted = True
+
+class FakeReaction:
+    """
+    An emoji a message was reacted with, like a discord.Reaction
+
+    instance fields:
+
+    reacted (List[FakeUser]) : The users who reacted with it, in order
+    """
+
+    def __init__(self, message, emoji):
+        self.message = message
+        self.emoji = emoji
+        self.reacted = []
+
+    @property
+    def count(self):
+        return len(self.reacted)
+
+    @property
+    def me(self):
+        return self.message.client.user in self.reacted
+
+    async def users(self):
+        for user in list(self.reacted):
+            yield user
+
+class FakeResponse:
+    """
+    What discord.HTTPException reads from the response of a REST call that failed
+    """
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+class FakeTextChannel(discord.TextChannel):
+
+    def __init__(self, client, guild, name):
+        #discord.py's constructor needs a connection state, none of it is used
+        self.client = client
+        self.id = client.next_id()
+        self.guild = guild
+        self.name = name
+
+    def __repr__(self):
+        return f"<FakeTextChannel {self.name}>"
+
+    async def send(self, content = None, **kwargs):
+        return self.client.record_message(FakeMessage(self.client, self, content, **kwargs))
+
+    async def fetch_message(self, message_id):
+        return self.client.find_message(self, message_id)
+
+class FakeDMChannel(discord.DMChannel):
+
+    def __init__(self, client, recipient):
+        self.client = client
+        self.id = client.next_id()
+        self.recipient = recipient
+
+    def __repr__(self):
+        return f"<FakeDMChannel {self.recipient}>"
+
+    async def send(self, content = None, **kwargs):
+        return self.client.record_message(FakeMessage(self.client, self, content, **kwargs))
+
+    async def fetch_message(self, message_id):
+        return self.client.find_message(self, message_id)
+
+class FakeGuild:
+    def __init__(self, client, name, channel_names):
+        self.id = client.next_id()
+        self.name = name
+        self.channels = [FakeTextChannel(client, self, channel_name) for channel_name in channel_names]
+
+    def __str__(self):
+        return self.name
+
+class FakeContext:
+    """
+    The commands.Context a command is invoked with
+    """
+
+    def __init__(self, client, author, channel):
+        self.bot = client
+        self.author = author
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+
+    async def send(self, content = None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+class FakeHTTP:
+    """
+    In place of the client's HTTPClient (the GameRunner counts its requests, there just aren't any)
+    """
+
+    async def request(self, route, **kwargs):
+        raise RuntimeError(f"The fake client can't make REST calls ({route.method} {route.path})")
+
+class FakeClient:
+    """
+    Stands in for the commands.Bot of a GameRunner (pass it as the runner's 'bot')
+
+    contructors:
+
+    __init__(self, loop : asyncio.AbstractEventLoop, guild_name : str, channel_names : List[str])
+
+    instance methods:
+
+    .make_user(self, name : str) -> FakeUser
+
+    .find_message(self, channel, message_id : int) -> FakeMessage
+
+        returns a message sent to 'channel'. Raises a discord.NotFound if there isn't one (or it was deleted)
+
+    async .invoke(self, author : FakeUser, channel, command_name : str, *args)
+
+        runs a command like discord.py would when 'author' sends it in 'channel' (returns once the command and all its prompts are done)
+
+    .react(self, user : FakeUser, message : FakeMessage, emoji : str) -> bool
+
+        adds a reaction and hands it to whatever is waiting for it. Returns whether anything was waiting for it
+
+    instance fields:
+
+    messages (List[FakeMessage]) : Every message sent, in order
+    """
+
+    def __init__(self, loop, guild_name, channel_names):
+        self.loop = loop
+        self.ids = itertools.count(1)
+
+        self.user = FakeUser(self, "GameBot", bot = True)
+        self.users = {self.user.id : self.user}
+        self.http = FakeHTTP()
+        self.guilds = [FakeGuild(self, guild_name, channel_names)]
+
+        self.commands = {}
+        self.listeners = {}
+        self.waiters = []
+        self.messages = []
+        self.logged_out = False
+
+    def next_id(self):
+        return next(self.ids)
+
+    @property
+    def cached_messages(self):
+        return self.messages
+
+    def make_user(self, name):
+        user = FakeUser(self, name)
+        self.users[user.id] = user
+        return user
+
+    def record_message(self, message):
+        self.messages.append(message)
+        return message
+
+    def find_message(self, channel, message_id):
+        for message in self.messages:
+            if message.id == message_id and message.channel is channel and not message.deleted:
+                return message
+
+        raise discord.NotFound(FakeResponse(404, "Not Found"), "Unknown Message")
+
+    def add_command(self, command):
+        self.commands[command.name] = command
+
+    def event(self, coro):
+        setattr(self, coro.__name__, coro)
+        return coro
+
+    def add_listener(self, func, name = None):
+        self.listeners.setdefault(name or func.__name__, []).append(func)
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id):
+        raise discord.NotFound(FakeResponse(404, "Not Found"), "Unknown User")
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds:
+            for channel in guild.channels:
+                if channel.id == channel_id:
+                    return channel
+        return None
+
+    def get_guild(self, guild_id):
+        return discord.utils.get(self.guilds, id = guild_id)
+
+    async def wait_until_ready(self):
+        pass
+
+    async def wait_for(self, event, check = None):
+        future = self.loop.create_future()
+        waiter = (event, check, future)
+        self.waiters.append(waiter)
+
+        try:
+            return await future
+        finally:
+            self.waiters.remove(waiter)
+
+    def dispatch(self, event, *args):
+        handled = False
+
+        for waiter_event, check, future in list(self.waiters):
+            if waiter_event != event or future.done():
+                continue
+            if check is None or check(*args):
+                future.set_result(args if len(args) > 1 else args[0])
+                handled = True
+
+        return handled
+
+    def react(self, user, message, emoji):
+        return self.dispatch("reaction_add", message.record_reaction(user, emoji), user)
+
+    async def invoke(self, author, channel, command_name, *args):
+        await self.commands[command_name].callback(FakeContext(self, author, channel), *args)
+
+    async def logout(self):
+        self.logged_out = True
@@ -0,0 +1,632 @@
+"""
+Runs real GameRunners on a virtual clock (harness.virtualClock) with a fake discord client (harness.fakeDiscord) to check
+every prompt/interrupt follow up of the games, including what happens when the players let them time out
+
+Each scenario plays a game until a particular CommandResultPrompt/CommandResultInterrupt comes up and then handles it one way:
+
+    prompts : "answer" (every player answers), "timeout" (one player never answers)
+    interrupts : "pass" (the pass emoji is clicked), "respond" (a player responds), "timeout" (no one clicks anything)
+    both : "migrate" (the game is moved to a new runner while it's up, see gameMigration.py)
+
+Prompts that give the turn clock a default are also run with the turn clock on. Every other prompt/interrupt on the way
+is answered at random and the game is driven with commands like a table of players would.
+
+A scenario passes if its follow up was called and didn't end in a game error or an exception. For the timeouts the
+follow up also has to come at least the prompt's timeout after it was sent and the prompt has to say it timed out.
+Waiting out a timeout takes no real time, so every timeout in the suite runs in a fraction of a second.
+
+A migrate scenario moves the game once before it starts and again partway through the answers to its prompt/interrupt
+(one reaction comes in during the move), like a worker pool would. The game is then played to its end and passes if
+everything called after the first move went through: no game errors, exceptions or follow ups turned down as illegal moves.
+
+Run from the 'src' directory:
+
+    python -m harness.scenarios
+
+    --seeds 50 : runs every scenario with 50 different seeds
+    --game Coup --continuation process_reveal_prompt_results : only runs some scenarios
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import collections
+
+import gameRunner
+import timerWheel
+import games.avalon.game
+import games.coup.game
+import games.rockpaperscissors.game
+from harness import fakeDiscord
+from harness import virtualClock
+
+GUILD_NAME = "harness-guild"
+CHANNEL_NAME = "game-channel"
+COMMAND_PREFIX = "h."
+
+PROMPT_MODES = ["answer", "timeout", "migrate"]
+INTERRUPT_MODES = ["pass", "respond", "timeout", "migrate"]
+
+#how long (in virtual seconds) to let the runner settle after each step. Anything that isn't waiting on a timer runs first
+SETTLE_SECONDS = 0.001
+
+#the chance a player responds to an interrupt that isn't the one being tested
+INTERRUPT_CHANCE = 0.3
+
+#a game that gets this many commands in a row without a prompt is started over
+STUCK_COMMANDS = 5
+
+##################
+#Game Definitions#
+##################
+
+def next_rock_paper_scissors_command(game, users):
+    if game.state == "player_select":
+        return users[0], "play"
+    return users[0], "reset"
+
+def next_coup_command(game, users):
+    if game.state == "new_game":
+        return users[0], "start"
+    if game.state in ["challenge", "reaction", "reaction_challenge"]:
+        return users[0], "next"
+    if game.state == "action":
+        return game.find_current_player().discord_channel, "action", "income"
+    return users[0], "restart"
+
+def choose_avalon_emojis(prompt, rng):
+    #good has to win three missions for the assassin to get a stab, which hardly ever happens if everyone on a mission picks at random
+    if prompt.func_name == "process_mission_prompt" and rng.random() < 0.9:
+        return [prompt.emojis[0]]
+    return rng.sample(list(prompt.emojis), prompt.count)
+
+def next_avalon_command(game, users):
+    #the stab has to be made by the assassin, so a game stuck there is started over
+    if game.state == "stab":
+        return users[0], "restart"
+    return users[0], "next"
+
+class GameSetup:
+    """
+    How the harness plays a game
+
+    contructors:
+
+    __init__(self, GameClass : type, player_count : int, next_command : function, restart : List[str], continuations : Dict[str, str], end_states : List[str], turn_clock : List[str], choose_emojis : function = None, setup : List[List[str]] = ())
+
+        next_command(game, users) returns (user, command name, *args), the command to send when nothing is happening
+
+        restart (List[str]) : The commands that start the game over
+
+        continuations (Dict[str, str]) : {follow up function : "prompt" or "interrupt"}
+
+        end_states (List[str]) : The states the game is in once it's over
+
+        turn_clock (List[str]) : The follow ups of prompts that have a default when the turn clock is on
+
+        choose_emojis(prompt, rng) returns the emojis a player answers a prompt with (picked at random if None)
+
+        setup (List[List[str]]) : Commands (and their args) sent once everyone has joined
+    """
+
+    def __init__(self, GameClass, player_count, next_command, restart, continuations, end_states, turn_clock = (), choose_emojis = None, setup = ()):
+        self.GameClass = GameClass
+        self.player_count = player_count
+        self.next_command = next_command
+        self.restart = restart
+        self.continuations = continuations
+        self.end_states = list(end_states)
+        self.turn_clock = list(turn_clock)
+        self.choose_emojis = choose_emojis
+        self.setup = list(setup)
+
+GAME_SETUPS = {
+    "RockPaperScissors" : GameSetup(games.rockpaperscissors.game.RockPaperScissors, 2, next_rock_paper_scissors_command, ["reset"],
+                                    {"process_throws" : "prompt"},
+                                    ["result"]),
+    "Coup" : GameSetup(games.coup.game.Coup, 4, next_coup_command, ["restart"],
+                       {"process_action_prompt_results" : "prompt",
+                        "process_target_prompt_results" : "prompt",
+                        "process_lose_influence_prompt_results" : "prompt",
+                        "process_exchange_prompt_results" : "prompt",
+                        "process_reveal_prompt_results" : "prompt",
+                        "process_challenge_interrupt_results" : "interrupt",
+                        "process_reaction_interrupt_results" : "interrupt"},
+                       ["game_end"],
+                       ["process_action_prompt_results"]),
+    "Avalon" : GameSetup(games.avalon.game.Avalon, 7, next_avalon_command, ["restart"],
+                         {"process_team_prompt" : "prompt",
+                          "process_vote_prompt" : "prompt",
+                          "process_mission_prompt" : "prompt",
+                          "process_stab_prompt" : "prompt"},
+                         ["game_end"],
+                         ["process_vote_prompt"],
+                         choose_avalon_emojis,
+                         #the assassin only gets a stab if Merlin is in the game
+                         [["change_rule", "Merlin", "add"]]),
+}
+
+class Scenario:
+    def __init__(self, game_name, continuation, kind, mode, turn_clock = False):
+        self.game_name = game_name
+        self.continuation = continuation
+        self.kind = kind
+        self.mode = mode
+        self.turn_clock = turn_clock
+
+    @property
+    def name(self):
+        return f"{self.game_name}.{self.continuation}.{self.mode}" + ("+turn_clock" if self.turn_clock else "")
+
+def make_scenarios(game_names = None, continuations = None):
+    """
+    returns a Scenario for every (game, follow up, mode) (and the turn clock variants)
+    """
+
+    scenarios = []
+    for game_name, setup in GAME_SETUPS.items():
+        if game_names and game_name not in game_names:
+            continue
+
+        for continuation, kind in setup.continuations.items():
+            if continuations and continuation not in continuations:
+                continue
+
+            for mode in (PROMPT_MODES if kind == "prompt" else INTERRUPT_MODES):
+                scenarios.append(Scenario(game_name, continuation, kind, mode))
+                if continuation in setup.turn_clock:
+                    scenarios.append(Scenario(game_name, continuation, kind, mode, turn_clock = True))
+
+    return scenarios
+
+#################
+#Scenario Runner#
+#################
+
+class ScenarioError(Exception):
+    pass
+
+class Call:
+    def __init__(self, func_name, at):
+        self.func_name = func_name
+        self.at = at
+        self.outcome = None
+        self.error = None
+
+class PromptGroup:
+    """
+    The prompts (or the interrupt) a call returned, that the runner is now waiting on
+    """
+
+    def __init__(self, prompts, interrupts, at, message_index):
+        self.prompts = prompts
+        self.interrupts = interrupts
+        self.func_name = (prompts or interrupts)[0].func_name
+        self.at = at
+        self.message_index = message_index
+        self.handled = False
+        self.messages = {}
+
+class ScenarioTrace:
+    """
+    Takes the place of the GameRunner's trace recorder (see traceRecorder.TraceRecorder) to see every call into the game,
+    how it went and the prompts/interrupts it returned
+    """
+
+    def __init__(self, loop, client):
+        self.loop = loop
+        self.client = client
+        self.calls = []
+        self.group = None
+
+    def command(self, author, is_dm, name, args):
+        pass
+
+    def call(self, func_name, args, author = None, is_dm = None):
+        self.calls.append(Call(func_name, self.loop.time()))
+        self.group = None
+
+    def result(self, outcome, prompts = (), interrupts = (), error = None):
+        call = self.calls[-1]
+        call.outcome = outcome
+        call.error = error
+
+        if len(prompts) or len(interrupts):
+            self.group = PromptGroup(list(prompts), list(interrupts), self.loop.time(), len(self.client.messages))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class ScenarioRun:
+    """
+    Plays one scenario with one seed
+
+    contructors:
+
+    __init__(self, scenario : Scenario, seed : int, max_steps : int)
+
+    instance methods:
+
+    async .run(self) -> str
+
+        plays until the scenario's prompt/interrupt is handled and its follow up has run (and in a migrate scenario, until
+        the game is over). Returns None if the scenario passed, the reason it failed otherwise. Raises a ScenarioError if the
+        prompt/interrupt never came up in 'max_steps' steps
+
+    async .migrate(self, reaction : Tuple[FakeUser, FakeMessage, str] = None)
+
+        moves the game to a new runner, with 'reaction' (if any) coming in while it's being moved
+
+    instance fields:
+
+    virtual_seconds (float) : How long the scenario took on the virtual clock
+    """
+
+    def __init__(self, scenario, seed, max_steps = 400):
+        self.scenario = scenario
+        self.setup = GAME_SETUPS[scenario.game_name]
+        self.seed = seed
+        self.max_steps = max_steps
+
+        self.rng = random.Random(seed)
+        self.loop = asyncio.get_event_loop()
+        self.client = fakeDiscord.FakeClient(self.loop, GUILD_NAME, [CHANNEL_NAME])
+        self.channel = self.client.guilds[0].channels[0]
+        self.users = [self.client.make_user(f"user{i}") for i in range(self.setup.player_count)]
+
+        self.runner = None
+        self.trace = None
+        self.commands = []
+        self.target = None
+        self.moved_at = None
+        self.virtual_seconds = 0.0
+
+    def make_runner(self, standby = False):
+        runner = gameRunner.GameRunner(self.setup.GameClass, None, GUILD_NAME, CHANNEL_NAME, COMMAND_PREFIX, {}, use_images = False, bot = self.client, run = False, standby = standby)
+
+        #the game's shuffles and deals come from the seed too (a game moved to a runner carries on with the numbers it had)
+        if not standby:
+            runner.game.random.seed(self.seed)
+
+        #timeouts go on a wheel of this scenario's own (on the virtual clock) and results are made on the loop's thread
+        runner.timers = timerWheel.TimerWheel()
+        runner.render_executor.shutdown()
+        runner.render_executor = virtualClock.InlineExecutor()
+
+        #every scenario runs in this process, so its memory says nothing about the game
+        runner.watchdog.limits = {}
+
+        if self.trace is None:
+            self.trace = ScenarioTrace(self.loop, self.client)
+        runner.trace = self.trace
+
+        if hasattr(runner.game, "enable_turn_clock"):
+            runner.game.enable_turn_clock = self.scenario.turn_clock
+
+        return runner
+
+    async def settle(self, seconds = SETTLE_SECONDS):
+        await asyncio.sleep(seconds)
+
+    def send_command(self, user, command_name, *args):
+        self.commands.append(self.loop.create_task(self.client.invoke(user, self.channel, command_name, *args)))
+
+    def is_command_running(self):
+        return any(not command.done() for command in self.commands)
+
+    async def react(self, user, message, emoji):
+        #the runner might still be getting ready to wait for the reaction
+        for _ in range(3):
+            if self.client.react(user, message, emoji):
+                await self.settle()
+                return
+            await self.settle()
+
+        raise ScenarioError(f"nothing was waiting for {user}'s {emoji} on {message}")
+
+    async def migrate(self, reaction = None):
+        #both runners share the fake client, like two workers that see the same guild
+        old_runner = self.runner
+        new_runner = self.make_runner(standby = True)
+
+        #(a traced game can't be moved since its trace couldn't be replayed, this trace only watches the calls)
+        old_runner.trace = None
+        dumped = await old_runner.export_game()
+
+        #the old runner holds on to the reaction, the new one has to pick it up from the message
+        if reaction is not None:
+            self.client.react(*reaction)
+            await self.settle()
+
+        await new_runner.import_game(dumped)
+        await old_runner.release()
+
+        self.runner = new_runner
+        if self.moved_at is None:
+            self.moved_at = len(self.trace.calls)
+        await self.settle()
+
+    def find_message(self, group, title, destination):
+        """
+        returns the message the runner sent for a prompt/interrupt of 'group'
+        """
+
+        channel = self.channel if destination is None else destination.dm_channel
+        used = set(message.id for message in group.messages.values())
+
+        for message in self.client.messages[group.message_index:]:
+            if message.id in used or message.channel is not channel:
+                continue
+            if message.embed is not None and message.embed.title == title:
+                return message
+
+        raise ScenarioError(f"the runner never sent the prompt '{title}'")
+
+    async def answer_prompt(self, group, i, migrate = False):
+        prompt = group.prompts[i]
+        message = group.messages[i]
+
+        if self.setup.choose_emojis is None:
+            emojis = self.rng.sample(list(prompt.emojis), prompt.count)
+        else:
+            emojis = self.setup.choose_emojis(prompt, self.rng)
+
+        if migrate:
+            await self.migrate((prompt.player.discord_channel, message, emojis[0]))
+            emojis = emojis[1:]
+
+        for emoji in emojis:
+            await self.react(prompt.player.discord_channel, message, emoji)
+
+    async def handle_prompts(self, group, is_target):
+        for i, prompt in enumerate(group.prompts):
+            group.messages[i] = self.find_message(group, prompt.title, prompt.channel)
+
+        #in a timeout scenario the first player never answers
+        skipped = 1 if is_target and self.scenario.mode == "timeout" else 0
+        #in a migrate scenario the game is moved once half the players have answered
+        moved = len(group.prompts) // 2 if is_target and self.scenario.mode == "migrate" else None
+        for i in range(skipped, len(group.prompts)):
+            await self.answer_prompt(group, i, migrate = (i == moved))
+
+        if skipped:
+            await self.settle(group.prompts[0].timeout + 2 * self.runner.timers.tick)
+
+    async def handle_interrupt(self, group, is_target):
+        interrupt = group.interrupts[0]
+        message = self.find_message(group, interrupt.title, None)
+        group.messages[0] = message
+
+        mode = self.scenario.mode if is_target else None
+        migrate = mode == "migrate"
+        if mode is None or migrate:
+            mode = "respond" if self.rng.random() < INTERRUPT_CHANCE else "pass"
+
+        #no one can answer an interrupt with no players
+        reaction = None
+        if mode == "timeout" or len(interrupt.players) == 0:
+            pass
+        elif mode == "respond" and len(interrupt.emojis):
+            reaction = (self.rng.choice(interrupt.players).discord_channel, message, self.rng.choice(interrupt.emojis))
+        else:
+            reaction = (interrupt.players[0].discord_channel, message, interrupt.end_emoji)
+
+        if migrate:
+            await self.migrate(reaction)
+        elif reaction is not None:
+            await self.react(*reaction)
+
+        if reaction is None:
+            await self.settle(interrupt.timeout + 2 * self.runner.timers.tick)
+
+    async def step(self, idle_commands):
+        """
+        does the next thing a table of players would and returns the number of commands sent in a row without a prompt
+        """
+
+        group = self.trace.group
+
+        if group is not None and not group.handled:
+            group.handled = True
+            is_target = (self.target is None) and (group.func_name == self.scenario.continuation)
+            if is_target:
+                self.target = group
+
+            if len(group.prompts):
+                await self.handle_prompts(group, is_target)
+            else:
+                await self.handle_interrupt(group, is_target)
+            return 0
+
+        if self.is_command_running():
+            #the runner is waiting on something (a timer)
+            await self.settle(1.0)
+            return idle_commands
+
+        if idle_commands >= STUCK_COMMANDS:
+            for command_name in self.setup.restart:
+                self.send_command(self.users[0], command_name)
+                await self.settle()
+            return 0
+
+        self.send_command(*self.setup.next_command(self.runner.game, self.users))
+        await self.settle()
+        return idle_commands + 1
+
+    def find_target_call(self):
+        for call in self.trace.calls:
+            if call.func_name == self.scenario.continuation and call.at >= self.target.at:
+                return call
+        return None
+
+    def is_over(self):
+        """
+        returns whether the scenario has played as far as it needs to
+        """
+
+        call = self.find_target_call()
+        if call is None or call.outcome is None:
+            return False
+
+        #a game that was moved is played to its end
+        return self.scenario.mode != "migrate" or (self.runner.game.state in self.setup.end_states and not self.is_command_running())
+
+    def check_migrated(self):
+        """
+        returns None if everything called after the game was first moved went through, what went wrong otherwise
+        """
+
+        if self.runner.game.state not in self.setup.end_states:
+            return f"the game never finished after it was moved (it's in '{self.runner.game.state}')"
+
+        for call in self.trace.calls[self.moved_at:]:
+            if call.outcome in ["game_error", "exception"]:
+                return f"{call.func_name} ended in {call.outcome} after the game was moved: {call.error}"
+            #every prompt/interrupt is answered with a choice it offered, so the game shouldn't turn one down
+            if call.func_name in self.setup.continuations and call.outcome != "ok":
+                return f"{call.func_name} ended in {call.outcome} after the game was moved: {call.error}"
+
+        return None
+
+    def check(self):
+        """
+        returns None if the scenario's follow up went like it should have, what went wrong otherwise
+        """
+
+        call = self.find_target_call()
+        if call is None:
+            return f"{self.scenario.continuation} was never called"
+
+        if call.outcome in ["game_error", "exception"]:
+            return f"{self.scenario.continuation} ended in {call.outcome}: {call.error}"
+
+        if self.scenario.mode == "timeout":
+            timeout = (self.target.prompts or self.target.interrupts)[0].timeout
+            #the clock is a float, the wheel never fires early but the sum can come out a hair short
+            waited = round(call.at - self.target.at, 6)
+            if waited < timeout:
+                return f"{self.scenario.continuation} was called {waited:.1f}s after the prompt was sent (the timeout is {timeout}s)"
+
+            message = self.target.messages[0]
+            descriptions = [str(edit["embed"].description) for edit in message.edits if edit.get("embed") is not None]
+            if not any("Timed out!" in description for description in descriptions):
+                return f"the prompt never said it timed out: {descriptions}"
+
+        if self.scenario.mode == "migrate":
+            return self.check_migrated()
+
+        return None
+
+    async def run(self):
+        start = self.loop.time()
+        self.runner = self.make_runner()
+
+        try:
+            for user in self.users:
+                self.send_command(user, "join", user.name)
+                await self.settle()
+            for command in self.setup.setup:
+                self.send_command(self.users[0], *command)
+                await self.settle()
+
+            if self.scenario.mode == "migrate":
+                await self.migrate()
+
+            idle_commands = 0
+            for _ in range(self.max_steps):
+                idle_commands = await self.step(idle_commands)
+
+                if self.target is not None and self.is_over():
+                    return self.check()
+
+            if self.target is None:
+                raise ScenarioError(f"{self.scenario.continuation} never came up in {self.max_steps} steps")
+            return self.check()
+
+        finally:
+            self.virtual_seconds = self.loop.time() - start
+            await self.close()
+
+    async def close(self):
+        self.runner.game.kill_game()
+
+        #stop the commands still waiting on prompts, the page turners and the memory watchdog
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task(self.loop)]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
+
+def run_scenario(loop, scenario, seed, attempts, max_steps):
+    """
+    runs 'scenario' from 'seed', trying the next seeds if the game never got to the scenario's prompt/interrupt
+
+    :return (Tuple[str, float, int]): (None or why it failed, virtual seconds, the seed that got there)
+    """
+
+    virtual_seconds = 0.0
+    for attempt_seed in range(seed, seed + attempts):
+        scenario_run = ScenarioRun(scenario, attempt_seed, max_steps)
+        try:
+            failure = loop.run_until_complete(scenario_run.run())
+        except ScenarioError as e:
+            failure = str(e)
+            #only not getting to the prompt/interrupt is worth another seed
+            if scenario_run.target is None:
+                virtual_seconds += scenario_run.virtual_seconds
+                continue
+        virtual_seconds += scenario_run.virtual_seconds
+        return failure, virtual_seconds, attempt_seed
+
+    return failure, virtual_seconds, None
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "runs the games' prompt/interrupt scenarios on a virtual clock")
+    parser.add_argument("--game", action = "append", choices = list(GAME_SETUPS), help = "only run this game's scenarios (can be repeated)")
+    parser.add_argument("--continuation", action = "append", help = "only run the scenarios of this follow up function (can be repeated)")
+    parser.add_argument("--seeds", type = int, default = 1, help = "run every scenario with this many seeds")
+    parser.add_argument("--seed", type = int, default = 0, help = "the first seed")
+    parser.add_argument("--attempts", type = int, default = 30, help = "how many seeds to try for a scenario before giving up on getting to its prompt/interrupt")
+    parser.add_argument("--max-steps", type = int, default = 400, help = "how many steps to give a seed to get to the prompt/interrupt")
+    parser.add_argument("--show", type = int, default = 10, help = "how many failures to show")
+    args = parser.parse_args(argv)
+
+    scenarios = make_scenarios(args.game, args.continuation)
+
+    loop = virtualClock.VirtualClockLoop()
+    asyncio.set_event_loop(loop)
+
+    failures = []
+    virtual_seconds = 0.0
+    runs = 0
+    seeds_tried = collections.Counter()
+    start = time.perf_counter()
+
+    try:
+        for scenario in scenarios:
+            for i in range(args.seeds):
+                seed = args.seed + i * args.attempts
+                failure, seconds, used_seed = run_scenario(loop, scenario, seed, args.attempts, args.max_steps)
+                runs += 1
+                virtual_seconds += seconds
+                seeds_tried[scenario.name] += 1 if used_seed is None else used_seed - seed + 1
+                if failure is not None:
+                    failures.append((scenario.name, seed if used_seed is None else used_seed, failure))
+    finally:
+        loop.close()
+
+    total = time.perf_counter() - start
+
+    print(f"{runs} scenario runs ({len(scenarios)} scenarios x {args.seeds} seeds) in {total:.2f}s real time, {virtual_seconds:.0f}s virtual time ({virtual_seconds / max(total, 1e-9):.0f}x)")
+    print(f"    seeds played: {sum(seeds_tried.values())} | passed: {runs - len(failures)} | failed: {len(failures)}")
+    for name, seed, failure in failures[:args.show]:
+        print(f"    FAILED {name} (seed {seed}): {failure}")
+
+    return 1 if len(failures) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
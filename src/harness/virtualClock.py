@@ -0,0 +1,67 @@
+"""
+An asyncio event loop whose clock only moves when there's nothing left to do
+
+Whenever every task is waiting on a timer (asyncio.sleep, wait_for, call_later, the TimerWheel) the loop jumps its clock
+straight to the next timer instead of sleeping until it's due. A prompt that times out after 300 seconds times out
+right away, and everything still happens in the same order it would in real time.
+
+Real I/O (sockets, pipes, threads finishing) is still waited for for real, but only when there are no timers left
+"""
+
+import asyncio
+import concurrent.futures
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """
+    See above
+
+    instance methods:
+
+    .time(self) -> float
+
+        the virtual time (starts at 0)
+
+    instance fields:
+
+    skipped (float) : How many seconds the clock has jumped ahead in total
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._virtual_time = 0.0
+        self.skipped = 0.0
+
+        select = self._selector.select
+
+        def virtual_select(timeout = None):
+            events = select(0)
+            if len(events) or timeout == 0:
+                return events
+
+            #nothing is scheduled, so only real I/O can wake the loop up
+            if timeout is None:
+                return select(None)
+
+            self._virtual_time += timeout
+            self.skipped += timeout
+            return []
+
+        self._selector.select = virtual_select
+
+    def time(self):
+        return self._virtual_time
+
+class InlineExecutor(concurrent.futures.Executor):
+    """
+    Runs what's submitted to it right away on the calling thread
+
+    Work done on another thread takes real time the virtual clock can't see, so the GameRunner's render thread is replaced with this
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
@@ -0,0 +1,313 @@
+"""
+Reports how much memory a game process is using and watches it for leaks
+
+'Admin Memory' asks a game for a report (make_report): its RSS, the top allocators from tracemalloc,
+counts of the objects the games make a lot of (Players, CommandResults, EncodedImages and numpy arrays),
+the size of each of the game's fields and how many messages discord.py has cached.
+
+Each game also runs a MemoryWatchdog that checks its RSS every "CheckInterval" seconds and:
+
+    flags the game if its RSS grew on "GrowthChecks" checks in a row by more than "GrowthMB" in total
+    writes a report to REPORT_FOLDER once it's over "SnapshotMB"
+    writes a report and restarts the game once it's over "RestartMB"
+
+The limits come from the "MEMORY" field of the settings (configure has to be called before the games are started)
+"""
+
+import gc
+import os
+import sys
+import time
+import asyncio
+import tracemalloc
+
+from games.common import GameClasses
+
+REPORT_FOLDER = os.path.join("..", "resources", "memory_reports")
+
+#a game that exits with this code is restarted by the host
+RESTART_EXIT_CODE = 75
+
+DEFAULT_LIMITS = {
+    "CheckInterval" : 60,
+    "GrowthChecks" : 10,
+    "GrowthMB" : 50,
+    "SnapshotMB" : 500,
+    "RestartMB" : 1000,
+    "Tracemalloc" : False,
+}
+
+_limits = dict(DEFAULT_LIMITS)
+
+def configure(settings):
+    """
+    sets the watchdog limits from the "MEMORY" settings (any that aren't given keep their default, null turns a limit off)
+    """
+
+    global _limits
+
+    _limits = dict(DEFAULT_LIMITS)
+    _limits.update(settings)
+
+def get_limits():
+    return _limits
+
+def get_rss():
+    """
+    returns the resident set size of this process in bytes (0 if it can't be found out)
+    """
+
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        #this is the peak not the current RSS, but it's better than nothing (KB on linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+def get_deep_size(obj, seen = None, max_objects = 100000):
+    """
+    returns roughly how many bytes 'obj' and everything it refers to take up (shared objects are only counted once)
+
+    Follows containers and instance fields, but not into discord.py's objects (a player's discord user leads to the whole client).
+    Stops after 'max_objects' objects
+    """
+
+    if seen is None:
+        seen = set()
+
+    size = 0
+    stack = [obj]
+
+    while stack and len(seen) < max_objects:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type) or type(obj).__module__.startswith("discord"):
+            continue
+        seen.add(id(obj))
+
+        #(a numpy array's getsizeof includes its buffer if it owns it, views and memory mapped tiles don't count their buffer)
+        try:
+            size += sys.getsizeof(obj)
+        except TypeError:
+            continue
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, bytearray, int, float)):
+            pass
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+
+    return size
+
+def count_game_objects():
+    """
+    returns {type name : (count, bytes)} for the kinds of objects the games make a lot of
+
+    Uses gc.get_objects, so it takes a moment in a big process (it's only run when asked for).
+    numpy arrays aren't tracked by the garbage collector, so they're found through the objects that refer to them
+    """
+
+    counts = {}
+    seen_arrays = set()
+
+    def add(name, size):
+        count, total = counts.get(name, (0, 0))
+        counts[name] = (count + 1, total + size)
+
+    def is_array(obj):
+        return type(obj).__name__ in ("ndarray", "memmap") and type(obj).__module__.startswith("numpy")
+
+    for obj in gc.get_objects():
+        obj_type = type(obj)
+        name = obj_type.__name__
+
+        if isinstance(obj, GameClasses.Player):
+            add(f"Player ({name})", sys.getsizeof(obj))
+        elif name.startswith("CommandResult") and obj_type.__module__ == GameClasses.__name__:
+            add(name, sys.getsizeof(obj))
+        elif isinstance(obj, GameClasses.EncodedImage):
+            add(name, len(obj.data))
+
+        for referent in gc.get_referents(obj):
+            if is_array(referent) and id(referent) not in seen_arrays:
+                seen_arrays.add(id(referent))
+                #only count the arrays that own their memory (views and memory mapped tiles don't use any of their own)
+                add(f"numpy.{type(referent).__name__}", referent.nbytes if referent.base is None else 0)
+
+    return counts
+
+def get_field_sizes(obj, limit = 10):
+    """
+    returns [(field name, bytes)] for the biggest fields of 'obj' (ex. the game, to find which of its logs/records is growing)
+    """
+
+    sizes = [(name, get_deep_size(value)) for name, value in vars(obj).items()]
+    sizes.sort(key = lambda item: -item[1])
+
+    return sizes[:limit]
+
+def format_mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def make_report(game = None, bot = None, top = 10):
+    """
+    returns a memory report of this process as text
+
+    :param game (DiscordGame): The game in this process (its biggest fields are listed)
+    :param bot (discord.ext.commands.Bot): The bot of the game (its message cache is counted)
+    :param top (int): How many allocators/fields to list
+    """
+
+    lines = [f"RSS: {format_mb(get_rss())}"]
+
+    if bot is not None:
+        lines.append(f"discord.py cached messages: {len(bot.cached_messages)}")
+
+    lines.append("")
+    lines.append("Objects:")
+    counts = count_game_objects()
+    for name, (count, size) in sorted(counts.items(), key = lambda item: -item[1][1]):
+        lines.append(f"    {name}: {count} ({format_mb(size)})")
+
+    if game is not None:
+        lines.append("")
+        lines.append(f"Biggest fields of {type(game).__name__}:")
+        for name, size in get_field_sizes(game, top):
+            lines.append(f"    {name}: {format_mb(size)}")
+
+    lines.append("")
+    if tracemalloc.is_tracing():
+        lines.append("Top allocators (tracemalloc):")
+        for stat in tracemalloc.take_snapshot().statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            lines.append(f"    {frame.filename.rsplit(os.sep, 1)[-1]}:{frame.lineno}: {format_mb(stat.size)} in {stat.count} blocks")
+    else:
+        lines.append("tracemalloc is off (ask for a report with trace seconds or set \"Tracemalloc\" : true)")
+
+    return "\n".join(lines)
+
+async def make_traced_report(seconds, game = None, bot = None, top = 10):
+    """
+    returns a report of what was allocated (and is still alive) over the next 'seconds' seconds
+
+    Traces allocations only while it runs (tracemalloc slows every allocation down) unless tracing was already on
+    """
+
+    if tracemalloc.is_tracing():
+        return make_report(game, bot, top)
+
+    tracemalloc.start()
+    try:
+        await asyncio.sleep(seconds)
+        return make_report(game, bot, top)
+    finally:
+        tracemalloc.stop()
+
+def write_report(report, game_name):
+    """
+    writes a report to REPORT_FOLDER and returns its path
+    """
+
+    os.makedirs(REPORT_FOLDER, exist_ok = True)
+    path = os.path.join(REPORT_FOLDER, f"{game_name}_{os.getpid()}_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+
+    with open(path, "w") as report_file:
+        report_file.write(report)
+
+    return path
+
+class MemoryWatchdog:
+    """
+    Checks the RSS of a game process every "CheckInterval" seconds (see above)
+
+    contructors:
+
+    __init__(self, game_name : str, make_report : function, restart : function, limits : dict = None)
+
+        make_report() returns the report to write when a limit is hit
+
+        restart(reason : str) is awaited once the game is over "RestartMB"
+
+    instance methods:
+
+    .check(self, rss : int) -> str
+
+        records one check and returns what should happen: None, "grew", "snapshot" or "restart"
+
+    async .run(self)
+    """
+
+    def __init__(self, game_name, make_report, restart, limits = None):
+        self.game_name = game_name
+        self.make_report = make_report
+        self.restart = restart
+        self.limits = get_limits() if limits is None else limits
+
+        self.samples = []
+        self.flagged = False
+        self.snapshot_taken = False
+
+    def check(self, rss):
+        self.samples.append(rss)
+
+        growth_checks = self.limits.get("GrowthChecks")
+        if growth_checks is not None:
+            self.samples = self.samples[-(growth_checks + 1):]
+
+        mb = rss / (1024 * 1024)
+
+        restart_mb = self.limits.get("RestartMB")
+        if restart_mb is not None and mb > restart_mb:
+            return "restart"
+
+        snapshot_mb = self.limits.get("SnapshotMB")
+        if snapshot_mb is not None and mb > snapshot_mb and not self.snapshot_taken:
+            self.snapshot_taken = True
+            return "snapshot"
+
+        growth_mb = self.limits.get("GrowthMB")
+        if growth_checks is not None and growth_mb is not None and len(self.samples) > growth_checks and not self.flagged:
+            grew_every_check = all(later > earlier for earlier, later in zip(self.samples[:-1], self.samples[1:]))
+            if grew_every_check and (self.samples[-1] - self.samples[0]) / (1024 * 1024) > growth_mb:
+                self.flagged = True
+                return "grew"
+
+        return None
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+
+        while True:
+            await asyncio.sleep(self.limits.get("CheckInterval", 60))
+
+            rss = get_rss()
+            action = self.check(rss)
+
+            if action is None:
+                continue
+
+            report = self.make_report()
+            path = await loop.run_in_executor(None, write_report, report, self.game_name)
+
+            if action == "grew":
+                print(f"Memory Watchdog: {self.game_name} ({os.getpid()}) grew on the last {len(self.samples) - 1} checks to {format_mb(rss)}. Report: {path}")
+            elif action == "snapshot":
+                print(f"Memory Watchdog: {self.game_name} ({os.getpid()}) is over {self.limits['SnapshotMB']} MB ({format_mb(rss)}). Report: {path}")
+            else:
+                print(f"Memory Watchdog: {self.game_name} ({os.getpid()}) is over {self.limits['RestartMB']} MB ({format_mb(rss)}), restarting. Report: {path}")
+                await self.restart(f"this game is using {format_mb(rss)} of memory (the limit is {self.limits['RestartMB']} MB)")
+                return
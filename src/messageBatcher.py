@@ -0,0 +1,337 @@
+import io
+import os
+import inspect
+import discord
+
+import games.common.GameClasses
+import games.common.GameExceptions
+
+#Discord limits for a single message
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_FILES_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+
+#older versions of discord.py can only send one embed per message
+if "embeds" not in inspect.signature(discord.abc.Messageable.send).parameters:
+    MAX_EMBEDS_PER_MESSAGE = 1
+
+#Discord renders a message as: content, then attachments, then embeds
+#so a batch can only grow by adding parts of the same or a later kind without reordering what players see
+_TEXT_PART = 0
+_FILE_PART = 1
+_EMBED_PART = 2
+
+def get_image_size(image):
+    """
+    returns the size in bytes of an image file or EncodedImage (0 if the file doesn't exist)
+    """
+
+    if isinstance(image, games.common.GameClasses.EncodedImage):
+        return len(image.data)
+
+    return os.path.getsize(image) if os.path.isfile(image) else 0
+
+def make_file(image):
+    """
+    returns a discord.File for an image file or EncodedImage
+
+    A discord.File can only be sent once, so a new one is made every time
+    """
+
+    if isinstance(image, games.common.GameClasses.EncodedImage):
+        return discord.File(io.BytesIO(image.data), filename = image.filename)
+
+    return discord.File(image)
+
+class MessageBatch:
+    """
+    A run of consecutive command results for the same destination that the GameRunner sends as a single message
+
+    contructors:
+
+    __init__(self, destination : Context)
+
+        destination (Context) : Where the batched message is sent
+
+    instance methods:
+
+    .try_add(self, text : str, image : str/EncodedImage, embed : discord.Embed) -> bool
+
+        adds the parts to this batch if they fit within Discord's limits and keep the displayed order intact
+
+        return (bool) : True if the parts were added, False if they need to go in a new batch
+
+    .send(self)
+
+        sends the batch as one message
+    """
+
+    def __init__(self, destination):
+        self.destination = destination
+
+        self.content = []
+        self.files = []
+        self.embeds = []
+
+        self.content_length = 0
+        self.upload_bytes = 0
+        self.embed_characters = 0
+        self.last_part = _TEXT_PART
+
+    def is_empty(self):
+        return len(self.content) == 0 and len(self.files) == 0 and len(self.embeds) == 0
+
+    def try_add(self, text = None, image = None, embed = None):
+
+        #figure out which kind of part this would add first and make sure it doesn't go before something already in the batch
+        if text is not None:
+            first_part = _TEXT_PART
+        elif image is not None:
+            first_part = _FILE_PART
+        else:
+            first_part = _EMBED_PART
+
+        if (not self.is_empty()) and first_part < self.last_part:
+            return False
+
+        if text is not None:
+            #joining with the previous content adds a newline
+            new_length = self.content_length + len(text) + (1 if len(self.content) else 0)
+            if new_length > MAX_CONTENT_LENGTH:
+                return False
+
+        if image is not None:
+            image_size = get_image_size(image)
+            if len(self.files) + 1 > MAX_FILES_PER_MESSAGE or self.upload_bytes + image_size > MAX_UPLOAD_BYTES:
+                return False
+
+        if embed is not None:
+            if len(self.embeds) + 1 > MAX_EMBEDS_PER_MESSAGE or self.embed_characters + len(embed) > MAX_EMBED_CHARACTERS:
+                return False
+
+        if text is not None:
+            self.content_length = new_length
+            self.content.append(text)
+            self.last_part = _TEXT_PART
+
+        if image is not None:
+            self.upload_bytes += image_size
+            self.files.append(image)
+            self.last_part = _FILE_PART
+
+        if embed is not None:
+            self.embed_characters += len(embed)
+            self.embeds.append(embed)
+            self.last_part = _EMBED_PART
+
+        return True
+
+    def get_send_kwargs(self):
+
+        kwargs = {}
+
+        if len(self.content):
+            kwargs["content"] = "\n".join(self.content)
+
+        if len(self.files) == 1:
+            kwargs["file"] = make_file(self.files[0])
+        elif len(self.files) > 1:
+            kwargs["files"] = [make_file(f) for f in self.files]
+
+        if len(self.embeds) == 1:
+            kwargs["embed"] = self.embeds[0]
+        elif len(self.embeds) > 1:
+            kwargs["embeds"] = self.embeds
+
+        return kwargs
+
+    async def send(self):
+        return await self.destination.send(**self.get_send_kwargs())
+
+class PagedMessage:
+    """
+    A CommandResultPages that the GameRunner sends on its own (so the page turning reactions only go on it)
+
+    contructors:
+
+    __init__(self, destination : Context, pages : CommandResultPages)
+
+        destination (Context) : Where the first page is sent
+
+        pages (CommandResultPages) : The pages to send
+
+    instance methods:
+
+    .make_embed(self, page : int) -> discord.Embed
+
+        returns the embedding showing page number 'page' (starting at 0)
+
+    .send(self)
+
+        sends the first page
+    """
+
+    def __init__(self, destination, pages):
+        self.destination = destination
+        self.pages = pages
+
+    def make_embed(self, page):
+        return discord.Embed(title = self.pages.get_page_title(page), description = self.pages.pages[page], color = self.pages.color)
+
+    async def send(self):
+        return await self.destination.send(embed = self.make_embed(0))
+
+def split_command_result(command_result):
+    """
+    separates the prompts and interrupts from the messages in the result of a DiscordGame Command
+
+    :return (Tuple[List[CommandResultPrompt], List[CommandResultInterrupt], messages]):
+    """
+
+    if isinstance(command_result, (list, tuple)):
+        interrupts = [res for res in command_result if isinstance(res, games.common.GameClasses.CommandResultInterrupt)]
+        prompts = [res for res in command_result if isinstance(res, games.common.GameClasses.CommandResultPrompt)]
+        messages = [res for res in command_result if not isinstance(res, (games.common.GameClasses.CommandResultPrompt,
+                                                                          games.common.GameClasses.CommandResultInterrupt))]
+    elif isinstance(command_result, games.common.GameClasses.CommandResultPrompt):
+        interrupts = []
+        prompts = [command_result]
+        messages = None
+    elif isinstance(command_result, games.common.GameClasses.CommandResultInterrupt):
+        interrupts = [command_result]
+        prompts = []
+        messages = None
+    else:
+        interrupts = []
+        prompts = []
+        messages = command_result
+
+    return prompts, interrupts, messages
+
+def is_streamed_result(command_result):
+    """
+    returns True if a DiscordGame Command returned a generator or async generator (its results are sent as they're yielded)
+    """
+
+    return inspect.isgenerator(command_result) or inspect.isasyncgen(command_result)
+
+def flatten_command_results(command_result, command_name = None, expand_live_boards = False):
+    """
+    yields each individual result out of any nesting of lists/tuples returned by a DiscordGame Command
+
+    if 'expand_live_boards' is True, each CommandResultLiveBoard is replaced by its fallback results
+
+    raises a DiscordGameError for any result type the GameRunner doesn't know how to send
+    """
+
+    if command_result is None:
+        pass
+
+    elif isinstance(command_result, (list, tuple)):
+        for cr in command_result:
+            yield from flatten_command_results(cr, command_name, expand_live_boards)
+
+    elif isinstance(command_result, games.common.GameClasses.CommandResultLiveBoard) and expand_live_boards:
+        yield from flatten_command_results(command_result.fallback, command_name, expand_live_boards)
+
+    elif isinstance(command_result, (str,
+                                     games.common.GameClasses.CommandResultMessage,
+                                     games.common.GameClasses.CommandResultEmbedding,
+                                     games.common.GameClasses.CommandResultLiveBoard,
+                                     games.common.GameClasses.CommandResultPages)):
+        yield command_result
+
+    else:
+        raise games.common.GameExceptions.DiscordGameError(f"result from commmand '{command_name}' not recognized: {type(command_result)}")
+
+def make_embed(command_result):
+
+    kwargs = {}
+
+    kwargs["title"] = command_result.title
+
+    if command_result.description is not None:
+        kwargs["description"] = command_result.description
+
+    kwargs["color"] = command_result.color
+
+    return discord.Embed(**kwargs)
+
+def find_live_boards(command_result, command_name = None):
+    """
+    returns every CommandResultLiveBoard in the results returned by a DiscordGame Command
+    """
+    
+    return [result for result in flatten_command_results(command_result, command_name) if isinstance(result, games.common.GameClasses.CommandResultLiveBoard)]
+
+def batch_command_results(default_destination, command_result, use_images = True, command_name = None, live_board = False):
+    """
+    coalesces the results returned by a DiscordGame Command into as few messages as possible
+
+    Consecutive results going to the same destination are merged into one MessageBatch
+    as long as the merged message stays within Discord's size limits and displays in the same order
+
+    :param default_destination (Context): where results with no destination get sent. Usually the game channel
+    :param command_result: the result returned by the DiscordGame Command
+    :param use_images (bool): whether images should be sent
+    :param command_name (str): the name of the command (used for error messages)
+    :param live_board (bool): if True, CommandResultLiveBoards are left out (the GameRunner edits the live board message instead)
+                              if False, their fallback results are sent in their place
+
+    :return (List[MessageBatch/PagedMessage]): the batches to send in order. Each CommandResultPages is its own PagedMessage
+    """
+
+    batches = []
+
+    for result in flatten_command_results(command_result, command_name, expand_live_boards = not live_board):
+
+        if isinstance(result, games.common.GameClasses.CommandResultLiveBoard):
+            continue
+
+        if isinstance(result, games.common.GameClasses.CommandResultPages):
+            destination = result.destination
+            if destination is None:
+                destination = default_destination
+            batches.append(PagedMessage(destination, result))
+            continue
+
+        text = None
+        image = None
+        embed = None
+
+        if isinstance(result, str):
+            destination = default_destination
+            text = result
+
+        else:
+            destination = result.destination
+            if destination is None:
+                destination = default_destination
+
+            if isinstance(result, games.common.GameClasses.CommandResultMessage):
+
+                if use_images and (result.image is not None):
+                    image = result.image
+
+                if (not use_images) or (result.image is None) or (result.send_both):
+                    text = result.text
+                    if text is None:
+                        text = "."
+
+            else:
+                embed = make_embed(result)
+
+        if len(batches) == 0 or isinstance(batches[-1], PagedMessage) or batches[-1].destination != destination or not batches[-1].try_add(text, image, embed):
+            batch = MessageBatch(destination)
+
+            if not batch.try_add(text, image, embed):
+                #a single result that is over the limits on its own still gets sent by itself and Discord decides what to do with it
+                batch.content = [text] if text is not None else []
+                batch.files = [image] if image is not None else []
+                batch.embeds = [embed] if embed is not None else []
+
+            batches.append(batch)
+
+    return batches
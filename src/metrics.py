@@ -0,0 +1,526 @@
+"""
+Latency histograms and counters for the bot and its games, shown in Prometheus' text format
+
+Every process keeps its own MetricsRegistry (get_registry). The game processes send a snapshot of theirs to the host
+(discordBot) through a multiprocessing.Queue every REPORT_INTERVAL seconds and the host's MetricsCollector adds them up
+for the metrics endpoint (MetricsServer) and 'Admin Stats'.
+
+The metrics are:
+
+    gamebot_command_seconds{game, command, stage} : how long each command took, split into
+        logic : the game's code (the command and any prompt/interrupt follow ups)
+        render : building the messages (batching and making the results of commands that yield them one at a time)
+        send : waiting on discord to send the messages
+        prompt_wait : waiting on players to answer prompts/interrupts
+        total : all of the above
+    gamebot_commands_total{game, command, outcome} : commands run (outcome is "ok", "illegal_move", "game_error" or "exception")
+    gamebot_discord_requests_total{source, method, route, status} : REST calls made to discord ("source" is the game or "host")
+    gamebot_discord_rate_limited_total{source, scope} : 429s discord answered with (discord.py retries these itself)
+    gamebot_discord_upload_bytes_total{source} : bytes of files uploaded to discord
+    gamebot_process_rss_bytes{source} : resident memory of the host and the games (added up for games of the same type)
+"""
+
+import io
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+import contextlib
+
+#upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+#how often (in seconds) the game processes send their metrics to the host
+REPORT_INTERVAL = 15
+
+COMMAND_SECONDS = "gamebot_command_seconds"
+COMMANDS_TOTAL = "gamebot_commands_total"
+REQUESTS_TOTAL = "gamebot_discord_requests_total"
+RATE_LIMITED_TOTAL = "gamebot_discord_rate_limited_total"
+UPLOAD_BYTES_TOTAL = "gamebot_discord_upload_bytes_total"
+RSS_BYTES = "gamebot_process_rss_bytes"
+
+HELP_TEXTS = {
+    COMMAND_SECONDS : "Time spent on game commands by stage (logic, render, send, prompt_wait, total)",
+    COMMANDS_TOTAL : "Game commands run by outcome",
+    REQUESTS_TOTAL : "REST calls made to discord",
+    RATE_LIMITED_TOTAL : "Rate limited (429) responses from discord",
+    UPLOAD_BYTES_TOTAL : "Bytes of files uploaded to discord",
+    RSS_BYTES : "Resident memory of the bot's processes",
+}
+
+STAGES = ["logic", "render", "send", "prompt_wait"]
+
+def make_key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+class Histogram:
+    """
+    Counts observations in fixed buckets (cumulative counts are only worked out when it's shown)
+
+    instance methods:
+
+    .observe(self, value : float)
+
+    .merge(self, counts : List[int], total : float, count : int)
+
+        adds another histogram's state (with the same buckets) to this one
+
+    .quantile(self, q : float) -> float
+
+        estimates the 'q' quantile (0 to 1) by interpolating inside the bucket it falls in
+    """
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets = LATENCY_BUCKETS):
+        self.buckets = buckets
+        #the last count is for observations bigger than every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.total += value
+        self.count += 1
+
+    def merge(self, counts, total, count):
+        for i, bucket_count in enumerate(counts):
+            self.counts[i] += bucket_count
+        self.total += total
+        self.count += count
+
+    def quantile(self, q):
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+
+        return self.buckets[-1]
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+class MetricsRegistry:
+    """
+    The counters and histograms of a process
+
+    Thread safe, since the render thread records metrics too
+
+    instance methods:
+
+    .increment(self, name : str, amount : float = 1, **labels)
+
+    .observe(self, name : str, value : float, **labels)
+
+        records 'value' in the histogram 'name' with the labels 'labels'
+
+    .set_gauge(self, name : str, value : float, **labels)
+
+    .snapshot(self) -> dict
+
+        returns a copy of everything recorded that can be pickled (to send it to another process)
+
+    .merge(self, snapshot : dict)
+
+        adds a snapshot to this registry
+
+    .render(self) -> str
+
+        returns everything in Prometheus' text format
+    """
+
+    def __init__(self, buckets = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, amount = 1, **labels):
+        key = make_key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = make_key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def set_gauge(self, name, value, **labels):
+        key = make_key(name, labels)
+        with self._lock:
+            self.gauges[key] = value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters" : dict(self.counters),
+                "gauges" : dict(self.gauges),
+                "histograms" : {key : (list(h.counts), h.total, h.count) for key, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+            #gauges from several processes with the same labels (ex. two games of the same type) are added up
+            for key, value in snapshot.get("gauges", {}).items():
+                self.gauges[key] = self.gauges.get(key, 0) + value
+
+            for key, (counts, total, count) in snapshot["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(self.buckets)
+                histogram.merge(counts, total, count)
+
+    def render(self):
+        snapshot = self.snapshot()
+        lines = []
+
+        def add_header(name, metric_type):
+            if name in HELP_TEXTS:
+                lines.append(f"# HELP {name} {HELP_TEXTS[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        last_name = None
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            if name != last_name:
+                add_header(name, "counter")
+                last_name = name
+            lines.append(f"{name}{format_labels(labels)} {format_number(value)}")
+
+        last_name = None
+        for (name, labels), value in sorted(snapshot["gauges"].items()):
+            if name != last_name:
+                add_header(name, "gauge")
+                last_name = name
+            lines.append(f"{name}{format_labels(labels)} {format_number(value)}")
+
+        last_name = None
+        for (name, labels), (counts, total, count) in sorted(snapshot["histograms"].items()):
+            if name != last_name:
+                add_header(name, "histogram")
+                last_name = name
+
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', format_number(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_number(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels):
+    if len(labels) == 0:
+        return ""
+
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return "{" + ",".join(f"{key}=\"{escape(value)}\"" for key, value in labels) + "}"
+
+def format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class CommandTimer:
+    """
+    Adds up how long one run of a command spends in each stage, then records it as a single observation per stage
+
+    (a command can go through the same stage several times, ex. one logic call per prompt follow up)
+
+    instance methods:
+
+    .stage(self, name : str)
+
+        a context manager that adds the time spent inside it to the stage 'name'
+
+    .add(self, name : str, seconds : float)
+
+    .record(self, registry : MetricsRegistry, outcome : str, **labels)
+    """
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {stage : 0.0 for stage in STAGES}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def record(self, registry, outcome, **labels):
+        for name, seconds in self.stages.items():
+            registry.observe(COMMAND_SECONDS, seconds, stage = name, **labels)
+        registry.observe(COMMAND_SECONDS, time.perf_counter() - self.start, stage = "total", **labels)
+        registry.increment(COMMANDS_TOTAL, outcome = outcome, **labels)
+
+###################
+#Discord API calls#
+###################
+
+def get_file_size(file):
+    """
+    returns the number of bytes a discord.File will upload (0 if that can't be found out)
+    """
+
+    fp = getattr(file, "fp", None)
+
+    try:
+        if isinstance(fp, io.BytesIO):
+            return fp.getbuffer().nbytes - fp.tell()
+        return os.fstat(fp.fileno()).st_size - fp.tell()
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+class RateLimitCounter(logging.Filter):
+    """
+    Counts the 429s discord.py handles (it retries them itself and only logs a warning, so that's the only place to see them)
+
+    Added as a filter on the "discord.http" logger, so it never stops a record from being logged
+    """
+
+    def __init__(self, registry, source):
+        super().__init__()
+        self.registry = registry
+        self.source = source
+
+    def filter(self, record):
+        message = str(record.msg).lower()
+        if record.levelno >= logging.WARNING and "rate limit" in message:
+            self.registry.increment(RATE_LIMITED_TOTAL, source = self.source, scope = "global" if "global" in message else "bucket")
+        return True
+
+def instrument_http(http, registry, source):
+    """
+    counts the REST calls (and the bytes of the files uploaded) made by a discord.py HTTPClient and the 429s it gets
+
+    :param http (discord.http.HTTPClient): The client (bot.http)
+    :param registry (MetricsRegistry): Where to record the counts
+    :param source (str): The "source" label (the game name or "host")
+    """
+
+    request = http.request
+
+    async def counted_request(route, **kwargs):
+
+        files = kwargs.get("files")
+        if files:
+            registry.increment(UPLOAD_BYTES_TOTAL, sum(get_file_size(file) for file in files), source = source)
+
+        status = "error"
+        try:
+            response = await request(route, **kwargs)
+            status = "ok"
+            return response
+        except Exception as e:
+            status = str(getattr(e, "status", "error"))
+            raise
+        finally:
+            #the route's path is the template (ex. /channels/{channel_id}/messages) so it doesn't blow up the number of labels
+            registry.increment(REQUESTS_TOTAL, source = source, method = route.method, route = route.path, status = status)
+
+    http.request = counted_request
+
+    #a game process starts with the host's filter (it's forked from it), which would count into the host's registry
+    logger = logging.getLogger("discord.http")
+    for log_filter in list(logger.filters):
+        if isinstance(log_filter, RateLimitCounter):
+            logger.removeFilter(log_filter)
+    logger.addFilter(RateLimitCounter(registry, source))
+
+################################
+#Collecting and Showing Metrics#
+################################
+
+class MetricsCollector:
+    """
+    Keeps the latest snapshot each game process sent to the host
+
+    Snapshots are cumulative, so only the latest one of each process is kept. Once a game is gone its last snapshot
+    is folded into the retired totals so the counters never go down (anything after its last report is lost
+    if it was killed)
+
+    instance methods:
+
+    .drain(self)
+
+        reads every snapshot waiting in the queue
+
+    .retire(self, pid : int)
+
+    .combine(self, *registries : MetricsRegistry) -> MetricsRegistry
+
+        returns the totals of every game (running or retired) and the given registries
+    """
+
+    def __init__(self, metrics_queue):
+        self.metrics_queue = metrics_queue
+        self.latest = {}
+        self.retired = MetricsRegistry()
+
+    def drain(self):
+        while True:
+            try:
+                pid, snapshot = self.metrics_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.latest[pid] = snapshot
+
+    def retire(self, pid):
+        self.drain()
+        snapshot = self.latest.pop(pid, None)
+        if snapshot is not None:
+            #a game that's gone doesn't use any memory
+            self.retired.merge(dict(snapshot, gauges = {}))
+
+    def combine(self, *registries):
+        self.drain()
+
+        combined = MetricsRegistry()
+        combined.merge(self.retired.snapshot())
+        for snapshot in self.latest.values():
+            combined.merge(snapshot)
+        for registry in registries:
+            combined.merge(registry.snapshot())
+
+        return combined
+
+def format_stats(registry, limit = 15):
+    """
+    returns a summary of the slowest commands (by total time spent on them) and the discord API counts
+
+    :return (str):
+    """
+
+    snapshot = registry.snapshot()
+
+    histograms = {}
+    for (name, labels), state in snapshot["histograms"].items():
+        if name != COMMAND_SECONDS:
+            continue
+        labels = dict(labels)
+        histogram = Histogram(registry.buckets)
+        histogram.merge(*state)
+        histograms.setdefault((labels["game"], labels["command"]), {})[labels["stage"]] = histogram
+
+    commands = sorted(histograms.items(), key = lambda item: item[1]["total"].total if "total" in item[1] else 0, reverse = True)
+
+    lines = []
+    for (game, command), stages in commands[:limit]:
+        total = stages.get("total")
+        if total is None:
+            continue
+        stage_means = " ".join(f"{stage}={1000 * stages[stage].mean():.0f}" for stage in STAGES if stage in stages)
+        lines.append(f"{game} {command}: {total.count} runs | mean {1000 * total.mean():.0f} ms | p95 {1000 * total.quantile(0.95):.0f} ms | {stage_means}")
+
+    if len(lines) == 0:
+        lines.append("No commands have been run yet")
+
+    def count(name):
+        return sum(value for (counter_name, _), value in snapshot["counters"].items() if counter_name == name)
+
+    lines.append("")
+    lines.append(f"Discord REST calls: {count(REQUESTS_TOTAL):.0f} | 429s: {count(RATE_LIMITED_TOTAL):.0f} | Uploaded: {count(UPLOAD_BYTES_TOTAL) / (1024 * 1024):.1f} MB")
+
+    return "\n".join(lines)
+
+class MetricsServer:
+    """
+    A minimal HTTP server for Prometheus to scrape ('GET /metrics')
+
+    contructors:
+
+    __init__(self, get_metrics : function, host : str, port : int)
+
+        get_metrics() returns the MetricsRegistry to show on each request
+    """
+
+    def __init__(self, get_metrics, host = "127.0.0.1", port = 9108):
+        self.get_metrics = get_metrics
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+
+            #skip the headers
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status = "200 OK"
+                body = self.get_metrics().render().encode("utf-8")
+            else:
+                status = "404 Not Found"
+                body = b"Not Found\n"
+
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            writer.write(body)
+            await writer.drain()
+
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+#every game hosted by a process records into the same registry
+_registry = None
+_registry_pid = None
+
+def get_registry():
+    """
+    returns the MetricsRegistry for this process
+
+    A forked game process gets a new one instead of carrying on with the host's counts
+    """
+
+    global _registry
+    global _registry_pid
+
+    if _registry is None or _registry_pid != os.getpid():
+        _registry = MetricsRegistry()
+        _registry_pid = os.getpid()
+
+    return _registry
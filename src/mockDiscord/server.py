@@ -0,0 +1,775 @@
+"""
+A local stand-in for Discord's gateway and REST API, so the bots can be load tested without a token or a network
+
+It implements as much of the API discord.py 1.x uses as the bot and the games need:
+
+    gateway : hello, identify -> READY + GUILD_CREATE, heartbeats, MESSAGE_CREATE/UPDATE/DELETE,
+              MESSAGE_REACTION_ADD/REMOVE/REMOVE_ALL and CHANNEL_CREATE (for DMs)
+    REST : sending (with files), fetching, editing and deleting messages, reactions (and who reacted), pins, opening DMs
+           and fetching users and members
+
+Every session that identifies is the same bot user (the host and every game use the same token), and every session
+gets every event, like several connections of one bot to the real gateway. A session that identifies with a shard only
+gets the events of the guilds on that shard (DMs go to shard 0, like Discord), see sharding.py.
+
+REST calls are delayed by 'rest_latency' and events by 'gateway_latency' (each +- 'jitter' of itself), and the
+REST routes have Discord-like rate limits (ROUTE_LIMITS, scaled by 'rate_limit_scale') that answer with 429s.
+
+The simulated players are driven through the "/_mock" routes (or the methods of MockDiscord when it's run in process):
+
+    POST /_mock/users {"username"} : add a player to every guild
+    POST /_mock/messages {"user_id", "channel_id", "content"} : a player sends a message to a channel
+    POST /_mock/dms {"user_id", "content"} : a player DMs the bot
+    POST /_mock/reactions {"user_id", "channel_id", "message_id", "emoji"} : a player reacts to a message (DELETE to unreact)
+    GET /_mock/channels/{channel_id}/messages?after=<message_id> : the messages in a channel
+    GET /_mock/state : the guilds, channels and users
+    GET /_mock/stats : request, 429 and upload counts
+
+Run it from the 'src' directory and set "DISCORD_API" in the settings to the URL it prints:
+
+    python -m mockDiscord.server --port 8088 --guild "Test Server" --channels general games --users 10
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import collections
+
+from aiohttp import web, WSMsgType
+
+from mockDiscord.state import MockState, to_json
+
+API_VERSION = 7
+
+HEARTBEAT_INTERVAL = 41250
+
+#(method, route) : (requests, per seconds). Buckets are per channel/guild like Discord's
+ROUTE_LIMITS = {
+    ("POST", "/channels/{channel_id}/messages") : (5, 5.0),
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}") : (5, 5.0),
+    ("DELETE", "/channels/{channel_id}/messages/{message_id}") : (5, 1.0),
+    ("PUT", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user_id}") : (1, 0.25),
+    ("DELETE", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user_id}") : (1, 0.25),
+}
+DEFAULT_LIMIT = (50, 1.0)
+GLOBAL_LIMIT = (50, 1.0)
+
+class RateLimiter:
+    """
+    Fixed window rate limits keyed by bucket
+
+    instance methods:
+
+    .hit(self, key, limit : int, window : float) -> Tuple[bool, int, float]
+
+        counts a request against the bucket 'key' and returns (allowed, requests remaining, seconds until the window resets)
+    """
+
+    def __init__(self):
+        #{key : [requests left, time the window resets]}
+        self.buckets = {}
+
+    def hit(self, key, limit, window):
+        now = time.time()
+
+        bucket = self.buckets.get(key)
+        if bucket is None or bucket[1] <= now:
+            bucket = self.buckets[key] = [limit, now + window]
+
+        if bucket[0] <= 0:
+            return False, 0, bucket[1] - now
+
+        bucket[0] -= 1
+        return True, bucket[0], bucket[1] - now
+
+    def prune(self):
+        now = time.time()
+        for key in [key for key, (_, reset) in self.buckets.items() if reset <= now]:
+            del self.buckets[key]
+
+def json_response(data, status = 200, headers = None):
+    """
+    returns a JSON response with the exact content type discord.py checks for (aiohttp's json_response adds a charset to it,
+    which discord.py 1.x reads as text)
+    """
+
+    return web.Response(body = json.dumps(data).encode("utf-8"), status = status, headers = headers, content_type = "application/json")
+
+def get_event_guild_id(event, data):
+    """
+    returns the id of the guild a gateway event is about (None if it isn't about a guild, ex. a DM)
+    """
+
+    if event in ["GUILD_CREATE", "GUILD_UPDATE", "GUILD_DELETE"]:
+        return data.get("id")
+    return data.get("guild_id")
+
+class GatewaySession:
+    """
+    One gateway connection. Events are sent in order, each one 'gateway_latency' after it was dispatched
+    """
+
+    def __init__(self, server, ws):
+        self.server = server
+        self.ws = ws
+        self.sequence = 0
+        self.identified = False
+        #(shard id, shard count) if the session identified with a shard
+        self.shard = None
+        self.session_id = "%032x" % random.getrandbits(128)
+        self.outbox = asyncio.Queue()
+        self.sender = asyncio.ensure_future(self.send_loop())
+
+    def send(self, payload, delay = 0.0):
+        self.outbox.put_nowait((time.monotonic() + delay, payload))
+
+    def is_on_shard(self, guild_id):
+        """
+        returns whether this session gets the events of the guild with id 'guild_id' (None for DMs)
+        """
+
+        if self.shard is None:
+            return True
+
+        shard_id, shard_count = self.shard
+        if guild_id is None:
+            return shard_id == 0
+        return (int(guild_id) >> 22) % shard_count == shard_id
+
+    def dispatch(self, event, data):
+        self.sequence += 1
+        self.send({"op" : 0, "t" : event, "s" : self.sequence, "d" : data}, self.server.get_delay(self.server.gateway_latency))
+
+    async def send_loop(self):
+        while True:
+            deliver_at, payload = await self.outbox.get()
+
+            delay = deliver_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if self.ws.closed:
+                return
+
+            try:
+                await self.ws.send_str(json.dumps(payload))
+            except (ConnectionError, RuntimeError):
+                return
+
+    def close(self):
+        self.sender.cancel()
+
+class MockDiscord:
+    """
+    The mock server (see above)
+
+    contructors:
+
+    __init__(self, rest_latency : float = 0.0, gateway_latency : float = 0.0, jitter : float = 0.0, rate_limit_scale : float = 1.0, bot_name : str = "GameBot", shard_count : int = 1)
+
+        rate_limit_scale (float) : Multiplies every rate limit (None turns them off)
+
+        shard_count (int) : The number of shards a bot is told to use when it doesn't pick its own
+
+    instance methods:
+
+    async .start(self, host : str, port : int)
+
+    async .stop(self)
+
+    .add_listener(self, listener : function)
+
+        calls listener(event name, data) for every event dispatched (ex. to see what the bots send)
+
+    .user_send_message(self, user_id : str, channel_id : str, content : str) -> dict
+
+    .user_send_dm(self, user_id : str, content : str) -> dict
+
+    .user_add_reaction(self, user_id : str, channel_id : str, message_id : str, emoji : str)
+
+    .user_remove_reaction(self, user_id : str, channel_id : str, message_id : str, emoji : str)
+    """
+
+    def __init__(self, rest_latency = 0.0, gateway_latency = 0.0, jitter = 0.0, rate_limit_scale = 1.0, bot_name = "GameBot", shard_count = 1):
+        self.state = MockState(bot_name)
+        self.shard_count = shard_count
+
+        self.rest_latency = rest_latency
+        self.gateway_latency = gateway_latency
+        self.jitter = jitter
+        self.rate_limit_scale = rate_limit_scale
+
+        self.rate_limiter = RateLimiter()
+        self.sessions = set()
+        self.listeners = []
+
+        self.stats = collections.Counter()
+        self.route_stats = collections.Counter()
+
+        self.url = None
+        self.runner = None
+
+        self.app = web.Application(middlewares = [self.api_middleware], client_max_size = 64 * 1024 * 1024)
+        self.add_routes()
+
+    ###########
+    #Utilities#
+    ###########
+
+    def get_delay(self, latency):
+        if latency <= 0:
+            return 0.0
+        return max(0.0, latency * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def dispatch(self, event, data):
+        guild_id = get_event_guild_id(event, data)
+
+        for session in list(self.sessions):
+            if session.identified and session.is_on_shard(guild_id):
+                session.dispatch(event, data)
+
+        for listener in self.listeners:
+            listener(event, data)
+
+        self.stats["events"] += 1
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def get_dm_channel(self, user_id):
+        channel, created = self.state.get_dm_channel(user_id)
+        if created:
+            self.dispatch("CHANNEL_CREATE", channel)
+        return channel
+
+    async def start(self, host = "127.0.0.1", port = 8088):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        for session in list(self.sessions):
+            session.close()
+            await session.ws.close()
+
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    def get_api_url(self):
+        return f"{self.url}/api/v{API_VERSION}"
+
+    ############
+    #Rate Limit#
+    ############
+
+    def get_rate_limit_headers(self, request):
+        """
+        returns (headers, seconds to retry after or None if the request is allowed)
+        """
+
+        if self.rate_limit_scale is None:
+            return {}, None
+
+        route = request.match_info.route.resource.canonical.split("/{version}", 1)[-1]
+        limit, window = ROUTE_LIMITS.get((request.method, route), DEFAULT_LIMIT)
+        limit = max(1, int(limit * self.rate_limit_scale))
+
+        #buckets are per channel/guild (the "major parameter"), like Discord's
+        major = request.match_info.get("channel_id") or request.match_info.get("guild_id") or ""
+        bucket = f"{request.method} {route} {major}"
+
+        global_limit, global_window = GLOBAL_LIMIT
+        allowed, _, global_reset_after = self.rate_limiter.hit("global", max(1, int(global_limit * self.rate_limit_scale)), global_window)
+        if not allowed:
+            return {"X-RateLimit-Global" : "true"}, global_reset_after
+
+        allowed, remaining, reset_after = self.rate_limiter.hit(bucket, limit, window)
+
+        headers = {
+            "X-RateLimit-Limit" : str(limit),
+            "X-RateLimit-Remaining" : str(remaining),
+            "X-RateLimit-Reset" : f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After" : f"{reset_after:.3f}",
+            "X-RateLimit-Bucket" : str(abs(hash((request.method, route)))),
+        }
+
+        return headers, (None if allowed else reset_after)
+
+    @web.middleware
+    async def api_middleware(self, request, handler):
+        if not request.path.startswith("/api/"):
+            return await handler(request)
+
+        self.stats["requests"] += 1
+        self.route_stats[f"{request.method} {request.match_info.route.resource.canonical if request.match_info.route.resource else request.path}"] += 1
+
+        delay = self.get_delay(self.rest_latency)
+        if delay:
+            await asyncio.sleep(delay)
+
+        headers, retry_after = self.get_rate_limit_headers(request) if request.match_info.route.resource else ({}, None)
+
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+
+            #API v6 gives retry_after in milliseconds, v7 in seconds
+            version = request.match_info.get("version", f"v{API_VERSION}")
+            body = {"message" : "You are being rate limited.", "retry_after" : retry_after * 1000 if version == "v6" else retry_after, "global" : "X-RateLimit-Global" in headers}
+
+            #discord.py treats a 429 without a Via header as a cloudflare ban, so it has to look like it came through the proxy
+            headers["Via"] = "1.1 google"
+            headers["Retry-After"] = f"{retry_after:.3f}"
+            return json_response(body, status = 429, headers = headers)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    ########
+    #Routes#
+    ########
+
+    def add_routes(self):
+        api = "/api/{version}"
+
+        self.app.router.add_get(api + "/gateway", self.get_gateway)
+        self.app.router.add_get(api + "/gateway/bot", self.get_gateway)
+        self.app.router.add_get(api + "/users/@me", self.get_me)
+        self.app.router.add_get(api + "/oauth2/applications/@me", self.get_application)
+        self.app.router.add_post(api + "/auth/logout", self.no_content)
+        self.app.router.add_post(api + "/users/@me/channels", self.create_dm)
+        self.app.router.add_get(api + "/users/{user_id}", self.get_user)
+
+        self.app.router.add_get(api + "/channels/{channel_id}", self.get_channel)
+        self.app.router.add_post(api + "/channels/{channel_id}/typing", self.no_content)
+        self.app.router.add_post(api + "/channels/{channel_id}/messages", self.send_message)
+        self.app.router.add_get(api + "/channels/{channel_id}/messages/{message_id}", self.get_message)
+        self.app.router.add_patch(api + "/channels/{channel_id}/messages/{message_id}", self.edit_message)
+        self.app.router.add_delete(api + "/channels/{channel_id}/messages/{message_id}", self.delete_message)
+        self.app.router.add_get(api + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}", self.get_reaction_users)
+        self.app.router.add_put(api + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user_id}", self.add_reaction)
+        self.app.router.add_delete(api + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user_id}", self.remove_reaction)
+        self.app.router.add_delete(api + "/channels/{channel_id}/messages/{message_id}/reactions", self.clear_reactions)
+        self.app.router.add_put(api + "/channels/{channel_id}/pins/{message_id}", self.pin_message)
+        self.app.router.add_delete(api + "/channels/{channel_id}/pins/{message_id}", self.unpin_message)
+
+        self.app.router.add_get(api + "/guilds/{guild_id}", self.get_guild)
+        self.app.router.add_get(api + "/guilds/{guild_id}/members/{user_id}", self.get_member)
+
+        self.app.router.add_get("/gateway", self.gateway)
+
+        self.app.router.add_post("/_mock/users", self.mock_add_user)
+        self.app.router.add_post("/_mock/messages", self.mock_send_message)
+        self.app.router.add_post("/_mock/dms", self.mock_send_dm)
+        self.app.router.add_post("/_mock/reactions", self.mock_add_reaction)
+        self.app.router.add_delete("/_mock/reactions", self.mock_remove_reaction)
+        self.app.router.add_get("/_mock/channels/{channel_id}/messages", self.mock_get_messages)
+        self.app.router.add_get("/_mock/state", self.mock_get_state)
+        self.app.router.add_get("/_mock/stats", self.mock_get_stats)
+
+    def not_found(self, what, code):
+        return json_response({"message" : f"Unknown {what}", "code" : code}, status = 404)
+
+    async def no_content(self, request):
+        return web.Response(status = 204)
+
+    ##########
+    #REST API#
+    ##########
+
+    async def get_gateway(self, request):
+        ws_url = self.url.replace("http://", "ws://", 1) + "/gateway"
+        return json_response({"url" : ws_url, "shards" : self.shard_count, "session_start_limit" : {"total" : 1000, "remaining" : 1000, "reset_after" : 0, "max_concurrency" : 1}})
+
+    async def get_me(self, request):
+        return json_response(dict(self.state.bot_user, verified = True, mfa_enabled = False, flags = 0))
+
+    async def get_application(self, request):
+        bot_user = self.state.bot_user
+        return json_response({"id" : bot_user["id"], "name" : bot_user["username"], "icon" : None, "description" : "",
+                                  "rpc_origins" : [], "bot_public" : True, "bot_require_code_grant" : False, "owner" : bot_user,
+                                  "summary" : "", "verify_key" : "", "flags" : 0})
+
+    async def get_user(self, request):
+        user = self.state.users.get(request.match_info["user_id"])
+        if user is None:
+            return self.not_found("User", 10013)
+        return json_response(user)
+
+    async def create_dm(self, request):
+        payload = await request.json()
+        #discord.py sends the id as a number, the ids are kept as strings (like in every payload)
+        recipient_id = str(payload.get("recipient_id"))
+        if recipient_id not in self.state.users:
+            return self.not_found("User", 10013)
+        return json_response(self.get_dm_channel(recipient_id))
+
+    async def get_channel(self, request):
+        channel = self.state.channels.get(request.match_info["channel_id"])
+        if channel is None:
+            return self.not_found("Channel", 10003)
+        return json_response(channel)
+
+    async def read_message_payload(self, request):
+        """
+        returns (the JSON payload, attachments) of a message being sent (with or without files)
+        """
+
+        if not request.content_type.startswith("multipart/"):
+            return await request.json(), []
+
+        payload = {}
+        attachments = []
+
+        reader = await request.multipart()
+        while True:
+            part = await reader.next()
+            if part is None:
+                break
+
+            if part.name == "payload_json":
+                payload = json.loads(await part.text())
+            else:
+                data = await part.read()
+                attachments.append(self.state.make_attachment(part.filename or "file", len(data)))
+                self.stats["upload_bytes"] += len(data)
+
+        return payload, attachments
+
+    async def send_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.state.channels:
+            return self.not_found("Channel", 10003)
+
+        payload, attachments = await self.read_message_payload(request)
+
+        embeds = list(payload.get("embeds") or [])
+        if payload.get("embed"):
+            embeds.append(payload["embed"])
+        for embed in embeds:
+            embed.setdefault("type", "rich")
+
+        if not payload.get("content") and not embeds and not attachments:
+            return json_response({"message" : "Cannot send an empty message", "code" : 50006}, status = 400)
+
+        message = self.state.create_message(channel_id, self.state.bot_user, payload.get("content"), embeds, attachments)
+        self.stats["messages_sent"] += 1
+
+        self.dispatch("MESSAGE_CREATE", to_json(message))
+        return json_response(to_json(message))
+
+    async def get_message(self, request):
+        message = self.state.get_message(request.match_info["channel_id"], request.match_info["message_id"])
+        if message is None:
+            return self.not_found("Message", 10008)
+        return json_response(to_json(message))
+
+    async def edit_message(self, request):
+        changes = await request.json()
+        for embed in changes.get("embeds") or ([changes["embed"]] if changes.get("embed") else []):
+            embed.setdefault("type", "rich")
+
+        message = self.state.edit_message(request.match_info["channel_id"], request.match_info["message_id"], changes)
+        if message is None:
+            return self.not_found("Message", 10008)
+
+        self.stats["messages_edited"] += 1
+        self.dispatch("MESSAGE_UPDATE", to_json(message))
+        return json_response(to_json(message))
+
+    async def delete_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        message = self.state.delete_message(channel_id, request.match_info["message_id"])
+        if message is None:
+            return self.not_found("Message", 10008)
+
+        event = {"id" : message["id"], "channel_id" : channel_id}
+        if "guild_id" in message:
+            event["guild_id"] = message["guild_id"]
+        self.dispatch("MESSAGE_DELETE", event)
+        return web.Response(status = 204)
+
+    def get_reaction_user(self, request):
+        user_id = request.match_info["user_id"]
+        return self.state.bot_user["id"] if user_id == "@me" else user_id
+
+    async def add_reaction(self, request):
+        channel_id = request.match_info["channel_id"]
+        message_id = request.match_info["message_id"]
+        if self.state.get_message(channel_id, message_id) is None:
+            return self.not_found("Message", 10008)
+
+        event = self.state.add_reaction(channel_id, message_id, self.get_reaction_user(request), request.match_info["emoji"])
+        if event is not None:
+            self.dispatch("MESSAGE_REACTION_ADD", event)
+        return web.Response(status = 204)
+
+    async def get_reaction_users(self, request):
+        message = self.state.get_message(request.match_info["channel_id"], request.match_info["message_id"])
+        if message is None:
+            return self.not_found("Message", 10008)
+
+        #a page of the users (by id, like Discord) after 'after'
+        after = int(request.query.get("after", 0))
+        limit = int(request.query.get("limit", 25))
+        user_ids = sorted((int(user_id) for user_id in message.get("_reaction_users", {}).get(request.match_info["emoji"], set())))
+        users = [self.state.users[str(user_id)] for user_id in user_ids if user_id > after][:limit]
+        return json_response(users)
+
+    async def remove_reaction(self, request):
+        channel_id = request.match_info["channel_id"]
+        message_id = request.match_info["message_id"]
+        if self.state.get_message(channel_id, message_id) is None:
+            return self.not_found("Message", 10008)
+
+        event = self.state.remove_reaction(channel_id, message_id, self.get_reaction_user(request), request.match_info["emoji"])
+        if event is not None:
+            self.dispatch("MESSAGE_REACTION_REMOVE", event)
+        return web.Response(status = 204)
+
+    async def clear_reactions(self, request):
+        event = self.state.clear_reactions(request.match_info["channel_id"], request.match_info["message_id"])
+        if event is None:
+            return self.not_found("Message", 10008)
+
+        self.dispatch("MESSAGE_REACTION_REMOVE_ALL", event)
+        return web.Response(status = 204)
+
+    async def pin_message(self, request):
+        if self.state.set_pinned(request.match_info["channel_id"], request.match_info["message_id"], True) is None:
+            return self.not_found("Message", 10008)
+        return web.Response(status = 204)
+
+    async def unpin_message(self, request):
+        if self.state.set_pinned(request.match_info["channel_id"], request.match_info["message_id"], False) is None:
+            return self.not_found("Message", 10008)
+        return web.Response(status = 204)
+
+    async def get_guild(self, request):
+        guild = self.state.guilds.get(request.match_info["guild_id"])
+        if guild is None:
+            return self.not_found("Guild", 10004)
+        return json_response({key : value for key, value in guild.items() if key not in ("channels", "members", "voice_states", "presences")})
+
+    async def get_member(self, request):
+        member = self.state.get_member(request.match_info["guild_id"], request.match_info["user_id"])
+        if member is None:
+            return self.not_found("Member", 10007)
+        return json_response(member)
+
+    #########
+    #Gateway#
+    #########
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size = 0)
+        await ws.prepare(request)
+
+        session = GatewaySession(self, ws)
+        self.sessions.add(session)
+        self.stats["gateway_connections"] += 1
+
+        session.send({"op" : 10, "s" : None, "t" : None, "d" : {"heartbeat_interval" : HEARTBEAT_INTERVAL, "_trace" : ["mock-discord"]}})
+
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+
+                payload = json.loads(message.data)
+                op = payload.get("op")
+
+                #heartbeat
+                if op == 1:
+                    session.send({"op" : 11, "s" : None, "t" : None, "d" : None})
+
+                #identify
+                elif op == 2:
+                    self.identify(session, payload.get("d") or {})
+
+                #resume. There's nothing to replay so have the client identify again
+                elif op == 6:
+                    session.send({"op" : 9, "s" : None, "t" : None, "d" : False})
+
+                #request guild members
+                elif op == 8:
+                    self.send_members(session, payload.get("d") or {})
+
+        finally:
+            self.sessions.discard(session)
+            session.close()
+
+        return ws
+
+    def identify(self, session, identify):
+        state = self.state
+        session.identified = True
+
+        if identify.get("shard") is not None:
+            session.shard = tuple(identify["shard"])
+
+        guilds = [guild for guild_id, guild in state.guilds.items() if session.is_on_shard(guild_id)]
+
+        ready = {
+            "v" : 6,
+            "user" : dict(state.bot_user, verified = True, mfa_enabled = False),
+            "guilds" : [{"id" : guild["id"], "unavailable" : True} for guild in guilds],
+            "session_id" : session.session_id,
+            "private_channels" : [],
+            "relationships" : [],
+            "user_settings" : {},
+            "application" : {"id" : state.bot_user["id"], "flags" : 0},
+            "_trace" : ["mock-discord"],
+        }
+        if session.shard is not None:
+            ready["shard"] = list(session.shard)
+        session.dispatch("READY", ready)
+
+        for guild in guilds:
+            session.dispatch("GUILD_CREATE", guild)
+
+        #the DMs opened before this session connected
+        if session.is_on_shard(None):
+            for channel_id in state.dm_channels.values():
+                session.dispatch("CHANNEL_CREATE", state.channels[channel_id])
+
+    def send_members(self, session, request):
+        guild_ids = request.get("guild_id")
+        if not isinstance(guild_ids, list):
+            guild_ids = [guild_ids]
+
+        for guild_id in guild_ids:
+            guild = self.state.guilds.get(str(guild_id))
+            if guild is None:
+                continue
+
+            chunk = {"guild_id" : guild["id"], "members" : guild["members"], "chunk_index" : 0, "chunk_count" : 1, "not_found" : []}
+            if "nonce" in request:
+                chunk["nonce"] = request["nonce"]
+            session.dispatch("GUILD_MEMBERS_CHUNK", chunk)
+
+    ######################
+    #Simulated Player API#
+    ######################
+
+    def add_user(self, username):
+        return self.state.add_user(username)
+
+    def user_send_message(self, user_id, channel_id, content):
+        message = self.state.create_message(channel_id, self.state.users[user_id], content)
+        self.dispatch("MESSAGE_CREATE", to_json(message))
+        return message
+
+    def user_send_dm(self, user_id, content):
+        channel = self.get_dm_channel(user_id)
+        return self.user_send_message(user_id, channel["id"], content)
+
+    def user_add_reaction(self, user_id, channel_id, message_id, emoji):
+        event = self.state.add_reaction(channel_id, message_id, user_id, emoji)
+        if event is not None:
+            self.dispatch("MESSAGE_REACTION_ADD", event)
+        return event
+
+    def user_remove_reaction(self, user_id, channel_id, message_id, emoji):
+        event = self.state.remove_reaction(channel_id, message_id, user_id, emoji)
+        if event is not None:
+            self.dispatch("MESSAGE_REACTION_REMOVE", event)
+        return event
+
+    async def mock_add_user(self, request):
+        payload = await request.json()
+        return json_response(self.add_user(payload["username"]))
+
+    async def mock_send_message(self, request):
+        payload = await request.json()
+        if payload.get("user_id") not in self.state.users or payload.get("channel_id") not in self.state.channels:
+            return json_response({"message" : "Unknown user or channel"}, status = 404)
+        return json_response(to_json(self.user_send_message(payload["user_id"], payload["channel_id"], payload["content"])))
+
+    async def mock_send_dm(self, request):
+        payload = await request.json()
+        if payload.get("user_id") not in self.state.users:
+            return json_response({"message" : "Unknown user"}, status = 404)
+        return json_response(to_json(self.user_send_dm(payload["user_id"], payload["content"])))
+
+    async def mock_add_reaction(self, request):
+        payload = await request.json()
+        event = self.user_add_reaction(payload["user_id"], payload["channel_id"], payload["message_id"], payload["emoji"])
+        return json_response({"added" : event is not None})
+
+    async def mock_remove_reaction(self, request):
+        payload = await request.json()
+        event = self.user_remove_reaction(payload["user_id"], payload["channel_id"], payload["message_id"], payload["emoji"])
+        return json_response({"removed" : event is not None})
+
+    async def mock_get_messages(self, request):
+        messages = self.state.messages.get(request.match_info["channel_id"])
+        if messages is None:
+            return json_response({"message" : "Unknown channel"}, status = 404)
+
+        after = request.query.get("after")
+        result = [to_json(message) for message_id, message in messages.items() if after is None or int(message_id) > int(after)]
+        return json_response(result)
+
+    async def mock_get_state(self, request):
+        state = self.state
+        return json_response({
+            "bot" : state.bot_user,
+            "guilds" : [{"id" : guild["id"], "name" : guild["name"], "channels" : [{"id" : channel["id"], "name" : channel["name"]} for channel in guild["channels"]]}
+                        for guild in state.guilds.values()],
+            "users" : [user for user in state.users.values() if not user.get("bot")],
+            "dm_channels" : state.dm_channels,
+        })
+
+    async def mock_get_stats(self, request):
+        return json_response(dict(self.stats, routes = dict(self.route_stats), sessions = len(self.sessions)))
+
+async def prune_rate_limits(server, interval = 60):
+    while True:
+        await asyncio.sleep(interval)
+        server.rate_limiter.prune()
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = "a local stand-in for the Discord API")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8088)
+    parser.add_argument("--guild", default = "Test Server", help = "the name of the guild")
+    parser.add_argument("--channels", nargs = "+", default = ["general"], help = "the text channels of the guild")
+    parser.add_argument("--users", type = int, default = 10, help = "how many players (player_0, player_1, ...) to add")
+    parser.add_argument("--rest-latency", type = float, default = 0.05, help = "seconds each REST call takes")
+    parser.add_argument("--gateway-latency", type = float, default = 0.02, help = "seconds each event takes to arrive")
+    parser.add_argument("--jitter", type = float, default = 0.2, help = "latencies vary by up to this fraction of themselves")
+    parser.add_argument("--rate-limit-scale", type = float, default = 1.0, help = "multiplies every rate limit")
+    parser.add_argument("--no-rate-limits", action = "store_true")
+    parser.add_argument("--shards", type = int, default = 1, help = "the shard count recommended to bots that ask for it")
+    args = parser.parse_args(argv)
+
+    server = MockDiscord(args.rest_latency, args.gateway_latency, args.jitter, None if args.no_rate_limits else args.rate_limit_scale, shard_count = args.shards)
+    server.state.add_guild(args.guild, args.channels)
+    for i in range(args.users):
+        server.add_user(f"player_{i}")
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(server.start(args.host, args.port))
+    loop.create_task(prune_rate_limits(server))
+
+    print(f"Mock Discord running. Set \"DISCORD_API\" : \"{server.get_api_url()}\" in the settings")
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+The users, guilds, channels and messages of the mock Discord server, as the JSON objects the API would return
+
+Everything is kept in memory. The messages of each channel are capped (MAX_MESSAGES_PER_CHANNEL) so long load tests don't grow forever
+"""
+
+import time
+import itertools
+import collections
+from datetime import datetime, timezone
+
+DISCORD_EPOCH = 1420070400000
+
+MAX_MESSAGES_PER_CHANNEL = 500
+
+TEXT_CHANNEL = 0
+DM_CHANNEL = 1
+
+class SnowflakeGenerator:
+    """
+    Makes unique, increasing snowflake ids (the same layout Discord uses, so discord.py can read the time out of them)
+    An id can be backdated by 'milliseconds_ago' (it's then still unique, but not increasing)
+    """
+
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def next(self, milliseconds_ago = 0):
+        milliseconds = int(time.time() * 1000) - DISCORD_EPOCH - milliseconds_ago
+        return str((milliseconds << 22) | (next(self.counter) & 0x3FFFFF))
+
+def get_timestamp():
+    return datetime.now(timezone.utc).isoformat()
+
+class MockState:
+    """
+    The data of the mock server
+
+    contructors:
+
+    __init__(self, bot_name : str = "GameBot")
+
+    instance methods:
+
+    .add_guild(self, name : str, channel_names : List[str]) -> dict
+
+    .add_user(self, username : str, guild_ids : List[str] = None) -> dict
+
+        adds a (human) user, as a member of every guild in 'guild_ids' (every guild if None)
+
+    .get_dm_channel(self, user_id : str) -> Tuple[dict, bool]
+
+        returns the DM channel between the bot and a user and whether it was just made
+
+    .create_message(self, channel_id : str, author : dict, content : str, embeds : List[dict], attachments : List[dict]) -> dict
+
+    .edit_message(self, channel_id : str, message_id : str, changes : dict) -> dict
+
+    .delete_message(self, channel_id : str, message_id : str) -> dict
+
+    .add_reaction(self, channel_id : str, message_id : str, user_id : str, emoji : str) -> dict
+
+        returns the MESSAGE_REACTION_ADD event (None if the user already reacted with that emoji)
+
+    .remove_reaction(self, channel_id : str, message_id : str, user_id : str, emoji : str) -> dict
+
+    .clear_reactions(self, channel_id : str, message_id : str) -> dict
+    """
+
+    def __init__(self, bot_name = "GameBot"):
+        self.snowflakes = SnowflakeGenerator()
+
+        self.bot_user = self.make_user(bot_name, bot = True)
+
+        self.users = {self.bot_user["id"] : self.bot_user}
+        self.guilds = {}
+        self.channels = {}
+
+        #{(guild id, user id) : member}
+        self.members = {}
+
+        #{channel id : OrderedDict(message id : message)}
+        self.messages = {}
+
+        #{user id : DM channel id}
+        self.dm_channels = {}
+
+        self.attachment_count = 0
+        self.attachment_bytes = 0
+
+    def make_user(self, username, bot = False):
+        user = {
+            "id" : self.snowflakes.next(),
+            "username" : username,
+            #discord.py doesn't cache users with the discriminator "0000" (it takes them for webhooks)
+            "discriminator" : "0001",
+            "avatar" : None,
+        }
+        if bot:
+            user["bot"] = True
+
+        return user
+
+    def make_member(self, user, guild):
+        return {
+            "user" : user,
+            "roles" : [],
+            "nick" : None,
+            "joined_at" : guild["joined_at"],
+            "deaf" : False,
+            "mute" : False,
+        }
+
+    def add_guild(self, name, channel_names):
+        #each guild is made a millisecond older than the last, so the guilds are spread over the shards like real ones ((id >> 22) % shard count)
+        guild_id = self.snowflakes.next(len(self.guilds))
+
+        guild = {
+            "id" : guild_id,
+            "name" : name,
+            "icon" : None,
+            "splash" : None,
+            "owner_id" : self.bot_user["id"],
+            "region" : "us-west",
+            "afk_channel_id" : None,
+            "afk_timeout" : 300,
+            "verification_level" : 0,
+            "default_message_notifications" : 0,
+            "explicit_content_filter" : 0,
+            "mfa_level" : 0,
+            "premium_tier" : 0,
+            "system_channel_id" : None,
+            "features" : [],
+            "emojis" : [],
+            #@everyone can do everything, so nothing the bots do is turned down
+            "roles" : [{"id" : guild_id, "name" : "@everyone", "permissions" : "8", "position" : 0, "color" : 0,
+                        "hoist" : False, "managed" : False, "mentionable" : False}],
+            "joined_at" : get_timestamp(),
+            "large" : False,
+            "unavailable" : False,
+            "member_count" : 0,
+            "voice_states" : [],
+            "presences" : [],
+            "channels" : [],
+            "members" : [],
+        }
+
+        self.guilds[guild_id] = guild
+
+        for position, channel_name in enumerate(channel_names):
+            channel = {
+                "id" : self.snowflakes.next(),
+                "type" : TEXT_CHANNEL,
+                "guild_id" : guild_id,
+                "name" : channel_name,
+                "position" : position,
+                "permission_overwrites" : [],
+                "topic" : None,
+                "nsfw" : False,
+                "last_message_id" : None,
+                "parent_id" : None,
+                "rate_limit_per_user" : 0,
+            }
+            guild["channels"].append(channel)
+            self.channels[channel["id"]] = channel
+            self.messages[channel["id"]] = collections.OrderedDict()
+
+        self.add_member(guild, self.bot_user)
+
+        return guild
+
+    def add_member(self, guild, user):
+        member = self.make_member(user, guild)
+        guild["members"].append(member)
+        guild["member_count"] += 1
+        self.members[(guild["id"], user["id"])] = member
+
+    def add_user(self, username, guild_ids = None):
+        user = self.make_user(username)
+        self.users[user["id"]] = user
+
+        for guild_id in (self.guilds.keys() if guild_ids is None else guild_ids):
+            self.add_member(self.guilds[guild_id], user)
+
+        return user
+
+    def find_user(self, username):
+        for user in self.users.values():
+            if user["username"] == username:
+                return user
+        return None
+
+    def find_channel(self, guild_name, channel_name):
+        for guild in self.guilds.values():
+            if guild["name"] == guild_name:
+                for channel in guild["channels"]:
+                    if channel["name"] == channel_name:
+                        return channel
+        return None
+
+    def get_member(self, guild_id, user_id):
+        return self.members.get((guild_id, user_id))
+
+    def get_dm_channel(self, user_id):
+        channel_id = self.dm_channels.get(user_id)
+        if channel_id is not None:
+            return self.channels[channel_id], False
+
+        channel = {
+            "id" : self.snowflakes.next(),
+            "type" : DM_CHANNEL,
+            "last_message_id" : None,
+            "recipients" : [self.users[user_id]],
+        }
+
+        self.channels[channel["id"]] = channel
+        self.messages[channel["id"]] = collections.OrderedDict()
+        self.dm_channels[user_id] = channel["id"]
+
+        return channel, True
+
+    def get_dm_recipient(self, channel):
+        return channel["recipients"][0] if channel["type"] == DM_CHANNEL else None
+
+    def get_message(self, channel_id, message_id):
+        return self.messages.get(channel_id, {}).get(message_id)
+
+    def create_message(self, channel_id, author, content = "", embeds = None, attachments = None):
+        channel = self.channels[channel_id]
+
+        message = {
+            "id" : self.snowflakes.next(),
+            "channel_id" : channel_id,
+            "author" : author,
+            "content" : content or "",
+            "timestamp" : get_timestamp(),
+            "edited_timestamp" : None,
+            "tts" : False,
+            "mention_everyone" : False,
+            "mentions" : [],
+            "mention_roles" : [],
+            "attachments" : attachments or [],
+            "embeds" : embeds or [],
+            "reactions" : [],
+            "pinned" : False,
+            "type" : 0,
+            "flags" : 0,
+        }
+
+        if "guild_id" in channel:
+            message["guild_id"] = channel["guild_id"]
+            member = self.get_member(channel["guild_id"], author["id"])
+            if member is not None:
+                message["member"] = {key : value for key, value in member.items() if key != "user"}
+
+        messages = self.messages[channel_id]
+        messages[message["id"]] = message
+        if len(messages) > MAX_MESSAGES_PER_CHANNEL:
+            messages.popitem(last = False)
+
+        channel["last_message_id"] = message["id"]
+
+        return message
+
+    def make_attachment(self, filename, size):
+        self.attachment_count += 1
+        self.attachment_bytes += size
+
+        attachment_id = self.snowflakes.next()
+        url = f"https://mock.discord.invalid/attachments/{attachment_id}/{filename}"
+
+        return {"id" : attachment_id, "filename" : filename, "size" : size, "url" : url, "proxy_url" : url}
+
+    def edit_message(self, channel_id, message_id, changes):
+        message = self.get_message(channel_id, message_id)
+        if message is None:
+            return None
+
+        for key in ("content", "embeds", "flags"):
+            if key in changes:
+                message[key] = changes[key] if changes[key] is not None else ([] if key == "embeds" else "")
+        if "embed" in changes:
+            message["embeds"] = [] if changes["embed"] is None else [changes["embed"]]
+
+        message["edited_timestamp"] = get_timestamp()
+
+        return message
+
+    def delete_message(self, channel_id, message_id):
+        return self.messages.get(channel_id, {}).pop(message_id, None)
+
+    def set_pinned(self, channel_id, message_id, pinned):
+        message = self.get_message(channel_id, message_id)
+        if message is not None:
+            message["pinned"] = pinned
+        return message
+
+    def make_reaction_event(self, message, user_id, emoji):
+        event = {
+            "user_id" : user_id,
+            "channel_id" : message["channel_id"],
+            "message_id" : message["id"],
+            "emoji" : {"id" : None, "name" : emoji},
+        }
+
+        if "guild_id" in message:
+            event["guild_id"] = message["guild_id"]
+            event["member"] = self.get_member(message["guild_id"], user_id)
+        else:
+            #Discord leaves the user out of a DM reaction, but discord.py 1.x without the members intent doesn't cache users
+            #and drops a reaction by a user it doesn't have (no on_reaction_add), so the user comes with it (as a member without a guild)
+            event["member"] = self.make_member(self.users[user_id], {"joined_at" : get_timestamp()})
+
+        return event
+
+    def add_reaction(self, channel_id, message_id, user_id, emoji):
+        message = self.get_message(channel_id, message_id)
+        if message is None:
+            return None
+
+        #the message only keeps counts (like the API), the users are kept to the side
+        reactions = message.setdefault("_reaction_users", {})
+        users = reactions.setdefault(emoji, set())
+        if user_id in users:
+            return None
+        users.add(user_id)
+
+        self.update_reaction_counts(message)
+
+        return self.make_reaction_event(message, user_id, emoji)
+
+    def remove_reaction(self, channel_id, message_id, user_id, emoji):
+        message = self.get_message(channel_id, message_id)
+        if message is None:
+            return None
+
+        users = message.get("_reaction_users", {}).get(emoji, set())
+        if user_id not in users:
+            return None
+        users.remove(user_id)
+
+        self.update_reaction_counts(message)
+
+        event = self.make_reaction_event(message, user_id, emoji)
+        event.pop("member", None)
+        return event
+
+    def clear_reactions(self, channel_id, message_id):
+        message = self.get_message(channel_id, message_id)
+        if message is None:
+            return None
+
+        message["_reaction_users"] = {}
+        message["reactions"] = []
+
+        event = {"channel_id" : channel_id, "message_id" : message_id}
+        if "guild_id" in message:
+            event["guild_id"] = message["guild_id"]
+        return event
+
+    def update_reaction_counts(self, message):
+        message["reactions"] = [
+            {"emoji" : {"id" : None, "name" : emoji}, "count" : len(users), "me" : self.bot_user["id"] in users}
+            for emoji, users in message["_reaction_users"].items() if len(users)
+        ]
+
+def to_json(message):
+    """
+    returns a message without the fields the mock keeps for itself
+    """
+
+    return {key : value for key, value in message.items() if not key.startswith("_")}
@@ -0,0 +1,154 @@
+"""
+Profiles a running game process for a few seconds ('Admin Profile')
+
+There are two kinds of profile:
+
+    sample : a background thread looks at the stack of every thread SAMPLE_INTERVAL seconds apart and counts them.
+             The result is in the collapsed stack format flame graph tools read (one "frame;frame;frame count" line per stack).
+             Costs next to nothing for the game, so this is the default. The sampler can only look when it gets the GIL,
+             so it leans towards places that let go of it (ex. the event loop waiting in select)
+    cprofile : cProfile on the event loop thread (every command handler and game function call), saved as a pstats file.
+               Exact call counts and times but it slows the game down while it runs
+"""
+
+import io
+import sys
+import time
+import pstats
+import marshal
+import asyncio
+import cProfile
+import threading
+
+SAMPLE_INTERVAL = 0.005
+
+MODES = ["sample", "cprofile"]
+
+class SamplingProfiler:
+    """
+    Counts the stacks of every thread (except its own) every 'interval' seconds
+
+    instance methods:
+
+    .start(self)
+
+    .stop(self) -> str
+
+        stops sampling and returns the stacks in the collapsed stack format
+    """
+
+    def __init__(self, interval = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = {}
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target = self._run, name = "profiler", daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        return self.collapse()
+
+    def _run(self):
+        own_id = threading.get_ident()
+
+        while not self._stop_event.wait(self.interval):
+            thread_names = {thread.ident : thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+            self.sample_count += 1
+
+    def collapse(self):
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.stacks.items(), key = lambda item: -item[1])) + "\n"
+
+    def summary(self, limit = 10):
+        """
+        returns the functions seen on top of a stack most often
+        """
+
+        top = {}
+        for stack, count in self.stacks.items():
+            frame = stack.rsplit(";", 1)[-1]
+            top[frame] = top.get(frame, 0) + count
+
+        total = sum(top.values()) or 1
+        return "\n".join(f"{100 * count / total:5.1f}% {frame}" for frame, count in sorted(top.items(), key = lambda item: -item[1])[:limit])
+
+def get_cprofile_summary(profile, limit = 10):
+    """
+    returns the functions with the most cumulative time in a cProfile.Profile
+    """
+
+    stream = io.StringIO()
+    pstats.Stats(profile, stream = stream).sort_stats("cumulative").print_stats(limit)
+
+    #only keep the table
+    lines = stream.getvalue().splitlines()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return "\n".join(lines[i:])
+
+    return stream.getvalue()
+
+_profiling = False
+
+async def profile_for(seconds, mode = "sample"):
+    """
+    profiles this process for 'seconds' seconds. Has to be run on the event loop thread (so cprofile sees the game)
+
+    :return (Tuple[str, bytes, str]): (file name, file contents, short text summary)
+    """
+
+    global _profiling
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (expected one of {MODES})")
+
+    if _profiling:
+        raise RuntimeError("This game is already being profiled")
+
+    _profiling = True
+    start = time.perf_counter()
+
+    try:
+        if mode == "sample":
+            sampler = SamplingProfiler()
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                collapsed = sampler.stop()
+
+            summary = f"{sampler.sample_count} samples over {time.perf_counter() - start:.1f}s\n{sampler.summary()}"
+            return "profile.folded", collapsed.encode("utf-8"), summary
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+
+        stats = pstats.Stats(profile)
+        summary = f"cProfile over {time.perf_counter() - start:.1f}s\n{get_cprofile_summary(profile)}"
+        return "profile.pstats", marshal.dumps(stats.stats), summary
+
+    finally:
+        _profiling = False
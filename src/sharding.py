@@ -0,0 +1,85 @@
+"""
+Splits the bot's gateway connection into shards so it can be in more guilds than one connection can handle
+
+Discord sends each guild's events to one shard: (guild id >> 22) % shard count. DMs always go to shard 0.
+
+With "SHARDING" in the settings the host bot is an AutoShardedBot:
+
+    "SHARDING" : {"Enabled" : true} : Discord's recommended number of shards, all in this process
+    "SHARDING" : {"Enabled" : true, "ShardCount" : 16, "ShardIds" : [0, 1, 2, 3]} : only shards 0-3 of 16 in this process,
+                                                                                     the other shards are run by other processes
+
+Every game is started by the process that owns its guild's shard and connects only to that shard (and shard 0 for its
+players' DMs), instead of getting the events of every guild the bot is in. It ignores the messages of every other guild on them.
+
+Sharding is off unless it's turned on in the settings (configure has to be called before the bot is made)
+"""
+
+from discord.ext import commands
+
+DEFAULT_SETTINGS = {
+    "Enabled" : False,
+    "ShardCount" : None,
+    "ShardIds" : None,
+}
+
+#the shard Discord sends every DM to
+DM_SHARD_ID = 0
+
+_settings = dict(DEFAULT_SETTINGS)
+
+def configure(settings):
+    """
+    sets the sharding settings from the "SHARDING" settings
+    """
+
+    global _settings
+
+    _settings = dict(DEFAULT_SETTINGS)
+    _settings.update(settings)
+
+    if _settings["ShardIds"] is not None and _settings["ShardCount"] is None:
+        raise ValueError("\"SHARDING\" needs a \"ShardCount\" when it has \"ShardIds\" (every process has to agree on the shard count)")
+
+def is_enabled():
+    return _settings.get("Enabled", False)
+
+def get_shard_id(guild_id, shard_count):
+    """
+    returns the shard Discord sends the events of the guild with id 'guild_id' to
+    """
+
+    return (guild_id >> 22) % shard_count
+
+def make_bot(command_prefix):
+    """
+    returns the host bot: an AutoShardedBot running the shards in the settings if sharding is on, a commands.Bot otherwise
+    """
+
+    if not is_enabled():
+        return commands.Bot(command_prefix = command_prefix)
+
+    return commands.AutoShardedBot(command_prefix = command_prefix, shard_count = _settings["ShardCount"], shard_ids = _settings["ShardIds"])
+
+def get_game_shard(bot, guild):
+    """
+    returns (shard id, shard count) for a game in 'guild' (None if the host isn't sharded, the game then gets every event)
+    """
+
+    if bot.shard_count is None or bot.shard_count <= 1:
+        return None
+
+    return get_shard_id(guild.id, bot.shard_count), bot.shard_count
+
+def make_game_bot(command_prefix, shard):
+    """
+    returns the bot of a game process, connected to its guild's shard and the DM shard only
+
+    :param shard (Tuple[int, int]): (shard id, shard count) from get_game_shard (a commands.Bot on every shard if None)
+    """
+
+    if shard is None:
+        return commands.Bot(command_prefix = command_prefix)
+
+    shard_id, shard_count = shard
+    return commands.AutoShardedBot(command_prefix = command_prefix, shard_count = shard_count, shard_ids = sorted({DM_SHARD_ID, shard_id}))
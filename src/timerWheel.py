@@ -0,0 +1,178 @@
+import math
+import asyncio
+
+class TimerHandle:
+    """
+    A deadline scheduled on a TimerWheel
+
+    instance methods:
+
+    .cancel(self)
+
+        stops the callback from being called. Does nothing if it already fired or was cancelled
+    """
+
+    __slots__ = ("wheel", "slot", "rounds", "callback", "args")
+
+    def __init__(self, wheel, slot, rounds, callback, args):
+        self.wheel = wheel
+        self.slot = slot
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        if self.wheel is not None:
+            self.wheel._remove(self)
+
+class TimerWheel:
+    """
+    A hashed timing wheel that keeps track of every prompt timeout (and turn clock) of the games in a process
+
+    Timers are put in one of 'slot_count' slots based on when they expire, so adding/cancelling a timer is O(1)
+    and the wheel only has to look at a single slot each tick no matter how many timers there are.
+    The wheel only ticks while it has timers in it.
+
+    Timers fire between 0 and 'tick' seconds after their deadline (never before it)
+
+    contructors:
+
+    __init__(self, tick : float, slot_count : int)
+
+        tick (float) : The resolution of the wheel in seconds
+
+        slot_count (int) : The number of slots in the wheel. Timers further away than tick*slot_count just wait extra turns of the wheel
+
+    instance methods:
+
+    .schedule(self, delay : float, callback : function, *args) -> TimerHandle
+
+        calls 'callback(*args)' from the event loop after 'delay' seconds
+
+    .wait_for(self, awaitable, timeout : float)
+
+        a drop in replacement for asyncio.wait_for that uses the wheel for the timeout
+    """
+
+    def __init__(self, tick = 1.0, slot_count = 512):
+        self.tick = tick
+        self.slot_count = slot_count
+
+        self._slots = [set() for _ in range(slot_count)]
+        self._cursor = 0
+        self._count = 0
+
+        self._loop = None
+        self._next_tick_time = None
+        self._tick_handle = None
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay, callback, *args):
+
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+
+        now = self._loop.time()
+
+        #start ticking if the wheel was idle
+        if self._tick_handle is None:
+            self._next_tick_time = now + self.tick
+            self._tick_handle = self._loop.call_at(self._next_tick_time, self._advance)
+
+        #count the ticks from the next one so a timer never fires early
+        ticks = max(1, math.ceil((now + delay - self._next_tick_time) / self.tick) + 1)
+
+        slot = (self._cursor + ticks) % self.slot_count
+        rounds = (ticks - 1) // self.slot_count
+
+        handle = TimerHandle(self, slot, rounds, callback, args)
+        self._slots[slot].add(handle)
+        self._count += 1
+
+        return handle
+
+    def _remove(self, handle):
+        self._slots[handle.slot].discard(handle)
+        handle.wheel = None
+        self._count -= 1
+
+        if self._count == 0 and self._tick_handle is not None:
+            self._tick_handle.cancel()
+            self._tick_handle = None
+
+    def _advance(self):
+
+        self._cursor = (self._cursor + 1) % self.slot_count
+
+        expired = []
+        for handle in self._slots[self._cursor]:
+            if handle.rounds > 0:
+                handle.rounds -= 1
+            else:
+                expired.append(handle)
+
+        for handle in expired:
+            self._slots[handle.slot].discard(handle)
+            handle.wheel = None
+            self._count -= 1
+
+        if self._count > 0:
+            #schedule from the intended time (not the current time) so the wheel doesn't drift
+            self._next_tick_time += self.tick
+            self._tick_handle = self._loop.call_at(self._next_tick_time, self._advance)
+        else:
+            self._tick_handle = None
+
+        for handle in expired:
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                self._loop.call_exception_handler({"message" : "Exception in TimerWheel callback", "exception" : e})
+
+    async def wait_for(self, awaitable, timeout):
+        """
+        waits for 'awaitable' to finish. Raises an asyncio.TimeoutError if it takes longer than 'timeout' seconds
+
+        :param awaitable: The coroutine/future to wait for
+        :param timeout (float): The time to wait in seconds (waits forever if None)
+        """
+
+        if timeout is None:
+            return await awaitable
+
+        task = asyncio.ensure_future(awaitable)
+        timed_out = False
+
+        def expire():
+            nonlocal timed_out
+            if not task.done():
+                timed_out = True
+                task.cancel()
+
+        handle = self.schedule(timeout, expire)
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if timed_out:
+                raise asyncio.TimeoutError()
+            raise
+        finally:
+            handle.cancel()
+
+#every game hosted by a process shares a single wheel
+_timer_wheel = None
+
+def get_timer_wheel():
+    """
+    returns the TimerWheel for this process
+    """
+
+    global _timer_wheel
+
+    if _timer_wheel is None:
+        _timer_wheel = TimerWheel()
+
+    return _timer_wheel
@@ -0,0 +1,212 @@
+"""
+Records what happens to a game to a trace file so it can be replayed without discord (benchmarks.replayTrace)
+
+A trace is a gzipped file with one JSON object per line. Each has its kind in "k" and the seconds since the game started in "at":
+
+    start : the game, its prefix, its options and the seed of its random numbers
+    cmd : a command someone sent (who, from a DM or not, the command and its args), before it's checked
+    call : a call into the game in the order they ran (a command or a prompt/interrupt follow up with its answers)
+    result : how the last call went ("ok", "illegal_move", "game_error" or "exception") and the prompts/interrupts it returned
+    react : a reaction added/removed on the game's channel or a DM
+    api : a REST call the game made (method, route, status, bytes uploaded and milliseconds)
+    end : the game stopped
+
+The game's random numbers (its own random.Random, DiscordGame.random) are seeded with the trace's seed, so a replay seeded
+the same way makes the same shuffles and deals as long as the calls are made in the same order.
+
+Tracing is off unless "TRACING" : {"Enabled" : true} is in the settings (configure has to be called before the games are started)
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import random
+
+import metrics
+
+TRACE_FOLDER = os.path.join("..", "resources", "traces")
+
+DEFAULT_SETTINGS = {
+    "Enabled" : False,
+    "Folder" : TRACE_FOLDER,
+}
+
+#write what's been recorded out after this many events even if no command finished (the game could be killed any time)
+FLUSH_EVERY = 50
+
+_settings = dict(DEFAULT_SETTINGS)
+
+def configure(settings):
+    """
+    sets the tracing settings from the "TRACING" settings
+    """
+
+    global _settings
+
+    _settings = dict(DEFAULT_SETTINGS)
+    _settings.update(settings)
+
+def is_enabled():
+    return _settings.get("Enabled", False)
+
+def make_trace_path(game_name, command_prefix):
+    folder = _settings.get("Folder", TRACE_FOLDER)
+    os.makedirs(folder, exist_ok = True)
+
+    #the prefix can be anything someone typed
+    prefix = re.sub(r"[^A-Za-z0-9_.-]", "_", command_prefix)
+    return os.path.join(folder, f"{game_name}_{prefix}_{os.getpid()}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+
+def encode(value):
+    """
+    returns 'value' as something JSON can hold (sets become {"$set" : [...]} so they come back as sets)
+    """
+
+    if isinstance(value, (set, frozenset)):
+        return {"$set" : sorted((encode(item) for item in value), key = str)}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key) : encode(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and "$set" in value:
+            return set(decode(item) for item in value["$set"])
+        return {key : decode(item) for key, item in value.items()}
+    return value
+
+def read_trace(path):
+    """
+    yields the events in a trace file (a trace cut off by the game being killed is read up to where it ends)
+    """
+
+    with gzip.open(path, "rt", encoding = "utf-8") as trace_file:
+        try:
+            for line in trace_file:
+                if not line.endswith("\n"):
+                    break
+                yield json.loads(line)
+        except EOFError:
+            return
+
+class TraceRecorder:
+    """
+    Writes the trace of one game (see above)
+
+    contructors:
+
+    __init__(self, path : str, game_name : str, command_prefix : str, options : dict, seed : int = None)
+
+        seed (int) : Seed for the game's random numbers (a random one if None)
+
+    instance methods:
+
+    .command(self, author : str, is_dm : bool, name : str, args : tuple)
+
+    .call(self, func_name : str, args : tuple, author : str = None, is_dm : bool = None)
+
+    .result(self, outcome : str, prompts : list = (), interrupts : list = (), error : str = None)
+
+    .reaction(self, user : str, emoji : str, message_id : int, removed : bool = False)
+
+    .api(self, method : str, route : str, status : str, upload_bytes : int, seconds : float)
+
+    .flush(self)
+
+    .close(self)
+    """
+
+    def __init__(self, path, game_name, command_prefix, options, seed = None):
+        self.path = path
+        self.start = time.monotonic()
+        self.unflushed = 0
+
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+
+        self.file = gzip.open(path, "wt", encoding = "utf-8")
+        self.write("start", game = game_name, prefix = command_prefix, options = options, seed = seed, wall = time.time())
+
+    def write(self, kind, **fields):
+        if self.file is None:
+            return
+
+        event = {"k" : kind, "at" : round(time.monotonic() - self.start, 4)}
+        event.update(fields)
+        self.file.write(json.dumps(event, separators = (",", ":")) + "\n")
+
+        self.unflushed += 1
+        if self.unflushed >= FLUSH_EVERY:
+            self.flush()
+
+    def command(self, author, is_dm, name, args):
+        self.write("cmd", user = author, dm = is_dm, name = name, args = encode(args))
+
+    def call(self, func_name, args, author = None, is_dm = None):
+        fields = {"func" : func_name, "args" : encode(args)}
+        if author is not None:
+            fields["user"] = author
+            fields["dm"] = is_dm
+        self.write("call", **fields)
+
+    def result(self, outcome, prompts = (), interrupts = (), error = None):
+        fields = {"outcome" : outcome}
+        if len(prompts):
+            fields["prompts"] = [prompt.func_name for prompt in prompts]
+        if len(interrupts):
+            fields["interrupts"] = [interrupt.func_name for interrupt in interrupts]
+        if error is not None:
+            fields["error"] = error
+        self.write("result", **fields)
+
+    def reaction(self, user, emoji, message_id, removed = False):
+        self.write("react", user = user, emoji = emoji, msg = message_id, removed = removed)
+
+    def api(self, method, route, status, upload_bytes, seconds):
+        self.write("api", method = method, route = route, status = status, bytes = upload_bytes, ms = round(seconds * 1000, 1))
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+            self.unflushed = 0
+
+    def close(self):
+        if self.file is not None:
+            self.write("end")
+            self.file.close()
+            self.file = None
+
+def trace_http(http, recorder):
+    """
+    records every REST call a discord.py HTTPClient makes to 'recorder'
+    """
+
+    request = http.request
+
+    async def traced_request(route, **kwargs):
+
+        files = kwargs.get("files")
+        upload_bytes = sum(metrics.get_file_size(file) for file in files) if files else 0
+
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await request(route, **kwargs)
+            status = "ok"
+            return response
+        except Exception as e:
+            status = str(getattr(e, "status", "error"))
+            raise
+        finally:
+            recorder.api(route.method, route.path, status, upload_bytes, time.perf_counter() - start)
+
+    http.request = traced_request